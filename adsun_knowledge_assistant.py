@@ -6,30 +6,188 @@ Vylepšený s lepšími odpoveďami keď nič nenájde
 """
 
 import sqlite3
+from answer_cache import FailedAnswer, answer_key, content_version, lookup_answer, store_answer
+from database_repository import fetch_value, get_connection
+from database_stats import get_breakdown, get_summary
+from intent_cache import lookup_intent, store_intent, taxonomy_version
+from intent_classifier import get_classifier
+from openai_clients import ai_enabled, chat_completion, resolve_api_key
+from process_search import search_processes
+from process_trigrams import fuzzy_search_processes
+from process_vectors import semantic_search_processes
+from query_cache import cached_call, cached_fetch_all
+from text_normalization import tokenize
 import json
+import logging
 import re
 import streamlit as st
 import os
-from typing import List, Dict, Tuple, Optional
+import time
+from typing import Iterator, List, Dict, Tuple, Optional
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# Mapa synonym (celé slová, bez diakritiky)
+QUERY_SYNONYMS = {
+    'count': 'pocet', 'stats': 'statistiky', 'statistics': 'statistiky',
+    'process': 'proces', 'processes': 'procesy',
+    'show': 'zobraz', 'display': 'zobraz', 'list': 'zoznam', 'all': 'vsetky',
+    'category': 'kategorie', 'type': 'typ',
+    'database': 'databaza', 'db': 'databaza',
+    'department': 'oddelenie', 'departments': 'oddelenia', 'section': 'sekcia', 'org': 'organizacia',
+    'how': 'ako', 'what': 'co', 'who': 'kto', 'where': 'kde',
+}
+
+
+# Kandidát s takouto istotou sa vráti priamo, bez volania AI
+DIRECT_MATCH_CONFIDENCE = 0.8
+# ...a zároveň musí mať aspoň takýto náskok pred druhým kandidátom
+DIRECT_MATCH_MARGIN = 0.2
+# Koľko kandidátov procesov najviac ide do promptu AI
+AI_CANDIDATES_TOP_K = 10
+
+# Timeouty volaní AI - krátka klasifikácia vs. písaná odpoveď
+INTENT_TIMEOUT_SECONDS = 10.0
+ANSWER_TIMEOUT_SECONDS = 30.0
+
+# Taxonómia intentov - poradie určuje prednosť pri hľadaní v odpovedi AI
+INTENT_TYPES = {
+    'statistics': 'chce ČÍSELNÉ štatistiky/počty (koľko, počet, stats, prehľad čísiel)',
+    'departments': 'pýta sa na oddelenia/organizáciu',
+    'list_all': 'chce ZOZNAM/VÝPIS konkrétnych položiek (všetky, zoznam, zobraz, vypis, ukáž)',
+    'find_process': 'hľadá konkrétny proces (ako robiť niečo)',
+    'people_roles': 'pýta sa na ľudí/pozície/zodpovednosti',
+    'pricing': 'pýta sa na ceny/cenník',
+    'categories': 'pýta sa na kategórie/typy',
+    'general_search': 'všeobecné vyhľadávanie',
+    'off_topic': 'otázka nesúvisí s firemými procesmi (osobné veci, jedlo, počasie...)',
+}
+
+# Od tejto istoty lokálneho klasifikátora sa AI na intent nepýta
+LOCAL_INTENT_THRESHOLD = 0.7
+
+# Jedno streamované volanie AI: riadok s intentom a nájdenými procesmi, potom odpoveď
+ANSWER_PROMPT_TEMPLATE = """Si AI asistent pre firemné procesy. Odpovedaj v slovenčine.
+
+KONTEXT DATABÁZY:
+{db_context}
+
+TYPY INTENTOV:
+{intent_types}
+
+PROCESY (id: názov - kategória, vlastník):
+{processes}
+
+Urči intent otázky. Ak hľadá proces ("find_process"), vyber zo zoznamu procesy podľa
+sémantického významu, nie presnej zhody textu ("faktúra dodávateľa" = "fakturácia").
+
+Formát odpovede:
+1. riadok - LEN JSON objekt na jednom riadku: {{"intent": "<typ intentu>", "process_ids": [<id najlepších procesov, najlepší prvý>]}}
+2. od ďalšieho riadku - krátka odpoveď v markdowne s emotikonmi
+"""
+
+# Zmena intentov alebo promptov zneplatní uložené klasifikácie
+INTENT_TAXONOMY_VERSION = taxonomy_version(INTENT_TYPES, ANSWER_PROMPT_TEMPLATE)
+
+# Tieto intenty vykreslia lokálne handlery z databázy - AI určí len intent
+LOCAL_RENDERED_INTENTS = ('statistics', 'departments', 'list_all', 'people_roles',
+                          'pricing', 'categories', 'general_search', 'off_topic')
+
+
+def _stream_tokens(response) -> Iterator[str]:
+    """Text z chunkov streamovanej odpovede OpenAI"""
+    for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
 class ADSUNKnowledgeAssistant:
     """Inteligentný asistent pre vyhľadávanie v procesoch"""
     
-    def __init__(self, db_path: str = "adsun_processes.db"):
+    def __init__(self, db_path: Optional[str] = None):
         self.db_path = db_path
         self.min_confidence_threshold = 0.6  # Zvýšený práh spoľahlivosti
     
     def answer_query(self, query: str) -> str:
         """Hlavná funkcia pre zodpovedanie otázok s SKUTOČNOU AI analýzou"""
+        return ''.join(self.answer_query_stream(query))
+    
+    def answer_query_stream(self, query: str) -> Iterator[str]:
+        """Odpoveď po častiach - text z AI prichádza token po tokene, lokálne handlery naraz"""
+        
+        query_lower = query.lower().strip()
+        query_key = self._normalize_and_expand_query(query_lower)
+        mode = 'ai' if self._get_api_key() else 'local'
+        intent, resolved = self._resolve_intent(query_lower, query_key)
         
+        # Hotová odpoveď pre rovnakú otázku a nezmenené dáta - kľúčom je už určený intent
+        version = content_version(self.db_path)
+        if resolved:
+            cached = lookup_answer(answer_key(query_key, intent, mode), version, self.db_path)
+            if cached:
+                yield cached
+                return
+        
+        outcome = {'intent': intent, 'failed': False}
+        chunks = []
+        for chunk in self._answer_stream(query, intent, resolved, outcome):
+            if isinstance(chunk, FailedAnswer):
+                outcome['failed'] = True
+            chunks.append(chunk)
+            yield chunk
+        if not outcome['failed']:
+            store_answer(answer_key(query_key, outcome['intent'], mode), outcome['intent'], version,
+                         ''.join(chunks), self.db_path)
+    
+    def _resolve_intent(self, query_lower: str, query_key: str) -> tuple:
+        """Intent bez volania AI: lokálny klasifikátor (mikrosekundy), potom intent_cache; (intent, určený)"""
+        intent, confidence = self._classify_locally(query_lower)
+        if confidence >= LOCAL_INTENT_THRESHOLD:
+            return intent, True
+        cached = lookup_intent(query_key, INTENT_TAXONOMY_VERSION, self.db_path)
+        if cached:
+            return cached[0], True
+        if not self._get_api_key():
+            # Bez AI rozhodne lokálna predikcia (preklep ako "fakturacai" tak prejde trigramovým
+            # indexom v hľadaní procesu), pri zlyhaní klasifikátora kľúčové slová
+            if confidence <= 0:
+                intent, _ = self._simple_fallback_analysis(query_lower)
+            return intent, True
+        return intent, False
+    
+    def _answer_stream(self, query: str, intent: str, resolved: bool, outcome: Dict) -> Iterator[str]:
+        """Odpoveď bez cache - AI sa volá len pre neurčený intent; outcome dostane výsledný intent a chybu"""
         query_lower = query.lower().strip()
         
-        # SKUTOČNÁ AI ANALÝZA INTENTU
-        intent, confidence = self._analyze_query_intent(query_lower)
+        if not resolved:
+            # Intent, výber procesu aj odpoveď jedným volaním AI
+            streamed = False
+            try:
+                for chunk in self._stream_one_call_answer(query, outcome):
+                    streamed = True
+                    yield chunk
+                return
+            except Exception as e:
+                logger.warning("AI odpoveď zlyhala: %s", e)
+                # Prerušená ani náhradná odpoveď sa neukladá - ďalší pokus s AI môže uspieť
+                outcome['failed'] = True
+                if streamed:
+                    yield FailedAnswer(f"\n\n❌ **Odpoveď AI sa prerušila:** {e}")
+                    return
+                intent, _ = self._simple_fallback_analysis(query_lower)
         
         # DEBUG: Vypíš rozoznané intent (len pre vývoj)
-        # print(f"🔍 AI ASSISTANT DEBUG: Query='{query}' → Intent='{intent}' (confidence={confidence})")
+        # print(f"🔍 AI ASSISTANT DEBUG: Query='{query}' → Intent='{intent}'")
+        
+        if intent in INTENT_TYPES or intent == 'no_ai':
+            yield self._dispatch_intent(intent, query)
+        else:
+            yield from self._stream_ai_powered_response(query)
+    
+    def _dispatch_intent(self, intent: str, query: str) -> str:
+        """Odpoveď handlera pre daný intent"""
+        query_lower = query.lower().strip()
         
         # Ak nie je AI k dispozícii, skús základnú analýzu a dáta
         if intent == 'no_ai':
@@ -57,186 +215,130 @@ class ADSUNKnowledgeAssistant:
         else:
             return self._generate_ai_powered_response(query)
     
-    def _analyze_query_intent(self, query: str) -> tuple:
-        """SKUTOČNÁ AI analýza intentu otázky pomocou OpenAI API"""
+    def _get_api_key(self) -> Optional[str]:
+        """API kľúč, alebo None keď chýba či je AI vypnuté vypínačom"""
+        return resolve_api_key() if ai_enabled() else None
+    
+    def _stream_one_call_answer(self, query: str, outcome: Dict) -> Iterator[str]:
+        """Jedno streamované volanie AI: prvý riadok JSON (intent, ID procesov), potom text odpovede"""
+        # Do promptu len top-k kandidátov z lokálnych indexov, nie celý katalóg
+        processes = self._ai_candidates(query, self._find_process_candidates(query))
+        
+        system_prompt = ANSWER_PROMPT_TEMPLATE.format(
+            db_context=self._get_database_context(),
+            intent_types='\n'.join(f'- "{name}" - {description}' for name, description in INTENT_TYPES.items()),
+            processes='\n'.join(f"{p['id']}: {p['name']} - {p['category']}, {p['owner']}" for p in processes) or 'žiadne'
+        )
         
-        # Najprv načítame základné info o databáze
-        db_context = self._get_database_context()
+        started = time.perf_counter()
+        response = chat_completion(
+            api_key=self._get_api_key(),
+            timeout=ANSWER_TIMEOUT_SECONDS,
+            model=st.session_state.get('ai_model', 'gpt-4'),
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"Otázka používateľa: '{query}'"}
+            ],
+            temperature=0.3,
+            max_tokens=500,
+            stream=True
+        )
         
         try:
-            from openai import OpenAI
-            
-            # Skontroluj API key
-            api_key = os.environ.get('OPENAI_API_KEY') or st.session_state.get('openai_api_key')
-            if not api_key:
-                return ('no_ai', 0.0)
-            
-            # Vytvor OpenAI klienta
-            client = OpenAI(api_key=api_key)
-            
-            # AI prompt pre analýzu intentu
-            system_prompt = f"""Si expert na analýzu používateľských otázok o firemných procesoch. 
-
-KONTEXT DATABÁZY:
-{db_context}
-
-Analyzuj otázku používateľa a rozhoduj ktorý typ odpovede potrebuje:
-
-TYPY INTENTOV:
-- "statistics" - chce ČÍSELNÉ štatistiky/počty (koľko, počet, stats, prehľad čísiel)
-- "departments" - pýta sa na oddelenia/organizáciu
-- "list_all" - chce ZOZNAM/VÝPIS konkrétnych položiek (všetky, zoznam, zobraz, vypis, ukáž)
-- "find_process" - hľadá konkrétny proces (ako robiť niečo)
-- "people_roles" - pýta sa na ľudí/pozície/zodpovednosti
-- "pricing" - pýta sa na ceny/cenník
-- "categories" - pýta sa na kategórie/typy
-- "general_search" - všeobecné vyhľadávanie
-- "off_topic" - otázka nesúvisí s firemými procesmi (osobné veci, jedlo, počasie...)
-
-KĽÚČOVÉ ROZLÍŠENIE:
-- "statistics" = chce POČTY, ČÍSLA: "koľko procesov", "počet", "stats"
-- "list_all" = chce ZOZNAM NÁZVOV: "všetky procesy", "zoznam procesov", "vypis procesy", "ukáž procesy"
-
-PRÍKLADY:
-- "koľko procesov mám" → statistics (chce ČÍSLO)
-- "ake procesy vypis zoznam" → list_all (chce ZOZNAM NÁZVOV)
-- "všetky procesy" → list_all (chce ZOZNAM NÁZVOV)
-- "zobraz procesy" → list_all (chce ZOZNAM NÁZVOV)
-- "počet procesov" → statistics (chce ČÍSLO)
-
-Odpoveď musí byť len jeden zo týchto typov. Rozlišuj presne medzi číslami a zoznamami!
-"""
-
-            user_prompt = f"Otázka používateľa: '{query}'"
-            
-            # Zavolaj OpenAI API
-            response = client.chat.completions.create(
-                model=st.session_state.get('ai_model', 'gpt-4'),
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1,  # Nízka teplota pre konzistentné rozhodovanie
-                max_tokens=50
-            )
-            
-            ai_intent = response.choices[0].message.content.strip().lower()
+            tokens = _stream_tokens(response)
+            header, rest = '', ''
+            for token in tokens:
+                header += token
+                if '\n' in header:
+                    header, rest = header.split('\n', 1)
+                    break
+            api_ms = (time.perf_counter() - started) * 1000
             
-            # Mapuj AI odpoveď na naše intenty
-            intent_mapping = {
-                'statistics': 'statistics',
-                'departments': 'departments', 
-                'list_all': 'list_all',
-                'find_process': 'find_process',
-                'people_roles': 'people_roles',
-                'pricing': 'pricing',
-                'categories': 'categories',
-                'general_search': 'general_search',
-                'off_topic': 'off_topic'
-            }
+            data = json.loads(header)
+            intent = str(data.get('intent', '')).strip().lower()
+            if intent not in INTENT_TYPES:
+                intent = 'general_search'
+            outcome['intent'] = intent
+            # Zaznamenaný intent ušetrí volanie pri opakovanej otázke a učí lokálny klasifikátor
+            store_intent(self._normalize_and_expand_query(query), INTENT_TAXONOMY_VERSION, intent, 0.9,
+                         api_ms, self.db_path)
             
-            # Nájdi najlepší match
-            for key, value in intent_mapping.items():
-                if key in ai_intent:
-                    return (value, 0.9)
+            # Lokálne vykreslené odpovede nepotrebujú zvyšok streamu
+            if intent in LOCAL_RENDERED_INTENTS:
+                yield self._dispatch_intent(intent, query)
+                return
             
-            # Fallback
-            return ('general_search', 0.6)
+            by_id = {process['id']: process for process in processes}
+            matched = [by_id[pid] for pid in data.get('process_ids') or [] if pid in by_id]
+            if matched:
+                yield self._format_process_details(matched[0], query)
+                return
             
+            rest = rest.lstrip()
+            first = rest or next((token for token in tokens if token.strip()), '')
+            if not first:
+                yield self._simple_process_search(query)
+                return
+            yield "🤖 **AI Analýza:**\n\n"
+            yield first.lstrip()
+            yield from tokens
+            yield "\n\n💡 **AI rozumie prirodzenej komunikácii!** Pýtajte sa ako chcete."
+        finally:
+            # Nedočítaný stream zatvoríme - model ďalej negeneruje
+            close = getattr(response, 'close', None)
+            if close:
+                close()
+    
+    def _classify_locally(self, query: str) -> tuple:
+        """Intent z lokálneho modelu (TF-IDF n-gramy + softmax), pri chybe istota 0"""
+        try:
+            model = get_classifier(self.db_path, INTENT_TAXONOMY_VERSION)
+            return model.predict(self._normalize_and_expand_query(query))
         except Exception as e:
-            print(f"AI analýza zlyhala: {e}")
-            # Fallback na jednoduchú analýzu len ako backup
-            return self._simple_fallback_analysis(query)
+            logger.warning("Lokálny klasifikátor zlyhal: %s", e)
+            return ('general_search', 0.0)
     
     def _get_database_context(self) -> str:
-        """Získa kontext databázy pre AI"""
+        """Získa kontext databázy pre AI (z cache do najbližšieho zápisu)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                # Počet procesov
-                cursor = conn.execute("SELECT COUNT(*) FROM processes WHERE is_active = 1")
-                process_count = cursor.fetchone()[0]
-                
-                # Kategórie
-                cursor = conn.execute("SELECT category, COUNT(*) FROM processes WHERE is_active = 1 GROUP BY category LIMIT 5")
-                categories = cursor.fetchall()
-                
-                # Vlastníci
-                cursor = conn.execute("SELECT owner, COUNT(*) FROM processes WHERE is_active = 1 GROUP BY owner LIMIT 5")  
-                owners = cursor.fetchall()
-                
-                context = f"""V databáze je:
-- {process_count} procesov celkom
-- Kategórie: {', '.join([f"{cat[0]} ({cat[1]}×)" for cat in categories]) if categories else 'žiadne'}
-- Vlastníci: {', '.join([f"{owner[0]} ({owner[1]}×)" for owner in owners]) if owners else 'žiadni'}"""
-                
-                return context
+            return cached_call(self._build_database_context, db_path=self.db_path)
         except:
             return "Databáza sa inicializuje..."
     
+    def _build_database_context(self) -> str:
+        summary = get_summary(self.db_path)
+        categories = get_breakdown('category', self.db_path, limit=5)
+        owners = get_breakdown('owner', self.db_path, limit=5)
+        
+        return f"""V databáze je:
+- {summary['process_count']} procesov celkom
+- Kategórie: {', '.join([f"{cat['key']} ({cat['count']}×)" for cat in categories]) if categories else 'žiadne'}
+- Vlastníci: {', '.join([f"{owner['key']} ({owner['count']}×)" for owner in owners]) if owners else 'žiadni'}"""
+    
     def _simple_fallback_analysis(self, query: str) -> tuple:
         """Jednoduchá fallback analýza ak AI nefunguje"""
-        query_lower = query.lower()
+        query_folded = self._normalize_and_expand_query(query)
         
-        # Veľmi základné rozoznávanie s lepšími slovak patterns
-        if any(word in query_lower for word in ['koľko', 'kolko', 'počet', 'pocet', 'stats', 'štatistiky', 'statistiky']):
+        # Veľmi základné rozoznávanie - kľúčové slová bez diakritiky
+        if any(word in query_folded for word in ['kolko', 'pocet', 'statistiky']):
             return ('statistics', 0.8)
-        elif any(word in query_lower for word in ['všetky', 'vsetky', 'zoznam', 'zobraz', 'ukaz', 'ukáž', 'vypis', 'vypiš', 'show', 'list']):
+        elif any(word in query_folded for word in ['vsetky', 'zoznam', 'zobraz', 'ukaz', 'vypis']):
             return ('list_all', 0.8)
-        elif any(word in query_lower for word in ['oddelen', 'divíz', 'organizác', 'struktur']):
+        elif any(word in query_folded for word in ['oddelen', 'diviz', 'organizac', 'struktur']):
             return ('departments', 0.7)
-        elif any(word in query_lower for word in ['ako', 'proces', 'postup']):
+        elif any(word in query_folded for word in ['ako', 'proces', 'postup']):
             return ('find_process', 0.7)
         else:
             return ('general_search', 0.5)
     
     def _normalize_and_expand_query(self, query: str) -> str:
-        """Normalizuje text a rozšíri synonymá pre lepšie porozumenie"""
-        
-        # Mapa synonym pre lepšie rozoznávanie
-        synonyms = {
-            # Počet/koľko
-            'kolko': 'koľko', 'pocet': 'počet', 'count': 'počet',
-            'stats': 'štatistiky', 'statistics': 'štatistiky',
-            
-            # Mám/máme  
-            'mam': 'mám', 'mame': 'máme', 'mame': 'máme',
-            
-            # Procesy
-            'process': 'proces', 'processes': 'procesy',
-            
-            # Ukáž/zobraz
-            'ukaz': 'ukáž', 'show': 'zobraz', 'display': 'zobraz',
-            
-            # Všetky
-            'vsetky': 'všetky', 'vsetko': 'všetko', 'all': 'všetky',
-            
-            # Kategórie
-            'kategor': 'kategórie', 'category': 'kategórie', 'type': 'typ',
-            
-            # Databáza
-            'databaz': 'databáza', 'database': 'databáza', 'db': 'databáza',
-            
-            # Oddelenia - nové synonymá
-            'oddelen': 'oddelenie', 'oddeleni': 'oddelenia', 'department': 'oddelenie',
-            'departments': 'oddelenia', 'diviz': 'divízia', 'divizia': 'divízia',
-            'sekc': 'sekcia', 'section': 'sekcia', 'organizacia': 'organizácia',
-            'struktur': 'štruktúra', 'org': 'organizácia',
-            
-            # Ako
-            'how': 'ako', 'what': 'čo', 'who': 'kto', 'where': 'kde',
-        }
-        
-        # Aplikuj synonymá
-        for old, new in synonyms.items():
-            query = query.replace(old, new)
-        
-        return query
+        """Normalizuje otázku po slovách - bez diakritiky, anglické synonymá na slovenské"""
+        return ' '.join(QUERY_SYNONYMS.get(word, word) for word in tokenize(query))
     
     def _handle_departments_query(self, query: str) -> str:
         """Spracúva otázky o oddeleniach"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with get_connection(self.db_path) as conn:
                 
                 # Skús najprv načítať z departments tabuľky
                 try:
@@ -335,17 +437,17 @@ Odpoveď musí byť len jeden zo týchto typov. Rozlišuj presne medzi číslami
                 return response
                 
         except Exception as e:
-            return f"""❌ **Chyba načítavania oddelení:** {e}
+            return FailedAnswer(f"""❌ **Chyba načítavania oddelení:** {e}
 
 💡 **Skúste:**
 • "Koľko procesov mám?" - celkové štatistiky
 • "Všetky procesy" - kompletný zoznam
-• Alebo prejdite do **🏢 Business Management → Oddelenia**"""
+• Alebo prejdite do **🏢 Business Management → Oddelenia**""")
     
     def _handle_categories_query(self, query: str) -> str:
         """Spracúva otázky o kategóriách"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.execute("""
                     SELECT category, COUNT(*) as count, 
                            AVG(duration_minutes) as avg_duration
@@ -389,7 +491,7 @@ Odpoveď musí byť len jeden zo týchto typov. Rozlišuj presne medzi číslami
                 return response
                 
         except Exception as e:
-            return f"❌ **Chyba získavania kategórií:** {e}"
+            return FailedAnswer(f"❌ **Chyba získavania kategórií:** {e}")
     
     def _handle_general_search(self, query: str) -> str:
         """Inteligentné všeobecné vyhľadávanie"""
@@ -504,7 +606,7 @@ Odpoveď musí byť len jeden zo týchto typov. Rozlišuj presne medzi číslami
     def _get_comprehensive_overview(self) -> str:
         """Získa kompletný prehľad systému"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 # Počet procesov
                 cursor = conn.execute("SELECT COUNT(*) FROM processes WHERE is_active = 1")
                 process_count = cursor.fetchone()[0]
@@ -532,7 +634,7 @@ Odpoveď musí byť len jeden zo týchto typov. Rozlišuj presne medzi číslami
     def _get_available_processes_summary(self) -> str:
         """Získa zhrnutie dostupných procesov"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.execute("SELECT name, category FROM processes WHERE is_active = 1 LIMIT 3")
                 processes = cursor.fetchall()
                 
@@ -546,7 +648,7 @@ Odpoveď musí byť len jeden zo týchto typov. Rozlišuj presne medzi číslami
     def _get_current_positions(self) -> str:
         """Získa aktuálne pozície zo systému"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.execute("SELECT DISTINCT owner FROM processes WHERE owner IS NOT NULL AND is_active = 1 LIMIT 3")
                 positions = [row[0] for row in cursor.fetchall()]
                 
@@ -571,65 +673,54 @@ Odpoveď musí byť len jeden zo týchto typov. Rozlišuj presne medzi číslami
 *Technické detaily: {error}*"""
 
     def _search_processes(self, query: str) -> List[Tuple[Dict, float]]:
-        """Hľadá procesy v databáze s confidence scoring"""
+        """Hľadá procesy cez fulltextový index (BM25) s confidence scoring"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                
-                # Základné vyhľadávanie
-                cursor = conn.execute("""
-                    SELECT * FROM processes 
-                    WHERE (name LIKE ? OR category LIKE ? OR owner LIKE ? OR tags LIKE ?) 
-                    AND is_active = 1
-                    ORDER BY created_at DESC
-                """, (f"%{query}%", f"%{query}%", f"%{query}%", f"%{query}%"))
-                
-                results = []
-                for row in cursor.fetchall():
-                    process = dict(row)
-                    confidence = self._calculate_confidence(query, process)
-                    results.append((process, confidence))
-                
-                # Zoraď podľa confidence
-                results.sort(key=lambda x: x[1], reverse=True)
-                return results
-                
+            return search_processes(query, self.db_path)
         except Exception as e:
             print(f"Search error: {e}")
             return []
     
-    def _calculate_confidence(self, query: str, process: Dict) -> float:
-        """Vypočíta confidence score pre relevantnosť procesu"""
-        query_lower = query.lower()
-        confidence = 0.0
-        
-        # Zhoda v názve (najvyššia váha)
-        if process.get('name'):
-            name_lower = process['name'].lower()
-            if query_lower in name_lower:
-                confidence += 0.8
-            elif any(word in name_lower for word in query_lower.split()):
-                confidence += 0.4
-        
-        # Zhoda v kategórii
-        if process.get('category'):
-            category_lower = process['category'].lower()
-            if query_lower in category_lower:
-                confidence += 0.3
-        
-        # Zhoda vo vlastníkovi
-        if process.get('owner'):
-            owner_lower = process['owner'].lower()
-            if query_lower in owner_lower:
-                confidence += 0.2
-        
-        # Zhoda v tags
-        if process.get('tags'):
-            tags_lower = process['tags'].lower()
-            if query_lower in tags_lower:
-                confidence += 0.2
-        
-        return min(confidence, 1.0)
+    def _find_process_candidates(self, query: str, k: int = 10) -> List[Tuple[Dict, float]]:
+        """Kandidáti z fulltextu a trigramového indexu (odolné voči preklepom)"""
+        candidates = {}
+        try:
+            found = search_processes(query, self.db_path, limit=k) + fuzzy_search_processes(query, self.db_path, k)
+        except Exception as e:
+            logger.warning("Candidate search error: %s", e)
+            return []
+        for process, confidence in found:
+            if confidence > candidates.get(process['id'], (None, 0.0))[1]:
+                candidates[process['id']] = (process, confidence)
+        return sorted(candidates.values(), key=lambda c: c[1], reverse=True)[:k]
+    
+    @staticmethod
+    def _is_clear_match(candidates: List[Tuple[Dict, float]], min_confidence: float) -> bool:
+        """Najlepší kandidát je dosť istý a výrazne pred druhým (jednoslovný dotaz dá 1.0 viacerým)"""
+        if not candidates or candidates[0][1] < min_confidence:
+            return False
+        return len(candidates) == 1 or candidates[0][1] - candidates[1][1] >= DIRECT_MATCH_MARGIN
+    
+    def _format_candidate_list(self, candidates: List[Tuple[Dict, float]], query: str) -> str:
+        """Viac podobne zhodných procesov - nechaj používateľa vybrať"""
+        lines = "\n".join(f"• **{p['name']}** ({p['category']})" for p, _ in candidates[:5])
+        return f"""🔍 **Viac procesov zodpovedá: "{query}"**
+
+{lines}
+
+🎯 **Spresnite otázku** - napíšte celý názov procesu"""
+    
+    def _ai_candidates(self, query: str, lexical: List[Tuple[Dict, float]],
+                       k: int = AI_CANDIDATES_TOP_K) -> List[Dict]:
+        """Kandidáti pre AI - lexikálne zhody, doplnené o sémanticky najbližšie procesy"""
+        processes = {process['id']: process for process, _ in lexical[:k]}
+        try:
+            for process, _ in semantic_search_processes(query, self.db_path, k):
+                if len(processes) >= k:
+                    break
+                processes.setdefault(process['id'], process)
+        except Exception as e:
+            logger.warning("Vector search error: %s", e)
+        return list(processes.values())
     
     def _format_results(self, results: List[Tuple[Dict, float]], query: str) -> str:
         """Formatuje výsledky vyhľadávania"""
@@ -662,19 +753,15 @@ Odpoveď musí byť len jeden zo týchto typov. Rozlišuj presne medzi číslami
     def get_available_processes(self) -> str:
         """Vráti zoznam všetkých dostupných procesov"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute("""
-                    SELECT name, category, owner, duration_minutes 
-                    FROM processes 
-                    WHERE is_active = 1
-                    ORDER BY category, name
-                """)
-                
-                processes = cursor.fetchall()
-                
-                if not processes:
-                    return """📋 **Žiadne procesy v databáze**
+            processes = cached_fetch_all("""
+                SELECT name, category, owner, duration_minutes 
+                FROM processes 
+                WHERE is_active = 1
+                ORDER BY category, name
+            """, db_path=self.db_path)
+            
+            if not processes:
+                return """📋 **Žiadne procesy v databáze**
 
 🎯 **Začnite:**
 1. **Kliknite "Učenie procesov"** v sidebar
@@ -683,79 +770,66 @@ Odpoveď musí byť len jeden zo týchto typov. Rozlišuj presne medzi číslami
 4. **Potom môžete vyhľadávať**
 
 💡 **Tip:** Začnite s procesom ktorý najčastejšie používate"""
+            
+            # Zoskup podľa kategórií
+            by_category = {}
+            for proc in processes:
+                cat = proc['category'] or 'Ostatné'
+                if cat not in by_category:
+                    by_category[cat] = []
+                by_category[cat].append(proc)
+            
+            response = f"📋 **Dostupné procesy ({len(processes)}):**\n\n"
+            
+            for category, procs in by_category.items():
+                response += f"**{category}:**\n"
+                for proc in procs[:5]:  # Max 5 procesov na kategóriu
+                    duration = f" ({proc['duration_minutes']}min)" if proc['duration_minutes'] else ""
+                    owner = f" - {proc['owner']}" if proc['owner'] else ""
+                    response += f"• {proc['name']}{owner}{duration}\n"
                 
-                # Zoskup podľa kategórií
-                by_category = {}
-                for proc in processes:
-                    cat = proc['category'] or 'Ostatné'
-                    if cat not in by_category:
-                        by_category[cat] = []
-                    by_category[cat].append(proc)
-                
-                response = f"📋 **Dostupné procesy ({len(processes)}):**\n\n"
-                
-                for category, procs in by_category.items():
-                    response += f"**{category}:**\n"
-                    for proc in procs[:5]:  # Max 5 procesov na kategóriu
-                        duration = f" ({proc['duration_minutes']}min)" if proc['duration_minutes'] else ""
-                        owner = f" - {proc['owner']}" if proc['owner'] else ""
-                        response += f"• {proc['name']}{owner}{duration}\n"
-                    
-                    if len(procs) > 5:
-                        response += f"... a ďalších {len(procs) - 5}\n"
-                    response += "\n"
-                
-                return response
-                
+                if len(procs) > 5:
+                    response += f"... a ďalších {len(procs) - 5}\n"
+                response += "\n"
+            
+            return response
+            
         except Exception as e:
-            return f"❌ **Chyba:** {e}" 
+            return FailedAnswer(f"❌ **Chyba:** {e}") 
 
     def _handle_statistics_query(self, query: str) -> str:
         """Spracúva otázky o štatistikách a počtoch"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                # Základné štatistiky
-                cursor = conn.execute("SELECT COUNT(*) FROM processes WHERE is_active = 1")
-                total_processes = cursor.fetchone()[0]
-                
-                cursor = conn.execute("SELECT COUNT(DISTINCT category) FROM processes WHERE category IS NOT NULL AND is_active = 1")
-                total_categories = cursor.fetchone()[0]
-                
-                cursor = conn.execute("SELECT COUNT(DISTINCT owner) FROM processes WHERE owner IS NOT NULL AND is_active = 1")
-                total_owners = cursor.fetchone()[0]
-                
-                # KRÁTKA ODPOVEĎ BEZ EXTRA INFORMÁCIÍ
-                if total_processes == 0:
-                    return "0 procesov v databáze."
-                
-                response = f"Celkom: {total_processes} procesov"
-                
-                if total_categories > 0:
-                    response += f", {total_categories} kategórií"
-                    
-                if total_owners > 0:
-                    response += f", {total_owners} vlastníkov"
-                
-                # Pridaj top kategórie ak sú
-                cursor = conn.execute("""
-                    SELECT category, COUNT(*) as count 
-                    FROM processes 
-                    WHERE category IS NOT NULL AND is_active = 1 
-                    GROUP BY category 
-                    ORDER BY count DESC
-                    LIMIT 3
-                """)
-                categories = cursor.fetchall()
-                
-                if categories:
-                    response += "\n\nNajviac procesov:"
-                    for cat, count in categories:
-                        response += f"\n• {cat}: {count}"
+            # Základné štatistiky - hotové počty z tabuľky stats
+            summary = get_summary(self.db_path)
+            total_processes = summary['process_count']
+            total_categories = summary['category_count']
+            total_owners = summary['owner_count']
+            
+            # KRÁTKA ODPOVEĎ BEZ EXTRA INFORMÁCIÍ
+            if total_processes == 0:
+                return "0 procesov v databáze."
+            
+            response = f"Celkom: {total_processes} procesov"
+            
+            if total_categories > 0:
+                response += f", {total_categories} kategórií"
                 
-                return response
+            if total_owners > 0:
+                response += f", {total_owners} vlastníkov"
+            
+            # Pridaj top kategórie ak sú
+            categories = get_breakdown('category', self.db_path, limit=3)
+            
+            if categories:
+                response += "\n\nNajviac procesov:"
+                for cat in categories:
+                    response += f"\n• {cat['key']}: {cat['count']}"
+            
+            return response
                 
         except Exception as e:
-            return f"Chyba získavania štatistík: {e}"
+            return FailedAnswer(f"Chyba získavania štatistík: {e}")
     
     def _handle_list_query(self, query: str) -> str:
         """Spracúva otázky o zoznamoch"""
@@ -764,8 +838,7 @@ Odpoveď musí byť len jeden zo týchto typov. Rozlišuj presne medzi číslami
         # print(f"🔍 LIST QUERY DEBUG: Handling list query '{query}'")
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with get_connection(self.db_path) as conn:
                 
                 # Zistí čo užívateľ chce - pre "ake procesy vypis zoznam" sa prioritne zobrazí zoznam procesov
                 if any(word in query.lower() for word in ['proces', 'procesy', 'všetky', 'vsetky', 'zoznam', 'vypis', 'zobraz', 'ukaz']):
@@ -852,32 +925,32 @@ Odpoveď musí byť len jeden zo týchto typov. Rozlišuj presne medzi číslami
                     
         except Exception as e:
             # print(f"🔍 LIST QUERY ERROR: {e}")
-            return f"Chyba: {e}"
+            return FailedAnswer(f"Chyba: {e}")
     
     def _handle_process_query(self, query: str) -> str:
         """Spracúva otázky o konkrétnych procesoch - s AI inteligentným vyhľadávaním"""
         
         try:
-            from openai import OpenAI
+            # Predvýber kandidátov - jasná zhoda nepotrebuje AI
+            candidates = self._find_process_candidates(query)
+            if self._is_clear_match(candidates, DIRECT_MATCH_CONFIDENCE):
+                return self._format_process_details(candidates[0][0], query)
             
             # Skontroluj API key
-            api_key = os.environ.get('OPENAI_API_KEY') or st.session_state.get('openai_api_key')
+            api_key = self._get_api_key()
             if not api_key:
+                if self._is_clear_match(candidates, 0.2):
+                    return self._format_process_details(candidates[0][0], query)
+                if candidates:
+                    return self._format_candidate_list(candidates, query)
                 return self._handle_no_ai_available(query)
             
-            # Načítaj všetky procesy z databázy
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute("""
-                    SELECT id, name, category, owner, description, steps, 
-                           duration_minutes, automation_readiness, tools, risks
-                    FROM processes 
-                    WHERE is_active = 1
-                    ORDER BY created_at DESC
-                """)
-                processes = [dict(row) for row in cursor.fetchall()]
+            # AI vyberá len z top-k kandidátov (fulltext, trigramy, vektorový index)
+            ai_processes = self._ai_candidates(query, candidates)
             
-            if not processes:
+            if not ai_processes:
+                if fetch_value("SELECT COUNT(*) FROM processes WHERE is_active = 1", db_path=self.db_path):
+                    return self._smart_search_suggestion(query)
                 return """❌ **Žiadne procesy v databáze**
 
 🎯 **Pridajte prvý proces:**
@@ -885,11 +958,8 @@ Odpoveď musí byť len jeden zo týchto typov. Rozlišuj presne medzi číslami
 2. Opíšte váš proces AI asistentovi
 3. AI vytvorí proces automaticky"""
             
-            # Vytvor OpenAI klienta
-            client = OpenAI(api_key=api_key)
-            
             # AI prompt pre inteligentné vyhľadávanie
-            processes_list = "\n".join([f"- {p['name']} (kategória: {p['category']}, vlastník: {p['owner']})" for p in processes])
+            processes_list = "\n".join([f"- {p['name']} (kategória: {p['category']}, vlastník: {p['owner']})" for p in ai_processes])
             
             system_prompt = f"""Si expert na vyhľadávanie firemných procesov. 
 
@@ -908,7 +978,9 @@ Odpoveď musí byť presný názov procesu zo zoznamu, alebo "NENÁJDENÝ" ak na
             user_prompt = f"Používateľ hľadá: '{query}'"
             
             # Zavolaj OpenAI API
-            response = client.chat.completions.create(
+            response = chat_completion(
+                api_key=api_key,
+                timeout=INTENT_TIMEOUT_SECONDS,
                 model=st.session_state.get('ai_model', 'gpt-4'),
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -922,7 +994,7 @@ Odpoveď musí byť presný názov procesu zo zoznamu, alebo "NENÁJDENÝ" ak na
             
             # Nájdi zhodný proces
             found_process = None
-            for process in processes:
+            for process in ai_processes:
                 if ai_match.lower() in process['name'].lower() or process['name'].lower() in ai_match.lower():
                     found_process = process
                     break
@@ -935,17 +1007,17 @@ Odpoveď musí byť presný názov procesu zo zoznamu, alebo "NENÁJDENÝ" ak na
 🤖 **AI analýza:** "{ai_match}"
 
 📋 **Dostupné procesy:**
-{chr(10).join([f"• **{p['name']}** ({p['category']})" for p in processes[:5]])}
+{chr(10).join([f"• **{p['name']}** ({p['category']})" for p in ai_processes[:5]])}
 
 🎯 **Riešenie:**
 • Skúste jednoduchšie: "objednávky", "faktúry", "dovolenky"  
 • Alebo použite **📚 Učenie procesov** pre vytvorenie nového"""
                 
         except Exception as e:
-            return f"""❌ **Chyba AI vyhľadávania:** {e}
+            return FailedAnswer(f"""❌ **Chyba AI vyhľadávania:** {e}
 
 💡 **Fallback vyhľadávanie:**
-{self._simple_process_search(query)}"""
+{self._simple_process_search(query)}""")
     
     def _format_process_details(self, process: Dict, original_query: str) -> str:
         """Formatuje detaily nájdeného procesu"""
@@ -1002,13 +1074,13 @@ Odpoveď musí byť presný názov procesu zo zoznamu, alebo "NENÁJDENÝ" ak na
     def _simple_process_search(self, query: str) -> str:
         """Jednoduchý fallback search bez AI"""
         try:
-            results = self._search_processes(query)
+            results = self._find_process_candidates(query)
             if results and results[0][1] > 0.2:
                 return self._format_process_details(results[0][0], query)
             else:
                 return f"Nenašiel som podobný proces pre '{query}'"
         except:
-            return "Chyba vyhľadávania"
+            return FailedAnswer("Chyba vyhľadávania")
     
     def _handle_pricing_query(self, query: str) -> str:
         """Spracúva cenové otázky"""
@@ -1034,7 +1106,7 @@ Odpoveď musí byť presný názov procesu zo zoznamu, alebo "NENÁJDENÝ" ak na
     def _handle_people_query(self, query: str) -> str:
         """Spracúva otázky o ľuďoch a pozíciách"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.execute("""
                     SELECT owner, COUNT(*) as process_count, 
                            GROUP_CONCAT(DISTINCT category) as categories
@@ -1072,7 +1144,7 @@ Odpoveď musí byť presný názov procesu zo zoznamu, alebo "NENÁJDENÝ" ak na
                 return response
                 
         except Exception as e:
-            return f"❌ **Chyba:** {e}"
+            return FailedAnswer(f"❌ **Chyba:** {e}")
     
     def _smart_search_suggestion(self, query: str) -> str:
         """Inteligentné návrhy keď vyhľadávanie zlyhá"""
@@ -1084,24 +1156,11 @@ Odpoveď musí byť presný názov procesu zo zoznamu, alebo "NENÁJDENÝ" ak na
         if not key_words:
             return self._generate_intelligent_fallback(query)
         
-        # Skús hľadať podobné procesy
+        # Skús hľadať podobné procesy - jeden dotaz do indexu pre všetky kľúčové slová
         similar_suggestions = []
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                
-                for word in key_words[:3]:  # Max 3 kľúčové slová
-                    cursor = conn.execute("""
-                        SELECT name, category FROM processes 
-                        WHERE (name LIKE ? OR category LIKE ? OR owner LIKE ?) 
-                        AND is_active = 1
-                        LIMIT 3
-                    """, (f"%{word}%", f"%{word}%", f"%{word}%"))
-                    
-                    similar = cursor.fetchall()
-                    for proc in similar:
-                        if proc['name'] not in [s['name'] for s in similar_suggestions]:
-                            similar_suggestions.append(dict(proc))
+            for proc, _ in search_processes(' '.join(key_words[:3]), self.db_path, limit=3):
+                similar_suggestions.append({'name': proc['name'], 'category': proc['category']})
         except:
             pass
         
@@ -1225,16 +1284,16 @@ Odpoveď musí byť presný názov procesu zo zoznamu, alebo "NENÁJDENÝ" ak na
     
     def _generate_ai_powered_response(self, query: str) -> str:
         """Generuje AI-powered odpoveď pre komplikované otázky"""
+        return ''.join(self._stream_ai_powered_response(query))
+    
+    def _stream_ai_powered_response(self, query: str) -> Iterator[str]:
+        """AI-powered odpoveď streamovaná token po tokene"""
         try:
-            from openai import OpenAI
-            
             # Skontroluj API key
-            api_key = os.environ.get('OPENAI_API_KEY') or st.session_state.get('openai_api_key')
+            api_key = self._get_api_key()
             if not api_key:
-                return self._handle_no_ai_available(query)
-            
-            # Vytvor OpenAI klienta
-            client = OpenAI(api_key=api_key)
+                yield self._handle_no_ai_available(query)
+                return
             
             # Získaj dáta z databázy
             db_data = self._get_comprehensive_db_data()
@@ -1251,37 +1310,35 @@ Odpoveď v slovenčine, používaj emotikoniky a markdown formátovanie."""
             user_prompt = f"Otázka: {query}"
             
             # Zavolaj OpenAI API
-            response = client.chat.completions.create(
+            response = chat_completion(
+                api_key=api_key,
+                timeout=ANSWER_TIMEOUT_SECONDS,
                 model=st.session_state.get('ai_model', 'gpt-4'),
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=st.session_state.get('ai_temperature', 0.7),
-                max_tokens=500
+                max_tokens=500,
+                stream=True
             )
             
-            ai_response = response.choices[0].message.content.strip()
-            
-            return f"""🤖 **AI Analýza:**
-
-{ai_response}
-
-💡 **AI rozumie prirodzenej komunikácii!** Pýtajte sa ako chcete."""
+            yield "🤖 **AI Analýza:**\n\n"
+            yield from _stream_tokens(response)
+            yield "\n\n💡 **AI rozumie prirodzenej komunikácii!** Pýtajte sa ako chcete."
             
         except Exception as e:
-            return f"""❌ **AI chyba:** {e}
+            yield FailedAnswer(f"""❌ **AI chyba:** {e}
 
 💡 **Skúste:**
 • Jednoduchšie otázky: "Koľko procesov mám?"
 • Použite **📚 Učenie procesov** pre pridanie dát
-• Skontrolujte AI nastavenia v sidebari"""
+• Skontrolujte AI nastavenia v sidebari""")
     
     def _get_comprehensive_db_data(self) -> str:
         """Získa komplexné dáta z databázy pre AI"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with get_connection(self.db_path) as conn:
                 
                 # Všetky procesy
                 cursor = conn.execute("SELECT name, category, owner FROM processes WHERE is_active = 1 LIMIT 10")
@@ -7,7 +7,11 @@ Hlavný spúšťač pre oba inteligentné agenty
 
 import os
 import sys
-import sqlite3
+from database_repository import get_connection
+from database_migrations import run_migrations
+from database_stats import check_stats, get_breakdown, get_summary
+from process_steps import get_automatable_minutes_by_tool, get_time_by_responsible
+from tenant_router import default_tenant, tenant_db_path
 import json
 from datetime import datetime
 
@@ -19,7 +23,8 @@ class ADSUNAgentLauncher:
     """Hlavný launcher pre ADSUN agentov"""
     
     def __init__(self):
-        self.db_path = "adsun_processes.db"
+        # Firma z ADSUN_TENANT alebo tenancy.default v company_settings.json
+        self.db_path = tenant_db_path(default_tenant())
         self.setup_database()
     
     def setup_database(self):
@@ -31,51 +36,8 @@ class ADSUNAgentLauncher:
             print("✅ Databáza vytvorená s ukážkovými dátami!")
     
     def _create_database(self):
-        """Vytvorí databázu zo schémy"""
-        with sqlite3.connect(self.db_path) as conn:
-            if os.path.exists('database_schema.sql'):
-                with open('database_schema.sql', 'r', encoding='utf-8') as f:
-                    conn.executescript(f.read())
-            else:
-                # Základná schéma ak súbor neexistuje
-                conn.executescript('''
-                    CREATE TABLE processes (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        name VARCHAR(255) NOT NULL,
-                        category VARCHAR(100) NOT NULL,
-                        trigger_type VARCHAR(255) NOT NULL,
-                        owner VARCHAR(255) NOT NULL,
-                        frequency VARCHAR(100) NOT NULL,
-                        duration_minutes INTEGER,
-                        priority VARCHAR(20) NOT NULL,
-                        volume_per_period INTEGER,
-                        success_criteria TEXT,
-                        common_problems TEXT,
-                        automation_readiness INTEGER,
-                        tags TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        is_active BOOLEAN DEFAULT 1
-                    );
-                    
-                    CREATE TABLE process_steps (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        process_id INTEGER NOT NULL,
-                        step_number INTEGER NOT NULL,
-                        title VARCHAR(255) NOT NULL,
-                        description TEXT NOT NULL,
-                        responsible_person VARCHAR(255) NOT NULL,
-                        system_tool VARCHAR(255),
-                        input_data TEXT,
-                        action_details TEXT NOT NULL,
-                        output_data TEXT,
-                        decision_logic TEXT,
-                        estimated_time_minutes INTEGER,
-                        is_automated BOOLEAN DEFAULT 0,
-                        automation_potential INTEGER,
-                        FOREIGN KEY (process_id) REFERENCES processes(id)
-                    );
-                ''')
+        """Vytvorí databázu cez verzionované migrácie"""
+        run_migrations(self.db_path)
     
     def _insert_sample_data(self):
         """Vloží ukážkové dáta pre testovanie"""
@@ -124,7 +86,7 @@ class ADSUNAgentLauncher:
             }
         ]
         
-        with sqlite3.connect(self.db_path) as conn:
+        with get_connection(self.db_path) as conn:
             for process in sample_processes:
                 cursor = conn.execute('''
                     INSERT INTO processes (name, category, trigger_type, owner, frequency, 
@@ -282,6 +244,7 @@ class ADSUNAgentLauncher:
         print("1. Vymazať všetky dáta")
         print("2. Obnoviť ukážkové dáta")
         print("3. Zobraziť štatistiky")
+        print("4. Skontrolovať a prepočítať štatistiky")
         print("0. Späť")
         
         choice = input("\nVyberte možnosť: ").strip()
@@ -299,38 +262,51 @@ class ADSUNAgentLauncher:
         elif choice == "3":
             self._show_statistics()
         
+        elif choice == "4":
+            self._check_statistics()
+        
         input("\n⏎ Stlačte Enter pre pokračovanie...")
     
     def _clear_database(self):
         """Vymaže všetky dáta z databázy"""
-        with sqlite3.connect(self.db_path) as conn:
+        with get_connection(self.db_path) as conn:
             conn.execute("DELETE FROM process_steps")
             conn.execute("DELETE FROM processes")
             conn.execute("DELETE FROM documentation_sessions")
     
     def _show_statistics(self):
         """Zobrazí štatistiky databázy"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT COUNT(*) FROM processes WHERE is_active = 1")
-            process_count = cursor.fetchone()[0]
-            
-            cursor = conn.execute("SELECT COUNT(*) FROM process_steps")
-            steps_count = cursor.fetchone()[0]
-            
-            cursor = conn.execute("""
-                SELECT category, COUNT(*) 
-                FROM processes 
-                WHERE is_active = 1 
-                GROUP BY category
-            """)
-            categories = cursor.fetchall()
+        summary = get_summary(self.db_path)
+        categories = get_breakdown('category', self.db_path)
         
         print(f"\n📊 Štatistiky databázy:")
-        print(f"• Aktívne procesy: {process_count}")
-        print(f"• Celkový počet krokov: {steps_count}")
+        print(f"• Aktívne procesy: {summary['process_count']}")
+        print(f"• Celkový počet krokov: {summary['steps_count']}")
         print(f"• Kategórie procesov:")
-        for category, count in categories:
-            print(f"  - {category}: {count}")
+        for category in categories:
+            print(f"  - {category['key']}: {category['count']}")
+        
+        responsible = get_time_by_responsible(self.db_path)
+        if responsible:
+            print(f"• Čas krokov podľa zodpovednej osoby:")
+            for row in responsible:
+                print(f"  - {row['responsible_person']}: {row['total_minutes']} min ({row['step_count']} krokov)")
+        
+        tools = get_automatable_minutes_by_tool(self.db_path)
+        if tools:
+            print(f"• Automatizovateľné minúty podľa nástroja:")
+            for row in tools:
+                print(f"  - {row['system_tool']}: {row['automatable_minutes']} min ({row['step_count']} krokov)")
+    
+    def _check_statistics(self):
+        """Prepočíta štatistiky od nuly a opraví nezhody"""
+        mismatches = check_stats(self.db_path)
+        if not mismatches:
+            print("✅ Štatistiky sú konzistentné.")
+            return
+        print(f"⚠️ Opravených nezhôd: {len(mismatches)}")
+        for item in mismatches:
+            print(f"  - {item['scope']} {item['key']} {item['sub_key']}: {item['stored']} → {item['expected']}")
     
     def run(self):
         """Hlavná slučka aplikácie"""
@@ -5,7 +5,8 @@ ADSUN Process Mapper s AI Reasoning
 Inteligentný agent na dokumentovanie procesov s pokročilým premýšľaním
 """
 
-import sqlite3
+from database_repository import get_connection
+from database_migrations import run_migrations
 import json
 import re
 from datetime import datetime
@@ -207,7 +208,7 @@ class AIReasoningEngine:
 class ADSUNProcessMapperAI:
     """Hlavný agent s AI reasoning pre dokumentovanie procesov"""
     
-    def __init__(self, db_path: str = "adsun_processes.db"):
+    def __init__(self, db_path: Optional[str] = None):
         self.db_path = db_path
         self.ai_engine = AIReasoningEngine()
         self.current_context = ProcessContext()
@@ -215,27 +216,8 @@ class ADSUNProcessMapperAI:
         self.init_database()
     
     def init_database(self):
-        """Inicializuje databázu"""
-        with sqlite3.connect(self.db_path) as conn:
-            # Načítaj schému z SQL súboru
-            try:
-                with open('database_schema.sql', 'r', encoding='utf-8') as f:
-                    conn.executescript(f.read())
-            except FileNotFoundError:
-                print("⚠️  Súbor database_schema.sql nebol nájdený. Vytváram základnú štruktúru...")
-                self._create_basic_schema(conn)
-    
-    def _create_basic_schema(self, conn):
-        """Vytvorí základnú databázovú štruktúru"""
-        # Zjednodušená verzia schémy
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS processes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                category TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        """Inicializuje databázu (čakajúce migrácie schémy)"""
+        run_migrations(self.db_path)
     
     def start_documentation_session(self, documenter_name: str) -> str:
         """Spustí novú dokumentačnú session"""
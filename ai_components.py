@@ -10,29 +10,19 @@ import json
 import os
 from typing import Dict, Optional
 from adsun_process_mapper_ai import ProcessContext
+from openai_clients import chat_completion, get_openai_client, resolve_api_key
 
 class RealAIReasoningEngine:
     """Skutočný AI reasoning engine s OpenAI API"""
     
     def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
-        if self.api_key:
-            try:
-                # Try new OpenAI client first
-                from openai import OpenAI
-                self.client = OpenAI(api_key=self.api_key)
-                self.ai_available = True
-                self.use_new_client = True
-            except:
-                try:
-                    # Fallback to old client
-                    import openai
-                    openai.api_key = self.api_key
-                    self.ai_available = True
-                    self.use_new_client = False
-                except:
-                    self.ai_available = False
-        else:
+        self.api_key = resolve_api_key(api_key)
+        # Klient zo zdieľaného registra - nový engine nestavia nový HTTP pool
+        try:
+            self.client = get_openai_client(self.api_key)
+            self.ai_available = True
+        except Exception:
+            self.client = None
             self.ai_available = False
     
     def analyze_response_with_ai(self, question: str, response: str, context: ProcessContext) -> Dict:
@@ -74,30 +64,17 @@ Vráť JSON odpoveď s:
 Odpovedaj POUZE v JSON formáte v slovenčine.
             """
             
-            # Use appropriate client
-            if self.use_new_client:
-                response_ai = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "Si expert na business proces analýzu. Odpovedáš presne a štruktúrovane v JSON formáte."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=1000,
-                    temperature=0.3
-                )
-                ai_content = response_ai.choices[0].message.content
-            else:
-                import openai
-                response_ai = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "Si expert na business proces analýzu. Odpovedáš presne a štruktúrovane v JSON formáte."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=1000,
-                    temperature=0.3
-                )
-                ai_content = response_ai.choices[0].message.content
+            response_ai = chat_completion(
+                api_key=self.api_key,
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "Si expert na business proces analýzu. Odpovedáš presne a štruktúrovane v JSON formáte."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=1000,
+                temperature=0.3
+            )
+            ai_content = response_ai.choices[0].message.content
             
             ai_analysis = json.loads(ai_content)
             ai_analysis['ai_powered'] = True
@@ -176,30 +153,17 @@ Vygeneruj 1 konkrétnu praktickú otázku o procese "{process_name}" ktorá:
 Odpoveď len otázka, nie JSON.
             """
             
-            # Use appropriate client
-            if self.use_new_client:
-                response_ai = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "Si expert na business procesy. Generuješ presné, praktické otázky."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=200,
-                    temperature=0.4
-                )
-                return response_ai.choices[0].message.content.strip()
-            else:
-                import openai
-                response_ai = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "Si expert na business procesy. Generuješ presné, praktické otázky."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=200,
-                    temperature=0.4
-                )
-                return response_ai.choices[0].message.content.strip()
+            response_ai = chat_completion(
+                api_key=self.api_key,
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "Si expert na business procesy. Generuješ presné, praktické otázky."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=200,
+                temperature=0.4
+            )
+            return response_ai.choices[0].message.content.strip()
             
         except Exception as e:
             st.error(f"❌ Chyba generovania otázky: {e}")
@@ -239,29 +203,17 @@ Odpoveď formatuj ako JSON:
 }}
             """
             
-            if self.use_new_client:
-                pred_response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "Si expert na business procesy pre ADSUN. Generuješ predikcie a návrhy v JSON formáte."},
-                        {"role": "user", "content": prediction_prompt}
-                    ],
-                    max_tokens=800,
-                    temperature=0.4
-                )
-                return json.loads(pred_response.choices[0].message.content)
-            else:
-                import openai
-                pred_response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "Si expert na business procesy pre ADSUN. Generuješ predikcie a návrhy v JSON formáte."},
-                        {"role": "user", "content": prediction_prompt}
-                    ],
-                    max_tokens=800,
-                    temperature=0.4
-                )
-                return json.loads(pred_response.choices[0].message.content)
+            pred_response = chat_completion(
+                api_key=self.api_key,
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "Si expert na business procesy pre ADSUN. Generuješ predikcie a návrhy v JSON formáte."},
+                    {"role": "user", "content": prediction_prompt}
+                ],
+                max_tokens=800,
+                temperature=0.4
+            )
+            return json.loads(pred_response.choices[0].message.content)
                 
         except Exception as e:
             st.error(f"❌ Chyba AI predikcie: {e}")
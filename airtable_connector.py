@@ -8,10 +8,29 @@ Integrácia s Airtable pre ukladanie a synchronizáciu procesov
 import requests
 import json
 import os
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
 import streamlit as st
 
+from session_writer import build_session_payloads
+
+# Airtable API prijme najviac 10 záznamov v jednom create requeste
+AIRTABLE_BATCH_SIZE = 10
+# Koľkokrát zopakovať neúspešnú dávku a pauza medzi pokusmi (limit API je 5 requestov/s)
+AIRTABLE_BATCH_RETRIES = 2
+AIRTABLE_RETRY_DELAY_SECONDS = 1.0
+
+
+class AirtableBatchError(RuntimeError):
+    """Časť session krokov sa do Airtable neuložila ani po opakovaní"""
+
+    def __init__(self, message: str, record_ids: List[str], failed_sessions: List[Dict]):
+        super().__init__(message)
+        self.record_ids = record_ids
+        self.failed_sessions = failed_sessions
+
+
 class AirtableConnector:
     """Connector pre Airtable API integráciu"""
     
@@ -168,21 +187,26 @@ class AirtableConnector:
             st.error(f"❌ Chyba pri ukladaní do Airtable: {e}")
             return None
     
+    @staticmethod
+    def _session_fields(process_id: str, session_data: Dict) -> Dict:
+        """Polia Documentation Sessions záznamu z payloadu session kroku"""
+        return {
+            "Process": [process_id],  # Link to Process record
+            "Documenter": session_data.get("documenter", ""),
+            "Step Number": session_data.get("step", 1),
+            "Question": session_data.get("question", ""),
+            "Response": session_data.get("response", ""),
+            "AI Analysis": json.dumps(session_data.get("analysis", {}), ensure_ascii=False),
+            "AI Powered": session_data.get("ai_powered", False),
+            "Session Date": session_data.get("timestamp", datetime.now().isoformat()),
+            "Completeness Score": session_data.get("completeness_score", 5)
+        }
+    
     def save_documentation_session(self, process_id: str, session_data: Dict) -> Optional[str]:
         """Uloží dokumentačnú session do Airtable"""
         try:
             airtable_data = {
-                "fields": {
-                    "Process": [process_id],  # Link to Process record
-                    "Documenter": session_data.get("documenter", ""),
-                    "Step Number": session_data.get("step", 1),
-                    "Question": session_data.get("question", ""),
-                    "Response": session_data.get("response", ""),
-                    "AI Analysis": json.dumps(session_data.get("analysis", {}), ensure_ascii=False),
-                    "AI Powered": session_data.get("ai_powered", False),
-                    "Session Date": session_data.get("timestamp", datetime.now().isoformat()),
-                    "Completeness Score": session_data.get("completeness_score", 5)
-                }
+                "fields": self._session_fields(process_id, session_data)
             }
             
             response = requests.post(
@@ -202,6 +226,44 @@ class AirtableConnector:
             st.error(f"❌ Chyba pri ukladaní session do Airtable: {e}")
             return None
     
+    def _post_session_batch(self, process_id: str, batch: List[Dict]) -> List[str]:
+        response = requests.post(
+            f"{self.base_url}/Documentation Sessions",
+            headers=self.headers,
+            json={"records": [{"fields": self._session_fields(process_id, s)} for s in batch]},
+            timeout=10
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code} - {response.text}")
+        return [record["id"] for record in response.json()["records"]]
+    
+    def save_documentation_sessions(self, process_id: str, sessions: List[Dict]) -> List[str]:
+        """Uloží viac session krokov naraz - Airtable berie max 10 záznamov na request.
+
+        Neúspešná dávka sa zopakuje; ak neprejde ani tak, ostatné dávky sa
+        uložia a na konci sa vyhodí AirtableBatchError s krokmi ktoré chýbajú.
+        """
+        record_ids = []
+        failed_sessions = []
+        errors = []
+        for start in range(0, len(sessions), AIRTABLE_BATCH_SIZE):
+            batch = sessions[start:start + AIRTABLE_BATCH_SIZE]
+            for attempt in range(AIRTABLE_BATCH_RETRIES + 1):
+                try:
+                    record_ids.extend(self._post_session_batch(process_id, batch))
+                    break
+                except (requests.RequestException, RuntimeError) as e:
+                    if attempt == AIRTABLE_BATCH_RETRIES:
+                        failed_sessions.extend(batch)
+                        errors.append(str(e))
+                    else:
+                        time.sleep(AIRTABLE_RETRY_DELAY_SECONDS)
+        if failed_sessions:
+            raise AirtableBatchError(
+                f"Airtable session chyba: {errors[-1]}", record_ids, failed_sessions
+            )
+        return record_ids
+    
     def get_processes(self, limit: int = 100) -> List[Dict]:
         """Načíta procesy z Airtable"""
         try:
@@ -401,20 +463,18 @@ class HybridDatabaseManager:
                 process_id = self.airtable.save_process(process_data)
                 
                 if process_id:
-                    # Uložiť všetky session kroky
-                    for i, entry in enumerate(conversation_history):
-                        session_data = {
-                            "documenter": documenter,
-                            "step": i + 1,
-                            "question": entry['question'],
-                            "response": entry['response'],
-                            "analysis": entry.get('analysis', {}),
-                            "ai_powered": entry.get('analysis', {}).get('ai_powered', False),
-                            "timestamp": entry['timestamp'].isoformat(),
-                            "completeness_score": min(len(conversation_history), 10)
-                        }
-                        
-                        self.airtable.save_documentation_session(process_id, session_data)
+                    # Proces už v Airtable je - zlyhané kroky sa hlásia k nemu, SQLite fallback
+                    # by vytvoril duplicitnú kópiu
+                    try:
+                        # Uložiť všetky session kroky dávkovo (rovnaký payload ako SQLite)
+                        self.airtable.save_documentation_sessions(
+                            process_id, build_session_payloads(conversation_history, documenter)
+                        )
+                    except AirtableBatchError as e:
+                        failed_steps = ', '.join(str(s['step']) for s in e.failed_sessions)
+                        st.warning(f"⚠️ Proces uložený do Airtable ({process_id}), ale kroky {failed_steps} "
+                                   f"sa nepodarilo uložiť: {e}")
+                        return process_id
                     
                     st.success("✅ Dáta uložené do Airtable!")
                     return process_id
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Answer Cache
+Perzistentná cache hotových odpovedí asistenta (tabuľka answer_cache v cache
+databáze vedľa databázy tenanta) podľa normalizovanej otázky, intentu a verzie
+obsahu databázy. Verziu zvyšujú triggery pri každom zápise do procesov, oddelení
+a pozícií - zmena dát tak starú odpoveď zneplatní. Záznamy majú TTL a nad limit
+vypadnú najdlhšie nepoužité.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from cache_database import ensure_cache_db
+from database_repository import fetch_one, fetch_value
+from database_writer import submit_write, write
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_TTL_HOURS = 24
+ANSWER_CACHE_MAX_ENTRIES = 1000
+
+# Tabuľky z ktorých odpovede čerpajú - zápis do nich zvýši content_version
+VERSIONED_TABLES = ('processes', 'process_steps', 'departments', 'positions')
+
+LOOKUP_SQL = f"""
+    SELECT answer FROM answer_cache
+    WHERE cache_key = ? AND data_version = ?
+      AND created_at >= datetime('now', '-{ANSWER_CACHE_TTL_HOURS} hours')
+"""
+
+
+class _Counters:
+    """Zásahy tohto procesu (perzistentné súčty sú v tabuľke)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+_counters = _Counters()
+
+
+def answer_key(query_key: str, intent: str, mode: str) -> str:
+    """Kľúč odpovede - rovnaká otázka s AI a bez AI dostane inú odpoveď"""
+    return f"{mode}|{intent}|{query_key}"
+
+
+def content_version(db_path: Optional[str] = None) -> Optional[int]:
+    """Aktuálna verzia obsahu, None ak databáza nemá tabuľku (cache sa obíde)"""
+    try:
+        return fetch_value("SELECT version FROM content_version WHERE id = 1", db_path=db_path)
+    except Exception:
+        return None
+
+
+class FailedAnswer(str):
+    """Chybové hlásenie handlera - odpoveď s ním sa neuloží, ďalší pokus môže uspieť"""
+
+
+def lookup_answer(cache_key: str, version: Optional[int], db_path: Optional[str] = None) -> Optional[str]:
+    """Odpoveď z cache pre danú verziu obsahu alebo None; zásah zaradí aktualizáciu last_used_at"""
+    if version is None:
+        return None
+    try:
+        cache_path = ensure_cache_db(db_path)
+        row = fetch_one(LOOKUP_SQL, (cache_key, version), db_path=cache_path)
+    except Exception:
+        return None
+    if row is None:
+        _counters.record(hit=False)
+        return None
+
+    _counters.record(hit=True)
+    submit_write(lambda conn: conn.execute("""
+        UPDATE answer_cache SET hits = hits + 1, last_used_at = CURRENT_TIMESTAMP WHERE cache_key = ?
+    """, (cache_key,)), cache_path)
+    return row['answer']
+
+
+def store_answer(cache_key: str, intent: str, version: Optional[int], answer: str,
+                 db_path: Optional[str] = None):
+    """Uloží odpoveď s verziou obsahu z času pred jej výpočtom (zápis medzitým ju hneď zneplatní)"""
+    if version is None or not answer:
+        return
+
+    def _store(conn):
+        conn.execute("""
+            INSERT OR REPLACE INTO answer_cache
+                (cache_key, intent, data_version, answer, hits, created_at, last_used_at)
+            VALUES (?, ?, ?, ?, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+        """, (cache_key, intent, version, answer))
+        evict_answers(conn, version)
+
+    try:
+        submit_write(_store, ensure_cache_db(db_path))
+    except Exception as e:
+        logger.warning("Answer cache: %s", e)
+
+
+def clear_answer_cache(db_path: Optional[str] = None):
+    """Zmaže odpovede databázy (po obnove zo zálohy sa verzia obsahu môže vrátiť späť)"""
+    write(lambda conn: conn.execute("DELETE FROM answer_cache"), ensure_cache_db(db_path))
+
+
+def evict_answers(conn, version: int, max_entries: int = ANSWER_CACHE_MAX_ENTRIES) -> int:
+    """Zmaže odpovede inej verzie obsahu, po TTL a najdlhšie nepoužité nad limit"""
+    removed = conn.execute(f"""
+        DELETE FROM answer_cache
+        WHERE data_version != ? OR created_at < datetime('now', '-{ANSWER_CACHE_TTL_HOURS} hours')
+    """, (version,)).rowcount
+    removed += conn.execute("""
+        DELETE FROM answer_cache WHERE cache_key IN (
+            SELECT cache_key FROM answer_cache ORDER BY last_used_at DESC, created_at DESC LIMIT -1 OFFSET ?
+        )
+    """, (max_entries,)).rowcount
+    return removed
+
+
+def get_answer_cache_stats(db_path: Optional[str] = None) -> Dict[str, Any]:
+    """Zásahy tohto procesu + počet uložených odpovedí a súčet zásahov v databáze"""
+    total = _counters.hits + _counters.misses
+    stats = {
+        'hits': _counters.hits,
+        'misses': _counters.misses,
+        'hit_rate': round(_counters.hits / total, 3) if total else 0.0,
+        'entries': 0,
+        'total_hits': 0,
+    }
+    try:
+        row = fetch_one(
+            "SELECT COUNT(*) AS entries, COALESCE(SUM(hits), 0) AS total_hits FROM answer_cache",
+            db_path=ensure_cache_db(db_path)
+        )
+        stats.update(entries=row['entries'], total_hits=row['total_hits'])
+    except Exception:
+        pass
+    return stats
+
+
+def reset_answer_cache_stats():
+    _counters.reset()
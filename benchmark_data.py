@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Benchmark Data
+Generátor syntetických dát (procesy, oddelenia, pozície, dokumentačné sessions)
+v slovenčine pre výkonnostné testy databázy v rôznych mierkach.
+"""
+
+import argparse
+import json
+import random
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from database_migrations import run_migrations
+from database_repository import get_connection
+from process_steps import backfill_process_steps
+
+# (label, hotovo, celkom)
+ProgressCallback = Callable[[str, int, int], None]
+
+INSERT_BATCH_SIZE = 5000
+
+
+@dataclass
+class DatasetScale:
+    """Počty generovaných záznamov"""
+    processes: int
+    sessions: int
+    departments: int = 12
+    positions: int = 60
+
+
+SCALES = {
+    'tiny': DatasetScale(processes=50, sessions=500, departments=6, positions=20),
+    'small': DatasetScale(processes=1_000, sessions=20_000),
+    'medium': DatasetScale(processes=10_000, sessions=200_000, departments=25, positions=300),
+    'large': DatasetScale(processes=50_000, sessions=1_000_000, departments=40, positions=1_000),
+}
+
+FIRST_NAMES = ['Mária', 'Peter', 'Anna', 'Ján', 'Katarína', 'Martin', 'Zuzana', 'Tomáš', 'Eva', 'Michal',
+               'Lucia', 'Jozef', 'Jana', 'Marek', 'Veronika', 'Lukáš', 'Monika', 'Juraj', 'Simona', 'Róbert']
+LAST_NAMES = ['Novák', 'Kováč', 'Krásna', 'Horváth', 'Varga', 'Tóth', 'Baláž', 'Szabó', 'Molnár', 'Lukáč',
+              'Šimko', 'Polák', 'Kráľ', 'Hudák', 'Blaho', 'Žiak', 'Čierny', 'Mráz', 'Oravec', 'Kučera']
+ROLES = ['Obchodný manažér', 'HR manažér', 'Účtovníčka', 'Vedúci výroby', 'Grafik', 'Technik montáže',
+         'Skladník', 'Projektový manažér', 'Asistentka', 'Konateľ']
+
+CATEGORIES = {
+    'obchod': ['objednávok zákazníkov', 'cenových ponúk', 'reklamácií', 'dopytov', 'zmlúv s klientmi'],
+    'HR': ['dovoleniek', 'nástupu zamestnanca', 'dochádzky', 'školení', 'hodnotenia zamestnancov'],
+    'administratíva': ['faktúr dodávateľom', 'pokladne', 'cestovných náhrad', 'archivácie dokumentov'],
+    'výroba': ['tlače veľkoformátových plagátov', 'polepu áut', 'výroby svetelnej reklamy', 'rezania fólií'],
+    'logistika': ['expedície tovaru', 'príjmu materiálu', 'inventúry skladu', 'montáže u zákazníka'],
+    'marketing': ['kampaní na sociálnych sieťach', 'newslettera', 'aktualizácie webu', 'veľtrhov'],
+}
+ACTIONS = ['Spracovanie', 'Schvaľovanie', 'Evidencia', 'Príprava', 'Kontrola', 'Plánovanie', 'Vyhodnotenie']
+STEP_VERBS = ['Príjem', 'Overenie', 'Zadanie do systému', 'Schválenie', 'Kontrola kvality', 'Odoslanie',
+              'Archivácia', 'Konzultácia', 'Príprava podkladov', 'Fakturácia']
+TOOLS = ['CRM systém', 'Email', 'Telefón', 'Excel', 'Účtovný systém', 'HR systém', 'Skladový systém',
+         'Internetbanking', 'Plotter', 'Tlačiareň', 'Web', 'Teams']
+FREQUENCIES = ['denne', 'týždenne', 'mesačne', 'štvrťročne', 'podľa potreby']
+DEPARTMENT_NAMES = ['Obchod', 'HR', 'Administratíva', 'Výroba', 'Logistika', 'Marketing', 'Grafické štúdio',
+                    'Montáž', 'Sklad', 'IT', 'Financie', 'Nákup']
+LEVELS = ['junior', 'medior', 'senior', 'vedúci']
+QUESTIONS = ['Ako proces začína?', 'Kto je zodpovedný za tento krok?', 'Aké systémy používate?',
+             'Koľko času krok trvá?', 'Čo sa stane pri chybe?', 'Ako často sa proces opakuje?',
+             'Ktoré kroky by sa dali automatizovať?', 'Kto schvaľuje výsledok?']
+ANSWERS = ['Zákazník pošle e-mail s požiadavkou.', 'Zodpovedá vedúci oddelenia.',
+           'Používame CRM a Excel.', 'Približne 15 minút.', 'Vráti sa to na opravu.',
+           'Denne, niekedy aj viackrát.', 'Zadávanie údajov do systému.', 'Schvaľuje konateľ.']
+
+
+def _person(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _department_name(index: int) -> str:
+    """Obchod, HR, ... a pri väčších mierkach Obchod 2, HR 2, ..."""
+    name = DEPARTMENT_NAMES[index % len(DEPARTMENT_NAMES)]
+    return name if index < len(DEPARTMENT_NAMES) else f"{name} {index // len(DEPARTMENT_NAMES) + 1}"
+
+
+def _process_row(rng: random.Random, index: int):
+    category = rng.choice(list(CATEGORIES))
+    name = f"{rng.choice(ACTIONS)} {rng.choice(CATEGORIES[category])}"
+    if index >= len(ACTIONS) * 5:
+        name += f" {index}"
+    owner = f"{_person(rng)} - {rng.choice(ROLES)}"
+    tools = rng.sample(TOOLS, rng.randint(1, 4))
+    step_count = rng.randint(3, 8)
+    verbs = rng.sample(STEP_VERBS, step_count)
+    steps = '\n'.join(f"{i + 1}. {verb}" for i, verb in enumerate(verbs))
+    step_details = '\n'.join(
+        f"{i + 1}. {verb}: {rng.choice(tools)}, cca {rng.randint(2, 30)} min" for i, verb in enumerate(verbs)
+    )
+    return (
+        name, category, f"Proces {name.lower()} v oddelení {category}.", owner, steps, step_details,
+        rng.choice(FREQUENCIES), rng.randint(5, 240), rng.randint(1, 5), ', '.join(tools),
+        'Oneskorenie, chyby v údajoch', rng.randint(1, 5), 'Automatizácia zadávania údajov',
+        json.dumps(rng.sample(['faktúra', 'zákazník', 'sklad', 'tlač', 'schválenie', 'web'], 2), ensure_ascii=False),
+        rng.random() > 0.05,
+    )
+
+
+def _insert_batches(conn, sql: str, rows, total: int, label: str, progress: Optional[ProgressCallback]) -> int:
+    batch = []
+    done = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            conn.executemany(sql, batch)
+            done += len(batch)
+            batch = []
+            if progress:
+                progress(label, done, total)
+    if batch:
+        conn.executemany(sql, batch)
+        done += len(batch)
+        if progress:
+            progress(label, done, total)
+    return done
+
+
+def generate_dataset(db_path: str, scale: DatasetScale, seed: int = 42,
+                     progress: Optional[ProgressCallback] = None) -> Dict[str, int]:
+    """Naplní (zmigrovanú) databázu syntetickými dátami, vráti počty vložených riadkov.
+
+    Rovnaký seed dá rovnaké dáta, benchmarky sú tak porovnateľné medzi behmi.
+    Kroky procesov sa rozložia z textu rovnako ako pri bežnom uložení.
+    """
+    rng = random.Random(seed)
+    run_migrations(db_path)
+    start = datetime(2025, 1, 1, 8, 0, 0)
+
+    with get_connection(db_path) as conn:
+        first_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM processes").fetchone()[0] + 1
+
+        departments = _insert_batches(conn, """
+            INSERT INTO departments (name, function, manager, staff_count, tools)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            (_department_name(i), f"Oddelenie č. {i + 1}", _person(rng), str(rng.randint(2, 40)),
+             ', '.join(rng.sample(TOOLS, 3)))
+            for i in range(scale.departments)
+        ), scale.departments, "Oddelenia", progress)
+
+        positions = _insert_batches(conn, """
+            INSERT INTO positions (name, description, department, level, responsibilities, tools_systems)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (
+            (f"{rng.choice(ROLES)} {i + 1}", "Pozícia vygenerovaná pre benchmark",
+             rng.choice(DEPARTMENT_NAMES), rng.choice(LEVELS),
+             ', '.join(rng.sample(STEP_VERBS, 3)).lower(), ', '.join(rng.sample(TOOLS, 2)))
+            for i in range(scale.positions)
+        ), scale.positions, "Pozície", progress)
+
+        processes = _insert_batches(conn, """
+            INSERT INTO processes (name, category, description, owner, steps, step_details, frequency,
+                                   duration_minutes, priority, tools, risks, automation_readiness,
+                                   improvements, tags, is_active)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (_process_row(rng, i) for i in range(scale.processes)), scale.processes, "Procesy", progress)
+
+        steps = backfill_process_steps(conn, progress=progress)
+
+        last_id = first_id + processes - 1
+        sessions = 0
+        if processes:
+            def session_rows():
+                for i in range(scale.sessions):
+                    step = rng.randint(1, 10)
+                    turn = rng.randrange(len(QUESTIONS))
+                    created = start + timedelta(minutes=i * 3)
+                    analysis = json.dumps({'ai_powered': rng.random() > 0.3}, ensure_ascii=False)
+                    notes = json.dumps({'step': step, 'question': QUESTIONS[turn], 'response': ANSWERS[turn],
+                                        'analysis': json.loads(analysis), 'timestamp': created.isoformat()},
+                                       ensure_ascii=False)
+                    yield (rng.randint(first_id, last_id), _person(rng), notes, step, QUESTIONS[turn],
+                           ANSWERS[turn], analysis, created.isoformat(), min(step, 10), created)
+
+            from session_writer import SESSION_INSERT_SQL
+            sessions = _insert_batches(conn, SESSION_INSERT_SQL, session_rows(), scale.sessions,
+                                       "Sessions", progress)
+
+        conn.execute("ANALYZE")
+
+    return {
+        'departments': departments,
+        'positions': positions,
+        'processes': processes,
+        'process_steps': steps,
+        'documentation_sessions': sessions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generátor syntetických dát ADSUN")
+    parser.add_argument('db_path', help="Cieľová databáza (vytvorí sa a zmigruje)")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--processes', type=int, help="Prepíše počet procesov zo zvolenej mierky")
+    parser.add_argument('--sessions', type=int, help="Prepíše počet sessions zo zvolenej mierky")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    scale = DatasetScale(**asdict(SCALES[args.scale]))
+    if args.processes is not None:
+        scale.processes = args.processes
+    if args.sessions is not None:
+        scale.sessions = args.sessions
+
+    def report(label, done, total):
+        print(f"\r{label}: {done}/{total}", end='\n' if done >= total else '', flush=True)
+
+    counts = generate_dataset(args.db_path, scale, args.seed, progress=report)
+    print(f"✅ Vygenerované: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Cache Database
+Cache asistenta (intent_cache, answer_cache) v samostatnom súbore vedľa databázy
+tenanta. Nové záznamy a zásahy cache tak nemenia PRAGMA data_version hlavnej
+databázy - nevyprázdnia query_cache a plánovač záloh v nich nevidí zmenu.
+"""
+
+import os
+import threading
+from typing import Optional
+
+from database_repository import get_connection, resolve_db_path
+
+CACHE_SUFFIX = '.cache.db'
+
+CACHE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS intent_cache (
+        query_key TEXT PRIMARY KEY,
+        intent TEXT NOT NULL,
+        confidence REAL,
+        taxonomy_version TEXT NOT NULL,
+        api_ms REAL,
+        hits INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_intent_cache_last_used ON intent_cache (last_used_at)",
+    """
+    CREATE TABLE IF NOT EXISTS answer_cache (
+        cache_key TEXT PRIMARY KEY,
+        intent TEXT,
+        data_version INTEGER NOT NULL,
+        answer TEXT NOT NULL,
+        hits INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_answer_cache_last_used ON answer_cache (last_used_at)",
+]
+
+_ready_paths = set()
+_ready_lock = threading.Lock()
+
+
+def cache_db_path(db_path: Optional[str] = None) -> str:
+    """Cache vedľa databázy (každý tenant má vlastnú)"""
+    return os.path.splitext(resolve_db_path(db_path))[0] + CACHE_SUFFIX
+
+
+def ensure_cache_db(db_path: Optional[str] = None) -> str:
+    """Cesta k cache databáze, tabuľky sa vytvoria pri prvom použití v procese"""
+    path = cache_db_path(db_path)
+    key = os.path.abspath(path)
+    if key in _ready_paths:
+        return path
+    with _ready_lock:
+        if key not in _ready_paths:
+            with get_connection(path) as conn:
+                for statement in CACHE_SCHEMA:
+                    conn.execute(statement)
+            _ready_paths.add(key)
+    return path
+
+
+def forget_cache_db(db_path: Optional[str] = None):
+    """Pri ďalšom použití znova over schému (napr. po zmazaní súboru cache)"""
+    with _ready_lock:
+        _ready_paths.discard(os.path.abspath(cache_db_path(db_path)))
@@ -6,7 +6,7 @@ Konfigurácia firemných údajov a parametrov
 """
 
 import streamlit as st
-import sqlite3
+from database_repository import get_connection
 import json
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -107,6 +107,10 @@ def render_company_settings():
                 }
             }
             
+            # Konfigurácia tenantov sa vo formulári neupravuje - zachovaj ju
+            if 'tenancy' in saved_settings:
+                settings['tenancy'] = saved_settings['tenancy']
+            
             # Uloženie do súboru
             try:
                 with open("company_settings.json", "w", encoding="utf-8") as f:
@@ -126,7 +130,7 @@ def render_company_settings():
     st.markdown("### 📊 Systémové štatistiky")
     
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
+        with get_connection() as conn:
             cursor = conn.execute("SELECT COUNT(*) FROM processes WHERE is_active = 1")
             process_count = cursor.fetchone()[0]
             
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Database Backup
+Online zálohy cez sqlite3 backup API (po dávkach stránok, zapisovatelia nečakajú),
+gzip kompresia, plánovač v pozadí a pravidlá uchovávania.
+"""
+
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from database_repository import DEFAULT_DB_PATH, close_pool, on_pool_closed, resolve_db_path
+from database_writer import close_writer
+
+logger = logging.getLogger(__name__)
+
+BACKUP_DIR = "backups"
+BACKUP_PREFIX = "adsun_processes_"
+BACKUP_SUFFIX = ".db.gz"
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+# Koľko stránok skopírovať naraz a pauza medzi dávkami (zapisovatelia medzitým pokračujú)
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.005
+# Zápis iným pripojením reštartuje kopírovanie - po toľkých reštartoch skopírujeme naraz
+BACKUP_MAX_RESTARTS = 3
+
+# Interval plánovača podľa nastavenia "Zálohovanie" vo firemných nastaveniach
+BACKUP_INTERVALS = {
+    'Denne': 24 * 3600,
+    'Týždenne': 7 * 24 * 3600,
+    'Mesačne': 30 * 24 * 3600,
+}
+DEFAULT_BACKUP_INTERVAL = BACKUP_INTERVALS['Týždenne']
+
+# (label, done, total) - rovnaký tvar ako pri migráciách
+ProgressCallback = Callable[[str, int, int], None]
+
+
+@dataclass
+class RetentionPolicy:
+    """Koľko záloh ponechať: posledných N + najnovšiu z každého dňa za posledné dni"""
+    keep_last: int = 5
+    keep_daily_days: int = 14
+
+
+class _BackupRestarted(Exception):
+    pass
+
+
+def _backup_pages(source: sqlite3.Connection, target: sqlite3.Connection,
+                  progress: Optional[ProgressCallback], label: str):
+    """Kopíruje po dávkach stránok; pri neustálych zápisoch dokončí jedným krokom.
+
+    Vo WAL režime jeden krok drží len čítaciu transakciu, zapisovatelia
+    ani vtedy nečakajú.
+    """
+    state = {'remaining': None, 'restarts': 0}
+
+    def report(status, remaining, total):
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+            if state['restarts'] > BACKUP_MAX_RESTARTS:
+                raise _BackupRestarted()
+        state['remaining'] = remaining
+        if progress:
+            progress(label, total - remaining, total)
+
+    try:
+        source.backup(target, pages=BACKUP_PAGES_PER_STEP, progress=report, sleep=BACKUP_STEP_SLEEP)
+    except _BackupRestarted:
+        source.backup(target, pages=-1)
+        if progress:
+            progress(label, 1, 1)
+
+
+def backup_dir(db_path: Optional[str] = None) -> str:
+    """Adresár záloh databázy - predvolená v BACKUP_DIR, tenanti v podadresári podľa názvu súboru"""
+    path = resolve_db_path(db_path)
+    if os.path.abspath(path) == os.path.abspath(DEFAULT_DB_PATH):
+        return BACKUP_DIR
+    return os.path.join(BACKUP_DIR, os.path.splitext(os.path.basename(path))[0])
+
+
+def _backup_name(created_at: datetime, tag: str = '') -> str:
+    suffix = f"_{tag}" if tag else ''
+    return f"{BACKUP_PREFIX}{created_at.strftime(TIMESTAMP_FORMAT)}{suffix}{BACKUP_SUFFIX}"
+
+
+def create_backup(db_path: Optional[str] = None, directory: Optional[str] = None, tag: str = '',
+                  progress: Optional[ProgressCallback] = None) -> Dict:
+    """Vytvorí komprimovanú zálohu bežiacej databázy.
+
+    Kópia ide cez backup API po BACKUP_PAGES_PER_STEP stránkach - je
+    konzistentná aj keď aplikácia práve zapisuje. Výsledný .db.gz sa
+    zapíše cez dočasný súbor a premenuje, neúplná záloha nikdy nevznikne.
+    """
+    db_path = resolve_db_path(db_path)
+    directory = directory or backup_dir(db_path)
+    os.makedirs(directory, exist_ok=True)
+    created_at = datetime.now()
+    path = os.path.join(directory, _backup_name(created_at, tag))
+
+    fd, snapshot_path = tempfile.mkstemp(suffix='.db', dir=directory)
+    os.close(fd)
+    try:
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(snapshot_path)
+        try:
+            _backup_pages(source, target, progress, os.path.basename(db_path))
+        finally:
+            target.close()
+            source.close()
+
+        with open(snapshot_path, 'rb') as raw, gzip.open(path + '.part', 'wb') as compressed:
+            shutil.copyfileobj(raw, compressed)
+        os.replace(path + '.part', path)
+    finally:
+        for leftover in (snapshot_path, path + '.part'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    return {
+        'name': os.path.basename(path),
+        'path': path,
+        'created_at': created_at,
+        'size': os.path.getsize(path),
+    }
+
+
+def list_backups(directory: Optional[str] = None) -> List[Dict]:
+    """Zoznam záloh od najnovšej (bez adresára: zálohy databázy aktuálneho tenanta)"""
+    directory = directory or backup_dir()
+    if not os.path.isdir(directory):
+        return []
+    backups = []
+    for name in os.listdir(directory):
+        if not (name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX)):
+            continue
+        stamp = name[len(BACKUP_PREFIX):len(BACKUP_PREFIX) + 15]
+        try:
+            created_at = datetime.strptime(stamp, TIMESTAMP_FORMAT)
+        except ValueError:
+            continue
+        path = os.path.join(directory, name)
+        backups.append({'name': name, 'path': path, 'created_at': created_at, 'size': os.path.getsize(path)})
+    backups.sort(key=lambda b: (b['created_at'], b['name']), reverse=True)
+    return backups
+
+
+def apply_retention(directory: Optional[str] = None, policy: Optional[RetentionPolicy] = None,
+                    now: Optional[datetime] = None) -> List[str]:
+    """Zmaže zálohy mimo pravidiel uchovávania, vráti názvy zmazaných"""
+    policy = policy or RetentionPolicy()
+    now = now or datetime.now()
+    backups = list_backups(directory or backup_dir())
+
+    keep = {b['name'] for b in backups[:policy.keep_last]}
+    seen_days = set()
+    for backup in backups:
+        day = backup['created_at'].date()
+        if now - backup['created_at'] <= timedelta(days=policy.keep_daily_days) and day not in seen_days:
+            seen_days.add(day)
+            keep.add(backup['name'])
+
+    removed = []
+    for backup in backups:
+        if backup['name'] not in keep:
+            os.remove(backup['path'])
+            removed.append(backup['name'])
+    return removed
+
+
+def restore_backup(backup_path: str, db_path: Optional[str] = None, directory: Optional[str] = None,
+                   progress: Optional[ProgressCallback] = None) -> Dict:
+    """Obnoví databázu zo zálohy.
+
+    Pred obnovou sa zastaví plánovač a zapisovač a uloží sa aktuálny stav
+    (tag "pred_obnovou"). Pool databázy sa zatvorí, obsah sa do nej zapíše
+    backup API, potom sa zahodí jej cache a indexy a dobehnú migrácie -
+    staršia záloha tak dostane aktuálnu schému.
+    """
+    db_path = resolve_db_path(db_path)
+    directory = directory or backup_dir(db_path)
+    # Plánovač nesmie zálohovať počas kopírovania; zápisy z fronty dobehnú ešte do zálohy pred obnovou
+    stop_backup_scheduler(db_path, final_backup=False)
+    close_writer(db_path)
+    safety = create_backup(db_path, directory, tag='pred_obnovou')
+    # Pripojenia, zapisovač a pamäťové indexy tejto databázy sa zatvoria pred kopírovaním
+    close_pool(db_path)
+
+    fd, snapshot_path = tempfile.mkstemp(suffix='.db', dir=directory)
+    os.close(fd)
+    try:
+        with gzip.open(backup_path, 'rb') as compressed, open(snapshot_path, 'wb') as raw:
+            shutil.copyfileobj(compressed, raw)
+        source = sqlite3.connect(snapshot_path)
+        target = sqlite3.connect(db_path)
+        try:
+            _backup_pages(source, target, progress, os.path.basename(backup_path))
+        finally:
+            target.close()
+            source.close()
+    finally:
+        os.remove(snapshot_path)
+
+    # Čo sa medzitým otvorilo, patrí k pôvodnému obsahu - len stav tejto databázy, ostatní tenanti ostávajú
+    close_pool(db_path)
+    from answer_cache import clear_answer_cache
+    from database_migrations import reset_migration_cache, run_migrations
+    from process_vectors import invalidate_vector_indexes
+    invalidate_vector_indexes(db_path)
+    # Verzia obsahu sa vrátila na hodnotu zo zálohy - staré odpovede by pod ňou platili
+    clear_answer_cache(db_path)
+    reset_migration_cache(db_path)
+    run_migrations(db_path)
+    return safety
+
+
+def _database_mtime(db_path: str) -> float:
+    """Čas poslednej zmeny databázy vrátane WAL súboru"""
+    return max(
+        (os.path.getmtime(path) for path in (db_path, db_path + '-wal') if os.path.exists(path)),
+        default=0.0
+    )
+
+
+class BackupScheduler:
+    """Vlákno v pozadí ktoré zálohuje v intervale a uplatňuje retenciu.
+
+    Ak sa databáza od poslednej zálohy nezmenila, záloha sa preskočí.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, directory: Optional[str] = None,
+                 interval_seconds: float = DEFAULT_BACKUP_INTERVAL,
+                 retention: Optional[RetentionPolicy] = None):
+        self.db_path = resolve_db_path(db_path)
+        self.directory = directory or backup_dir(self.db_path)
+        self.interval_seconds = interval_seconds
+        self.retention = retention or RetentionPolicy()
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._final_backup = False
+        self._thread: Optional[threading.Thread] = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._final_backup = False
+        self._thread = threading.Thread(target=self._run, name="adsun-backup", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None, final_backup: bool = False):
+        """Zastaví vlákno; final_backup = pred skončením ešte zálohuj nezálohované zmeny"""
+        self._final_backup = final_backup
+        self._stop.set()
+        if self._thread and timeout != 0:
+            self._thread.join(timeout)
+
+    def seconds_until_due(self) -> float:
+        backups = list_backups(self.directory)
+        if not backups:
+            return 0.0
+        age = (datetime.now() - backups[0]['created_at']).total_seconds()
+        return max(0.0, self.interval_seconds - age)
+
+    def run_once(self) -> Optional[Dict]:
+        """Jedna plánovaná záloha (alebo None ak sa nič nezmenilo)"""
+        backups = list_backups(self.directory)
+        if backups and _database_mtime(self.db_path) <= backups[0]['created_at'].timestamp():
+            return None
+        backup = create_backup(self.db_path, self.directory)
+        apply_retention(self.directory, self.retention)
+        return backup
+
+    def _run(self):
+        while not self._stop.wait(self.seconds_until_due()):
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning("Backup error: %s", e)
+            # Aj pri chybe/preskočení počkáme celý interval
+            if self._stop.wait(self.interval_seconds):
+                break
+        if self._final_backup:
+            try:
+                self.run_once()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning("Backup error: %s", e)
+
+
+_schedulers: Dict[str, BackupScheduler] = {}
+_scheduler_lock = threading.Lock()
+
+
+def backup_interval_from_settings() -> float:
+    """Interval podľa company_settings.json (reporting.backup_frequency)"""
+    try:
+        from company_settings import load_company_settings
+        frequency = load_company_settings().get('reporting', {}).get('backup_frequency')
+    except Exception:
+        frequency = None
+    return BACKUP_INTERVALS.get(frequency, DEFAULT_BACKUP_INTERVAL)
+
+
+def start_backup_scheduler(db_path: Optional[str] = None, interval_seconds: Optional[float] = None) -> BackupScheduler:
+    """Spustí (raz za proces pre každú databázu) plánovač záloh"""
+    key = os.path.abspath(resolve_db_path(db_path))
+    with _scheduler_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = BackupScheduler(db_path, interval_seconds=interval_seconds or backup_interval_from_settings())
+            _schedulers[key] = scheduler
+        scheduler.start()
+        return scheduler
+
+
+def stop_backup_scheduler(db_path: Optional[str] = None, final_backup: bool = True):
+    """Zastaví plánovač databázy bez čakania (pri zatvorení jej poolu).
+
+    Zmeny od poslednej zálohy sa ešte zálohujú na pozadí, ďalší beh
+    aplikácie s touto databázou plánovač znova spustí.
+    """
+    with _scheduler_lock:
+        scheduler = _schedulers.pop(os.path.abspath(resolve_db_path(db_path)), None)
+    if scheduler is not None:
+        scheduler.stop(timeout=0, final_backup=final_backup)
+
+
+on_pool_closed(stop_backup_scheduler)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Database Benchmark
+Meria hot queries, repository funkcie a handlery knowledge asistenta
+(p50/p95, počet dotazov, kroky SQLite VM, full scany) a zapisuje JSON report
+porovnateľný medzi behmi.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from database_indexes import HOT_QUERIES, IndexManager
+from database_repository import fetch_all, get_connection, get_query_stats, reset_query_stats
+from process_steps import AUTOMATABLE_BY_TOOL_SQL, AUTOMATABLE_POTENTIAL, TIME_BY_RESPONSIBLE_SQL
+
+DEFAULT_REPEAT = 20
+DEFAULT_WARMUP = 2
+
+# Progress handler sa volá každých N inštrukcií VM - kroky sú teda zaokrúhlené na N
+VM_STEP_GRANULARITY = 100
+
+# Zhoršenie p95 o viac ako 20 % (a aspoň o 1 ms) sa hlási ako regresia
+REGRESSION_THRESHOLD = 0.2
+REGRESSION_MIN_DELTA_MS = 1.0
+
+# Ďalšie agregácie mimo HOT_QUERIES: názov -> (sql, params)
+EXTRA_QUERIES = {
+    'time_by_responsible': (TIME_BY_RESPONSIBLE_SQL, ()),
+    'automatable_by_tool': (AUTOMATABLE_BY_TOOL_SQL, (AUTOMATABLE_POTENTIAL,)),
+}
+
+
+def _repository_cases(db_path: str) -> Dict[str, Callable[[], Any]]:
+    """Repository funkcie tak, ako ich volá aplikácia"""
+    from database_browser import fetch_table_page
+    from database_components import DatabaseManager
+    from database_stats import get_breakdown, get_summary
+    from process_search import search_processes
+    from process_trigrams import fuzzy_search_processes
+    from process_vectors import semantic_search_processes
+
+    manager = DatabaseManager(db_path)
+    return {
+        'get_all_processes': manager.get_all_processes,
+        'load_process_sessions': lambda: manager.load_process_sessions('Mária Novák'),
+        'load_process_history': lambda: manager.load_process_history(1),
+        'get_process_statistics': manager.get_process_statistics,
+        'get_summary': lambda: get_summary(db_path),
+        'get_breakdown_owner': lambda: get_breakdown('owner', db_path, limit=10),
+        'search_processes': lambda: search_processes('fakturácia dodávateľom', db_path),
+        'fuzzy_search_processes': lambda: fuzzy_search_processes('fakturacia dodavatelm', db_path),
+        'semantic_search_processes': lambda: semantic_search_processes('úhrada účtov od dodávateľov', db_path),
+        'fetch_table_page_filtered': lambda: fetch_table_page('processes', 'obchod', db_path=db_path),
+    }
+
+
+def _handler_cases(db_path: str) -> Dict[str, Callable[[], Any]]:
+    """Handlery knowledge asistenta (bez AI - merajú sa len databázové cesty)"""
+    from adsun_knowledge_assistant import ADSUNKnowledgeAssistant
+
+    assistant = ADSUNKnowledgeAssistant(db_path)
+    return {
+        'handle_process_query': lambda: assistant._handle_process_query('ako prebieha fakturácia'),
+        'handle_departments_query': lambda: assistant._handle_departments_query('aké máme oddelenia'),
+        'handle_categories_query': lambda: assistant._handle_categories_query('aké sú kategórie'),
+        'handle_statistics_query': lambda: assistant._handle_statistics_query('koľko máme procesov'),
+        'handle_list_query': lambda: assistant._handle_list_query('zoznam všetkých procesov'),
+        'handle_people_query': lambda: assistant._handle_people_query('kto robí v obchode'),
+        'handle_general_search': lambda: assistant._handle_general_search('reklamácie zákazníkov'),
+        'search_processes': lambda: assistant._search_processes('objednávky'),
+    }
+
+
+@contextmanager
+def _without_openai():
+    """Handlery bez API kľúča nevolajú sieť, meria sa len práca s databázou"""
+    api_key = os.environ.pop('OPENAI_API_KEY', None)
+    try:
+        yield
+    finally:
+        if api_key is not None:
+            os.environ['OPENAI_API_KEY'] = api_key
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil metódou najbližšieho poradia"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def _result_rows(result) -> Optional[int]:
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, dict):
+        return len(result)
+    return None
+
+
+def measure(fn: Callable[[], Any], db_path: str, repeat: int = DEFAULT_REPEAT,
+            warmup: int = DEFAULT_WARMUP) -> Dict[str, Any]:
+    """Zmeria jednu funkciu: časy behov, počet SQL dotazov a kroky VM jedného behu"""
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Jeden beh navyše s počítadlom - pooled pripojenie je vnorením zdieľané s fn()
+    steps = [0]
+
+    def count_steps():
+        steps[0] += VM_STEP_GRANULARITY
+        return 0
+
+    reset_query_stats()
+    with get_connection(db_path) as conn:
+        conn.set_progress_handler(count_steps, VM_STEP_GRANULARITY)
+        try:
+            fn()
+        finally:
+            conn.set_progress_handler(None, 0)
+    queries = sum(stat['calls'] for stat in get_query_stats())
+
+    timings.sort()
+    return {
+        'runs': repeat,
+        'p50_ms': round(_percentile(timings, 50), 3),
+        'p95_ms': round(_percentile(timings, 95), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3) if timings else 0.0,
+        'max_ms': round(timings[-1], 3) if timings else 0.0,
+        'rows': _result_rows(result),
+        'queries': queries,
+        'vm_steps': steps[0],
+    }
+
+
+def run_benchmark(db_path: str, repeat: int = DEFAULT_REPEAT, warmup: int = DEFAULT_WARMUP,
+                  include_handlers: bool = True) -> Dict[str, Any]:
+    """Spustí všetky merania nad databázou a vráti report (dict pripravený na JSON)"""
+    from database_stats import get_table_counts
+
+    manager = IndexManager(db_path)
+    cases: Dict[str, Dict[str, Any]] = {}
+
+    for name, (sql, params) in {**HOT_QUERIES, **EXTRA_QUERIES}.items():
+        try:
+            stats = measure(lambda: fetch_all(sql, params, db_path=db_path), db_path, repeat, warmup)
+            stats.update(manager.explain(sql, params))
+        except sqlite3.Error as e:
+            stats = {'error': str(e)}
+        cases[f"query.{name}"] = {'kind': 'query', **stats}
+
+    groups = [('repository', _repository_cases(db_path))]
+    if include_handlers:
+        groups.append(('handler', _handler_cases(db_path)))
+    with _without_openai():
+        for kind, functions in groups:
+            for name, fn in functions.items():
+                try:
+                    stats = measure(fn, db_path, repeat, warmup)
+                except Exception as e:
+                    stats = {'error': str(e)}
+                cases[f"{kind}.{name}"] = {'kind': kind, **stats}
+
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'db_path': os.path.abspath(db_path),
+        'sqlite_version': sqlite3.sqlite_version,
+        'python_version': platform.python_version(),
+        'repeat': repeat,
+        'table_counts': get_table_counts(db_path),
+        'cases': cases,
+    }
+
+
+def write_report(report: Dict[str, Any], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = REGRESSION_THRESHOLD,
+                    min_delta_ms: float = REGRESSION_MIN_DELTA_MS) -> List[Dict[str, Any]]:
+    """Porovná p95 spoločných meraní, najväčšie zhoršenia sú prvé"""
+    rows = []
+    for name, case in current['cases'].items():
+        old = baseline.get('cases', {}).get(name)
+        if not old or 'p95_ms' not in old or 'p95_ms' not in case:
+            continue
+        delta = case['p95_ms'] - old['p95_ms']
+        change = delta / old['p95_ms'] if old['p95_ms'] else 0.0
+        rows.append({
+            'name': name,
+            'baseline_p95_ms': old['p95_ms'],
+            'current_p95_ms': case['p95_ms'],
+            'change': round(change, 3),
+            'regression': change > threshold and delta >= min_delta_ms,
+        })
+    rows.sort(key=lambda row: row['change'], reverse=True)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark databázovej vrstvy ADSUN")
+    parser.add_argument('db_path', help="Databáza na meranie")
+    parser.add_argument('--generate', metavar='SCALE',
+                        help="Najprv vygenerovať dáta v mierke (tiny/small/medium/large)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP)
+    parser.add_argument('--output', default=f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    parser.add_argument('--compare', metavar='BASELINE', help="Predošlý report na porovnanie")
+    parser.add_argument('--no-handlers', action='store_true', help="Bez handlerov knowledge asistenta")
+    args = parser.parse_args()
+
+    if args.generate:
+        from benchmark_data import SCALES, generate_dataset
+        print(f"🏗️ Generujem dáta ({args.generate})...")
+        print(f"✅ {generate_dataset(args.db_path, SCALES[args.generate])}")
+
+    report = run_benchmark(args.db_path, args.repeat, args.warmup, include_handlers=not args.no_handlers)
+    write_report(report, args.output)
+
+    print(f"\n{'meranie':<48} {'p50 ms':>9} {'p95 ms':>9} {'dotazy':>7} {'VM kroky':>10}")
+    for name, case in report['cases'].items():
+        if 'error' in case:
+            print(f"{name:<48} ❌ {case['error']}")
+            continue
+        scan = ' ⚠️ full scan' if case.get('full_scans') else ''
+        print(f"{name:<48} {case['p50_ms']:>9.2f} {case['p95_ms']:>9.2f} {case['queries']:>7} "
+              f"{case['vm_steps']:>10}{scan}")
+    print(f"\n📄 Report: {args.output}")
+
+    if args.compare:
+        regressions = [row for row in compare_reports(load_report(args.compare), report) if row['regression']]
+        if regressions:
+            print(f"\n⚠️ Regresie oproti {args.compare}:")
+            for row in regressions:
+                print(f"  - {row['name']}: {row['baseline_p95_ms']} → {row['current_p95_ms']} ms "
+                      f"(+{row['change']:.0%})")
+        else:
+            print(f"\n✅ Bez regresií oproti {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
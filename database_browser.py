@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Database Browser
+Filtrovanie v SQL a keyset stránkovanie tabuliek pre správu databázy
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from database_repository import get_connection
+from text_normalization import fold_text
+
+PAGE_SIZES = [25, 50, 100, 250]
+DEFAULT_PAGE_SIZE = 50
+
+
+def _escape_like(term: str) -> str:
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def table_columns(conn, table_name: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info(`{table_name}`)").fetchall()]
+
+
+def table_key_column(conn, table_name: str) -> Optional[str]:
+    """Stĺpec pre keyset stránkovanie - id, inak rowid (WITHOUT ROWID tabuľky nemajú žiadny)"""
+    if 'id' in table_columns(conn, table_name):
+        return 'id'
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (table_name,)).fetchone()
+    if row and row[0] and 'WITHOUT ROWID' in row[0].upper():
+        return None
+    return 'rowid'
+
+
+def build_filter(columns: List[str], search_term: str = '',
+                 search_column: Optional[str] = None) -> Tuple[str, List[Any]]:
+    """WHERE podmienka pre vyhľadávanie (bez diakritiky a veľkosti písmen).
+
+    search_column None = všetky stĺpce. Názvy stĺpcov sa berú len zo
+    skutočnej štruktúry tabuľky, hodnota ide ako parameter.
+    """
+    if not search_term:
+        return '', []
+    if search_column is not None and search_column not in columns:
+        raise ValueError(f"Neznámy stĺpec: {search_column}")
+    target_columns = [search_column] if search_column else columns
+    pattern = f"%{_escape_like(fold_text(search_term))}%"
+    conditions = [f"fold(`{col}`) LIKE ? ESCAPE '\\'" for col in target_columns]
+    return f"({' OR '.join(conditions)})", [pattern] * len(conditions)
+
+
+def fetch_table_page(table_name: str, search_term: str = '', search_column: Optional[str] = None,
+                     after: Optional[Any] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                     offset: int = 0, db_path: Optional[str] = None) -> Dict[str, Any]:
+    """Načíta jednu stranu tabuľky.
+
+    Pri keyset stránkovaní sa ďalšia strana pýta cez after=next_after, cena
+    strany je preto rovnaká na začiatku aj na konci tabuľky. Tabuľky bez
+    rowid používajú offset.
+    """
+    with get_connection(db_path) as conn:
+        columns = table_columns(conn, table_name)
+        key = table_key_column(conn, table_name)
+        where, params = build_filter(columns, search_term, search_column)
+        conditions = [where] if where else []
+
+        if key is not None:
+            select = f"SELECT {key} AS _page_key, *" if key == 'rowid' else "SELECT *"
+            if after is not None:
+                conditions.append(f"{key} > ?")
+                params.append(after)
+            order = f" ORDER BY {key}"
+        else:
+            select = "SELECT *"
+            order = ""
+
+        sql = f"{select} FROM `{table_name}`"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += order + " LIMIT ?"
+        params.append(page_size + 1)
+        if key is None:
+            sql += " OFFSET ?"
+            params.append(offset)
+
+        rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    next_after = None
+    if has_next and key is not None:
+        next_after = rows[-1]['_page_key' if key == 'rowid' else key]
+    if key == 'rowid':
+        for row in rows:
+            row.pop('_page_key')
+    return {
+        'columns': columns,
+        'rows': rows,
+        'has_next': has_next,
+        'next_after': next_after,
+        'keyset': key is not None,
+    }
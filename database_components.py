@@ -6,7 +6,11 @@ Database manager a súvisiace funkcie
 """
 
 import streamlit as st
-import sqlite3
+from database_repository import get_connection
+from database_writer import write
+from database_stats import get_breakdown, get_summary
+from process_steps import sync_process_steps
+from session_writer import build_session_payloads, write_sessions
 import json
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -15,14 +19,14 @@ from adsun_process_mapper_ai import ProcessContext
 class DatabaseManager:
     """Pôvodný SQLite manager pre backward compatibility"""
     
-    def __init__(self, db_path: str = "adsun_processes.db"):
+    def __init__(self, db_path: Optional[str] = None):
         self.db_path = db_path
     
     def save_process_session(self, process_name: str, conversation_history: List[Dict], 
                            context: ProcessContext, documenter: str) -> int:
         """Uloží session dokumentovania procesu do databázy"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            def _save(conn):
                 # Vytvor nový proces
                 cursor = conn.execute("""
                     INSERT INTO processes (name, category, trigger_type, owner, frequency, 
@@ -45,28 +49,14 @@ class DatabaseManager:
                 ))
                 
                 process_id = cursor.lastrowid
+                sync_process_steps(conn, process_id)
                 
-                # Ulož konverzačnú históriu
-                for i, entry in enumerate(conversation_history):
-                    conn.execute("""
-                        INSERT INTO documentation_sessions (process_id, documented_by, session_notes, 
-                                                          completeness_score, created_at)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (
-                        process_id,
-                        documenter,
-                        json.dumps({
-                            'step': i + 1,
-                            'question': entry['question'],
-                            'response': entry['response'],
-                            'analysis': entry.get('analysis', {}),
-                            'timestamp': entry['timestamp'].isoformat()
-                        }, ensure_ascii=False),
-                        min(len(conversation_history), 10),
-                        entry['timestamp']
-                    ))
-                
+                # Ulož konverzačnú históriu - jeden executemany v tej istej transakcii
+                write_sessions(conn, process_id, build_session_payloads(conversation_history, documenter))
                 return process_id
+            
+            # Zapisovač zoskupí súbežné uloženia do jednej transakcie bez 'database is locked'
+            return write(_save, self.db_path)
                 
         except Exception as e:
             st.error(f"❌ Chyba pri ukladaní: {e}")
@@ -75,12 +65,12 @@ class DatabaseManager:
     def load_process_sessions(self, documenter: str = None) -> List[Dict]:
         """Načíta sessions dokumentovania z databázy"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with get_connection(self.db_path) as conn:
                 
                 if documenter:
                     cursor = conn.execute("""
-                        SELECT p.*, ds.session_notes, ds.created_at as session_date
+                        SELECT p.*, ds.session_notes, ds.step, ds.question, ds.response,
+                               ds.created_at as session_date
                         FROM processes p
                         JOIN documentation_sessions ds ON p.id = ds.process_id
                         WHERE ds.documented_by = ?
@@ -88,7 +78,8 @@ class DatabaseManager:
                     """, (documenter,))
                 else:
                     cursor = conn.execute("""
-                        SELECT p.*, ds.session_notes, ds.created_at as session_date
+                        SELECT p.*, ds.session_notes, ds.step, ds.question, ds.response,
+                               ds.created_at as session_date
                         FROM processes p
                         JOIN documentation_sessions ds ON p.id = ds.process_id
                         ORDER BY ds.created_at DESC
@@ -100,40 +91,42 @@ class DatabaseManager:
             st.error(f"❌ Chyba pri načítavaní: {e}")
             return []
     
-    def get_process_statistics(self) -> Dict:
-        """Získa štatistiky z databázy"""
+    def load_process_history(self, process_id: int, step: Optional[int] = None) -> List[Dict]:
+        """História dokumentácie procesu po krokoch (voliteľne len jeden krok)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                # Základné počty
-                cursor = conn.execute("SELECT COUNT(*) FROM processes WHERE is_active = 1")
-                process_count = cursor.fetchone()[0]
-                
-                cursor = conn.execute("SELECT COUNT(*) FROM process_steps")
-                steps_count = cursor.fetchone()[0]
-                
-                cursor = conn.execute("SELECT COUNT(*) FROM documentation_sessions")
-                sessions_count = cursor.fetchone()[0]
-                
-                cursor = conn.execute("SELECT AVG(automation_readiness) FROM processes WHERE automation_readiness IS NOT NULL")
-                avg_automation = cursor.fetchone()[0] or 0
-                
-                # Top dokumentátori
-                cursor = conn.execute("""
-                    SELECT documented_by, COUNT(*) as session_count
-                    FROM documentation_sessions
-                    GROUP BY documented_by
-                    ORDER BY session_count DESC
-                    LIMIT 5
-                """)
-                top_documenters = cursor.fetchall()
+            sql = """
+                SELECT id, documented_by, step, question, response, analysis,
+                       session_timestamp, created_at
+                FROM documentation_sessions
+                WHERE process_id = ?
+            """
+            params: list = [process_id]
+            if step is not None:
+                sql += " AND step = ?"
+                params.append(step)
+            sql += " ORDER BY step, created_at"
+            with get_connection(self.db_path) as conn:
+                return [dict(row) for row in conn.execute(sql, params).fetchall()]
                 
-                return {
-                    'process_count': process_count,
-                    'steps_count': steps_count,
-                    'sessions_count': sessions_count,
-                    'avg_automation': avg_automation,
-                    'top_documenters': top_documenters
-                }
+        except Exception as e:
+            st.error(f"❌ Chyba pri načítavaní: {e}")
+            return []
+    
+    def get_process_statistics(self) -> Dict:
+        """Získa štatistiky z databázy (z tabuľky stats udržiavanej triggermi)"""
+        try:
+            summary = get_summary(self.db_path)
+            top_documenters = [
+                (row['key'], row['count']) for row in get_breakdown('documenter', self.db_path, limit=5)
+            ]
+            
+            return {
+                'process_count': summary['process_count'],
+                'steps_count': summary['steps_count'],
+                'sessions_count': summary['sessions_count'],
+                'avg_automation': summary['avg_automation'],
+                'top_documenters': top_documenters
+            }
                 
         except Exception as e:
             st.error(f"❌ Chyba pri načítavaní štatistík: {e}")
@@ -148,8 +141,7 @@ class DatabaseManager:
     def get_all_processes(self) -> List[Dict]:
         """Načíta všetky procesy pre zobrazenie"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with get_connection(self.db_path) as conn:
                 
                 cursor = conn.execute("""
                     SELECT p.*, COUNT(ps.id) as step_count
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Database Export
+Streamovaný export tabuliek a filtrovaných dotazov do CSV / JSONL / Parquet.
+Riadky idú z kurzora po dávkach priamo do dočasného súboru, pamäť ostáva ohraničená.
+"""
+
+import csv
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from database_browser import build_filter, table_columns, table_key_column
+from database_repository import get_connection
+
+EXPORT_CHUNK_SIZE = 5000
+
+# formát -> (mime, prípona)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'jsonl': ('application/x-ndjson', '.jsonl'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+}
+
+
+def available_export_formats() -> List[str]:
+    """Formáty ktoré sa dajú v tomto prostredí vytvoriť - Parquet len s nainštalovaným pyarrow"""
+    formats = ['csv', 'jsonl']
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return formats
+    return formats + ['parquet']
+
+
+def _iter_chunks(cursor, chunk_size: int) -> Iterator[List[tuple]]:
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield [tuple(row) for row in rows]
+
+
+def _json_value(value):
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def _write_csv(path: str, columns: List[str], chunks: Iterator[List[tuple]]) -> int:
+    count = 0
+    # utf-8-sig aby Excel správne zobrazil diakritiku
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def _write_jsonl(path: str, columns: List[str], chunks: Iterator[List[tuple]]) -> int:
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for rows in chunks:
+            f.writelines(
+                json.dumps(dict(zip(columns, map(_json_value, row))), ensure_ascii=False, default=str) + '\n'
+                for row in rows
+            )
+            count += len(rows)
+    return count
+
+
+def _parquet_schema(conn, sql: str, params: Sequence, columns: List[str]):
+    """Typy stĺpcov podľa skutočných hodnôt (SQLite má dynamické typy).
+
+    Jeden prechod cez typeof() - čisto celé čísla -> int64, čísla -> float64,
+    čisto BLOB -> binary, inak (text alebo mix) -> string.
+    """
+    import pyarrow as pa
+
+    checks = []
+    for i in range(len(columns)):
+        for kind in ('integer', 'real', 'text', 'blob'):
+            checks.append(f"MAX(typeof(c{i}) = '{kind}')")
+    aliased = ', '.join('"{}" AS c{}'.format(col.replace('"', '""'), i) for i, col in enumerate(columns))
+    row = conn.execute(f"SELECT {', '.join(checks)} FROM (SELECT {aliased} FROM ({sql}))", params).fetchone()
+
+    fields = []
+    kinds = []
+    for i, col in enumerate(columns):
+        has_int, has_real, has_text, has_blob = (bool(v) for v in row[i * 4:i * 4 + 4])
+        if has_blob and not (has_int or has_real or has_text):
+            kind = pa.binary()
+        elif has_text or has_blob or not (has_int or has_real):
+            kind = pa.string()
+        elif has_real:
+            kind = pa.float64()
+        else:
+            kind = pa.int64()
+        fields.append(pa.field(col, kind))
+        kinds.append(kind)
+    return pa.schema(fields), kinds
+
+
+def _write_parquet(path: str, columns: List[str], chunks: Iterator[List[tuple]], schema_info) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema, kinds = schema_info
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            arrays = []
+            for i, kind in enumerate(kinds):
+                values = [row[i] for row in rows]
+                if kind == pa.string():
+                    values = [None if v is None else str(v) for v in values]
+                arrays.append(pa.array(values, type=kind))
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            count += len(rows)
+    return count
+
+
+def export_query(sql: str, params: Sequence = (), fmt: str = 'csv', db_path: Optional[str] = None,
+                 chunk_size: int = EXPORT_CHUNK_SIZE, directory: Optional[str] = None) -> Dict[str, Any]:
+    """Exportuje výsledok dotazu do dočasného súboru.
+
+    Vráti {'path', 'rows', 'mime', 'extension'}; súbor maže volajúci.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Nepodporovaný formát exportu: {fmt}")
+    if fmt not in available_export_formats():
+        raise ValueError(f"Export do {fmt.upper()} vyžaduje balík pyarrow (pip install pyarrow)")
+    mime, extension = EXPORT_FORMATS[fmt]
+    fd, path = tempfile.mkstemp(prefix='adsun_export_', suffix=extension, dir=directory)
+    os.close(fd)
+
+    try:
+        with get_connection(db_path) as conn:
+            schema_info = None
+            if fmt == 'parquet':
+                columns = [d[0] for d in conn.execute(f"SELECT * FROM ({sql}) LIMIT 0", params).description]
+                schema_info = _parquet_schema(conn, sql, params, columns)
+            cursor = conn.execute(sql, params)
+            columns = [d[0] for d in cursor.description]
+            chunks = _iter_chunks(cursor, chunk_size)
+            if fmt == 'csv':
+                rows = _write_csv(path, columns, chunks)
+            elif fmt == 'jsonl':
+                rows = _write_jsonl(path, columns, chunks)
+            else:
+                rows = _write_parquet(path, columns, chunks, schema_info)
+    except Exception:
+        os.remove(path)
+        raise
+
+    return {'path': path, 'rows': rows, 'mime': mime, 'extension': extension}
+
+
+def table_export_query(table_name: str, search_term: str = '', search_column: Optional[str] = None,
+                       db_path: Optional[str] = None) -> Tuple[str, List[Any]]:
+    """SELECT pre celú tabuľku s rovnakým filtrom ako prehliadač tabuliek"""
+    with get_connection(db_path) as conn:
+        columns = table_columns(conn, table_name)
+        key = table_key_column(conn, table_name)
+    where, params = build_filter(columns, search_term, search_column)
+    sql = f"SELECT * FROM `{table_name}`"
+    if where:
+        sql += f" WHERE {where}"
+    if key:
+        sql += f" ORDER BY {key}"
+    return sql, params
+
+
+def export_table(table_name: str, fmt: str = 'csv', search_term: str = '', search_column: Optional[str] = None,
+                 db_path: Optional[str] = None, chunk_size: int = EXPORT_CHUNK_SIZE,
+                 directory: Optional[str] = None) -> Dict[str, Any]:
+    """Exportuje celú (prípadne filtrovanú) tabuľku, pridá navrhovaný názov súboru"""
+    sql, params = table_export_query(table_name, search_term, search_column, db_path)
+    result = export_query(sql, params, fmt, db_path, chunk_size, directory)
+    result['file_name'] = f"{table_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{result['extension']}"
+    return result
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Database Indexes
+Správa sekundárnych indexov deklarovaných v DATABASE_SCHEMA
+"""
+
+import re
+import streamlit as st
+import pandas as pd
+from typing import Dict, List, Optional, Any
+
+from database_repository import get_connection
+from database_schema import DATABASE_SCHEMA
+
+# Najčastejšie dotazy aplikácie - kontrolujeme pre ne plán vykonania
+HOT_QUERIES = {
+    'get_all_processes': ("""
+        SELECT p.*, COUNT(ps.id) as step_count
+        FROM processes p
+        LEFT JOIN process_steps ps ON p.id = ps.process_id
+        WHERE p.is_active = 1
+        GROUP BY p.id
+        ORDER BY p.created_at DESC
+    """, ()),
+    '_handle_people_query': ("""
+        SELECT owner, COUNT(*) as process_count,
+               GROUP_CONCAT(DISTINCT category) as categories
+        FROM processes
+        WHERE owner IS NOT NULL AND is_active = 1
+        GROUP BY owner
+        ORDER BY process_count DESC
+    """, ()),
+    'render_departments': ("""
+        SELECT category, COUNT(*) as process_count,
+               AVG(automation_readiness) as avg_automation,
+               GROUP_CONCAT(DISTINCT owner) as employees
+        FROM processes
+        WHERE is_active = 1 AND category IS NOT NULL
+        GROUP BY category
+        ORDER BY process_count DESC
+    """, ()),
+    'show_department_processes': ("""
+        SELECT name, owner, priority, automation_readiness
+        FROM processes
+        WHERE category = ? AND is_active = 1
+        ORDER BY priority DESC, name
+    """, ('obchod',)),
+    'load_process_sessions': ("""
+        SELECT p.*, ds.session_notes, ds.step, ds.question, ds.response,
+               ds.created_at as session_date
+        FROM processes p
+        JOIN documentation_sessions ds ON p.id = ds.process_id
+        WHERE ds.documented_by = ?
+        ORDER BY ds.created_at DESC
+    """, ('Mária Novák',)),
+    'show_process_details': ("""
+        SELECT documented_by, created_at, step, question, response, session_notes
+        FROM documentation_sessions
+        WHERE process_id = ?
+        ORDER BY created_at DESC
+        LIMIT 3
+    """, (1,)),
+    'load_process_history': ("""
+        SELECT id, documented_by, step, question, response, analysis,
+               session_timestamp, created_at
+        FROM documentation_sessions
+        WHERE process_id = ? AND step = ?
+        ORDER BY step, created_at
+    """, (1, 1)),
+}
+
+_SQL_KEYWORDS = {'AND', 'OR', 'NOT', 'IS', 'NULL', 'IN', 'LIKE', 'BETWEEN'}
+
+
+class IndexManager:
+    """Vytvára, overuje a analyzuje indexy deklarované v DATABASE_SCHEMA"""
+
+    def __init__(self, db_path: Optional[str] = None, schema: Optional[Dict] = None):
+        self.db_path = db_path
+        self.schema = schema or DATABASE_SCHEMA
+
+    def declared_indexes(self) -> List[Dict[str, Any]]:
+        """Vráti zoznam deklarovaných indexov s názvom tabuľky"""
+        indexes = []
+        for table_name, table_info in self.schema.items():
+            for index in table_info.get('indexes', []):
+                indexes.append({'table': table_name, **index})
+        return indexes
+
+    @staticmethod
+    def index_sql(index: Dict[str, Any]) -> str:
+        """Zostaví CREATE INDEX príkaz (prípadne s WHERE pre partial index)"""
+        columns = ', '.join(index['columns'])
+        sql = f"CREATE INDEX IF NOT EXISTS {index['name']} ON {index['table']} ({columns})"
+        if index.get('where'):
+            sql += f" WHERE {index['where']}"
+        return sql
+
+    def _table_columns(self, conn, table: str) -> List[str]:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info(`{table}`)").fetchall()]
+
+    def _missing_columns(self, conn, index: Dict[str, Any]) -> List[str]:
+        existing = set(self._table_columns(conn, index['table']))
+        needed = list(index['columns'])
+        # Stĺpce použité v podmienke partial indexu musia tiež existovať
+        for word in re.findall(r'[A-Za-z_]+', index.get('where', '')):
+            if word.upper() not in _SQL_KEYWORDS and word not in needed:
+                needed.append(word)
+        return [col for col in needed if col not in existing]
+
+    def ensure_indexes(self) -> Dict[str, List]:
+        """Vytvorí chýbajúce indexy, tabuľky bez potrebných stĺpcov preskočí"""
+        result = {'created': [], 'existing': [], 'skipped': []}
+        with get_connection(self.db_path) as conn:
+            existing = {
+                row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+            }
+            for index in self.declared_indexes():
+                missing = self._missing_columns(conn, index)
+                if missing:
+                    result['skipped'].append((index['name'], f"chýbajú stĺpce: {', '.join(missing)}"))
+                    continue
+                if index['name'] in existing:
+                    result['existing'].append(index['name'])
+                    continue
+                conn.execute(self.index_sql(index))
+                result['created'].append(index['name'])
+        return result
+
+    def verify_indexes(self) -> List[Dict[str, Any]]:
+        """Porovná deklarované indexy so skutočným stavom databázy"""
+        report = []
+        with get_connection(self.db_path) as conn:
+            for index in self.declared_indexes():
+                row = conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (index['name'],)
+                ).fetchone()
+                if row is None:
+                    status = 'missing'
+                else:
+                    actual_columns = [r[2] for r in conn.execute(f"PRAGMA index_info(`{index['name']}`)").fetchall()]
+                    is_partial = ' WHERE ' in (row[0] or '').upper()
+                    if actual_columns != list(index['columns']) or is_partial != bool(index.get('where')):
+                        status = 'different'
+                    else:
+                        status = 'ok'
+                report.append({
+                    'name': index['name'],
+                    'table': index['table'],
+                    'columns': ', '.join(index['columns']),
+                    'where': index.get('where', ''),
+                    'status': status
+                })
+        return report
+
+    def analyze(self):
+        """Aktualizuje štatistiky pre query planner"""
+        with get_connection(self.db_path) as conn:
+            conn.execute("ANALYZE")
+
+    def explain(self, sql: str, params=()) -> Dict[str, Any]:
+        """Vráti EXPLAIN QUERY PLAN pre dotaz a označí full table scany"""
+        with get_connection(self.db_path) as conn:
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+        full_scans = [
+            step for step in plan
+            if step.startswith('SCAN ') and 'USING' not in step
+        ]
+        return {'plan': plan, 'full_scans': full_scans}
+
+    def explain_hot_queries(self) -> Dict[str, Dict[str, Any]]:
+        """EXPLAIN QUERY PLAN pre všetky známe hot queries"""
+        results = {}
+        for name, (sql, params) in HOT_QUERIES.items():
+            try:
+                results[name] = self.explain(sql, params)
+            except Exception as e:
+                results[name] = {'plan': [], 'full_scans': [], 'error': str(e)}
+        return results
+
+
+def render_index_management():
+    """Zobrazí stav indexov a plány vykonania hot queries"""
+    st.markdown("### ⚡ Indexy a výkon dotazov")
+
+    manager = IndexManager()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🛠️ Vytvoriť chýbajúce indexy"):
+            try:
+                result = manager.ensure_indexes()
+                st.success(f"✅ Vytvorených: {len(result['created'])}, existujúcich: {len(result['existing'])}")
+                for name, reason in result['skipped']:
+                    st.warning(f"⚠️ {name} preskočený - {reason}")
+            except Exception as e:
+                st.error(f"❌ Chyba vytvárania indexov: {e}")
+    with col2:
+        if st.button("📊 Spustiť ANALYZE"):
+            try:
+                manager.analyze()
+                st.success("✅ Štatistiky pre query planner aktualizované")
+            except Exception as e:
+                st.error(f"❌ Chyba ANALYZE: {e}")
+
+    st.markdown("#### 📋 Deklarované indexy")
+    try:
+        report = manager.verify_indexes()
+        status_labels = {'ok': '✅ OK', 'missing': '❌ Chýba', 'different': '⚠️ Líši sa'}
+        df = pd.DataFrame([
+            {
+                'Index': item['name'],
+                'Tabuľka': item['table'],
+                'Stĺpce': item['columns'],
+                'Podmienka': item['where'] or '-',
+                'Stav': status_labels[item['status']]
+            }
+            for item in report
+        ])
+        st.dataframe(df, use_container_width=True, hide_index=True)
+    except Exception as e:
+        st.error(f"❌ Chyba overovania indexov: {e}")
+
+    st.markdown("#### 🔍 EXPLAIN QUERY PLAN pre hot queries")
+    for name, result in manager.explain_hot_queries().items():
+        if result.get('error'):
+            icon = "❌"
+        elif result['full_scans']:
+            icon = "⚠️"
+        else:
+            icon = "✅"
+        with st.expander(f"{icon} {name}"):
+            if result.get('error'):
+                st.error(f"❌ {result['error']}")
+                continue
+            st.code("\n".join(result['plan']) or "-", language="text")
+            if result['full_scans']:
+                st.warning(f"⚠️ Full table scan: {', '.join(result['full_scans'])}")
@@ -5,8 +5,17 @@ ADSUN Database Management
 Správa databázy s prehľadom tabuliek a priamou editáciou
 """
 
+import os
 import streamlit as st
-import sqlite3
+from database_repository import get_connection, get_query_stats, reset_query_stats
+from database_writer import get_write_metrics, write
+from query_cache import get_cache_stats
+from answer_cache import get_answer_cache_stats
+from intent_cache import get_intent_cache_stats
+from openai_clients import ai_enabled, get_openai_stats
+from database_stats import STATS_TABLE, check_stats, get_table_counts
+from database_browser import DEFAULT_PAGE_SIZE, PAGE_SIZES, fetch_table_page
+from database_export import available_export_formats, export_table
 import pandas as pd
 from datetime import datetime
 from typing import Dict, List, Optional, Any
@@ -47,7 +56,7 @@ def render_database_management():
 def get_database_tables() -> List[Dict]:
     """Získa zoznam všetkých tabuliek v databáze"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
+        with get_connection() as conn:
             # Získaj zoznam tabuliek
             cursor = conn.execute("""
                 SELECT name FROM sqlite_master 
@@ -56,12 +65,18 @@ def get_database_tables() -> List[Dict]:
             """)
             table_names = [row[0] for row in cursor.fetchall()]
             
+            # Hlavné tabuľky majú počty v tabuľke stats
+            tracked_counts = get_table_counts() if STATS_TABLE in table_names else {}
+            
             tables = []
             for table_name in table_names:
                 # Spočítaj záznamy v každej tabuľke
                 try:
-                    cursor = conn.execute(f"SELECT COUNT(*) FROM `{table_name}`")
-                    count = cursor.fetchone()[0]
+                    if table_name in tracked_counts:
+                        count = tracked_counts[table_name]
+                    else:
+                        cursor = conn.execute(f"SELECT COUNT(*) FROM `{table_name}`")
+                        count = cursor.fetchone()[0]
                     tables.append({
                         'name': table_name,
                         'count': count
@@ -81,7 +96,7 @@ def get_database_tables() -> List[Dict]:
 def get_table_structure(table_name: str) -> List[Dict]:
     """Získa štruktúru tabuľky"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
+        with get_connection() as conn:
             cursor = conn.execute(f"PRAGMA table_info(`{table_name}`)")
             columns = []
             for row in cursor.fetchall():
@@ -118,40 +133,45 @@ def render_table_management(table_name: str):
         render_add_record(table_name)
 
 def render_table_data(table_name: str):
-    """Zobrazí dáta z tabuľky"""
+    """Zobrazí dáta z tabuľky - filter v SQL, keyset stránkovanie"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            # Načítaj dáta
-            df = pd.read_sql_query(f"SELECT * FROM `{table_name}` LIMIT 100", conn)
-            
-            if df.empty:
-                st.info("📭 Tabuľka je prázdna")
-                return
-            
-            st.markdown(f"**Zobrazených: {len(df)} záznamov (max 100)**")
-            
-            # Filter a vyhľadávanie
-            if len(df.columns) > 0:
-                col1, col2 = st.columns([2, 1])
-                
-                with col1:
-                    search_term = st.text_input("🔍 Vyhľadávanie:", placeholder="Zadajte text na vyhľadanie...")
-                
-                with col2:
-                    search_column = st.selectbox("🎯 V stĺpci:", ["Všetky"] + list(df.columns))
-                
-                # Filtrovanie
-                if search_term:
-                    if search_column == "Všetky":
-                        # Hľadaj vo všetkých textových stĺpcoch
-                        mask = df.astype(str).apply(lambda x: x.str.contains(search_term, case=False, na=False)).any(axis=1)
-                        df = df[mask]
-                    else:
-                        # Hľadaj v konkrétnom stĺpci
-                        mask = df[search_column].astype(str).str.contains(search_term, case=False, na=False)
-                        df = df[mask]
-                    
-                    st.markdown(f"**Nájdených: {len(df)} záznamov**")
+        columns = [col['name'] for col in get_table_structure(table_name)]
+        
+        # Filter a vyhľadávanie
+        col1, col2, col3 = st.columns([2, 1, 1])
+        
+        with col1:
+            search_term = st.text_input("🔍 Vyhľadávanie:", placeholder="Zadajte text na vyhľadanie...")
+        
+        with col2:
+            search_column = st.selectbox("🎯 V stĺpci:", ["Všetky"] + columns)
+        
+        with col3:
+            page_size = st.selectbox("📄 Na stranu:", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE))
+        
+        # Stav stránkovania - pri zmene filtra začíname od prvej strany
+        state_key = f"db_browser_{table_name}"
+        page_filter = (search_term, search_column, page_size)
+        state = st.session_state.get(state_key)
+        if not state or state['filter'] != page_filter:
+            state = {'filter': page_filter, 'cursors': [], 'offset': 0}
+            st.session_state[state_key] = state
+        
+        page = fetch_table_page(
+            table_name,
+            search_term=search_term,
+            search_column=None if search_column == "Všetky" else search_column,
+            after=state['cursors'][-1] if state['cursors'] else None,
+            page_size=page_size,
+            offset=state['offset']
+        )
+        df = pd.DataFrame(page['rows'], columns=page['columns'])
+        page_number = (len(state['cursors']) if page['keyset'] else state['offset'] // page_size) + 1
+        
+        if df.empty:
+            st.info("📭 Žiadne záznamy" if search_term else "📭 Tabuľka je prázdna")
+        else:
+            st.markdown(f"**Strana {page_number} · zobrazených: {len(df)} záznamov**")
             
             # Zobrazenie dát
             # Konvertuj všetky hodnoty na stringy pre PyArrow kompatibilitu
@@ -169,43 +189,79 @@ def render_table_data(table_name: str):
                     ) for col in df.columns
                 }
             )
-            
-            # Export možnosti
-            col1, col2, col3 = st.columns([1, 1, 2])
+        
+        # Navigácia medzi stranami
+        nav1, nav2, _ = st.columns([1, 1, 2])
+        with nav1:
+            if st.button("⬅️ Predchádzajúca", disabled=page_number == 1):
+                if page['keyset']:
+                    state['cursors'].pop()
+                else:
+                    state['offset'] = max(0, state['offset'] - page_size)
+                st.rerun()
+        with nav2:
+            if st.button("Ďalšia ➡️", disabled=not page['has_next']):
+                if page['keyset']:
+                    state['cursors'].append(page['next_after'])
+                else:
+                    state['offset'] += page_size
+                st.rerun()
+        
+        # Export možnosti - celá tabuľka s aktuálnym filtrom, nie len zobrazená strana
+        col1, col2, col3 = st.columns([1, 1, 2])
+        
+        with col1:
+            export_formats = available_export_formats()
+            export_format = st.selectbox("📦 Formát exportu:", export_formats, format_func=str.upper)
+            if 'parquet' not in export_formats:
+                st.caption("ℹ️ Export do Parquet je dostupný po inštalácii balíka pyarrow")
+            if st.button("📥 Pripraviť export"):
+                render_table_export(
+                    table_name, export_format, search_term,
+                    None if search_column == "Všetky" else search_column
+                )
+        
+        with col2:
+            if st.button("🗑️ Zmazať všetko"):
+                st.session_state.confirm_delete_all = table_name
+        
+        # Potvrdenie mazania
+        if st.session_state.get('confirm_delete_all') == table_name:
+            st.warning("⚠️ Naozaj chcete zmazať všetky záznamy z tejto tabuľky?")
+            col1, col2 = st.columns(2)
             
             with col1:
-                if st.button("📥 Export CSV"):
-                    csv = df.to_csv(index=False)
-                    st.download_button(
-                        label="💾 Stiahnuť CSV",
-                        data=csv,
-                        file_name=f"{table_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                        mime='text/csv'
-                    )
+                if st.button("✅ Áno, zmazať všetko", type="primary"):
+                    delete_all_records(table_name)
+                    del st.session_state.confirm_delete_all
+                    st.rerun()
             
             with col2:
-                if st.button("🗑️ Zmazať všetko"):
-                    st.session_state.confirm_delete_all = table_name
-            
-            # Potvrdenie mazania
-            if st.session_state.get('confirm_delete_all') == table_name:
-                st.warning("⚠️ Naozaj chcete zmazať všetky záznamy z tejto tabuľky?")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    if st.button("✅ Áno, zmazať všetko", type="primary"):
-                        delete_all_records(table_name)
-                        del st.session_state.confirm_delete_all
-                        st.rerun()
-                
-                with col2:
-                    if st.button("❌ Zrušiť"):
-                        del st.session_state.confirm_delete_all
-                        st.rerun()
-            
+                if st.button("❌ Zrušiť"):
+                    del st.session_state.confirm_delete_all
+                    st.rerun()
+        
     except Exception as e:
         st.error(f"❌ Chyba načítavania dát: {e}")
 
+def render_table_export(table_name: str, export_format: str, search_term: str, search_column: Optional[str]):
+    """Vytvorí exportný súbor (streamovane z kurzora) a ponúkne ho na stiahnutie"""
+    with st.spinner("📦 Exportujem..."):
+        export = export_table(table_name, export_format, search_term, search_column)
+    # Súbor sa prečíta raz pri vykreslení a zmaže sa - nenačítava sa pri každom rerune;
+    # kliknutie nespustí rerun, tlačidlo teda ostane do ďalšej akcie
+    try:
+        with open(export['path'], 'rb') as export_file:
+            st.download_button(
+                label=f"💾 Stiahnuť {export['file_name']} ({export['rows']} záznamov)",
+                data=export_file,
+                file_name=export['file_name'],
+                mime=export['mime'],
+                on_click='ignore'
+            )
+    finally:
+        os.remove(export['path'])
+
 def render_table_structure(table_name: str):
     """Zobrazí štruktúru tabuľky"""
     columns = get_table_structure(table_name)
@@ -238,7 +294,7 @@ def render_table_structure(table_name: str):
     # Dodatočné informácie
     with st.expander("📊 Ďalšie informácie"):
         try:
-            with sqlite3.connect("adsun_processes.db") as conn:
+            with get_connection() as conn:
                 # Počet záznamov
                 cursor = conn.execute(f"SELECT COUNT(*) FROM `{table_name}`")
                 count = cursor.fetchone()[0]
@@ -267,7 +323,7 @@ def render_table_edit(table_name: str):
     st.markdown("### ✏️ Editácia záznamov")
     
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
+        with get_connection() as conn:
             # Načítaj prvých 20 záznamov na editáciu
             df = pd.read_sql_query(f"SELECT * FROM `{table_name}` LIMIT 20", conn)
             
@@ -431,70 +487,62 @@ def render_add_record(table_name: str):
 def update_record(table_name: str, record_id: int, values: Dict[str, Any]):
     """Aktualizuje záznam v databáze"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            # Vytvor SET clause
-            set_clauses = []
-            params = []
-            
-            for col_name, value in values.items():
-                set_clauses.append(f"`{col_name}` = ?")
-                params.append(value)
-            
-            # Pridaj updated_at ak existuje
-            try:
-                columns = get_table_structure(table_name)
-                if any(col['name'] == 'updated_at' for col in columns):
-                    set_clauses.append("`updated_at` = CURRENT_TIMESTAMP")
-            except:
-                pass
-            
-            params.append(record_id)
-            
-            query = f"UPDATE `{table_name}` SET {', '.join(set_clauses)} WHERE id = ?"
-            conn.execute(query, params)
-            conn.commit()
-            
+        # Vytvor SET clause
+        set_clauses = []
+        params = []
+        
+        for col_name, value in values.items():
+            set_clauses.append(f"`{col_name}` = ?")
+            params.append(value)
+        
+        # Pridaj updated_at ak existuje
+        try:
+            columns = get_table_structure(table_name)
+            if any(col['name'] == 'updated_at' for col in columns):
+                set_clauses.append("`updated_at` = CURRENT_TIMESTAMP")
+        except:
+            pass
+        
+        params.append(record_id)
+        
+        query = f"UPDATE `{table_name}` SET {', '.join(set_clauses)} WHERE id = ?"
+        write(lambda conn: conn.execute(query, params))
+        
     except Exception as e:
         st.error(f"❌ Chyba aktualizácie: {e}")
 
 def delete_record(table_name: str, record_id: int):
     """Zmaže záznam z databázy"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            conn.execute(f"DELETE FROM `{table_name}` WHERE id = ?", (record_id,))
-            conn.commit()
+        write(lambda conn: conn.execute(f"DELETE FROM `{table_name}` WHERE id = ?", (record_id,)))
     except Exception as e:
         st.error(f"❌ Chyba mazania: {e}")
 
 def add_record(table_name: str, values: Dict[str, Any]):
     """Pridá nový záznam do databázy"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            columns = list(values.keys())
-            placeholders = ["?" for _ in columns]
-            
-            # Pridaj created_at ak existuje
-            try:
-                table_columns = get_table_structure(table_name)
-                if any(col['name'] == 'created_at' for col in table_columns):
-                    columns.append('created_at')
-                    placeholders.append('CURRENT_TIMESTAMP')
-            except:
-                pass
-            
-            query = f"INSERT INTO `{table_name}` ({', '.join([f'`{col}`' for col in columns])}) VALUES ({', '.join(placeholders)})"
-            conn.execute(query, list(values.values()))
-            conn.commit()
-            
+        columns = list(values.keys())
+        placeholders = ["?" for _ in columns]
+        
+        # Pridaj created_at ak existuje
+        try:
+            table_columns = get_table_structure(table_name)
+            if any(col['name'] == 'created_at' for col in table_columns):
+                columns.append('created_at')
+                placeholders.append('CURRENT_TIMESTAMP')
+        except:
+            pass
+        
+        query = f"INSERT INTO `{table_name}` ({', '.join([f'`{col}`' for col in columns])}) VALUES ({', '.join(placeholders)})"
+        write(lambda conn: conn.execute(query, list(values.values())))
+        
     except Exception as e:
         st.error(f"❌ Chyba pridávania: {e}")
 
 def delete_all_records(table_name: str):
     """Zmaže všetky záznamy z tabuľky"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            conn.execute(f"DELETE FROM `{table_name}`")
-            conn.commit()
+        write(lambda conn: conn.execute(f"DELETE FROM `{table_name}`"))
     except Exception as e:
         st.error(f"❌ Chyba mazania: {e}")
 
@@ -503,7 +551,7 @@ def show_database_statistics():
     st.markdown("### 📈 Štatistiky databázy")
     
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
+        with get_connection() as conn:
             # Celková veľkosť databázy
             cursor = conn.execute("SELECT page_count * page_size as size FROM pragma_page_count(), pragma_page_size()")
             db_size = cursor.fetchone()[0]
@@ -539,6 +587,77 @@ def show_database_statistics():
                     use_container_width=True,
                     hide_index=True
                 )
-            
+
+        # Časovanie dotazov zo zdieľaného poolu pripojení
+        query_stats = get_query_stats()
+        if query_stats:
+            st.markdown("#### ⏱️ Časovanie SQL dotazov")
+            df_queries = pd.DataFrame(query_stats[:20])[['sql', 'calls', 'total_ms', 'avg_ms', 'max_ms']]
+            df_queries = df_queries.round({'total_ms': 2, 'avg_ms': 2, 'max_ms': 2})
+            df_queries = df_queries.rename(columns={
+                'sql': 'Dotaz', 'calls': 'Volania', 'total_ms': 'Celkom (ms)',
+                'avg_ms': 'Priemer (ms)', 'max_ms': 'Max (ms)'
+            })
+            st.dataframe(df_queries, use_container_width=True, hide_index=True)
+
+            if st.button("🔄 Vynulovať časovanie"):
+                reset_query_stats()
+                st.rerun()
+
+        # Fronta zápisov - hĺbka a latencia commitov zapisovača
+        for writer in get_write_metrics():
+            st.markdown("#### ✍️ Fronta zápisov")
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("📥 Vo fronte", writer['queue_depth'], help=f"Maximum: {writer['max_queue_depth']}")
+            with col2:
+                st.metric("✅ Commity", writer['commits'],
+                          help=f"Zápisov: {writer['completed']}, priemerne {writer['avg_batch_size']} na commit")
+            with col3:
+                st.metric("⏱️ Commit p95", f"{writer['p95_commit_ms']:.1f} ms",
+                          help=f"Priemer: {writer['avg_commit_ms']:.1f} ms, čakanie vo fronte {writer['avg_wait_ms']:.1f} ms")
+            with col4:
+                st.metric("❌ Zlyhané", writer['failed'])
+
+        # Cache čítaní (platná do najbližšieho zápisu podľa PRAGMA data_version)
+        cache_stats = get_cache_stats()
+        if cache_stats['hits'] or cache_stats['misses']:
+            st.caption(
+                f"🗃️ Cache čítaní: {cache_stats['hits']} zásahov, {cache_stats['misses']} načítaní "
+                f"({cache_stats['hit_rate']:.0%}), uložených {cache_stats['entries']}"
+            )
+
+        intent_stats = get_intent_cache_stats()
+        if intent_stats['entries']:
+            st.caption(
+                f"🧠 Cache intentov: {intent_stats['entries']} otázok, zásahy {intent_stats['hits']}/"
+                f"{intent_stats['hits'] + intent_stats['misses']} ({intent_stats['hit_rate']:.0%}) · "
+                f"ušetrené {intent_stats['saved_ms'] / 1000:.1f} s "
+                f"(celkovo {intent_stats['total_hits']} zásahov, {intent_stats['total_saved_ms'] / 1000:.1f} s)"
+            )
+        answer_stats = get_answer_cache_stats()
+        if answer_stats['entries']:
+            st.caption(
+                f"💬 Cache odpovedí: {answer_stats['entries']} odpovedí, zásahy {answer_stats['hits']}/"
+                f"{answer_stats['hits'] + answer_stats['misses']} ({answer_stats['hit_rate']:.0%}) · "
+                f"celkovo {answer_stats['total_hits']} zásahov"
+            )
+        openai_stats = get_openai_stats()
+        if openai_stats['calls']:
+            st.caption(
+                f"🔌 OpenAI: {openai_stats['clients']} zdieľaných klientov · {openai_stats['calls']} volaní · "
+                f"{openai_stats['retries']} opakovaní · {openai_stats['failures']} zlyhaní"
+                + ("" if ai_enabled() else " · ⛔ AI vypnuté")
+            )
+
+        # Kontrola súhrnnej tabuľky stats voči skutočným dátam
+        if st.button("🧮 Skontrolovať a prepočítať štatistiky"):
+            mismatches = check_stats()
+            if mismatches:
+                st.warning(f"⚠️ Opravených nezhôd: {len(mismatches)}")
+                st.dataframe(pd.DataFrame(mismatches).astype(str), use_container_width=True, hide_index=True)
+            else:
+                st.success("✅ Štatistiky sú konzistentné")
+
     except Exception as e:
-        st.error(f"❌ Chyba štatistík: {e}") 
\ No newline at end of file
+        st.error(f"❌ Chyba štatistík: {e}")
\ No newline at end of file
@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Database Migrations
+Verzionované migrácie schémy - každý krok sa vykoná práve raz pri štarte
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from database_repository import get_connection, resolve_db_path
+
+logger = logging.getLogger(__name__)
+
+# progress(label, hotovo, celkom)
+ProgressCallback = Callable[[str, int, int], None]
+
+COPY_BATCH_SIZE = 500
+MIGRATION_LOCK_TIMEOUT_MS = 120000
+
+
+@dataclass
+class Migration:
+    """Jeden krok migrácie schémy"""
+    version: int
+    description: str
+    apply: Callable
+
+
+def _table_exists(conn, table: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def _table_columns(conn, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info(`{table}`)").fetchall()]
+
+
+def _add_missing_columns(conn, table: str, columns: Dict[str, str]) -> List[str]:
+    """Pridá stĺpce ktoré v tabuľke chýbajú, vráti zoznam pridaných"""
+    existing = set(_table_columns(conn, table))
+    added = []
+    for name, definition in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE `{table}` ADD COLUMN `{name}` {definition}")
+            added.append(name)
+    return added
+
+
+def copy_table_in_batches(conn, source: str, target: str, column_map: Dict[str, str],
+                          batch_size: int = COPY_BATCH_SIZE,
+                          progress: Optional[ProgressCallback] = None,
+                          label: str = "") -> int:
+    """Skopíruje riadky zo source do target po dávkach podľa rowid.
+
+    column_map mapuje cieľový stĺpec na SQL výraz nad zdrojovou tabuľkou.
+    Pamäť ostáva konštantná aj pri veľkých tabuľkách a po každej dávke
+    sa zavolá progress callback.
+    """
+    total = conn.execute(f"SELECT COUNT(*) FROM `{source}`").fetchone()[0]
+    target_columns = ", ".join(f"`{col}`" for col in column_map)
+    source_exprs = ", ".join(column_map.values())
+    placeholders = ", ".join("?" for _ in column_map)
+    insert_sql = f"INSERT INTO `{target}` ({target_columns}) VALUES ({placeholders})"
+    select_sql = (
+        f"SELECT rowid, {source_exprs} FROM `{source}` "
+        f"WHERE rowid > ? ORDER BY rowid LIMIT ?"
+    )
+
+    copied = 0
+    last_rowid = -1
+    if progress:
+        progress(label or target, 0, total)
+    while True:
+        rows = conn.execute(select_sql, (last_rowid, batch_size)).fetchall()
+        if not rows:
+            break
+        conn.executemany(insert_sql, [tuple(row)[1:] for row in rows])
+        last_rowid = rows[-1][0]
+        copied += len(rows)
+        if progress:
+            progress(label or target, copied, total)
+    return copied
+
+
+# --- Jednotlivé kroky migrácie -------------------------------------------------
+
+# Aktuálna podoba základných tabuliek aplikácie
+BASE_TABLES = {
+    'processes': """
+    CREATE TABLE IF NOT EXISTS processes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        category TEXT NOT NULL DEFAULT '',
+        description TEXT DEFAULT '',
+        owner TEXT NOT NULL DEFAULT '',
+        steps TEXT DEFAULT '',
+        step_details TEXT DEFAULT '',
+        frequency TEXT DEFAULT '',
+        duration_minutes INTEGER DEFAULT 0,
+        priority INTEGER DEFAULT 3,
+        volume_per_period INTEGER,
+        tools TEXT DEFAULT '',
+        risks TEXT DEFAULT '',
+        automation_readiness INTEGER DEFAULT 3,
+        improvements TEXT DEFAULT '',
+        trigger_type TEXT NOT NULL DEFAULT 'manuálny proces',
+        success_criteria TEXT DEFAULT 'dokončenie úloh',
+        common_problems TEXT DEFAULT 'žiadne známe problémy',
+        tags TEXT DEFAULT '',
+        is_active BOOLEAN DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    'process_steps': """
+    CREATE TABLE IF NOT EXISTS process_steps (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        process_id INTEGER NOT NULL,
+        step_number INTEGER NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        description TEXT NOT NULL,
+        responsible_person VARCHAR(255) NOT NULL,
+        system_tool VARCHAR(255),
+        input_data TEXT,
+        action_details TEXT NOT NULL,
+        output_data TEXT,
+        decision_logic TEXT,
+        estimated_time_minutes INTEGER,
+        is_automated BOOLEAN DEFAULT 0,
+        automation_potential INTEGER CHECK(automation_potential >= 1 AND automation_potential <= 5),
+        FOREIGN KEY (process_id) REFERENCES processes(id) ON DELETE CASCADE
+    )
+    """,
+    'process_relationships': """
+    CREATE TABLE IF NOT EXISTS process_relationships (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        process_a_id INTEGER NOT NULL,
+        process_b_id INTEGER NOT NULL,
+        relationship_type VARCHAR(50) NOT NULL,
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (process_a_id) REFERENCES processes(id) ON DELETE CASCADE,
+        FOREIGN KEY (process_b_id) REFERENCES processes(id) ON DELETE CASCADE
+    )
+    """,
+    'process_resources': """
+    CREATE TABLE IF NOT EXISTS process_resources (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        process_id INTEGER NOT NULL,
+        resource_type VARCHAR(100) NOT NULL,
+        resource_name VARCHAR(255) NOT NULL,
+        resource_url VARCHAR(500),
+        description TEXT,
+        is_critical BOOLEAN DEFAULT 0,
+        FOREIGN KEY (process_id) REFERENCES processes(id) ON DELETE CASCADE
+    )
+    """,
+    'documentation_sessions': """
+    CREATE TABLE IF NOT EXISTS documentation_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        process_id INTEGER NOT NULL,
+        documented_by VARCHAR(255) NOT NULL,
+        session_notes TEXT,
+        ai_analysis TEXT,
+        completeness_score INTEGER CHECK(completeness_score >= 1 AND completeness_score <= 10),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (process_id) REFERENCES processes(id) ON DELETE CASCADE
+    )
+    """,
+    'departments': """
+    CREATE TABLE IF NOT EXISTS departments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        function TEXT,
+        manager TEXT,
+        processes TEXT,
+        staff_count TEXT,
+        competencies TEXT,
+        collaboration TEXT,
+        tools TEXT,
+        challenges TEXT,
+        success_metrics TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    'positions': """
+    CREATE TABLE IF NOT EXISTS positions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT,
+        department TEXT,
+        level TEXT,
+        responsibilities TEXT,
+        requirements TEXT,
+        tools_systems TEXT,
+        work_time TEXT,
+        challenges TEXT,
+        success_metrics TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+}
+
+
+def _create_base_tables(conn, progress):
+    """Základné tabuľky aplikácie (no-op pre existujúce databázy)"""
+    for ddl in BASE_TABLES.values():
+        conn.execute(ddl)
+
+
+def _add_process_columns(conn, progress):
+    """Stĺpce ktoré save_process_to_db predtým pridával pri každom uložení"""
+    added = _add_missing_columns(conn, 'processes', {
+        'description': "TEXT DEFAULT ''",
+        'steps': "TEXT DEFAULT ''",
+        'step_details': "TEXT DEFAULT ''",
+        'tools': "TEXT DEFAULT ''",
+        'risks': "TEXT DEFAULT ''",
+        'improvements': "TEXT DEFAULT ''",
+        'trigger_type': "TEXT DEFAULT 'manuálny proces'",
+        'success_criteria': "TEXT DEFAULT 'dokončenie úloh'",
+        'common_problems': "TEXT DEFAULT 'žiadne známe problémy'",
+        'frequency': "TEXT DEFAULT ''",
+        'duration_minutes': "INTEGER DEFAULT 0",
+        'priority': "INTEGER DEFAULT 3",
+        'volume_per_period': "INTEGER",
+        'automation_readiness': "INTEGER DEFAULT 3",
+        'tags': "TEXT DEFAULT ''",
+        'is_active': "BOOLEAN DEFAULT 1",
+        # ALTER TABLE nepovoľuje DEFAULT CURRENT_TIMESTAMP - hodnoty doplníme nižšie
+        'created_at': "TIMESTAMP",
+        'updated_at': "TIMESTAMP",
+    })
+    if 'created_at' in added:
+        conn.execute("UPDATE processes SET created_at = CURRENT_TIMESTAMP")
+    if 'updated_at' in added:
+        conn.execute("UPDATE processes SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)")
+
+
+def _add_department_columns(conn, progress):
+    """Staršie databázy mali oddelenia len s popisom a manažérom"""
+    added = _add_missing_columns(conn, 'departments', {
+        'function': "TEXT",
+        'processes': "TEXT",
+        'staff_count': "TEXT",
+        'competencies': "TEXT",
+        'collaboration': "TEXT",
+        'tools': "TEXT",
+        'challenges': "TEXT",
+        'success_metrics': "TEXT",
+        'updated_at': "TIMESTAMP",
+    })
+    if 'function' in added and 'description' in _table_columns(conn, 'departments'):
+        conn.execute("UPDATE departments SET function = description WHERE function IS NULL")
+    if 'updated_at' in added:
+        conn.execute("UPDATE departments SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)")
+
+
+def _rebuild_legacy_positions(conn, progress):
+    """Pôvodná tabuľka positions (title, department_id) -> nový formát"""
+    columns = _table_columns(conn, 'positions')
+    if 'name' in columns or 'title' not in columns:
+        return
+
+    conn.execute("ALTER TABLE positions RENAME TO positions_legacy")
+    conn.execute(BASE_TABLES['positions'])
+
+    legacy_columns = set(columns)
+    column_map = {
+        'id': 'id',
+        'name': 'title',
+        'department': (
+            "(SELECT d.name FROM departments d WHERE d.id = positions_legacy.department_id)"
+            if 'department_id' in legacy_columns else "NULL"
+        ),
+        'description': 'description' if 'description' in legacy_columns else "''",
+        'responsibilities': 'responsibilities' if 'responsibilities' in legacy_columns else "''",
+        'created_at': 'created_at' if 'created_at' in legacy_columns else 'CURRENT_TIMESTAMP',
+        'updated_at': 'created_at' if 'created_at' in legacy_columns else 'CURRENT_TIMESTAMP',
+    }
+    copy_table_in_batches(conn, 'positions_legacy', 'positions', column_map,
+                          progress=progress, label="Pozície")
+    conn.execute("DROP TABLE positions_legacy")
+
+
+def _create_declared_indexes(conn, progress):
+    """Sekundárne indexy deklarované v DATABASE_SCHEMA"""
+    from database_indexes import IndexManager
+    db_path = conn.execute("PRAGMA database_list").fetchone()[2]
+    IndexManager(db_path).ensure_indexes()
+
+
+def _create_search_index(conn, progress):
+    """FTS5 index procesov - bez FTS5 modulu ostane vyhľadávanie cez LIKE"""
+    from process_search import create_search_index
+    try:
+        create_search_index(conn)
+    except sqlite3.OperationalError as e:
+        if 'fts5' not in str(e).lower():
+            raise
+        logger.warning("SQLite bez FTS5 - fulltextový index preskočený: %s", e)
+
+
+def _add_folded_columns(conn, progress):
+    """Tieňové stĺpce bez diakritiky pre name/category/owner + folded FTS index"""
+    from process_search import FOLDED_COLUMNS, create_search_triggers, rebuild_search_index
+    _add_missing_columns(conn, 'processes', {f"{col}_folded": "TEXT" for col in FOLDED_COLUMNS})
+    for col in FOLDED_COLUMNS:
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_processes_{col}_folded ON processes ({col}_folded) WHERE is_active = 1"
+        )
+    # Zložený a stemovaný text počíta Python (process_search), triggery len logujú zmeny
+    create_search_triggers(conn)
+    rebuild_search_index(conn)
+
+
+def _create_change_log(conn, progress):
+    """Log zmenených procesov - podľa neho sa inkrementálne dopĺňa trigramový index"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS process_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            process_id INTEGER NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS processes_changes_insert AFTER INSERT ON processes BEGIN
+            INSERT INTO process_changes (process_id) VALUES (new.id);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS processes_changes_update
+        AFTER UPDATE OF name, owner, tags, is_active ON processes BEGIN
+            INSERT INTO process_changes (process_id) VALUES (new.id);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS processes_changes_delete AFTER DELETE ON processes BEGIN
+            INSERT INTO process_changes (process_id) VALUES (old.id);
+        END
+    """)
+
+
+def _create_stats_table(conn, progress):
+    from database_stats import create_stats_table
+    create_stats_table(conn)
+
+
+# Polia JSON-u v session_notes -> vlastné stĺpce documentation_sessions
+SESSION_NOTE_COLUMNS = {
+    'step': ('INTEGER', '$.step'),
+    'question': ('TEXT', '$.question'),
+    'response': ('TEXT', '$.response'),
+    'analysis': ('TEXT', '$.analysis'),
+    'session_timestamp': ('TEXT', '$.timestamp'),
+}
+
+
+def backfill_session_columns(conn, batch_size: int = COPY_BATCH_SIZE,
+                             progress: Optional[ProgressCallback] = None) -> int:
+    """Rozbalí session_notes do stĺpcov po dávkach podľa id.
+
+    Riadky s neplatným JSON-om (voľný text) ostanú so stĺpcami NULL,
+    pôvodný session_notes sa nemení.
+    """
+    total = conn.execute("SELECT COUNT(*) FROM documentation_sessions").fetchone()[0]
+    if not total:
+        return 0
+    assignments = ', '.join(
+        f"{col} = json_extract(session_notes, '{path}')" for col, (_, path) in SESSION_NOTE_COLUMNS.items()
+    )
+    done = 0
+    last_id = -1
+    if progress:
+        progress("Dokumentačné sessions", 0, total)
+    while True:
+        ids = [row[0] for row in conn.execute(
+            "SELECT id FROM documentation_sessions WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+        ).fetchall()]
+        if not ids:
+            break
+        conn.execute(f"""
+            UPDATE documentation_sessions SET {assignments}
+            WHERE id BETWEEN ? AND ? AND json_valid(session_notes)
+              AND json_type(session_notes) = 'object'
+        """, (ids[0], ids[-1]))
+        last_id = ids[-1]
+        done += len(ids)
+        if progress:
+            progress("Dokumentačné sessions", done, total)
+    return done
+
+
+def _promote_session_notes(conn, progress):
+    """Krok, otázka, odpoveď, analýza a čas session ako stĺpce s indexom (process_id, step)"""
+    _add_missing_columns(conn, 'documentation_sessions', {
+        col: sql_type for col, (sql_type, _) in SESSION_NOTE_COLUMNS.items()
+    })
+    backfill_session_columns(conn, progress=progress)
+    _create_declared_indexes(conn, progress)
+
+
+def _extract_process_steps(conn, progress):
+    """Zdroj kroku (manual/text), indexy pre agregácie a rozklad existujúcich procesov"""
+    _add_missing_columns(conn, 'process_steps', {'source': "TEXT DEFAULT 'manual'"})
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_steps_process ON process_steps (process_id, step_number)")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_steps_responsible
+        ON process_steps (responsible_person, process_id, estimated_time_minutes)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_steps_tool_automatable
+        ON process_steps (system_tool, automation_potential, process_id, estimated_time_minutes)
+        WHERE is_automated = 0
+    """)
+    from process_steps import backfill_process_steps
+    backfill_process_steps(conn, progress=progress)
+
+
+def _create_vector_change_log(conn, progress):
+    """Log zmien textu procesov - podľa neho sa inkrementálne dopĺňa vektorový index"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS process_vector_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            process_id INTEGER NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS processes_vector_changes_insert AFTER INSERT ON processes BEGIN
+            INSERT INTO process_vector_changes (process_id) VALUES (new.id);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS processes_vector_changes_update
+        AFTER UPDATE OF name, category, owner, tags, description, is_active ON processes BEGIN
+            INSERT INTO process_vector_changes (process_id) VALUES (new.id);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS processes_vector_changes_delete AFTER DELETE ON processes BEGIN
+            INSERT INTO process_vector_changes (process_id) VALUES (old.id);
+        END
+    """)
+
+
+def _create_content_version(conn, progress):
+    """Verzia obsahu zvyšovaná triggermi pri zápisoch - podľa nej platia odpovede v cache asistenta"""
+    from answer_cache import VERSIONED_TABLES
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS content_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO content_version (id, version) VALUES (1, 0)")
+    for table in VERSIONED_TABLES:
+        if not _table_exists(conn, table):
+            continue
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_content_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE content_version SET version = version + 1 WHERE id = 1;
+                END
+            """)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Základné tabuľky", _create_base_tables),
+    Migration(2, "Chýbajúce stĺpce procesov (description, steps, is_active, updated_at…)", _add_process_columns),
+    Migration(3, "Chýbajúce stĺpce oddelení", _add_department_columns),
+    Migration(4, "Prestavba pôvodnej tabuľky pozícií", _rebuild_legacy_positions),
+    Migration(5, "Sekundárne indexy z DATABASE_SCHEMA", _create_declared_indexes),
+    Migration(6, "Fulltextový FTS5 index procesov", _create_search_index),
+    Migration(7, "Vyhľadávanie bez diakritiky (tieňové stĺpce, stemovaný FTS)", _add_folded_columns),
+    Migration(8, "Log zmien procesov pre trigramový index", _create_change_log),
+    Migration(9, "Súhrnná tabuľka štatistík udržiavaná triggermi", _create_stats_table),
+    Migration(10, "Stĺpce histórie dokumentácie namiesto JSON v session_notes", _promote_session_notes),
+    Migration(11, "Kroky procesov rozložené z textu do process_steps", _extract_process_steps),
+    Migration(12, "Log zmien procesov pre vektorový index", _create_vector_change_log),
+    Migration(13, "Verzia obsahu pre cache odpovedí asistenta", _create_content_version),
+]
+
+
+# --- Spúšťanie migrácií ---------------------------------------------------------
+
+_migration_lock = threading.Lock()
+_migrated_paths = set()
+
+
+def get_schema_version(db_path: Optional[str] = None) -> int:
+    """Vráti aktuálnu verziu schémy (0 ak ešte neprebehla žiadna migrácia)"""
+    with get_connection(db_path) as conn:
+        if not _table_exists(conn, 'schema_version'):
+            return 0
+        return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def reset_migration_cache(db_path: Optional[str] = None):
+    """Zabudne že databáza je zmigrovaná (napr. po obnove zo zálohy)"""
+    with _migration_lock:
+        _migrated_paths.discard(os.path.abspath(resolve_db_path(db_path)))
+
+
+def run_migrations(db_path: Optional[str] = None,
+                   progress: Optional[ProgressCallback] = None,
+                   migrations: Optional[List[Migration]] = None) -> List[int]:
+    """Vykoná všetky čakajúce migrácie a vráti zoznam aplikovaných verzií.
+
+    V rámci procesu chráni beh threading zámok, medzi procesmi (viac
+    Streamlit workerov) BEGIN EXCLUSIVE - druhý worker počká a po získaní
+    zámku už nájde schému aktuálnu.
+    """
+    key = os.path.abspath(resolve_db_path(db_path))
+    use_default = migrations is None
+    migrations = sorted(migrations or MIGRATIONS, key=lambda m: m.version)
+
+    with _migration_lock:
+        if use_default and key in _migrated_paths:
+            return []
+
+        applied = []
+        with get_connection(db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.commit()
+
+            busy_timeout = conn.execute("PRAGMA busy_timeout").fetchone()[0]
+            conn.execute(f"PRAGMA busy_timeout = {MIGRATION_LOCK_TIMEOUT_MS}")
+            try:
+                conn.execute("BEGIN EXCLUSIVE")
+            finally:
+                conn.execute(f"PRAGMA busy_timeout = {busy_timeout}")
+
+            try:
+                current = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+                for migration in migrations:
+                    if migration.version <= current:
+                        continue
+                    migration.apply(conn, progress)
+                    conn.execute(
+                        "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                        (migration.version, migration.description)
+                    )
+                    applied.append(migration.version)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+        if use_default:
+            _migrated_paths.add(key)
+        return applied
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Database Repository
+Zdieľaný thread-safe pool SQLite pripojení a spoločná vrstva pre čítanie a zápis
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from text_normalization import register_sql_functions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "adsun_processes.db"
+
+# PRAGMA nastavenia - aplikujú sa raz pri vytvorení každého pripojenia
+CONNECTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,        # ms čakania na zámok zapisovača
+    'synchronous': 'NORMAL',     # v WAL režime bezpečné a výrazne rýchlejšie
+    'cache_size': -20000,        # záporná hodnota = KiB (~20 MB page cache)
+    'mmap_size': 268435456,      # 256 MB memory-mapped I/O
+}
+
+POOL_SIZE = 8
+POOL_TIMEOUT_SECONDS = 30.0
+
+# Koľko poolov (databáz tenantov) držať otvorených naraz a kedy zavrieť nepoužívaný pool
+MAX_OPEN_POOLS = 16
+POOL_IDLE_SECONDS = 600.0
+
+
+class QueryStats:
+    """Thread-safe počítadlá trvania SQL dotazov"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def normalize_sql(sql: str) -> str:
+        """Zjednotí whitespace aby sa rovnaký dotaz počítal spolu"""
+        return ' '.join(sql.split())[:300]
+
+    def record(self, sql: str, duration_ms: float):
+        key = self.normalize_sql(sql)
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                entry = {'sql': key, 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+                self._stats[key] = entry
+            entry['calls'] += 1
+            entry['total_ms'] += duration_ms
+            if duration_ms > entry['max_ms']:
+                entry['max_ms'] = duration_ms
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Vráti kópiu počítadiel zoradenú podľa celkového času"""
+        with self._lock:
+            rows = [dict(entry) for entry in self._stats.values()]
+        for row in rows:
+            row['avg_ms'] = row['total_ms'] / row['calls'] if row['calls'] else 0.0
+        rows.sort(key=lambda r: r['total_ms'], reverse=True)
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+_query_stats = QueryStats()
+
+
+class _TimedCursor(sqlite3.Cursor):
+    """Kurzor ktorý meria trvanie každého dotazu"""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _query_stats.record(sql, (time.perf_counter() - start) * 1000)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _query_stats.record(sql, (time.perf_counter() - start) * 1000)
+
+
+# Profiler aktívny v aktuálnom vlákne (jeden beh Streamlit skriptu), None = vypnutý
+_profiler_local = threading.local()
+
+
+def set_query_profiler(profiler):
+    """Nastaví profiler pre aktuálne vlákno (objekt s metódou record(sql, duration_ms, rows) -> dict)"""
+    _profiler_local.profiler = profiler
+
+
+def get_query_profiler():
+    return getattr(_profiler_local, 'profiler', None)
+
+
+# Databáza tenanta aktuálneho vlákna (nastavuje ju tenant router pre beh skriptu)
+_tenant_local = threading.local()
+
+
+def set_current_db_path(db_path: Optional[str]):
+    """Nastaví databázu ktorú v tomto vlákne použijú volania bez db_path (None = predvolená)"""
+    _tenant_local.db_path = db_path
+
+
+def get_current_db_path() -> Optional[str]:
+    return getattr(_tenant_local, 'db_path', None)
+
+
+def resolve_db_path(db_path: Optional[str] = None) -> str:
+    """Explicitná cesta, inak databáza tenanta aktuálneho vlákna, inak DEFAULT_DB_PATH"""
+    return db_path or get_current_db_path() or DEFAULT_DB_PATH
+
+
+class _ProfiledCursor(_TimedCursor):
+    """Kurzor pre profilovanie - k záznamu dotazu pripočíta čas a počet riadkov pri fetch"""
+
+    profiler = None
+    entry = None
+
+    def _record(self, sql, start):
+        rows = self.rowcount if self.rowcount >= 0 else 0
+        self.entry = self.profiler.record(sql, (time.perf_counter() - start) * 1000, rows)
+
+    def _fetched(self, start, count):
+        if self.entry is not None:
+            self.entry['duration_ms'] += (time.perf_counter() - start) * 1000
+            self.entry['rows'] += count
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(sql, start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(sql, start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        row = super().__next__()
+        self._fetched(start, 1)
+        return row
+
+
+class _TimedConnection(sqlite3.Connection):
+    """Pripojenie ktoré všetky dotazy smeruje cez merací kurzor"""
+
+    def cursor(self, factory=_TimedCursor):
+        profiler = get_query_profiler()
+        if profiler is not None and factory is _TimedCursor:
+            cursor = super().cursor(_ProfiledCursor)
+            cursor.profiler = profiler
+            return cursor
+        return super().cursor(factory)
+
+    # Connection.execute v C volá kurzor priamo, preto ho treba prepísať explicitne
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            _query_stats.record(sql_script, duration_ms)
+            profiler = get_query_profiler()
+            if profiler is not None:
+                profiler.record(sql_script, duration_ms, 0)
+
+
+class ConnectionPool:
+    """Thread-safe pool SQLite pripojení zdieľaný všetkými Streamlit sessions"""
+
+    def __init__(self, db_path: str, size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT_SECONDS):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+        self.last_used = time.monotonic()
+
+    def _create_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,  # pripojenie môže po vrátení do poolu použiť iné vlákno
+            factory=_TimedConnection
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in CONNECTION_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        register_sql_functions(conn)
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+
+        if can_create:
+            try:
+                return self._create_connection()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Pool pripojení pre {self.db_path} je vyčerpaný ({self.size} pripojení)"
+            )
+
+    def _release(self, conn: sqlite3.Connection):
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Požičia pripojenie z poolu.
+
+        Vnorené volania v rovnakom vlákne dostanú to isté pripojenie, takže
+        jedna otázka v chate už neotvára viacero pripojení. Transakciu
+        potvrdí (alebo pri chybe vráti) až najvonkajší blok.
+        """
+        self.last_used = time.monotonic()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+            if conn.in_transaction:
+                sync_derived_data(conn)
+                conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._release(conn)
+
+    def close(self):
+        """Zatvorí všetky nečinné pripojenia a ďalšie vrátené pripojenia"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def current_connection(self) -> Optional[sqlite3.Connection]:
+        """Pripojenie ktoré má aktuálne vlákno práve požičané (inak None)"""
+        return getattr(self._local, 'conn', None)
+
+    @property
+    def in_use(self) -> int:
+        """Počet práve požičaných pripojení"""
+        return self._created - self._idle.qsize()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'db_path': self.db_path,
+            'size': self.size,
+            'created': self._created,
+            'idle': self._idle.qsize()
+        }
+
+
+# LRU poolov - najdlhšie nepoužitý je prvý
+_pools: "OrderedDict[str, ConnectionPool]" = OrderedDict()
+_pools_lock = threading.Lock()
+
+# Čo uvoľniť keď sa pool databázy zatvorí (zapisovač, plánovač záloh, indexy v pamäti...)
+_close_hooks: List[Callable[[str], None]] = []
+
+
+def on_pool_closed(hook: Callable[[str], None]):
+    """Zaregistruje hook(absolútna cesta databázy) volaný po zatvorení jej poolu"""
+    _close_hooks.append(hook)
+
+
+def _run_close_hooks(db_path: str):
+    for hook in list(_close_hooks):
+        try:
+            hook(os.path.abspath(db_path))
+        except Exception as e:
+            logger.warning("Uvoľnenie %s: %s", db_path, e)
+
+
+def _close_pools(pools: List[ConnectionPool]):
+    for pool in pools:
+        pool.close()
+        _run_close_hooks(pool.db_path)
+
+
+def _evict_pools(max_open: int) -> List[ConnectionPool]:
+    """Vyradí najdlhšie nepoužité pooly nad limit (volá sa so zámkom _pools_lock)"""
+    evicted = []
+    for key in list(_pools):
+        if len(_pools) <= max_open:
+            break
+        if _pools[key].in_use == 0:
+            evicted.append(_pools.pop(key))
+    return evicted
+
+
+def get_pool(db_path: Optional[str] = None) -> ConnectionPool:
+    """Vráti (a pri prvom použití vytvorí) pool pre danú databázu"""
+    path = resolve_db_path(db_path)
+    key = os.path.abspath(path)
+    evicted = []
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(path)
+            _pools[key] = pool
+            evicted = _evict_pools(MAX_OPEN_POOLS)
+        else:
+            _pools.move_to_end(key)
+    _close_pools(evicted)
+    return pool
+
+
+def close_idle_pools(max_idle_seconds: float = POOL_IDLE_SECONDS) -> int:
+    """Zavrie pooly ktoré dlhšie nikto nepoužil a nemajú požičané pripojenie, vráti ich počet.
+
+    Spolu s poolom sa uvoľní všetko čo k databáze patrí (hooky z on_pool_closed).
+    """
+    now = time.monotonic()
+    with _pools_lock:
+        idle = [key for key, pool in _pools.items()
+                if pool.in_use == 0 and now - pool.last_used >= max_idle_seconds]
+        pools = [_pools.pop(key) for key in idle]
+    _close_pools(pools)
+    return len(pools)
+
+
+def close_pool(db_path: Optional[str] = None):
+    """Zavrie pool jednej databázy a uvoľní jej prostriedky (napr. pred obnovou zo zálohy)"""
+    with _pools_lock:
+        pool = _pools.pop(os.path.abspath(resolve_db_path(db_path)), None)
+    if pool is not None:
+        pool.close()
+    _run_close_hooks(resolve_db_path(db_path))
+
+
+def get_pool_status() -> List[Dict[str, Any]]:
+    """Stav otvorených poolov od naposledy použitého"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.status() for pool in reversed(pools)]
+
+
+def sync_derived_data(conn):
+    """Pred COMMIT dopočíta tieňové stĺpce a FTS text zmenených procesov.
+
+    Počíta sa v Pythone, nie v triggeroch - zápis tak funguje aj z pripojení
+    mimo poolu. Chyba synchronizácie nezruší samotný zápis (doplní sa neskôr).
+    """
+    from process_search import sync_search_index  # process_search importuje tento modul
+    try:
+        sync_search_index(conn)
+    except sqlite3.Error as e:
+        logger.warning("Synchronizácia vyhľadávania: %s", e)
+
+
+@contextmanager
+def get_connection(db_path: Optional[str] = None):
+    """Context manager pre pripojenie zo zdieľaného poolu"""
+    with get_pool(db_path).connection() as conn:
+        yield conn
+
+
+def fetch_all(sql: str, params: Sequence = (), db_path: Optional[str] = None) -> List[Dict]:
+    """Vykoná SELECT a vráti všetky riadky ako slovníky"""
+    with get_connection(db_path) as conn:
+        return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+
+def fetch_one(sql: str, params: Sequence = (), db_path: Optional[str] = None) -> Optional[Dict]:
+    """Vykoná SELECT a vráti prvý riadok ako slovník"""
+    with get_connection(db_path) as conn:
+        row = conn.execute(sql, params).fetchone()
+        return dict(row) if row is not None else None
+
+
+def fetch_value(sql: str, params: Sequence = (), db_path: Optional[str] = None, default: Any = None) -> Any:
+    """Vykoná SELECT a vráti prvú hodnotu prvého riadku"""
+    with get_connection(db_path) as conn:
+        row = conn.execute(sql, params).fetchone()
+        if row is None or row[0] is None:
+            return default
+        return row[0]
+
+
+def execute(sql: str, params: Sequence = (), db_path: Optional[str] = None) -> sqlite3.Cursor:
+    """Vykoná zápis v transakcii a vráti kurzor (lastrowid, rowcount)"""
+    with get_connection(db_path) as conn:
+        return conn.execute(sql, params)
+
+
+def execute_many(sql: str, seq_of_params: Iterable[Sequence], db_path: Optional[str] = None) -> int:
+    """Vykoná dávkový zápis v jednej transakcii a vráti počet ovplyvnených riadkov"""
+    with get_connection(db_path) as conn:
+        return conn.executemany(sql, seq_of_params).rowcount
+
+
+def get_query_stats() -> List[Dict[str, Any]]:
+    """Vráti počítadlá trvania dotazov (calls, total_ms, avg_ms, max_ms)"""
+    return _query_stats.snapshot()
+
+
+def reset_query_stats():
+    """Vynuluje počítadlá trvania dotazov"""
+    _query_stats.reset()
+
+
+def close_all_pools():
+    """Zatvorí všetky pooly - používa sa pri testoch a vypínaní"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -5,8 +5,12 @@ ADSUN Database Schema Management
 Štandardizácia štruktúry databázy pre kompatibilitu s Airtable
 """
 
+import os
 import streamlit as st
-import sqlite3
+from database_repository import get_connection
+from database_migrations import copy_table_in_batches
+from database_backup import RetentionPolicy, apply_retention, backup_dir, create_backup, list_backups, restore_backup
+from process_steps import sync_process_steps
 from typing import Dict, List, Any
 from datetime import datetime
 
@@ -32,7 +36,15 @@ DATABASE_SCHEMA = {
             'is_active': {'type': 'BOOLEAN', 'default': True, 'airtable_type': 'checkbox'},
             'created_at': {'type': 'TIMESTAMP', 'default': 'CURRENT_TIMESTAMP', 'airtable_type': 'created_time'},
             'updated_at': {'type': 'TIMESTAMP', 'default': 'CURRENT_TIMESTAMP', 'airtable_type': 'last_modified_time'}
-        }
+        },
+        'indexes': [
+            {'name': 'idx_processes_active_category', 'columns': ['category', 'owner', 'automation_readiness'],
+             'where': 'is_active = 1', 'description': 'Oddelenia a kategórie (GROUP BY category)'},
+            {'name': 'idx_processes_active_owner', 'columns': ['owner', 'category'],
+             'where': 'is_active = 1', 'description': 'Ľudia a vlastníci procesov (GROUP BY owner)'},
+            {'name': 'idx_processes_active_created', 'columns': ['created_at'],
+             'where': 'is_active = 1', 'description': 'Zoznam procesov podľa dátumu vytvorenia'}
+        ]
     },
     
     'departments': {
@@ -83,9 +95,22 @@ DATABASE_SCHEMA = {
             'process_id': {'type': 'INTEGER', 'airtable_type': 'link_to_record'},
             'documented_by': {'type': 'TEXT', 'required': True, 'airtable_type': 'single_line_text'},
             'session_notes': {'type': 'TEXT', 'airtable_type': 'long_text'},
+            'step': {'type': 'INTEGER', 'airtable_type': 'number'},
+            'question': {'type': 'TEXT', 'airtable_type': 'long_text'},
+            'response': {'type': 'TEXT', 'airtable_type': 'long_text'},
+            'analysis': {'type': 'TEXT', 'airtable_type': 'long_text'},
+            'session_timestamp': {'type': 'TEXT', 'airtable_type': 'single_line_text'},
             'ai_analysis': {'type': 'TEXT', 'airtable_type': 'long_text'},
             'created_at': {'type': 'TIMESTAMP', 'default': 'CURRENT_TIMESTAMP', 'airtable_type': 'created_time'}
-        }
+        },
+        'indexes': [
+            {'name': 'idx_sessions_process', 'columns': ['process_id', 'created_at'],
+             'description': 'Sessions konkrétneho procesu'},
+            {'name': 'idx_sessions_process_step', 'columns': ['process_id', 'step', 'created_at'],
+             'description': 'Konkrétny krok dokumentácie procesu'},
+            {'name': 'idx_sessions_documented_by', 'columns': ['documented_by', 'created_at'],
+             'description': 'Sessions podľa dokumentátora'}
+        ]
     }
 }
 
@@ -109,7 +134,7 @@ def render_database_schema():
     st.markdown("*Štandardizovaná štruktúra pre kompatibilitu s Airtable*")
     
     # Tabs pre rôzne sekcie
-    tab1, tab2, tab3, tab4 = st.tabs(["📊 Prehľad schémy", "🔄 Migrácia", "📋 Airtable mapping", "🛠️ Úpravy"])
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📊 Prehľad schémy", "🔄 Migrácia", "📋 Airtable mapping", "🛠️ Úpravy", "⚡ Indexy", "💾 Zálohy"])
     
     with tab1:
         render_schema_overview()
@@ -122,6 +147,13 @@ def render_database_schema():
     
     with tab4:
         render_schema_modifications()
+    
+    with tab5:
+        from database_indexes import render_index_management
+        render_index_management()
+    
+    with tab6:
+        render_backups()
 
 def render_schema_overview():
     """Zobrazí prehľad schémy"""
@@ -205,7 +237,7 @@ def render_migration_tools():
 def analyze_current_structure():
     """Analyzuje aktuálnu štruktúru databázy"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
+        with get_connection() as conn:
             cursor = conn.execute("""
                 SELECT name FROM sqlite_master 
                 WHERE type='table' AND name NOT LIKE 'sqlite_%'
@@ -216,7 +248,7 @@ def analyze_current_structure():
         
         for table in current_tables:
             try:
-                with sqlite3.connect("adsun_processes.db") as conn:
+                with get_connection() as conn:
                     cursor = conn.execute(f"PRAGMA table_info(`{table}`)")
                     columns = cursor.fetchall()
                 
@@ -273,7 +305,7 @@ def migrate_to_new_schema():
 def migrate_table(table_name: str):
     """Migruje konkrétnu tabuľku"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
+        with get_connection() as conn:
             schema = DATABASE_SCHEMA[table_name]
             
             # Vytvor SQL pre novú tabuľku
@@ -314,11 +346,18 @@ def migrate_table(table_name: str):
                     common_columns = [col for col in old_columns if col in new_columns]
                     
                     if common_columns:
-                        columns_str = ", ".join([f"`{col}`" for col in common_columns])
-                        conn.execute(f"""
-                            INSERT INTO `{table_name}_new` ({columns_str})
-                            SELECT {columns_str} FROM `{table_name}`
-                        """)
+                        # Kopírovanie po dávkach s priebehom namiesto jedného INSERT ... SELECT
+                        progress_bar = st.progress(0.0)
+                        
+                        def report(label, done, total):
+                            fraction = min(done / total, 1.0) if total else 1.0
+                            progress_bar.progress(fraction, text=f"📦 {label}: {done}/{total}")
+                        
+                        copy_table_in_batches(
+                            conn, table_name, f"{table_name}_new",
+                            {col: f"`{col}`" for col in common_columns},
+                            progress=report, label=table_name
+                        )
                     
                     # Premenuj tabuľky
                     conn.execute(f"DROP TABLE `{table_name}`")
@@ -337,15 +376,63 @@ def migrate_table(table_name: str):
         st.error(f"❌ Chyba migrácie {table_name}: {e}")
 
 def create_database_backup():
-    """Vytvorí zálohu databázy"""
+    """Vytvorí online zálohu databázy (backup API, gzip) s priebehom"""
     try:
-        import shutil
-        backup_name = f"adsun_processes_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-        shutil.copy2("adsun_processes.db", backup_name)
-        st.success(f"✅ Záloha vytvorená: {backup_name}")
+        progress_bar = st.progress(0.0)
+        
+        def report(label, done, total):
+            fraction = min(done / total, 1.0) if total else 1.0
+            progress_bar.progress(fraction, text=f"💾 {label}: {done}/{total} stránok")
+        
+        backup = create_backup(progress=report)
+        apply_retention()
+        st.success(f"✅ Záloha vytvorená: {backup['name']} ({backup['size'] / 1024:.1f} KB)")
     except Exception as e:
         st.error(f"❌ Chyba zálohy: {e}")
 
+def render_backups():
+    """Zoznam záloh s možnosťou vytvorenia a obnovy"""
+    st.markdown("### 💾 Zálohy databázy")
+    st.caption(f"Adresár: `{backup_dir()}` · uchováva sa posledných {RetentionPolicy.keep_last} "
+               f"a jedna denne za posledných {RetentionPolicy.keep_daily_days} dní")
+    
+    if st.button("💾 Vytvoriť zálohu teraz"):
+        create_database_backup()
+    
+    backups = list_backups()
+    if not backups:
+        st.info("📭 Zatiaľ žiadne zálohy")
+        return
+    
+    for backup in backups:
+        col1, col2, col3 = st.columns([3, 1, 1])
+        with col1:
+            st.markdown(f"**{backup['name']}**")
+        with col2:
+            st.caption(f"{backup['created_at'].strftime('%d.%m.%Y %H:%M')} · {backup['size'] / 1024:.1f} KB")
+        with col3:
+            if st.button("♻️ Obnoviť", key=f"restore_{backup['name']}"):
+                st.session_state.confirm_restore_backup = backup['path']
+    
+    # Potvrdenie obnovy
+    restore_path = st.session_state.get('confirm_restore_backup')
+    if restore_path:
+        st.warning(f"⚠️ Obnoviť databázu zo zálohy **{os.path.basename(restore_path)}**? "
+                   f"Aktuálny stav sa pred obnovou uloží ako nová záloha.")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("✅ Áno, obnoviť", type="primary"):
+                try:
+                    safety = restore_backup(restore_path)
+                    st.success(f"✅ Databáza obnovená (predchádzajúci stav: {safety['name']})")
+                except Exception as e:
+                    st.error(f"❌ Chyba obnovy: {e}")
+                del st.session_state.confirm_restore_backup
+        with col2:
+            if st.button("❌ Zrušiť obnovu"):
+                del st.session_state.confirm_restore_backup
+                st.rerun()
+
 def render_airtable_mapping():
     """Zobrazí mapování pre Airtable"""
     st.markdown("### 📋 Mapovanie pre Airtable")
@@ -845,7 +932,7 @@ def add_custom_field(table_name: str, field_name: str, field_type: str, airtable
         }
         
         # Pridaj do databázy
-        with sqlite3.connect("adsun_processes.db") as conn:
+        with get_connection() as conn:
             required_clause = "NOT NULL" if is_required else ""
             conn.execute(f"ALTER TABLE `{table_name}` ADD COLUMN `{field_name}` {field_type} {required_clause}")
             conn.commit()
@@ -992,8 +1079,7 @@ def sync_sqlite_to_airtable(api_key: str, base_id: str):
                 return
             
             # Synchronizuj procesy
-            with sqlite3.connect("adsun_processes.db") as conn:
-                conn.row_factory = sqlite3.Row
+            with get_connection() as conn:
                 cursor = conn.execute("SELECT * FROM processes WHERE is_active = 1 LIMIT 10")
                 processes = [dict(row) for row in cursor.fetchall()]
             
@@ -1043,7 +1129,7 @@ def sync_airtable_to_sqlite(api_key: str, base_id: str):
             if airtable_processes:
                 imported_count = 0
                 
-                with sqlite3.connect("adsun_processes.db") as conn:
+                with get_connection() as conn:
                     for process in airtable_processes:
                         try:
                             # Skontroluj či proces už existuje
@@ -1054,7 +1140,7 @@ def sync_airtable_to_sqlite(api_key: str, base_id: str):
                             
                             if not cursor.fetchone():
                                 # Vlož nový proces
-                                conn.execute("""
+                                cursor = conn.execute("""
                                     INSERT INTO processes (
                                         name, category, owner, frequency, duration_minutes,
                                         priority, automation_readiness, success_criteria,
@@ -1071,11 +1157,11 @@ def sync_airtable_to_sqlite(api_key: str, base_id: str):
                                     process.get('success_criteria', ''),
                                     process.get('common_problems', '')
                                 ))
+                                # Kroky procesu v tej istej transakcii ako import
+                                sync_process_steps(conn, cursor.lastrowid)
                                 imported_count += 1
                         except Exception as e:
                             st.warning(f"⚠️ Chyba importu procesu {process.get('name', '')}: {e}")
-                    
-                    conn.commit()
                 
                 st.success(f"✅ Importovaných {imported_count}/{len(airtable_processes)} nových procesov!")
             else:
@@ -37,6 +37,7 @@ CREATE TABLE process_steps (
     estimated_time_minutes INTEGER,
     is_automated BOOLEAN DEFAULT 0,
     automation_potential INTEGER CHECK(automation_potential >= 1 AND automation_potential <= 5),
+    source TEXT DEFAULT 'manual', -- 'manual' alebo 'text' (rozložené z processes.steps)
     FOREIGN KEY (process_id) REFERENCES processes(id) ON DELETE CASCADE
 );
 
@@ -70,6 +71,11 @@ CREATE TABLE documentation_sessions (
     process_id INTEGER NOT NULL,
     documented_by VARCHAR(255) NOT NULL,
     session_notes TEXT,
+    step INTEGER,
+    question TEXT,
+    response TEXT,
+    analysis TEXT,
+    session_timestamp TEXT,
     completeness_score INTEGER CHECK(completeness_score >= 1 AND completeness_score <= 10),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (process_id) REFERENCES processes(id) ON DELETE CASCADE
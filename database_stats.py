@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Database Stats
+Súhrnná tabuľka štatistík udržiavaná triggermi - dashboardy a chat čítajú
+hotové počty namiesto COUNT/AVG/GROUP BY nad celými tabuľkami.
+"""
+
+from typing import Dict, List, Optional
+
+from database_repository import fetch_all, get_connection
+
+STATS_TABLE = "stats"
+
+# Tabuľky ktorých celkový počet riadkov sa sleduje (scope 'table')
+TRACKED_TABLES = ('processes', 'process_steps', 'documentation_sessions')
+
+# Dimenzie aktívnych procesov: scope -> (key, sub_key, podmienka) pre riadok {ref}
+PROCESS_DIMENSIONS = {
+    'processes': ("''", "''", "1"),
+    'category': ("{ref}.category", "''", "{ref}.category IS NOT NULL"),
+    'owner': ("{ref}.owner", "''", "{ref}.owner IS NOT NULL"),
+    'category_owner': ("{ref}.category", "{ref}.owner", "{ref}.category IS NOT NULL AND {ref}.owner IS NOT NULL"),
+}
+
+STATS_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {STATS_TABLE} (
+        scope TEXT NOT NULL,
+        key TEXT NOT NULL DEFAULT '',
+        sub_key TEXT NOT NULL DEFAULT '',
+        count INTEGER NOT NULL DEFAULT 0,
+        automation_sum REAL NOT NULL DEFAULT 0,
+        automation_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (scope, key, sub_key)
+    ) WITHOUT ROWID
+"""
+
+
+def _upsert_sql(scope: str, key: str, sub_key: str, count: str, automation_sum: str,
+                automation_count: str, condition: str) -> str:
+    return f"""
+        INSERT INTO {STATS_TABLE} (scope, key, sub_key, count, automation_sum, automation_count)
+        SELECT '{scope}', {key}, {sub_key}, {count}, {automation_sum}, {automation_count}
+        WHERE {condition}
+        ON CONFLICT (scope, key, sub_key) DO UPDATE SET
+            count = count + excluded.count,
+            automation_sum = automation_sum + excluded.automation_sum,
+            automation_count = automation_count + excluded.automation_count;"""
+
+
+def _process_delta_sql(ref: str, sign: int) -> str:
+    """Príspevok riadku procesu (new/old) do všetkých dimenzií, sign = +1/-1"""
+    statements = []
+    for scope, (key, sub_key, condition) in PROCESS_DIMENSIONS.items():
+        statements.append(_upsert_sql(
+            scope, key.format(ref=ref), sub_key.format(ref=ref),
+            str(sign),
+            f"{sign} * COALESCE({ref}.automation_readiness, 0)",
+            f"{sign} * ({ref}.automation_readiness IS NOT NULL)",
+            f"{ref}.is_active = 1 AND {condition.format(ref=ref)}"
+        ))
+    return ''.join(statements)
+
+
+def _table_delta_sql(table: str, sign: int) -> str:
+    return _upsert_sql('table', f"'{table}'", "''", str(sign), "0", "0", "1")
+
+
+def _documenter_delta_sql(ref: str, sign: int) -> str:
+    return _upsert_sql('documenter', f"{ref}.documented_by", "''", str(sign), "0", "0",
+                       f"{ref}.documented_by IS NOT NULL")
+
+
+_CLEANUP_SQL = f"DELETE FROM {STATS_TABLE} WHERE count = 0 AND scope != 'table';"
+
+STATS_TRIGGERS = {
+    'stats_processes_insert': f"""
+        AFTER INSERT ON processes BEGIN
+            {_table_delta_sql('processes', 1)}
+            {_process_delta_sql('new', 1)}
+        END""",
+    'stats_processes_update': f"""
+        AFTER UPDATE OF is_active, category, owner, automation_readiness ON processes BEGIN
+            {_process_delta_sql('old', -1)}
+            {_process_delta_sql('new', 1)}
+            {_CLEANUP_SQL}
+        END""",
+    'stats_processes_delete': f"""
+        AFTER DELETE ON processes BEGIN
+            {_table_delta_sql('processes', -1)}
+            {_process_delta_sql('old', -1)}
+            {_CLEANUP_SQL}
+        END""",
+    'stats_steps_insert': f"""
+        AFTER INSERT ON process_steps BEGIN
+            {_table_delta_sql('process_steps', 1)}
+        END""",
+    'stats_steps_delete': f"""
+        AFTER DELETE ON process_steps BEGIN
+            {_table_delta_sql('process_steps', -1)}
+        END""",
+    'stats_sessions_insert': f"""
+        AFTER INSERT ON documentation_sessions BEGIN
+            {_table_delta_sql('documentation_sessions', 1)}
+            {_documenter_delta_sql('new', 1)}
+        END""",
+    'stats_sessions_update': f"""
+        AFTER UPDATE OF documented_by ON documentation_sessions BEGIN
+            {_documenter_delta_sql('old', -1)}
+            {_documenter_delta_sql('new', 1)}
+            {_CLEANUP_SQL}
+        END""",
+    'stats_sessions_delete': f"""
+        AFTER DELETE ON documentation_sessions BEGIN
+            {_table_delta_sql('documentation_sessions', -1)}
+            {_documenter_delta_sql('old', -1)}
+            {_CLEANUP_SQL}
+        END""",
+}
+
+# Výpočet všetkých štatistík od nuly (rovnaké riadky ako udržiavajú triggery)
+RECOMPUTE_QUERIES = [
+    "SELECT 'table', 'processes', '', COUNT(*), 0, 0 FROM processes",
+    "SELECT 'table', 'process_steps', '', COUNT(*), 0, 0 FROM process_steps",
+    "SELECT 'table', 'documentation_sessions', '', COUNT(*), 0, 0 FROM documentation_sessions",
+    """SELECT 'processes', '', '', COUNT(*), COALESCE(SUM(automation_readiness), 0), COUNT(automation_readiness)
+       FROM processes WHERE is_active = 1""",
+    """SELECT 'category', category, '', COUNT(*), COALESCE(SUM(automation_readiness), 0), COUNT(automation_readiness)
+       FROM processes WHERE is_active = 1 AND category IS NOT NULL GROUP BY category""",
+    """SELECT 'owner', owner, '', COUNT(*), COALESCE(SUM(automation_readiness), 0), COUNT(automation_readiness)
+       FROM processes WHERE is_active = 1 AND owner IS NOT NULL GROUP BY owner""",
+    """SELECT 'category_owner', category, owner, COUNT(*), COALESCE(SUM(automation_readiness), 0),
+              COUNT(automation_readiness)
+       FROM processes WHERE is_active = 1 AND category IS NOT NULL AND owner IS NOT NULL
+       GROUP BY category, owner""",
+    """SELECT 'documenter', documented_by, '', COUNT(*), 0, 0
+       FROM documentation_sessions WHERE documented_by IS NOT NULL GROUP BY documented_by""",
+]
+
+
+def create_stats_table(conn):
+    """Vytvorí tabuľku stats, triggery a naplní ju aktuálnymi hodnotami"""
+    conn.execute(STATS_TABLE_SQL)
+    for name, body in STATS_TRIGGERS.items():
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute(f"CREATE TRIGGER {name} {body}")
+    _rebuild(conn)
+
+
+def _compute(conn) -> Dict[tuple, tuple]:
+    rows = {}
+    for sql in RECOMPUTE_QUERIES:
+        for row in conn.execute(sql).fetchall():
+            if row[0] != 'table' and not row[3]:
+                continue
+            rows[(row[0], row[1], row[2])] = (row[3], float(row[4]), row[5])
+    return rows
+
+
+def _rebuild(conn) -> Dict[tuple, tuple]:
+    expected = _compute(conn)
+    conn.execute(f"DELETE FROM {STATS_TABLE}")
+    conn.executemany(
+        f"INSERT INTO {STATS_TABLE} (scope, key, sub_key, count, automation_sum, automation_count) "
+        f"VALUES (?, ?, ?, ?, ?, ?)",
+        [key + values for key, values in expected.items()]
+    )
+    return expected
+
+
+def check_stats(db_path: Optional[str] = None, repair: bool = True) -> List[Dict]:
+    """Prepočíta štatistiky od nuly a porovná s tabuľkou stats.
+
+    Vráti zoznam nezhôd (prázdny = konzistentné); pri repair=True tabuľku
+    prepíše prepočítanými hodnotami.
+    """
+    with get_connection(db_path) as conn:
+        stored = {
+            (row[0], row[1], row[2]): (row[3], float(row[4]), row[5])
+            for row in conn.execute(
+                f"SELECT scope, key, sub_key, count, automation_sum, automation_count FROM {STATS_TABLE}"
+            ).fetchall()
+        }
+        expected = _rebuild(conn) if repair else _compute(conn)
+
+    mismatches = []
+    for key in sorted(set(stored) | set(expected), key=lambda k: tuple(str(part) for part in k)):
+        if stored.get(key) != expected.get(key):
+            mismatches.append({
+                'scope': key[0], 'key': key[1], 'sub_key': key[2],
+                'stored': stored.get(key), 'expected': expected.get(key)
+            })
+    return mismatches
+
+
+# --- Čítanie ----------------------------------------------------------------
+
+def _avg(row) -> float:
+    return row['automation_sum'] / row['automation_count'] if row and row['automation_count'] else 0
+
+
+def get_table_counts(db_path: Optional[str] = None) -> Dict[str, int]:
+    """Počty riadkov sledovaných tabuliek"""
+    rows = fetch_all(f"SELECT key, count FROM {STATS_TABLE} WHERE scope = 'table'", db_path=db_path)
+    counts = {table: 0 for table in TRACKED_TABLES}
+    counts.update({row['key']: row['count'] for row in rows})
+    return counts
+
+
+def get_summary(db_path: Optional[str] = None) -> Dict:
+    """Súhrn pre dashboardy - všetko jedným čítaním malej tabuľky"""
+    rows = fetch_all(
+        f"SELECT * FROM {STATS_TABLE} WHERE scope IN ('table', 'processes', 'category', 'owner')",
+        db_path=db_path
+    )
+    tables = {row['key']: row['count'] for row in rows if row['scope'] == 'table'}
+    active = next((row for row in rows if row['scope'] == 'processes'), None)
+    return {
+        'process_count': active['count'] if active else 0,
+        'steps_count': tables.get('process_steps', 0),
+        'sessions_count': tables.get('documentation_sessions', 0),
+        'avg_automation': _avg(active),
+        'category_count': sum(1 for row in rows if row['scope'] == 'category'),
+        'owner_count': sum(1 for row in rows if row['scope'] == 'owner'),
+    }
+
+
+def get_breakdown(scope: str, db_path: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+    """Počty podľa kategórie / vlastníka / dokumentátora zoradené zostupne"""
+    sql = f"SELECT * FROM {STATS_TABLE} WHERE scope = ? ORDER BY count DESC, key"
+    params: list = [scope]
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return [
+        {'key': row['key'], 'count': row['count'], 'avg_automation': _avg(row)}
+        for row in fetch_all(sql, params, db_path=db_path)
+    ]
+
+
+def get_category_owners(db_path: Optional[str] = None) -> Dict[str, List[str]]:
+    """Vlastníci procesov v jednotlivých kategóriách (náhrada GROUP_CONCAT)"""
+    owners: Dict[str, List[str]] = {}
+    for row in fetch_all(
+        f"SELECT key, sub_key FROM {STATS_TABLE} WHERE scope = 'category_owner' ORDER BY key, sub_key",
+        db_path=db_path
+    ):
+        owners.setdefault(row['key'], []).append(row['sub_key'])
+    return owners
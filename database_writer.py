@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Database Writer
+Jeden zapisovač na databázu - zápisy zo všetkých Streamlit sessions idú cez
+ohraničenú frontu do vlákna ktoré ich zoskupuje do transakcií, takže sa
+sessions nebijú o zámok SQLite ("database is locked").
+"""
+
+import atexit
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+from database_repository import (
+    get_connection,
+    get_current_db_path,
+    on_pool_closed,
+    resolve_db_path,
+    set_current_db_path,
+    sync_derived_data,
+)
+
+# Maximálny počet čakajúcich zápisov - pri plnej fronte volajúci čaká (backpressure)
+WRITE_QUEUE_SIZE = 256
+# Koľko čakajúcich zápisov sa spojí do jednej transakcie
+WRITE_BATCH_MAX = 50
+# Ako dlho volajúci čaká na miesto vo fronte a na výsledok zápisu
+WRITE_TIMEOUT_SECONDS = 30.0
+# Opakovanie BEGIN/COMMIT ak zámok drží iný proces (napr. migrácia alebo CLI)
+LOCK_RETRIES = 5
+LOCK_RETRY_DELAY_SECONDS = 0.1
+# Počet posledných commitov z ktorých sa počíta p95 latencie
+LATENCY_WINDOW = 500
+
+# Zápis dostane pripojenie v otvorenej transakcii; nesmie volať commit()
+WriteFn = Callable[[sqlite3.Connection], Any]
+
+
+class _WriteJob:
+    __slots__ = ('fn', 'future', 'enqueued_at')
+
+    def __init__(self, fn: WriteFn):
+        self.fn = fn
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+def _is_locked(error: Exception) -> bool:
+    return isinstance(error, sqlite3.OperationalError) and 'locked' in str(error).lower()
+
+
+def _with_lock_retry(action: Callable[[], Any]):
+    """BEGIN/COMMIT s opakovaním - busy_timeout nepokryje dlhšie zámky iných procesov"""
+    for attempt in range(LOCK_RETRIES):
+        try:
+            action()
+            return
+        except sqlite3.OperationalError as e:
+            if not _is_locked(e) or attempt == LOCK_RETRIES - 1:
+                raise
+            time.sleep(LOCK_RETRY_DELAY_SECONDS * (attempt + 1))
+
+
+class WriteQueue:
+    """Fronta zápisov jednej databázy obsluhovaná jedným vláknom.
+
+    Každý zápis beží vo vlastnom SAVEPOINT, chyba jedného teda nezruší ostatné
+    v tej istej transakcii. Future sa vyrieši až po COMMIT - volajúci ktorý
+    počká na výsledok si hneď prečíta vlastný zápis.
+    """
+
+    def __init__(self, db_path: str, maxsize: int = WRITE_QUEUE_SIZE, batch_max: int = WRITE_BATCH_MAX):
+        self.db_path = db_path
+        self.batch_max = batch_max
+        self._queue: "queue.Queue[Optional[_WriteJob]]" = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._max_depth = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._commits = 0
+        self._wait_ms_total = 0.0
+        self._commit_ms: deque = deque(maxlen=LATENCY_WINDOW)
+        self._thread = threading.Thread(target=self._run, name=f"adsun-writer:{os.path.basename(db_path)}",
+                                        daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: WriteFn, timeout: float = WRITE_TIMEOUT_SECONDS) -> Future:
+        """Zaradí zápis do fronty a vráti Future s návratovou hodnotou fn(conn)"""
+        if self._closed:
+            raise sqlite3.OperationalError(f"Zapisovač pre {self.db_path} je zatvorený")
+
+        job = _WriteJob(fn)
+        if threading.current_thread() is self._thread:
+            # Zápis vyvolaný iným zápisom - beží rovno v jeho transakcii (inak by vlákno čakalo samo na seba)
+            try:
+                with get_connection(self.db_path) as conn:
+                    job.future.set_result(fn(conn))
+            except Exception as e:
+                job.future.set_exception(e)
+            return job.future
+
+        with self._lock:
+            self._submitted += 1
+        try:
+            self._queue.put(job, timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self._submitted -= 1
+            raise sqlite3.OperationalError(f"Fronta zápisov pre {self.db_path} je plná")
+        with self._lock:
+            self._max_depth = max(self._max_depth, self._queue.qsize())
+        return job.future
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            batch = [job]
+            stop = False
+            while len(batch) < self.batch_max:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                batch.append(job)
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch: List[_WriteJob]):
+        jobs = [job for job in batch if job.future.set_running_or_notify_cancel()]
+        if not jobs:
+            return
+
+        started = time.perf_counter()
+        outcomes = []
+        # Zápisy volajú funkcie bez db_path (resolve_db_path) - vo vlákne zapisovača
+        # nie je nastavený tenant session, ktorá zápis poslala
+        previous_db_path = get_current_db_path()
+        set_current_db_path(self.db_path)
+        try:
+            with get_connection(self.db_path) as conn:
+                _with_lock_retry(lambda: conn.execute("BEGIN IMMEDIATE"))
+                for job in jobs:
+                    conn.execute("SAVEPOINT write_job")
+                    try:
+                        result = job.fn(conn)
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO SAVEPOINT write_job")
+                        conn.execute("RELEASE SAVEPOINT write_job")
+                        outcomes.append((job, None, e))
+                    else:
+                        conn.execute("RELEASE SAVEPOINT write_job")
+                        outcomes.append((job, result, None))
+                sync_derived_data(conn)
+                _with_lock_retry(conn.commit)
+        except Exception as e:
+            # Transakcia ako celok zlyhala (pripojenie vrátilo zmeny) - zlyhajú všetky zápisy dávky
+            outcomes = [(job, None, e) for job in jobs]
+        finally:
+            set_current_db_path(previous_db_path)
+        commit_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self._commits += 1
+            self._commit_ms.append(commit_ms)
+            for job, _, error in outcomes:
+                self._wait_ms_total += (started - job.enqueued_at) * 1000
+                self._completed += 1
+                if error is not None:
+                    self._failed += 1
+
+        for job, result, error in outcomes:
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+
+    def close(self, timeout: Optional[float] = WRITE_TIMEOUT_SECONDS):
+        """Dokončí čakajúce zápisy a zastaví vlákno"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._commit_ms)
+            completed = self._completed
+            return {
+                'db_path': self.db_path,
+                'queue_depth': self._queue.qsize(),
+                'max_queue_depth': self._max_depth,
+                'submitted': self._submitted,
+                'completed': completed,
+                'failed': self._failed,
+                'commits': self._commits,
+                'avg_batch_size': round(completed / self._commits, 2) if self._commits else 0.0,
+                'avg_commit_ms': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+                'p95_commit_ms': round(latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)], 3)
+                if latencies else 0.0,
+                'avg_wait_ms': round(self._wait_ms_total / completed, 3) if completed else 0.0,
+            }
+
+
+_writers: Dict[str, WriteQueue] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path: Optional[str] = None) -> WriteQueue:
+    """Vráti (a pri prvom použití spustí) zapisovač pre danú databázu"""
+    path = resolve_db_path(db_path)
+    key = os.path.abspath(path)
+    writer = _writers.get(key)
+    if writer is None or writer._closed:
+        with _writers_lock:
+            writer = _writers.get(key)
+            if writer is None or writer._closed:
+                writer = WriteQueue(path)
+                _writers[key] = writer
+    return writer
+
+
+def submit_write(fn: WriteFn, db_path: Optional[str] = None) -> Future:
+    """Zaradí zápis do fronty a hneď vráti Future"""
+    return get_writer(db_path).submit(fn)
+
+
+def write(fn: WriteFn, db_path: Optional[str] = None, timeout: float = WRITE_TIMEOUT_SECONDS) -> Any:
+    """Zapíše cez zapisovač a počká na COMMIT; chybu zápisu vyhodí tu, u volajúceho"""
+    future = submit_write(fn, db_path)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        # Zápis ešte čaká vo fronte - zrušíme ho, aby neprebehol až po chybe u volajúceho
+        future.cancel()
+        raise
+
+
+def get_write_metrics() -> List[Dict[str, Any]]:
+    """Hĺbka fronty, počet commitov a latencia všetkých bežiacich zapisovačov"""
+    with _writers_lock:
+        writers = list(_writers.values())
+    return [writer.metrics() for writer in writers]
+
+
+def close_all_writers():
+    """Dokončí čakajúce zápisy a zastaví všetky zapisovače - pri testoch a vypínaní"""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+
+def close_writer(db_path: Optional[str] = None):
+    """Dokončí čakajúce zápisy a zastaví zapisovač jednej databázy"""
+    with _writers_lock:
+        writer = _writers.pop(os.path.abspath(resolve_db_path(db_path)), None)
+    if writer is not None:
+        writer.close()
+
+
+atexit.register(close_all_writers)
+on_pool_closed(close_writer)
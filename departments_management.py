@@ -6,7 +6,9 @@ Správa oddelení s AI-driven vytváraním
 """
 
 import streamlit as st
-import sqlite3
+from database_repository import get_connection
+from database_writer import write
+from database_stats import get_breakdown, get_category_owners
 import json
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -17,18 +19,16 @@ def render_departments():
     
     # Načítanie oddelení z procesov
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            conn.row_factory = sqlite3.Row  # Fix: pridané pre dict() konverziu
-            cursor = conn.execute("""
-                SELECT category, COUNT(*) as process_count,
-                       AVG(automation_readiness) as avg_automation,
-                       GROUP_CONCAT(DISTINCT owner) as employees
-                FROM processes 
-                WHERE is_active = 1 AND category IS NOT NULL
-                GROUP BY category
-                ORDER BY process_count DESC
-            """)
-            departments = [dict(row) for row in cursor.fetchall()]
+        category_owners = get_category_owners()
+        departments = [
+            {
+                'category': row['key'],
+                'process_count': row['count'],
+                'avg_automation': row['avg_automation'],
+                'employees': ','.join(category_owners.get(row['key'], []))
+            }
+            for row in get_breakdown('category')
+        ]
     except Exception as e:
         st.error(f"❌ Chyba načítavania oddelení: {e}")
         departments = []
@@ -190,8 +190,7 @@ def render_departments():
 def show_department_processes(category: str):
     """Zobrazí procesy oddelenia"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            conn.row_factory = sqlite3.Row
+        with get_connection() as conn:
             cursor = conn.execute("""
                 SELECT name, owner, priority, automation_readiness
                 FROM processes 
@@ -214,8 +213,7 @@ def show_department_processes(category: str):
 def show_department_details(category: str):
     """Zobrazí detailné informácie o oddelení"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            conn.row_factory = sqlite3.Row
+        with get_connection() as conn:
             
             # Základné štatistiky oddelenia
             cursor = conn.execute("""
@@ -504,17 +502,17 @@ def render_department_learning():
         
         # AI návrh ak existuje
         if f"ai_suggestion_{field['key']}" in st.session_state:
-            st.success(f"🤖 AI návrh: {st.session_state[f'ai_suggestion_{field['key']}']}")
+            st.success(f"🤖 AI návrh: {st.session_state['ai_suggestion_' + field['key']]}")
             
             col1, col2 = st.columns(2)
             with col1:
                 if st.button("✅ Použiť AI návrh", key=f"use_ai_{field['key']}"):
-                    st.session_state.current_department_data[field['key']] = st.session_state[f'ai_suggestion_{field['key']}']
-                    del st.session_state[f'ai_suggestion_{field['key']}']
+                    st.session_state.current_department_data[field['key']] = st.session_state['ai_suggestion_' + field['key']]
+                    del st.session_state['ai_suggestion_' + field['key']]
                     st.rerun()
             with col2:
                 if st.button("❌ Zamietnuť", key=f"reject_ai_{field['key']}"):
-                    del st.session_state[f'ai_suggestion_{field['key']}']
+                    del st.session_state['ai_suggestion_' + field['key']]
                     st.rerun()
         
         # Navigačné tlačidlá
@@ -811,6 +809,7 @@ def get_department_ai_suggestion(field: Dict, current_data: Dict) -> str:
     """Získa AI návrh pre pole oddelenia"""
     try:
         from ai_components import RealAIReasoningEngine
+        from openai_clients import chat_completion
         ai_engine = RealAIReasoningEngine()
         
         if not ai_engine.ai_available:
@@ -828,29 +827,17 @@ Funkcia: {current_data.get('function', 'všeobecná')}
 Napíš krátku, praktickú odpoveď v slovenčine.
 """
         
-        if ai_engine.use_new_client:
-            response = ai_engine.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=300,
-                temperature=0.4
-            )
-            return response.choices[0].message.content.strip()
-        else:
-            import openai
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=300,
-                temperature=0.4
-            )
-            return response.choices[0].message.content.strip()
+        response = chat_completion(
+            api_key=ai_engine.api_key,
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=300,
+            temperature=0.4
+        )
+        return response.choices[0].message.content.strip()
             
     except Exception as e:
         st.error(f"❌ Chyba AI návrhu: {e}")
@@ -859,26 +846,7 @@ Napíš krátku, praktickú odpoveď v slovenčine.
 def save_department_to_db(department_data: Dict):
     """Uloží oddelenie do databázy s novým formátom"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            # Vytvor tabuľku ak neexistuje
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS departments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    function TEXT,
-                    manager TEXT,
-                    processes TEXT,
-                    staff_count TEXT,
-                    competencies TEXT,
-                    collaboration TEXT,
-                    tools TEXT,
-                    challenges TEXT,
-                    success_metrics TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
+        def _insert(conn):
             conn.execute("""
                 INSERT INTO departments (
                     name, function, manager, processes, staff_count,
@@ -896,7 +864,7 @@ def save_department_to_db(department_data: Dict):
                 department_data.get('challenges', ''),
                 department_data.get('success_metrics', '')
             ))
-            conn.commit()
+        write(_insert)
     except Exception as e:
         st.error(f"❌ Chyba ukladania: {e}")
 
@@ -953,8 +921,7 @@ def render_edit_department():
     
     # Načítanie procesov oddelenia
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            conn.row_factory = sqlite3.Row
+        with get_connection() as conn:
             cursor = conn.execute("""
                 SELECT id, name, owner, priority, automation_readiness
                 FROM processes 
@@ -996,17 +963,14 @@ def render_edit_department():
 def delete_department_and_processes(department_name: str):
     """Zmaže oddelenie a všetky jeho procesy (soft delete)"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            # Soft delete všetkých procesov v oddelení
-            cursor = conn.execute(
-                "UPDATE processes SET is_active = 0 WHERE category = ? AND is_active = 1", 
-                (department_name,)
-            )
-            deleted_count = cursor.rowcount
-            conn.commit()
-            
-            # Debug info
-            print(f"🗑️ Deleted {deleted_count} processes from department: {department_name}")
+        # Soft delete všetkých procesov v oddelení
+        deleted_count = write(lambda conn: conn.execute(
+            "UPDATE processes SET is_active = 0 WHERE category = ? AND is_active = 1", 
+            (department_name,)
+        ).rowcount)
+        
+        # Debug info
+        print(f"🗑️ Deleted {deleted_count} processes from department: {department_name}")
             
     except Exception as e:
         st.error(f"❌ Chyba mazania oddelenia: {e}")
@@ -1015,17 +979,14 @@ def delete_department_and_processes(department_name: str):
 def transfer_department_processes(source_department: str, target_department: str):
     """Presunie všetky procesy z jedného oddelenia do druhého"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            # Presun všetkých aktívnych procesov
-            cursor = conn.execute(
-                "UPDATE processes SET category = ? WHERE category = ? AND is_active = 1",
-                (target_department, source_department)
-            )
-            transferred_count = cursor.rowcount
-            conn.commit()
-            
-            # Debug info  
-            print(f"📤 Transferred {transferred_count} processes from {source_department} to {target_department}")
+        # Presun všetkých aktívnych procesov
+        transferred_count = write(lambda conn: conn.execute(
+            "UPDATE processes SET category = ? WHERE category = ? AND is_active = 1",
+            (target_department, source_department)
+        ).rowcount)
+        
+        # Debug info  
+        print(f"📤 Transferred {transferred_count} processes from {source_department} to {target_department}")
             
     except Exception as e:
         st.error(f"❌ Chyba presunutia procesov: {e}")
@@ -1035,6 +996,7 @@ def parse_department_chatgpt_conversation(conversation: str) -> dict:
     """Parsuje ChatGPT konverzáciu a extraktuje dáta o oddelení"""
     try:
         from ai_components import RealAIReasoningEngine
+        from openai_clients import chat_completion
         ai_engine = RealAIReasoningEngine()
         
         if not ai_engine.ai_available:
@@ -1071,29 +1033,17 @@ Parsuj túto ChatGPT konverzáciu a extraktuj dáta o oddelení:
 Vráť VALID JSON s extraktovanými dátami o oddelení.
 """
         
-        if ai_engine.use_new_client:
-            response = ai_engine.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.1
-            )
-            result = response.choices[0].message.content.strip()
-        else:
-            import openai
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.1
-            )
-            result = response.choices[0].message.content.strip()
+        response = chat_completion(
+            api_key=ai_engine.api_key,
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            max_tokens=1000,
+            temperature=0.1
+        )
+        result = response.choices[0].message.content.strip()
         
         # Parsuj JSON
         import json
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Intent Cache
+Perzistentná cache klasifikácie intentu otázok (tabuľka intent_cache v cache
+databáze vedľa databázy tenanta) - rovnako znejúca otázka nejde znova do OpenAI.
+Záznamy majú TTL, pri prekročení limitu vypadnú najdlhšie nepoužité a pri zmene
+taxonómie intentov sa zneplatnia.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from cache_database import ensure_cache_db
+from database_repository import fetch_one
+from database_writer import submit_write
+
+logger = logging.getLogger(__name__)
+
+INTENT_CACHE_TTL_DAYS = 30
+INTENT_CACHE_MAX_ENTRIES = 5000
+
+LOOKUP_SQL = f"""
+    SELECT intent, confidence, api_ms FROM intent_cache
+    WHERE query_key = ? AND taxonomy_version = ?
+      AND created_at >= datetime('now', '-{INTENT_CACHE_TTL_DAYS} days')
+"""
+
+
+def taxonomy_version(intents: Dict[str, str], prompt_template: str = '') -> str:
+    """Odtlačok taxonómie (názvy + popisy intentov a šablóna promptu) - zmena zneplatní cache"""
+    payload = json.dumps([intents, prompt_template], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class _Counters:
+    """Zásahy tohto procesu (perzistentné súčty sú v tabuľke)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+    def record(self, hit: bool, saved_ms: float = 0.0):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.saved_ms += saved_ms
+            else:
+                self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+            self.saved_ms = 0.0
+
+
+_counters = _Counters()
+
+
+def lookup_intent(query_key: str, version: str, db_path: Optional[str] = None) -> Optional[Tuple[str, float]]:
+    """Intent z cache alebo None; zásah len zaradí aktualizáciu last_used_at do zapisovača"""
+    if not query_key:
+        return None
+    try:
+        cache_path = ensure_cache_db(db_path)
+        row = fetch_one(LOOKUP_SQL, (query_key, version), db_path=cache_path)
+    except Exception:
+        # Nedostupná cache sa len obíde
+        return None
+    if row is None:
+        _counters.record(hit=False)
+        return None
+
+    _counters.record(hit=True, saved_ms=row['api_ms'] or 0.0)
+    submit_write(lambda conn: conn.execute("""
+        UPDATE intent_cache SET hits = hits + 1, last_used_at = CURRENT_TIMESTAMP WHERE query_key = ?
+    """, (query_key,)), cache_path)
+    return row['intent'], row['confidence']
+
+
+def store_intent(query_key: str, version: str, intent: str, confidence: float, api_ms: float,
+                 db_path: Optional[str] = None):
+    """Uloží výsledok klasifikácie (na pozadí cez zapisovač) a uprace staré záznamy"""
+    if not query_key:
+        return
+
+    def _store(conn):
+        conn.execute("""
+            INSERT OR REPLACE INTO intent_cache
+                (query_key, intent, confidence, taxonomy_version, api_ms, hits, created_at, last_used_at)
+            VALUES (?, ?, ?, ?, ?, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+        """, (query_key, intent, confidence, version, api_ms))
+        evict_intents(conn, version)
+
+    try:
+        submit_write(_store, ensure_cache_db(db_path))
+    except Exception as e:
+        logger.warning("Intent cache: %s", e)
+
+
+def evict_intents(conn, version: str, max_entries: int = INTENT_CACHE_MAX_ENTRIES) -> int:
+    """Zmaže záznamy inej taxonómie, po TTL a najdlhšie nepoužité nad limit"""
+    removed = conn.execute(f"""
+        DELETE FROM intent_cache
+        WHERE taxonomy_version != ? OR created_at < datetime('now', '-{INTENT_CACHE_TTL_DAYS} days')
+    """, (version,)).rowcount
+    removed += conn.execute("""
+        DELETE FROM intent_cache WHERE query_key IN (
+            SELECT query_key FROM intent_cache ORDER BY last_used_at DESC, created_at DESC LIMIT -1 OFFSET ?
+        )
+    """, (max_entries,)).rowcount
+    return removed
+
+
+def get_intent_cache_stats(db_path: Optional[str] = None) -> Dict[str, Any]:
+    """Zásahy a ušetrený čas tohto procesu + súčty uložené v databáze"""
+    total = _counters.hits + _counters.misses
+    stats = {
+        'hits': _counters.hits,
+        'misses': _counters.misses,
+        'hit_rate': round(_counters.hits / total, 3) if total else 0.0,
+        'saved_ms': round(_counters.saved_ms, 1),
+        'entries': 0,
+        'total_hits': 0,
+        'total_saved_ms': 0.0,
+    }
+    try:
+        row = fetch_one("""
+            SELECT COUNT(*) AS entries, COALESCE(SUM(hits), 0) AS total_hits,
+                   COALESCE(SUM(hits * api_ms), 0) AS total_saved_ms
+            FROM intent_cache
+        """, db_path=ensure_cache_db(db_path))
+        stats.update(entries=row['entries'], total_hits=row['total_hits'],
+                     total_saved_ms=round(row['total_saved_ms'], 1))
+    except Exception:
+        pass
+    return stats
+
+
+def reset_intent_cache_stats():
+    _counters.reset()
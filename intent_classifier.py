@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Intent Classifier
+Lokálny prvý stupeň klasifikácie otázok - TF-IDF znakových n-gramov a lineárny
+(softmax) model v NumPy. Učí sa z príkladov v prompte a z otázok ktoré už
+klasifikovalo AI (tabuľka intent_cache v cache databáze); AI sa volá len pri
+nízkej istote. Model tenanta sa trénuje na pozadí, dovtedy platí model z príkladov.
+Model inej taxonómie sa nepoužije a po pribudnutí nových otázok v logu sa model
+pretrénuje.
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from cache_database import ensure_cache_db
+from database_repository import fetch_all, on_pool_closed, resolve_db_path
+
+logger = logging.getLogger(__name__)
+
+NGRAM_RANGE = (2, 4)
+TRAIN_EPOCHS = 300
+LEARNING_RATE = 0.5
+L2_PENALTY = 1e-4
+# Najviac toľko n-gramov (najčastejších podľa počtu dokumentov) - ohraničí veľkosť modelu
+MAX_VOCABULARY = 20000
+MODEL_SUFFIX = '.intent_model.npz'
+# Po toľkých nových otázkach klasifikovaných AI sa model pretrénuje na pozadí
+RETRAIN_AFTER_EXAMPLES = 50
+# Ako často najviac sa log otázok kontroluje (počet nových riadkov)
+RETRAIN_CHECK_SECONDS = 300.0
+
+# Príklady z promptu a bežné formulácie (normalizované rovnako ako otázky - bez diakritiky)
+SEED_EXAMPLES: List[Tuple[str, str]] = [
+    ('kolko procesov mam', 'statistics'),
+    ('pocet procesov', 'statistics'),
+    ('kolko mame procesov', 'statistics'),
+    ('statistiky procesov', 'statistics'),
+    ('kolko je procesov v databaze', 'statistics'),
+    ('aky je priemerny cas procesov', 'statistics'),
+    ('ake procesy vypis zoznam', 'list_all'),
+    ('vsetky procesy', 'list_all'),
+    ('zobraz procesy', 'list_all'),
+    ('ukaz vsetky procesy', 'list_all'),
+    ('zoznam procesov', 'list_all'),
+    ('vypis vsetky procesy', 'list_all'),
+    ('ake mame oddelenia', 'departments'),
+    ('zoznam oddeleni', 'departments'),
+    ('ktore oddelenia ma firma', 'departments'),
+    ('organizacna struktura firmy', 'departments'),
+    ('ako funguje oddelenie obchod', 'departments'),
+    ('ako prebieha fakturacia', 'find_process'),
+    ('ako spracovat objednavku', 'find_process'),
+    ('ako schvalit dovolenku', 'find_process'),
+    ('postup pri reklamacii', 'find_process'),
+    ('co robit ked pride faktura', 'find_process'),
+    ('kto je zodpovedny za fakturaciu', 'people_roles'),
+    ('kto robi v obchode', 'people_roles'),
+    ('ake pozicie mame', 'people_roles'),
+    ('kto schvaluje dovolenky', 'people_roles'),
+    ('zodpovednosti uctovnicky', 'people_roles'),
+    ('kolko stoji polep auta', 'pricing'),
+    ('aky je cennik', 'pricing'),
+    ('cena tlace plagatu', 'pricing'),
+    ('za kolko robime montaz', 'pricing'),
+    ('ake su kategorie', 'categories'),
+    ('typy procesov', 'categories'),
+    ('ake kategorie procesov mame', 'categories'),
+    ('do akej kategorie patri fakturacia', 'categories'),
+    ('reklamacie zakaznikov', 'general_search'),
+    ('najdi nieco o sklade', 'general_search'),
+    ('informacie o dodavateloch', 'general_search'),
+    ('email zakaznikovi', 'general_search'),
+    ('ake bude pocasie zajtra', 'off_topic'),
+    ('co si dam na obed', 'off_topic'),
+    ('povedz mi vtip', 'off_topic'),
+    ('kto vyhral futbal', 'off_topic'),
+]
+
+
+def char_ngrams(text: str, ngram_range: Tuple[int, int] = NGRAM_RANGE) -> List[str]:
+    """Znakové n-gramy v rámci slov (s medzerou na okrajoch)"""
+    grams = []
+    for word in text.split():
+        padded = f" {word} "
+        for n in range(ngram_range[0], ngram_range[1] + 1):
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+class IntentClassifier:
+    """TF-IDF (sublineárne tf, L2 normalizácia) + multinomiálna logistická regresia"""
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.zeros(0)
+        self.labels: List[str] = []
+        self.weights = np.zeros((0, 0))
+        self.bias = np.zeros(0)
+        # Taxonómia a čas tréningu (formát CURRENT_TIMESTAMP) - podľa nich sa model pretrénuje
+        self.taxonomy_version: Optional[str] = None
+        self.trained_at: Optional[str] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return bool(self.labels)
+
+    def _vector(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Riedky TF-IDF vektor ako (indexy, hodnoty)"""
+        counts: Dict[int, int] = {}
+        for gram in char_ngrams(text):
+            index = self.vocabulary.get(gram)
+            if index is not None:
+                counts[index] = counts.get(index, 0) + 1
+        if not counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = (1.0 + np.log(np.fromiter(counts.values(), dtype=float, count=len(counts)))) * self.idf[indices]
+        return indices, values / np.linalg.norm(values)
+
+    def fit(self, texts: Sequence[str], labels: Sequence[str], epochs: int = TRAIN_EPOCHS,
+            learning_rate: float = LEARNING_RATE, l2: float = L2_PENALTY,
+            max_vocabulary: int = MAX_VOCABULARY) -> 'IntentClassifier':
+        documents = [set(char_ngrams(text)) for text in texts]
+        document_freq: Dict[str, int] = {}
+        for grams in documents:
+            for gram in grams:
+                document_freq[gram] = document_freq.get(gram, 0) + 1
+        kept = sorted(document_freq, key=lambda gram: (-document_freq[gram], gram))[:max_vocabulary]
+        self.vocabulary = {gram: index for index, gram in enumerate(kept)}
+        self.idf = np.log((1 + len(documents)) / (1 + np.array([document_freq[g] for g in kept], dtype=float))) + 1.0
+
+        # Riedka matica príznakov (trojice riadok, stĺpec, hodnota) - hustá by mala dokumenty × slovník
+        rows = [self._vector(text) for text in texts]
+        row_ids = np.repeat(np.arange(len(rows)), [len(indices) for indices, _ in rows])
+        col_ids = np.concatenate([indices for indices, _ in rows]) if rows else np.zeros(0, dtype=np.int64)
+        values = np.concatenate([vals for _, vals in rows]) if rows else np.zeros(0)
+
+        self.labels = sorted(set(labels))
+        targets = np.zeros((len(labels), len(self.labels)))
+        targets[np.arange(len(labels)), [self.labels.index(label) for label in labels]] = 1.0
+
+        # Dávkový gradientný zostup na krížovej entropii (súčiny s riedkou maticou cez bincount)
+        self.weights = np.zeros((len(self.vocabulary), len(self.labels)))
+        self.bias = np.zeros(len(self.labels))
+        for _ in range(epochs):
+            scores = self.bias + _sparse_product(row_ids, col_ids, values, self.weights, len(labels))
+            error = (_softmax(scores) - targets) / len(labels)
+            gradient = _sparse_product(col_ids, row_ids, values, error, len(self.vocabulary))
+            self.weights -= learning_rate * (gradient + l2 * self.weights)
+            self.bias -= learning_rate * error.sum(axis=0)
+        return self
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """(intent, pravdepodobnosť) - bez známych n-gramov ('general_search', 0.0)"""
+        indices, values = self._vector(text)
+        if not self.is_trained or not len(indices):
+            return 'general_search', 0.0
+        probabilities = _softmax(values @ self.weights[indices] + self.bias)
+        best = int(probabilities.argmax())
+        return self.labels[best], float(probabilities[best])
+
+    def save(self, path: str):
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        with open(path + '.part', 'wb') as f:
+            np.savez_compressed(f, idf=self.idf, weights=self.weights, bias=self.bias,
+                                meta=np.array(json.dumps({'labels': self.labels, 'vocabulary': vocabulary,
+                                                          'taxonomy_version': self.taxonomy_version,
+                                                          'trained_at': self.trained_at},
+                                                         ensure_ascii=False)))
+        os.replace(path + '.part', path)
+
+    @classmethod
+    def load(cls, path: str) -> 'IntentClassifier':
+        model = cls()
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            model.idf = data['idf']
+            model.weights = data['weights']
+            model.bias = data['bias']
+        model.labels = meta['labels']
+        model.vocabulary = {gram: index for index, gram in enumerate(meta['vocabulary'])}
+        model.taxonomy_version = meta.get('taxonomy_version')
+        model.trained_at = meta.get('trained_at')
+        return model
+
+
+def _sparse_product(out_ids: np.ndarray, in_ids: np.ndarray, values: np.ndarray,
+                    matrix: np.ndarray, size: int) -> np.ndarray:
+    """out[o] += value * matrix[i] pre každú trojicu (o, i, value) - riedka matica krát hustá"""
+    return np.column_stack([
+        np.bincount(out_ids, weights=values * matrix[in_ids, column], minlength=size)
+        for column in range(matrix.shape[1])
+    ]) if matrix.shape[1] else np.zeros((size, 0))
+
+
+def _softmax(scores: np.ndarray) -> np.ndarray:
+    exp = np.exp(scores - scores.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def model_path(db_path: Optional[str] = None) -> str:
+    """Model vedľa databázy (každý tenant má vlastný)"""
+    return os.path.splitext(resolve_db_path(db_path))[0] + MODEL_SUFFIX
+
+
+def load_training_data(db_path: Optional[str] = None,
+                       taxonomy_version: Optional[str] = None) -> Tuple[List[str], List[str]]:
+    """Príklady z promptu + otázky klasifikované AI (intent_cache) aktuálnej taxonómie"""
+    texts = [text for text, _ in SEED_EXAMPLES]
+    labels = [label for _, label in SEED_EXAMPLES]
+    try:
+        sql = "SELECT query_key, intent FROM intent_cache"
+        params: tuple = ()
+        if taxonomy_version:
+            sql += " WHERE taxonomy_version = ?"
+            params = (taxonomy_version,)
+        for row in fetch_all(sql, params, db_path=ensure_cache_db(db_path)):
+            texts.append(row['query_key'])
+            labels.append(row['intent'])
+    except Exception:
+        pass  # Nedostupná cache - len príklady
+    return texts, labels
+
+
+def count_new_examples(db_path: Optional[str] = None, taxonomy_version: Optional[str] = None,
+                       since: Optional[str] = None) -> int:
+    """Počet otázok klasifikovaných AI (aktuálnej taxonómie) od času tréningu"""
+    sql = "SELECT COUNT(*) AS new_examples FROM intent_cache WHERE created_at > ?"
+    params: list = [since or '']
+    if taxonomy_version:
+        sql += " AND taxonomy_version = ?"
+        params.append(taxonomy_version)
+    try:
+        return fetch_all(sql, params, db_path=ensure_cache_db(db_path))[0]['new_examples']
+    except Exception:
+        return 0
+
+
+_models: Dict[str, IntentClassifier] = {}
+_models_lock = threading.Lock()
+_checked_at: Dict[str, float] = {}
+
+
+def train_classifier(db_path: Optional[str] = None, taxonomy_version: Optional[str] = None) -> IntentClassifier:
+    """Natrénuje model z logu otázok, uloží ho a použije pre ďalšie otázky"""
+    path = model_path(db_path)
+    # Čas pred načítaním logu - otázky pribudnuté počas tréningu sa rátajú ako nové
+    trained_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    model = IntentClassifier().fit(*load_training_data(db_path, taxonomy_version))
+    model.taxonomy_version = taxonomy_version
+    model.trained_at = trained_at
+    model.save(path)
+    with _models_lock:
+        _models[os.path.abspath(path)] = model
+    return model
+
+
+_seed_model: Optional[IntentClassifier] = None
+_training: Set[str] = set()
+
+
+def seed_classifier() -> IntentClassifier:
+    """Model len z SEED_EXAMPLES - spoločný pre všetkých tenantov, kým nemajú vlastný"""
+    global _seed_model
+    if _seed_model is None:
+        with _models_lock:
+            if _seed_model is None:
+                _seed_model = IntentClassifier().fit(*zip(*SEED_EXAMPLES))
+    return _seed_model
+
+
+def _train_in_background(db_path: str, taxonomy_version: Optional[str]):
+    """Tréning z logu otázok mimo behu otázky (raz naraz pre každú databázu)"""
+    key = os.path.abspath(model_path(db_path))
+    with _models_lock:
+        if key in _training:
+            return
+        _training.add(key)
+
+    def run():
+        try:
+            train_classifier(db_path, taxonomy_version)
+        except Exception as e:
+            logger.warning("Intent model %s: %s", key, e)
+        finally:
+            with _models_lock:
+                _training.discard(key)
+
+    threading.Thread(target=run, name=f"adsun-intent-train:{os.path.basename(db_path)}", daemon=True).start()
+
+
+def _needs_retraining(key: str, model: IntentClassifier, db_path: Optional[str],
+                      taxonomy_version: Optional[str]) -> bool:
+    """Pribudlo v logu dosť nových otázok? (kontrola najviac raz za RETRAIN_CHECK_SECONDS)"""
+    now = time.monotonic()
+    if now - _checked_at.get(key, float('-inf')) < RETRAIN_CHECK_SECONDS:
+        return False
+    _checked_at[key] = now
+    return count_new_examples(db_path, taxonomy_version, model.trained_at) >= RETRAIN_AFTER_EXAMPLES
+
+
+def get_classifier(db_path: Optional[str] = None, taxonomy_version: Optional[str] = None) -> IntentClassifier:
+    """Model z pamäte alebo zo súboru; bez neho (či pre inú taxonómiu) model z príkladov a tréning na pozadí"""
+    key = os.path.abspath(model_path(db_path))
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None and os.path.exists(key):
+                try:
+                    model = _models[key] = IntentClassifier.load(key)
+                except Exception as e:
+                    logger.warning("Intent model %s: %s", key, e)
+    if model is None or (taxonomy_version and model.taxonomy_version != taxonomy_version):
+        # Starý model by vracal intenty ktoré už neexistujú
+        _train_in_background(resolve_db_path(db_path), taxonomy_version)
+        return seed_classifier()
+    if _needs_retraining(key, model, db_path, taxonomy_version):
+        _train_in_background(resolve_db_path(db_path), taxonomy_version)
+    return model
+
+
+def release_classifier(db_path: Optional[str] = None):
+    """Zahodí model databázy z pamäte, uložený súbor ostáva (pri zatvorení poolu)"""
+    key = os.path.abspath(model_path(db_path))
+    with _models_lock:
+        _models.pop(key, None)
+        _checked_at.pop(key, None)
+
+
+on_pool_closed(release_classifier)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pretrénovanie lokálneho klasifikátora intentov z logu otázok")
+    parser.add_argument('db_path', nargs='?', help="Databáza (predvolene podľa tenanta)")
+    args = parser.parse_args()
+
+    from adsun_knowledge_assistant import INTENT_TAXONOMY_VERSION
+    from tenant_router import default_tenant, tenant_db_path
+    db_path = args.db_path or tenant_db_path(default_tenant())
+    texts, labels = load_training_data(db_path, INTENT_TAXONOMY_VERSION)
+    model = train_classifier(db_path, INTENT_TAXONOMY_VERSION)
+    correct = sum(model.predict(text)[0] == label for text, label in zip(texts, labels))
+    print(f"✅ Model: {model_path(db_path)} · {len(texts)} príkladov "
+          f"({len(texts) - len(SEED_EXAMPLES)} z logu) · {len(model.labels)} intentov · "
+          f"presnosť na trénovacích dátach {correct / len(texts):.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ Refaktorovaný modulárny systém pod 600 riadkov
 """
 
 import streamlit as st
-import sqlite3
+from database_repository import resolve_db_path
 import os
 import json
 
@@ -21,6 +21,13 @@ from ui_components import (
     render_assistant_mode
 )
 
+from database_migrations import run_migrations
+from database_backup import start_backup_scheduler
+from database_writer import write
+from process_steps import sync_process_steps
+from query_profiler import profile_script_run, render_profiler_sidebar
+from tenant_router import tenant_session
+
 from business_management import (
     render_process_management,
     render_departments,
@@ -35,63 +42,21 @@ from business_management import (
 
 def initialize_database():
     """Inicializuje databázu s ukážkovými dátami pre Streamlit Cloud"""
-    db_path = "adsun_processes.db"
+    # Databáza tenanta tejto session (nastavená v tenant_session)
+    db_path = resolve_db_path()
     
     try:
-        # Skontroluj či databáza existuje a má dáta
-        if os.path.exists(db_path):
-            with sqlite3.connect(db_path) as conn:
-                try:
-                    cursor = conn.execute("SELECT COUNT(*) FROM processes")
-                    count = cursor.fetchone()[0]
-                    if count > 0:
-                        return  # Databáza už má dáta
-                except sqlite3.OperationalError:
-                    pass  # Tabuľka neexistuje, pokračuj s vytvorením
+        # Schéma - čakajúce migrácie sa vykonajú raz za beh procesu
+        run_migrations(db_path, progress=render_migration_progress())
         
-        # Vytvor databázu a tabuľky
-        with sqlite3.connect(db_path) as conn:
-            # Vytvor základné tabuľky
-            conn.executescript('''
-                CREATE TABLE IF NOT EXISTS processes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    category TEXT NOT NULL DEFAULT '',
-                    description TEXT DEFAULT '',
-                    owner TEXT NOT NULL DEFAULT '',
-                    steps TEXT DEFAULT '',
-                    step_details TEXT DEFAULT '',
-                    frequency TEXT DEFAULT '',
-                    duration_minutes INTEGER DEFAULT 0,
-                    priority INTEGER DEFAULT 3,
-                    tools TEXT DEFAULT '',
-                    risks TEXT DEFAULT '',
-                    automation_readiness INTEGER DEFAULT 3,
-                    improvements TEXT DEFAULT '',
-                    trigger_type TEXT NOT NULL DEFAULT 'manuálny proces',
-                    success_criteria TEXT DEFAULT 'dokončenie úloh',
-                    common_problems TEXT DEFAULT 'žiadne známe problémy',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-                
-                CREATE TABLE IF NOT EXISTS departments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    description TEXT DEFAULT '',
-                    manager TEXT DEFAULT '',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-                
-                CREATE TABLE IF NOT EXISTS positions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    department_id INTEGER,
-                    description TEXT DEFAULT '',
-                    responsibilities TEXT DEFAULT '',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (department_id) REFERENCES departments(id)
-                );
-            ''')
+        # Plánované zálohy v pozadí (interval podľa firemných nastavení)
+        start_backup_scheduler(db_path)
+        
+        # Ukážkové dáta cez zapisovač - kontrola aj vloženie v jednej transakcii
+        def _seed_sample_data(conn):
+            cursor = conn.execute("SELECT COUNT(*) FROM processes")
+            if cursor.fetchone()[0] > 0:
+                return  # Databáza už má dáta
             
             # Vlož ukážkové dáta
             sample_processes = [
@@ -152,7 +117,7 @@ def initialize_database():
             ]
             
             for process in sample_processes:
-                conn.execute('''
+                cursor = conn.execute('''
                     INSERT INTO processes (name, category, description, owner, steps, step_details,
                                          frequency, duration_minutes, priority, tools, risks, 
                                          automation_readiness, improvements, trigger_type, 
@@ -166,28 +131,53 @@ def initialize_database():
                     process['improvements'], process['trigger_type'], 
                     process['success_criteria'], process['common_problems']
                 ))
+                sync_process_steps(conn, cursor.lastrowid)
             
             # Ukážkové oddelenia
             sample_departments = [
-                {'name': 'Obchod', 'description': 'Obchodný tím a predaj', 'manager': 'Mária Novák'},
-                {'name': 'HR', 'description': 'Ľudské zdroje', 'manager': 'Peter Kováč'},
-                {'name': 'Administratíva', 'description': 'Účtovníctvo a správa', 'manager': 'Anna Krásna'},
-                {'name': 'Výroba', 'description': 'Výrobné procesy', 'manager': 'Ján Kováč'}
+                {'name': 'Obchod', 'function': 'Obchodný tím a predaj', 'manager': 'Mária Novák'},
+                {'name': 'HR', 'function': 'Ľudské zdroje', 'manager': 'Peter Kováč'},
+                {'name': 'Administratíva', 'function': 'Účtovníctvo a správa', 'manager': 'Anna Krásna'},
+                {'name': 'Výroba', 'function': 'Výrobné procesy', 'manager': 'Ján Kováč'}
             ]
             
             for dept in sample_departments:
                 conn.execute('''
-                    INSERT INTO departments (name, description, manager)
+                    INSERT INTO departments (name, function, manager)
                     VALUES (?, ?, ?)
-                ''', (dept['name'], dept['description'], dept['manager']))
+                ''', (dept['name'], dept['function'], dept['manager']))
+        
+        write(_seed_sample_data, db_path)
                 
     except Exception as e:
         st.error(f"⚠️ Chyba inicializácie databázy: {e}")
 
+def render_migration_progress():
+    """Vráti progress callback ktorý zobrazí priebeh dlhších migrácií"""
+    progress_bar = None
+    
+    def report(label: str, done: int, total: int):
+        nonlocal progress_bar
+        if progress_bar is None:
+            progress_bar = st.progress(0.0)
+        fraction = min(done / total, 1.0) if total else 1.0
+        progress_bar.progress(fraction, text=f"🔄 Migrácia - {label}: {done}/{total}")
+    
+    return report
+
 def main():
     """Hlavná funkcia aplikácie"""
     init_streamlit_config()
     
+    # Celý beh ide do databázy firmy tejto session
+    with tenant_session():
+        # Voliteľné SQL profilovanie celého behu (prepínač v sidebare)
+        with profile_script_run() as profiler:
+            run_app()
+        render_profiler_sidebar(profiler)
+
+def run_app():
+    """Obsah aplikácie podľa aktuálneho režimu"""
     # Inicializácia databázy (predovšetkým pre Streamlit Cloud)
     initialize_database()
     
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN OpenAI Clients
+Jeden zdieľaný OpenAI klient na API kľúč pre celý proces - HTTP pripojenia
+(keep-alive, TLS) sa znovu používajú. Volania majú explicitný timeout,
+obmedzený počet opakovaní s náhodným (jitter) odstupom a núdzový vypínač.
+"""
+
+import atexit
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import streamlit as st
+
+OPENAI_TIMEOUT_SECONDS = 30.0
+OPENAI_MAX_RETRIES = 3
+RETRY_BASE_DELAY_SECONDS = 0.5
+RETRY_MAX_DELAY_SECONDS = 8.0
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = ('APIConnectionError', 'APITimeoutError')
+
+# Núdzový vypínač - "1" vypne všetky volania AI bez reštartu kódu
+AI_KILL_SWITCH_ENV_VAR = 'ADSUN_AI_DISABLED'
+
+
+class AIDisabledError(RuntimeError):
+    """AI je vypnuté vypínačom alebo chýba API kľúč"""
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    def add(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+_stats = _Stats()
+_disabled = False
+
+
+def set_ai_enabled(enabled: bool):
+    """Vypínač za behu (napr. z administrácie) - platí pre celý proces"""
+    global _disabled
+    _disabled = not enabled
+
+
+def ai_enabled() -> bool:
+    return not _disabled and os.environ.get(AI_KILL_SWITCH_ENV_VAR, '').lower() not in ('1', 'true', 'yes')
+
+
+def resolve_api_key(api_key: Optional[str] = None) -> Optional[str]:
+    return api_key or os.environ.get('OPENAI_API_KEY') or st.session_state.get('openai_api_key')
+
+
+def get_openai_client(api_key: Optional[str] = None):
+    """Zdieľaný klient pre API kľúč (vlastný pool HTTP pripojení, SDK sám neopakuje)"""
+    if not ai_enabled():
+        raise AIDisabledError(f"AI je vypnuté ({AI_KILL_SWITCH_ENV_VAR})")
+    key = resolve_api_key(api_key)
+    if not key:
+        raise AIDisabledError("Chýba OpenAI API kľúč")
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            from openai import OpenAI
+            client = _clients[key] = OpenAI(api_key=key, timeout=OPENAI_TIMEOUT_SECONDS, max_retries=0)
+    return client
+
+
+def _is_retryable(error: Exception) -> bool:
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return any(cls.__name__ in RETRYABLE_ERRORS for cls in type(error).__mro__)
+
+
+def retry_delay(attempt: int) -> float:
+    """Exponenciálny odstup s plným jitterom - súbežné sessions sa nezosynchronizujú"""
+    return random.uniform(0, min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * 2 ** attempt))
+
+
+def call_with_retries(call: Callable[[Any], Any], api_key: Optional[str] = None,
+                      max_retries: int = OPENAI_MAX_RETRIES) -> Any:
+    """call(client) s opakovaním pri výpadku spojenia, timeoute, 429 a 5xx"""
+    client = get_openai_client(api_key)
+    for attempt in range(max_retries + 1):
+        if not ai_enabled():
+            raise AIDisabledError(f"AI je vypnuté ({AI_KILL_SWITCH_ENV_VAR})")
+        _stats.add('calls')
+        try:
+            return call(client)
+        except Exception as e:
+            if attempt >= max_retries or not _is_retryable(e):
+                _stats.add('failures')
+                raise
+            _stats.add('retries')
+            time.sleep(retry_delay(attempt))
+
+
+def chat_completion(api_key: Optional[str] = None, timeout: float = OPENAI_TIMEOUT_SECONDS,
+                    max_retries: int = OPENAI_MAX_RETRIES, **kwargs) -> Any:
+    """client.chat.completions.create(**kwargs) cez zdieľaného klienta (aj stream=True)"""
+    return call_with_retries(
+        lambda client: client.chat.completions.create(timeout=timeout, **kwargs), api_key, max_retries
+    )
+
+
+def create_embeddings(api_key: Optional[str] = None, timeout: float = OPENAI_TIMEOUT_SECONDS,
+                      max_retries: int = OPENAI_MAX_RETRIES, **kwargs) -> Any:
+    return call_with_retries(
+        lambda client: client.embeddings.create(timeout=timeout, **kwargs), api_key, max_retries
+    )
+
+
+def get_openai_stats() -> Dict[str, int]:
+    return {
+        'clients': len(_clients),
+        'calls': _stats.calls,
+        'retries': _stats.retries,
+        'failures': _stats.failures,
+    }
+
+
+def close_openai_clients():
+    """Zatvorí HTTP pooly všetkých klientov (pri ukončení procesu a v testoch)"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+atexit.register(close_openai_clients)
@@ -7,35 +7,40 @@ Správa pozícií s AI-driven vytváraním a automatickým dopĺňaním
 
 import streamlit as st
 import sqlite3
+from database_repository import get_connection
+from database_writer import write
+from query_cache import cached_call, cached_fetch_all
 import json
 from datetime import datetime
 from typing import Dict, List, Optional
 from ai_components import RealAIReasoningEngine
+from openai_clients import chat_completion
 from ui_components import render_section_header, render_action_buttons, render_modern_dataframe
 
+def _query_departments() -> tuple:
+    """Oddelenia z departments, inak z pozícií (tuple - výsledok sa zdieľa cez cache)"""
+    with get_connection() as conn:
+        
+        # Pokús sa načítať z departments tabuľky
+        try:
+            cursor = conn.execute("SELECT DISTINCT name FROM departments ORDER BY name")
+            departments = tuple(row[0] for row in cursor.fetchall() if row[0])
+            if departments:
+                return departments
+        except sqlite3.OperationalError:
+            pass  # Tabuľka departments neexistuje
+        
+        # Fallback - načítaj z positions tabuľky
+        try:
+            cursor = conn.execute("SELECT DISTINCT department FROM positions WHERE department IS NOT NULL AND department != '' ORDER BY department")
+            return tuple(row[0] for row in cursor.fetchall() if row[0])
+        except sqlite3.OperationalError:
+            return ()  # Ani positions tabuľka neexistuje
+
 def load_existing_departments() -> List[str]:
-    """Načíta existujúce oddelenia z databázy"""
+    """Načíta existujúce oddelenia z databázy (z cache do najbližšieho zápisu)"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            conn.row_factory = sqlite3.Row
-            
-            # Pokús sa načítať z departments tabuľky
-            try:
-                cursor = conn.execute("SELECT DISTINCT name FROM departments ORDER BY name")
-                departments = [row[0] for row in cursor.fetchall() if row[0]]
-                if departments:
-                    return departments
-            except sqlite3.OperationalError:
-                pass  # Tabuľka departments neexistuje
-            
-            # Fallback - načítaj z positions tabuľky
-            try:
-                cursor = conn.execute("SELECT DISTINCT department FROM positions WHERE department IS NOT NULL AND department != '' ORDER BY department")
-                departments = [row[0] for row in cursor.fetchall() if row[0]]
-                return departments
-            except sqlite3.OperationalError:
-                return []  # Ani positions tabuľka neexistuje
-                
+        return list(cached_call(_query_departments))
     except Exception as e:
         st.error(f"❌ Chyba načítavania oddelení: {e}")
         return []
@@ -149,35 +154,12 @@ def render_positions():
                     st.warning(f"⚠️ Zmazanie pozície {pos['name']} - funkcia bude dostupná v ďalšej verzii")
 
 def load_positions_from_db() -> List[Dict]:
-    """Načíta pozície z databázy"""
+    """Načíta pozície z databázy (z cache do najbližšieho zápisu)"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            conn.row_factory = sqlite3.Row
-            
-            # Vytvor tabuľku ak neexistuje
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS positions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    department TEXT,
-                    level TEXT,
-                    responsibilities TEXT,
-                    requirements TEXT,
-                    tools_systems TEXT,
-                    work_time TEXT,
-                    challenges TEXT,
-                    success_metrics TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            cursor = conn.execute("""
-                SELECT * FROM positions 
-                ORDER BY name
-            """)
-            return [dict(row) for row in cursor.fetchall()]
+        return cached_fetch_all("""
+            SELECT * FROM positions 
+            ORDER BY name
+        """)
     except Exception as e:
         st.error(f"❌ Chyba načítavania pozícií: {e}")
         return []
@@ -185,8 +167,7 @@ def load_positions_from_db() -> List[Dict]:
 def show_position_details(position_id: int):
     """Zobrazí detaily pozície"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            conn.row_factory = sqlite3.Row
+        with get_connection() as conn:
             cursor = conn.execute("SELECT * FROM positions WHERE id = ?", (position_id,))
             position = dict(cursor.fetchone())
             
@@ -240,8 +221,7 @@ def show_position_details(position_id: int):
 def show_position_responsibilities(position_id: int):
     """Zobrazí zodpovednosti pozície"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            conn.row_factory = sqlite3.Row
+        with get_connection() as conn:
             cursor = conn.execute("SELECT * FROM positions WHERE id = ?", (position_id,))
             position = dict(cursor.fetchone())
             
@@ -544,17 +524,17 @@ def render_position_learning():
         
         # AI návrh ak existuje
         if f"ai_suggestion_{field['key']}" in st.session_state:
-            st.success(f"🤖 AI návrh: {st.session_state[f'ai_suggestion_{field['key']}']}")
+            st.success(f"🤖 AI návrh: {st.session_state['ai_suggestion_' + field['key']]}")
             
             col1, col2 = st.columns(2)
             with col1:
                 if st.button("✅ Použiť AI návrh", key=f"use_ai_{field['key']}"):
-                    st.session_state.current_position_data[field['key']] = st.session_state[f'ai_suggestion_{field['key']}']
-                    del st.session_state[f'ai_suggestion_{field['key']}']
+                    st.session_state.current_position_data[field['key']] = st.session_state['ai_suggestion_' + field['key']]
+                    del st.session_state['ai_suggestion_' + field['key']]
                     st.rerun()
             with col2:
                 if st.button("❌ Zamietnuť", key=f"reject_ai_{field['key']}"):
-                    del st.session_state[f'ai_suggestion_{field['key']}']
+                    del st.session_state['ai_suggestion_' + field['key']]
                     st.rerun()
         
         # Navigačné tlačidlá
@@ -888,29 +868,17 @@ Parsuj túto ChatGPT konverzáciu a extraktuj dáta o pozícii:
 Vráť VALID JSON s extraktovanými dátami o pozícii.
 """
         
-        if ai_engine.use_new_client:
-            response = ai_engine.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.1
-            )
-            result = response.choices[0].message.content.strip()
-        else:
-            import openai
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.1
-            )
-            result = response.choices[0].message.content.strip()
+        response = chat_completion(
+            api_key=ai_engine.api_key,
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            max_tokens=1000,
+            temperature=0.1
+        )
+        result = response.choices[0].message.content.strip()
         
         # Parsuj JSON
         import json
@@ -965,29 +933,17 @@ Oddelenie: {current_data.get('department', 'všeobecné')}{additional_context}
 Napíš krátku, praktickú odpoveď v slovenčine.
 """
         
-        if ai_engine.use_new_client:
-            response = ai_engine.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=300,
-                temperature=0.4
-            )
-            return response.choices[0].message.content.strip()
-        else:
-            import openai
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=300,
-                temperature=0.4
-            )
-            return response.choices[0].message.content.strip()
+        response = chat_completion(
+            api_key=ai_engine.api_key,
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=300,
+            temperature=0.4
+        )
+        return response.choices[0].message.content.strip()
             
     except Exception as e:
         st.error(f"❌ Chyba AI návrhu: {e}")
@@ -996,26 +952,7 @@ Napíš krátku, praktickú odpoveď v slovenčine.
 def save_position_to_db(position_data: Dict):
     """Uloží pozíciu do databázy"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            # Vytvor tabuľku ak neexistuje
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS positions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    department TEXT,
-                    level TEXT,
-                    responsibilities TEXT,
-                    requirements TEXT,
-                    tools_systems TEXT,
-                    work_time TEXT,
-                    challenges TEXT,
-                    success_metrics TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
+        def _insert(conn):
             conn.execute("""
                 INSERT INTO positions (
                     name, description, department, level, responsibilities,
@@ -1033,7 +970,7 @@ def save_position_to_db(position_data: Dict):
                 position_data.get('challenges', ''),
                 position_data.get('success_metrics', '')
             ))
-            conn.commit()
+        write(_insert)
     except Exception as e:
         st.error(f"❌ Chyba ukladania: {e}")
 
@@ -1083,8 +1020,7 @@ def render_edit_position():
     
     # Načítaj pozíciu
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            conn.row_factory = sqlite3.Row
+        with get_connection() as conn:
             cursor = conn.execute("SELECT * FROM positions WHERE id = ?", (position_id,))
             position = dict(cursor.fetchone())
     except Exception as e:
@@ -1128,7 +1064,7 @@ def render_edit_position():
     
     if submit:
         try:
-            with sqlite3.connect("adsun_processes.db") as conn:
+            def _update(conn):
                 conn.execute("""
                     UPDATE positions SET
                         name = ?, description = ?, department = ?, level = ?,
@@ -1141,7 +1077,7 @@ def render_edit_position():
                     new_responsibilities, new_requirements, new_tools,
                     new_work_time, new_challenges, new_success, position_id
                 ))
-                conn.commit()
+            write(_update)
             
             st.success("✅ Pozícia upravená!")
             st.session_state.mode = "positions"
@@ -1158,9 +1094,9 @@ def render_edit_position():
         with col1:
             if st.button("✅ Áno, zmazať", type="primary"):
                 try:
-                    with sqlite3.connect("adsun_processes.db") as conn:
+                    def _delete(conn):
                         conn.execute("DELETE FROM positions WHERE id = ?", (position_id,))
-                        conn.commit()
+                    write(_delete)
                     
                     st.success("✅ Pozícia zmazaná!")
                     st.session_state.mode = "positions"
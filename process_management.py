@@ -7,11 +7,19 @@ Správa procesov - zoznam, editácia, mazanie
 
 import streamlit as st
 import sqlite3
+from database_repository import get_connection, resolve_db_path
+from database_writer import write
+from query_cache import cached_fetch_all
+from process_search import search_process_ids
+from process_steps import sync_process_steps
 import json
+import logging
 from datetime import datetime
 from typing import Dict, List, Optional
 from ui_components import render_section_header, render_action_buttons, render_modern_dataframe
 
+logger = logging.getLogger(__name__)
+
 def get_fallback_processes():
     """Vráti fallback procesy ak databáza nefunguje"""
     return [
@@ -50,6 +58,27 @@ def get_fallback_processes():
         }
     ]
 
+def filter_processes_by_search(processes: List[Dict], search: str, db_path: Optional[str] = None) -> List[Dict]:
+    """Procesy zoradené podľa relevancie z fulltextu; pri chybe indexu alebo prázdnom
+    výsledku (napr. len stop-slová) pôvodné hľadanie podreťazca v názve, kategórii a vlastníkovi"""
+    try:
+        ranking = {process_id: rank for rank, process_id in enumerate(search_process_ids(search, db_path))}
+    except Exception as e:
+        logger.warning("Fulltext search error: %s", e)
+        ranking = {}
+    matched = [p for p in processes if p.get('id') in ranking]
+    if matched:
+        return sorted(matched, key=lambda p: ranking[p['id']])
+    
+    needle = search.lower()
+    return [
+        p for p in processes
+        if needle in str(p.get('name', '')).lower()
+        or needle in str(p.get('category', '')).lower()
+        or needle in str(p.get('owner', '')).lower()
+    ]
+
+
 def render_process_management():
     """Render správy procesov - zoznam, editácia, mazanie"""
     
@@ -62,7 +91,7 @@ def render_process_management():
     
     try:
         import os
-        db_path = "adsun_processes.db"
+        db_path = resolve_db_path()
         
         # Debug: skontroluj súbor
         if os.path.exists(db_path):
@@ -74,8 +103,7 @@ def render_process_management():
             processes = get_fallback_processes()
         
         if not processes:  # Ak ešte stále nemáme procesy, skús načítať z DB
-            with sqlite3.connect(db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with get_connection(db_path) as conn:
                 
                 # Debug: skontroluj tabuľky
                 cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -172,12 +200,7 @@ def render_process_management():
     # Filtrovanie procesov
     filtered_processes = processes
     if search:
-        filtered_processes = [
-            p for p in filtered_processes 
-            if search.lower() in str(p.get('name', '')).lower() 
-            or search.lower() in str(p.get('category', '')).lower()
-            or search.lower() in str(p.get('owner', '')).lower()
-        ]
+        filtered_processes = filter_processes_by_search(filtered_processes, search)
     
     if selected_category != "Všetky":
         filtered_processes = [p for p in filtered_processes if p.get('category') == selected_category]
@@ -227,8 +250,7 @@ def render_process_management():
 def show_process_details(process_id: int):
     """Zobrazí detaily procesu"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            conn.row_factory = sqlite3.Row
+        with get_connection() as conn:
             
             # Proces
             cursor = conn.execute("SELECT * FROM processes WHERE id = ?", (process_id,))
@@ -236,9 +258,11 @@ def show_process_details(process_id: int):
             
             # Sessions
             cursor = conn.execute("""
-                SELECT * FROM documentation_sessions 
-                WHERE process_id = ? 
+                SELECT documented_by, created_at, step, question, response, session_notes
+                FROM documentation_sessions
+                WHERE process_id = ?
                 ORDER BY created_at DESC
+                LIMIT 3
             """, (process_id,))
             sessions = [dict(row) for row in cursor.fetchall()]
             
@@ -299,16 +323,13 @@ def show_process_details(process_id: int):
                     st.markdown(f"**📅 Dokumentačná session {i+1}**")
                     st.markdown(f"*Dokumentoval:* {session.get('documented_by', 'Neznámy')} | *Dátum:* {session.get('created_at', '')[:16]}*")
                     
-                    if session.get('session_notes'):
-                        try:
-                            notes = json.loads(session['session_notes'])
-                            
-                            # Široký layout pre otázky a odpovede - na plnú šírku
-                            st.markdown(f"**❓ Otázka:** {notes.get('question', 'N/A')}")
-                            st.markdown(f"**💬 Odpoveď:** {notes.get('response', 'N/A')}")
-                                
-                        except:
-                            st.markdown(f"**📄 Poznámky:** {session['session_notes']}")
+                    if session.get('question') is not None or session.get('response') is not None:
+                        # Široký layout pre otázky a odpovede - na plnú šírku
+                        st.markdown(f"**❓ Otázka:** {session.get('question') or 'N/A'}")
+                        st.markdown(f"**💬 Odpoveď:** {session.get('response') or 'N/A'}")
+                    elif session.get('session_notes'):
+                        # Voľný text ktorý sa nedal rozbaliť do stĺpcov
+                        st.markdown(f"**📄 Poznámky:** {session['session_notes']}")
                     
                     if i < len(sessions[:3]) - 1:  # Nie posledný
                         st.markdown("---")
@@ -321,10 +342,8 @@ def show_process_details(process_id: int):
 def delete_process(process_id: int):
     """Zmaže proces z databázy"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            # Soft delete - označí ako neaktívny
-            conn.execute("UPDATE processes SET is_active = 0 WHERE id = ?", (process_id,))
-            conn.commit()
+        # Soft delete - označí ako neaktívny
+        write(lambda conn: conn.execute("UPDATE processes SET is_active = 0 WHERE id = ?", (process_id,)))
     except Exception as e:
         st.error(f"❌ Chyba mazania: {e}")
 
@@ -344,8 +363,7 @@ def render_edit_process():
     
     # Načítaj proces z databázy
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            conn.row_factory = sqlite3.Row
+        with get_connection() as conn:
             cursor = conn.execute("SELECT * FROM processes WHERE id = ?", (process_id,))
             process = dict(cursor.fetchone())
     except Exception as e:
@@ -399,7 +417,7 @@ def render_edit_process():
     # Spracovanie uloženia
     if submit_button:
         try:
-            with sqlite3.connect("adsun_processes.db") as conn:
+            def _update(conn):
                 conn.execute("""
                     UPDATE processes 
                     SET name = ?, category = ?, owner = ?, frequency = ?, 
@@ -413,7 +431,10 @@ def render_edit_process():
                     new_trigger, new_success, new_problems,
                     process_id
                 ))
-                conn.commit()
+                # Vlastník a pripravenosť sa premietajú do krokov
+                sync_process_steps(conn, process_id)
+            
+            write(_update)
             
             st.success("✅ Proces úspešne upravený!")
             st.session_state.mode = "process_management"
@@ -432,9 +453,7 @@ def render_edit_process():
         with col1:
             if st.button("✅ Áno, zmazať", type="primary"):
                 try:
-                    with sqlite3.connect("adsun_processes.db") as conn:
-                        conn.execute("UPDATE processes SET is_active = 0 WHERE id = ?", (process_id,))
-                        conn.commit()
+                    write(lambda conn: conn.execute("UPDATE processes SET is_active = 0 WHERE id = ?", (process_id,)))
                     
                     st.success("✅ Proces zmazaný!")
                     st.session_state.mode = "process_management"
@@ -756,17 +775,17 @@ def render_process_learning():
         
         # AI návrh ak existuje
         if f"ai_suggestion_{field['key']}" in st.session_state:
-            st.success(f"🤖 AI návrh: {st.session_state[f'ai_suggestion_{field['key']}']}")
+            st.success(f"🤖 AI návrh: {st.session_state['ai_suggestion_' + field['key']]}")
             
             col1, col2 = st.columns(2)
             with col1:
                 if st.button("✅ Použiť AI návrh", key=f"use_ai_{field['key']}"):
-                    st.session_state.current_process_data[field['key']] = st.session_state[f'ai_suggestion_{field['key']}']
-                    del st.session_state[f'ai_suggestion_{field['key']}']
+                    st.session_state.current_process_data[field['key']] = st.session_state['ai_suggestion_' + field['key']]
+                    del st.session_state['ai_suggestion_' + field['key']]
                     st.rerun()
             with col2:
                 if st.button("❌ Zamietnuť", key=f"reject_ai_{field['key']}"):
-                    del st.session_state[f'ai_suggestion_{field['key']}']
+                    del st.session_state['ai_suggestion_' + field['key']]
                     st.rerun()
         
         # Navigačné tlačidlá
@@ -1192,6 +1211,7 @@ def parse_chatgpt_conversation(conversation: str) -> dict:
     """Parsuje ChatGPT konverzáciu a extraktuje dáta o procese"""
     try:
         from ai_components import RealAIReasoningEngine
+        from openai_clients import chat_completion
         ai_engine = RealAIReasoningEngine()
         
         if not ai_engine.ai_available:
@@ -1232,29 +1252,17 @@ Parsuj túto ChatGPT konverzáciu a extraktuj dáta o procese:
 Vráť VALID JSON s extraktovanými dátami.
 """
         
-        if ai_engine.use_new_client:
-            response = ai_engine.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.1
-            )
-            result = response.choices[0].message.content.strip()
-        else:
-            import openai
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.1
-            )
-            result = response.choices[0].message.content.strip()
+        response = chat_completion(
+            api_key=ai_engine.api_key,
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            max_tokens=1000,
+            temperature=0.1
+        )
+        result = response.choices[0].message.content.strip()
         
         # Parsuj JSON
         import json
@@ -1283,12 +1291,10 @@ Vráť VALID JSON s extraktovanými dátami.
         return {}
 
 def load_existing_categories() -> List[str]:
-    """Načíta existujúce kategórie z databázy"""
+    """Načíta existujúce kategórie z databázy (z cache do najbližšieho zápisu)"""
     try:
-        with sqlite3.connect("adsun_processes.db") as conn:
-            cursor = conn.execute("SELECT DISTINCT category FROM processes WHERE category IS NOT NULL AND category != '' ORDER BY category")
-            categories = [row[0] for row in cursor.fetchall() if row[0]]
-            return categories
+        rows = cached_fetch_all("SELECT DISTINCT category FROM processes WHERE category IS NOT NULL AND category != '' ORDER BY category")
+        return [row['category'] for row in rows if row['category']]
     except Exception as e:
         st.error(f"❌ Chyba načítavania kategórií: {e}")
         return []
@@ -1297,6 +1303,7 @@ def get_process_ai_suggestion(field: Dict, current_data: Dict) -> str:
     """Získa AI návrh pre pole procesu"""
     try:
         from ai_components import RealAIReasoningEngine
+        from openai_clients import chat_completion
         ai_engine = RealAIReasoningEngine()
         
         if not ai_engine.ai_available:
@@ -1321,29 +1328,17 @@ Kategória: {current_data.get('category', 'všeobecná')}{additional_context}
 Napíš detailnú, užitočnú odpoveď v slovenčine. Buď konkrétny a zachovaj všetky dôležité informácie.
 """
         
-        if ai_engine.use_new_client:
-            response = ai_engine.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800,
-                temperature=0.4
-            )
-            return response.choices[0].message.content.strip()
-        else:
-            import openai
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800,
-                temperature=0.4
-            )
-            return response.choices[0].message.content.strip()
+        response = chat_completion(
+            api_key=ai_engine.api_key,
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=800,
+            temperature=0.4
+        )
+        return response.choices[0].message.content.strip()
             
     except Exception as e:
         st.error(f"❌ Chyba AI návrhu: {e}")
@@ -1352,84 +1347,46 @@ Napíš detailnú, užitočnú odpoveď v slovenčine. Buď konkrétny a zachova
 def save_process_to_db(process_data: Dict):
     """Uloží proces do databázy"""
     try:
-        # DEBUG INFO
-        print(f"🔍 save_process_to_db called with data: {process_data}")
+        # HLAVNÝ INSERT
+        insert_query = """
+            INSERT INTO processes (
+                name, category, description, owner, steps, step_details, frequency, 
+                duration_minutes, priority, tools, risks, automation_readiness, 
+                improvements, trigger_type, success_criteria, common_problems, 
+                is_active, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, datetime('now'))
+        """
         
-        with sqlite3.connect("adsun_processes.db") as conn:
-            # Pridaj nové stĺpce ak neexistujú
-            try:
-                conn.execute("ALTER TABLE processes ADD COLUMN description TEXT")
-            except sqlite3.OperationalError:
-                pass  # Stĺpec už existuje
-            
-            try:
-                conn.execute("ALTER TABLE processes ADD COLUMN steps TEXT")
-            except sqlite3.OperationalError:
-                pass
-            
-            try:
-                conn.execute("ALTER TABLE processes ADD COLUMN tools TEXT")
-            except sqlite3.OperationalError:
-                pass
-            
-            try:
-                conn.execute("ALTER TABLE processes ADD COLUMN risks TEXT")
-            except sqlite3.OperationalError:
-                pass
-            
-            try:
-                conn.execute("ALTER TABLE processes ADD COLUMN improvements TEXT")
-            except sqlite3.OperationalError:
-                pass
-            
-            try:
-                conn.execute("ALTER TABLE processes ADD COLUMN step_details TEXT")
-            except sqlite3.OperationalError:
-                pass  # Stĺpec už existuje
-            
-            # HLAVNÝ INSERT
-            insert_query = """
-                INSERT INTO processes (
-                    name, category, description, owner, steps, step_details, frequency, 
-                    duration_minutes, priority, tools, risks, automation_readiness, 
-                    improvements, trigger_type, success_criteria, common_problems, 
-                    is_active, created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, datetime('now'))
-            """
-            
-            insert_values = (
-                process_data.get('name', ''),
-                process_data.get('category', 'nezhodnotené'),
-                process_data.get('description', ''),
-                process_data.get('owner', ''),
-                process_data.get('steps', ''),
-                process_data.get('step_details', ''),  # Nový stĺpec
-                process_data.get('frequency', 'nezhodnotené'),
-                int(process_data.get('duration_minutes', 0)),
-                int(process_data.get('priority', 0)),
-                process_data.get('tools', ''),
-                process_data.get('risks', ''),
-                int(process_data.get('automation_readiness', 0)),
-                process_data.get('improvements', ''),
-                'manuálny proces',  # trigger_type - DEFAULT hodnota
-                'dokončenie úloh',  # success_criteria - DEFAULT hodnota  
-                'žiadne známe problémy'  # common_problems - DEFAULT hodnota
-            )
-            
-            # DEBUG INFO
-            print(f"🔍 INSERT VALUES: {insert_values}")
-            
+        insert_values = (
+            process_data.get('name', ''),
+            process_data.get('category', 'nezhodnotené'),
+            process_data.get('description', ''),
+            process_data.get('owner', ''),
+            process_data.get('steps', ''),
+            process_data.get('step_details', ''),  # Nový stĺpec
+            process_data.get('frequency', 'nezhodnotené'),
+            int(process_data.get('duration_minutes', 0)),
+            int(process_data.get('priority', 0)),
+            process_data.get('tools', ''),
+            process_data.get('risks', ''),
+            int(process_data.get('automation_readiness', 0)),
+            process_data.get('improvements', ''),
+            'manuálny proces',  # trigger_type - DEFAULT hodnota
+            'dokončenie úloh',  # success_criteria - DEFAULT hodnota  
+            'žiadne známe problémy'  # common_problems - DEFAULT hodnota
+        )
+        
+        def _insert(conn):
             cursor = conn.execute(insert_query, insert_values)
-            process_id = cursor.lastrowid
-            conn.commit()
-            
-            print(f"✅ Proces uložený s ID: {process_id}")
-            
-            # OVERENIE - načítaj späť z DB
-            verify_cursor = conn.execute("SELECT name FROM processes WHERE id = ?", (process_id,))
-            saved_name = verify_cursor.fetchone()
-            print(f"🔍 OVERENIE: Uložený proces má názov: {saved_name[0] if saved_name else 'NENAŠIEL SA!'}")
-            
+            # Kroky z textu do process_steps v tej istej transakcii
+            sync_process_steps(conn, cursor.lastrowid)
+            return cursor.lastrowid
+        
+        # Zápis cez zapisovač - po návrate je už potvrdený a viditeľný pre čítanie
+        process_id = write(_insert)
+        
+        print(f"✅ Proces uložený s ID: {process_id}")
+        
     except Exception as e:
         error_msg = f"❌ Chyba ukladania procesu: {e}"
         print(error_msg)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Process Search
+Fulltextové vyhľadávanie procesov cez SQLite FTS5 s BM25 rankingom.
+Index aj otázky sa normalizujú rovnako - bez diakritiky a so slovenským stemmerom.
+"""
+
+import logging
+import os
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from database_repository import get_connection
+from text_normalization import fold_stem_text, fold_text, stem_word, tokenize
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "processes_fts"
+# Log procesov ktorým treba dopočítať tieňové stĺpce a FTS text
+SEARCH_CHANGES_TABLE = "process_search_changes"
+SYNC_BATCH_SIZE = 500
+
+# Indexované stĺpce a ich BM25 váhy (poradie musí sedieť s FTS tabuľkou)
+FTS_COLUMNS = {
+    'name': 10.0,
+    'description': 3.0,
+    'steps': 2.0,
+    'step_details': 1.0,
+    'tools': 1.5,
+    'risks': 1.0,
+    'owner': 4.0,
+    'category': 5.0,
+}
+
+# Stĺpce s kópiou bez diakritiky (<stĺpec>_folded) pre LIKE a filtrovanie
+FOLDED_COLUMNS = ('name', 'category', 'owner')
+SEARCH_SOURCE_COLUMNS = tuple(dict.fromkeys(tuple(FTS_COLUMNS) + FOLDED_COLUMNS))
+
+# Stop slová bez diakritiky (porovnávajú sa so zloženým textom)
+STOP_WORDS = {
+    'ako', 'co', 'kde', 'kedy', 'preco', 'kto', 'je', 'sa', 'na', 'do', 'pre',
+    'the', 'and', 'or', 'mam', 'mame', 'a', 'v', 'z', 's', 'o', 'k', 'u'
+}
+
+DEFAULT_LIMIT = 20
+
+
+def _query_words(query: str) -> List[str]:
+    return [word for word in tokenize(query) if word not in STOP_WORDS and len(word) >= 2]
+
+
+def extract_terms(query: str) -> List[str]:
+    """Rozloží otázku na kmene hľadaných slov (bez diakritiky a stop slov)"""
+    terms = []
+    for word in _query_words(query):
+        stem = stem_word(word)
+        if stem not in terms:
+            terms.append(stem)
+    return terms
+
+
+def extract_like_patterns(query: str) -> List[str]:
+    """Podreťazce pre LIKE fallback - spoločný začiatok slova a jeho kmeňa.
+
+    Kmeň môže mať zmenenú koncovku (fakturacia -> fakturak), v neindexovanom
+    texte preto hľadáme len časť ktorú má slovo s kmeňom spoločnú.
+    """
+    patterns = []
+    for word in _query_words(query):
+        pattern = os.path.commonprefix([word, stem_word(word)]) or word
+        if pattern not in patterns:
+            patterns.append(pattern)
+    return patterns
+
+
+def _match_expression(terms: List[str]) -> str:
+    return ' OR '.join(f'"{term}"*' for term in terms)
+
+
+def build_match_query(query: str) -> str:
+    """Zostaví FTS5 MATCH výraz - každý výraz ako prefix, spojené cez OR"""
+    return _match_expression(extract_terms(query))
+
+
+def create_search_index(conn):
+    """Vytvorí FTS5 tabuľku, log zmien procesov a naplní index.
+
+    Vyhodí sqlite3.OperationalError ak SQLite nemá FTS5 modul.
+    """
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            {', '.join(FTS_COLUMNS)},
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    create_search_triggers(conn)
+    rebuild_search_index(conn)
+
+
+def create_search_triggers(conn):
+    """Triggery len zapíšu id zmeneného procesu - len vstavané SQL, takže zápis
+    funguje aj z pripojení mimo poolu (sqlite3 CLI, skripty). Zložený text
+    dopočíta sync_search_index() pred COMMIT.
+    """
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SEARCH_CHANGES_TABLE} (
+            process_id INTEGER PRIMARY KEY
+        )
+    """)
+    for trigger in ('processes_fts_delete', 'processes_search_changes_insert', 'processes_search_changes_update'):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute(f"""
+        CREATE TRIGGER processes_search_changes_insert AFTER INSERT ON processes BEGIN
+            INSERT OR IGNORE INTO {SEARCH_CHANGES_TABLE} (process_id) VALUES (new.id);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER processes_search_changes_update AFTER UPDATE OF {', '.join(SEARCH_SOURCE_COLUMNS)}
+        ON processes BEGIN
+            INSERT OR IGNORE INTO {SEARCH_CHANGES_TABLE} (process_id) VALUES (new.id);
+        END
+    """)
+    if fts_available(conn):
+        conn.execute(f"""
+            CREATE TRIGGER processes_fts_delete AFTER DELETE ON processes BEGIN
+                DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            END
+        """)
+
+
+def _has_folded_columns(conn) -> bool:
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(processes)").fetchall()}
+    return all(f"{col}_folded" in columns for col in FOLDED_COLUMNS)
+
+
+def _write_search_rows(conn, rows):
+    """Zapíše tieňové stĺpce a FTS riadky procesov spočítané v Pythone (staré FTS riadky zmaže volajúci)"""
+    rows = [dict(row) for row in rows]
+    if _has_folded_columns(conn):
+        assignments = ', '.join(f"{col}_folded = ?" for col in FOLDED_COLUMNS)
+        conn.executemany(
+            f"UPDATE processes SET {assignments} WHERE id = ?",
+            [[fold_text(row[col]) if row[col] is not None else None for col in FOLDED_COLUMNS] + [row['id']]
+             for row in rows]
+        )
+    if fts_available(conn):
+        columns = ', '.join(FTS_COLUMNS)
+        conn.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (?, {', '.join('?' * len(FTS_COLUMNS))})",
+            [[row['id']] + [fold_stem_text(row[col]) if row[col] is not None else None for col in FTS_COLUMNS]
+             for row in rows]
+        )
+
+
+def _source_columns(conn) -> List[str]:
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(processes)").fetchall()}
+    return [col for col in SEARCH_SOURCE_COLUMNS if col in existing]
+
+
+def sync_search_index(conn) -> int:
+    """Dopočíta zložený text procesov z logu zmien, vráti ich počet.
+
+    Volá sa v otvorenej transakcii pred COMMIT (pool aj zapisovač), zmeny
+    z pripojení mimo aplikácie sa doplnia pri najbližšom zápise aplikácie.
+    """
+    try:
+        changed = [row[0] for row in conn.execute(
+            f"SELECT process_id FROM {SEARCH_CHANGES_TABLE}"
+        ).fetchall()]
+    except sqlite3.OperationalError:
+        return 0  # Nezmigrovaná databáza
+    if not changed:
+        return 0
+
+    columns = ', '.join(['id'] + _source_columns(conn))
+    for start in range(0, len(changed), SYNC_BATCH_SIZE):
+        ids = changed[start:start + SYNC_BATCH_SIZE]
+        placeholders = ', '.join('?' * len(ids))
+        rows = conn.execute(f"SELECT {columns} FROM processes WHERE id IN ({placeholders})", ids).fetchall()
+        if fts_available(conn):
+            conn.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = ?", [(i,) for i in ids])
+        _write_search_rows(conn, [_with_missing(row, SEARCH_SOURCE_COLUMNS) for row in rows])
+        conn.execute(f"DELETE FROM {SEARCH_CHANGES_TABLE} WHERE process_id IN ({placeholders})", ids)
+    return len(changed)
+
+
+def _with_missing(row, columns) -> Dict:
+    values = dict(row)
+    for col in columns:
+        values.setdefault(col, None)
+    return values
+
+
+def rebuild_search_index(conn):
+    """Znovu naplní tieňové stĺpce a FTS index z tabuľky processes"""
+    if fts_available(conn):
+        conn.execute(f"DELETE FROM {FTS_TABLE}")
+    columns = ', '.join(['id'] + _source_columns(conn))
+    cursor = conn.execute(f"SELECT {columns} FROM processes")
+    while True:
+        rows = cursor.fetchmany(SYNC_BATCH_SIZE)
+        if not rows:
+            break
+        _write_search_rows(conn, [_with_missing(row, SEARCH_SOURCE_COLUMNS) for row in rows])
+    try:
+        conn.execute(f"DELETE FROM {SEARCH_CHANGES_TABLE}")
+    except sqlite3.OperationalError:
+        pass
+
+
+def fts_available(conn) -> bool:
+    """Zistí či databáza má FTS index procesov"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).fetchone()
+    return row is not None
+
+
+def _term_coverage(terms: List[str], process: Dict) -> float:
+    """Podiel hľadaných výrazov ktoré sa v procese naozaj vyskytujú"""
+    if not terms:
+        return 0.0
+    words = set(fold_stem_text(' '.join(str(process.get(col) or '') for col in FTS_COLUMNS)).split())
+    matched = sum(1 for term in terms if any(word.startswith(term) for word in words))
+    return matched / len(terms)
+
+
+def _search_fts(conn, terms: List[str], limit: Optional[int], include_inactive: bool) -> List[Tuple[Dict, float]]:
+    weights = ', '.join(str(w) for w in FTS_COLUMNS.values())
+    match = _match_expression(terms)
+    sql = f"""
+        SELECT p.*, -bm25({FTS_TABLE}, {weights}) AS search_score
+        FROM {FTS_TABLE}
+        JOIN processes p ON p.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH ?
+        {'' if include_inactive else 'AND p.is_active = 1'}
+        ORDER BY bm25({FTS_TABLE}, {weights})
+    """
+    params: list = [match]
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+    if not rows:
+        return []
+
+    # BM25 je relatívne skóre - normalizujeme voči najlepšiemu výsledku
+    # a násobíme pokrytím výrazov, aby čiastočná zhoda nedostala plnú dôveru
+    best = max(row['search_score'] for row in rows) or 1.0
+    results = []
+    for row in rows:
+        score = row.pop('search_score')
+        relative = max(score, 0.0) / best if best > 0 else 1.0
+        confidence = _term_coverage(terms, row) * (0.5 + 0.5 * relative)
+        results.append((row, round(min(confidence, 1.0), 3)))
+    results.sort(key=lambda r: r[1], reverse=True)
+    return results
+
+
+def _search_like(conn, terms: List[str], patterns: List[str], limit: Optional[int],
+                 include_inactive: bool) -> List[Tuple[Dict, float]]:
+    """Fallback bez FTS5 - LIKE cez tieňové stĺpce bez diakritiky"""
+    conditions = []
+    params: list = []
+    for term in patterns:
+        conditions.append(
+            "(name_folded LIKE ? OR category_folded LIKE ? OR owner_folded LIKE ? OR fold(description) LIKE ?)"
+        )
+        params.extend([f"%{term}%"] * 4)
+    sql = f"SELECT * FROM processes WHERE ({' OR '.join(conditions)})"
+    if not include_inactive:
+        sql += " AND is_active = 1"
+    rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+    results = [(row, round(_term_coverage(terms, row), 3)) for row in rows]
+    results.sort(key=lambda r: r[1], reverse=True)
+    return results[:limit] if limit else results
+
+
+def search_processes(query: str, db_path: Optional[str] = None, limit: Optional[int] = DEFAULT_LIMIT,
+                     include_inactive: bool = False) -> List[Tuple[Dict, float]]:
+    """Vyhľadá procesy a vráti [(proces, confidence 0-1)] zoradené podľa relevancie"""
+    terms = extract_terms(query)
+    if not terms:
+        return []
+    with get_connection(db_path) as conn:
+        if fts_available(conn):
+            try:
+                return _search_fts(conn, terms, limit, include_inactive)
+            except sqlite3.OperationalError as e:
+                logger.warning("FTS search error, používam LIKE: %s", e)
+        return _search_like(conn, terms, extract_like_patterns(query), limit, include_inactive)
+
+
+def search_process_ids(query: str, db_path: Optional[str] = None, limit: Optional[int] = None,
+                       include_inactive: bool = False) -> List[int]:
+    """ID procesov zoradené podľa relevancie (pre filtrovanie zoznamov)"""
+    return [process['id'] for process, _ in search_processes(query, db_path, limit, include_inactive)]
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Process Steps
+Rozklad voľného textu krokov (steps / step_details) na riadky tabuľky process_steps
+a agregácie nad krokmi (čas podľa zodpovednej osoby, automatizovateľné minúty podľa nástroja).
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from database_repository import fetch_all
+from text_normalization import fold_text
+
+# Kroky rozložené z textu - ručne zadané kroky (source 'manual') sa nikdy neprepisujú
+EXTRACTED_SOURCE = 'text'
+DEFAULT_RESPONSIBLE = 'nezhodnotené'
+
+# Od akej automatizačnej pripravenosti (1-5) považujeme krok za automatizovateľný
+AUTOMATABLE_POTENTIAL = 4
+
+BACKFILL_BATCH_SIZE = 200
+
+_NUMBERED_RE = re.compile(r'^\s*(?:krok\s*)?(\d{1,3})\s*[.):\-]\s*(.+?)\s*$', re.IGNORECASE)
+_BULLET_RE = re.compile(r'^\s*[-•*]\s*(.+?)\s*$')
+_MINUTES_RE = re.compile(r'(\d+)\s*(?:min(?:út|úty|uta|uty|\.)?\b)', re.IGNORECASE)
+_HOURS_RE = re.compile(r'(\d+)\s*(?:h|hod(?:ín|iny|ina|\.)?)\b', re.IGNORECASE)
+_RESPONSIBLE_RE = re.compile(r'(?:zodpovedn[áýé]|zodpovedá|vykonáva)\s*:?\s*([^,;.()\n]+)', re.IGNORECASE)
+
+STEP_INSERT_SQL = """
+    INSERT INTO process_steps (process_id, step_number, title, description, responsible_person,
+                               system_tool, action_details, estimated_time_minutes,
+                               automation_potential, source)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _split_numbered(text: str) -> Dict[int, str]:
+    """Číslované riadky -> {číslo: text}; nečíslované riadky pokračujú predošlým krokom.
+
+    Text bez čísiel sa skúsi ako odrážky (- / •), číslujú sa postupne.
+    """
+    items: Dict[int, str] = {}
+    current = None
+    for line in (text or '').splitlines():
+        match = _NUMBERED_RE.match(line)
+        if match:
+            current = int(match.group(1))
+            items[current] = match.group(2)
+        elif current is not None and line.strip():
+            items[current] += ' ' + line.strip()
+
+    if not items:
+        bullets = [m.group(1) for m in map(_BULLET_RE.match, (text or '').splitlines()) if m]
+        items = {i + 1: bullet for i, bullet in enumerate(bullets)}
+    return items
+
+
+def _title_and_detail(text: str):
+    """"Príjem faktúry: Email alebo pošta" -> ("Príjem faktúry", "Email alebo pošta")"""
+    title, sep, detail = text.partition(':')
+    if sep and title.strip() and detail.strip():
+        return title.strip(), detail.strip()
+    return text.strip(), ''
+
+
+def _explicit_minutes(text: str) -> Optional[int]:
+    minutes = sum(int(m) for m in _MINUTES_RE.findall(text))
+    minutes += sum(int(h) * 60 for h in _HOURS_RE.findall(text))
+    return minutes or None
+
+
+def _split_tools(tools: str) -> List[str]:
+    return [tool.strip() for tool in re.split(r'[,;\n]', tools or '') if tool.strip()]
+
+
+def _match_tool(text: str, tools: List[str]) -> Optional[str]:
+    folded = fold_text(text)
+    for tool in tools:
+        if fold_text(tool) in folded:
+            return tool
+    return None
+
+
+def _automation_potential(readiness) -> Optional[int]:
+    try:
+        value = int(readiness)
+    except (TypeError, ValueError):
+        return None
+    return min(5, value) if value >= 1 else None
+
+
+def parse_steps(steps: str, step_details: str = '', owner: str = '', tools: str = '',
+                duration_minutes=None, automation_readiness=None) -> List[Dict]:
+    """Rozloží číslovaný text krokov na záznamy pre process_steps.
+
+    Názov kroku je z `steps` (inak z `step_details`), popis z `step_details`.
+    Zodpovedná osoba je vlastník procesu, ak text kroku neuvádza inú
+    ("zodpovedá: ..."). Nástroj je prvý nástroj procesu spomenutý v kroku.
+    Čas sa berie z textu ("10 min", "2 hod"); kroky bez času si rovnomerne
+    rozdelia zvyšok celkového trvania procesu.
+    """
+    short = _split_numbered(steps)
+    detailed = _split_numbered(step_details)
+    tool_list = _split_tools(tools)
+    potential = _automation_potential(automation_readiness)
+
+    records = []
+    for number in sorted(set(short) | set(detailed)):
+        title, inline_detail = _title_and_detail(short.get(number, ''))
+        detail_title, detail = _title_and_detail(detailed.get(number, ''))
+        title = title or detail_title
+        description = detail or inline_detail or title
+        text = f"{title} {description}"
+
+        responsible = _RESPONSIBLE_RE.search(text)
+        records.append({
+            'step_number': number,
+            'title': title[:255],
+            'description': description,
+            'responsible_person': responsible.group(1).strip() if responsible else (owner or DEFAULT_RESPONSIBLE),
+            'system_tool': _match_tool(text, tool_list),
+            'action_details': description,
+            'estimated_time_minutes': _explicit_minutes(text),
+            'automation_potential': potential,
+        })
+
+    try:
+        duration = int(duration_minutes or 0)
+    except (TypeError, ValueError):
+        duration = 0
+    unknown = [record for record in records if record['estimated_time_minutes'] is None]
+    remaining = duration - sum(record['estimated_time_minutes'] or 0 for record in records)
+    if unknown and remaining > 0:
+        share, extra = divmod(remaining, len(unknown))
+        for i, record in enumerate(unknown):
+            record['estimated_time_minutes'] = share + (1 if i < extra else 0)
+    return records
+
+
+def sync_process_steps(conn, process_id: int) -> int:
+    """Prepíše kroky procesu rozložené z textu, vráti počet vložených krokov.
+
+    Ak má proces ručne zadané kroky, ponechajú sa a nič sa nerozkladá.
+    Transakciu drží volajúci.
+    """
+    process = conn.execute("""
+        SELECT owner, steps, step_details, tools, duration_minutes, automation_readiness
+        FROM processes WHERE id = ?
+    """, (process_id,)).fetchone()
+    if process is None:
+        return 0
+    manual = conn.execute(
+        "SELECT 1 FROM process_steps WHERE process_id = ? AND source IS NOT ? LIMIT 1",
+        (process_id, EXTRACTED_SOURCE)
+    ).fetchone()
+    if manual:
+        return 0
+
+    records = parse_steps(
+        process['steps'], process['step_details'], process['owner'], process['tools'],
+        process['duration_minutes'], process['automation_readiness']
+    )
+    conn.execute("DELETE FROM process_steps WHERE process_id = ? AND source = ?", (process_id, EXTRACTED_SOURCE))
+    conn.executemany(STEP_INSERT_SQL, [
+        (process_id, r['step_number'], r['title'], r['description'], r['responsible_person'],
+         r['system_tool'], r['action_details'], r['estimated_time_minutes'],
+         r['automation_potential'], EXTRACTED_SOURCE)
+        for r in records
+    ])
+    return len(records)
+
+
+def backfill_process_steps(conn, batch_size: int = BACKFILL_BATCH_SIZE, progress=None) -> int:
+    """Rozloží kroky existujúcich procesov bez process_steps po dávkach podľa id"""
+    candidates = """
+        FROM processes p
+        WHERE (COALESCE(p.steps, '') != '' OR COALESCE(p.step_details, '') != '')
+          AND NOT EXISTS (SELECT 1 FROM process_steps ps WHERE ps.process_id = p.id)
+    """
+    total = conn.execute(f"SELECT COUNT(*) {candidates}").fetchone()[0]
+    if not total:
+        return 0
+
+    done = 0
+    inserted = 0
+    last_id = -1
+    if progress:
+        progress("Kroky procesov", 0, total)
+    while True:
+        ids = [row[0] for row in conn.execute(
+            f"SELECT p.id {candidates} AND p.id > ? ORDER BY p.id LIMIT ?", (last_id, batch_size)
+        ).fetchall()]
+        if not ids:
+            break
+        for process_id in ids:
+            inserted += sync_process_steps(conn, process_id)
+        last_id = ids[-1]
+        done += len(ids)
+        if progress:
+            progress("Kroky procesov", done, total)
+    return inserted
+
+
+# --- Agregácie nad krokmi -----------------------------------------------------
+
+TIME_BY_RESPONSIBLE_SQL = """
+    SELECT ps.responsible_person, COUNT(*) AS step_count,
+           COALESCE(SUM(ps.estimated_time_minutes), 0) AS total_minutes
+    FROM process_steps ps
+    JOIN processes p ON p.id = ps.process_id
+    WHERE p.is_active = 1
+    GROUP BY ps.responsible_person
+    ORDER BY total_minutes DESC, ps.responsible_person
+"""
+
+AUTOMATABLE_BY_TOOL_SQL = """
+    SELECT ps.system_tool, COUNT(*) AS step_count,
+           COALESCE(SUM(ps.estimated_time_minutes), 0) AS automatable_minutes
+    FROM process_steps ps
+    JOIN processes p ON p.id = ps.process_id
+    WHERE ps.is_automated = 0 AND ps.system_tool IS NOT NULL
+      AND ps.automation_potential >= ? AND p.is_active = 1
+    GROUP BY ps.system_tool
+    ORDER BY automatable_minutes DESC, ps.system_tool
+"""
+
+
+def get_time_by_responsible(db_path: Optional[str] = None) -> List[Dict]:
+    """Minúty a počet krokov podľa zodpovednej osoby (aktívne procesy)"""
+    return fetch_all(TIME_BY_RESPONSIBLE_SQL, db_path=db_path)
+
+
+def get_automatable_minutes_by_tool(db_path: Optional[str] = None,
+                                    min_potential: int = AUTOMATABLE_POTENTIAL) -> List[Dict]:
+    """Minúty neautomatizovaných krokov s vysokým potenciálom podľa nástroja"""
+    return fetch_all(AUTOMATABLE_BY_TOOL_SQL, (min_potential,), db_path=db_path)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Process Trigrams
+Trigramový index názvov, vlastníkov a tagov procesov pre vyhľadávanie s preklepmi.
+Index žije v pamäti a dopĺňa sa inkrementálne podľa tabuľky process_changes.
+"""
+
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from database_repository import fetch_all, get_connection, on_pool_closed, resolve_db_path
+from database_writer import submit_write
+from process_search import STOP_WORDS
+from text_normalization import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Indexované stĺpce procesov
+TRIGRAM_COLUMNS = ('name', 'owner', 'tags')
+
+DEFAULT_TOP_K = 5
+MIN_SIMILARITY = 0.3
+
+# Koľko posledných záznamov process_changes ponechať (staršie sa mažú cez zapisovač
+# až keď ich je aspoň CHANGE_LOG_PRUNE_AT, nie pri každom vyhľadávaní)
+CHANGE_LOG_KEEP = 1000
+CHANGE_LOG_PRUNE_AT = 2 * CHANGE_LOG_KEEP
+
+
+def word_trigrams(word: str) -> Set[str]:
+    """Trigramy slova doplneného medzerami ("  fa", " fak", ... ako pg_trgm)"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _index_words(text: str) -> Set[str]:
+    return {word for word in tokenize(text) if len(word) >= 2}
+
+
+def _query_words(query: str) -> List[str]:
+    words = []
+    for word in tokenize(query):
+        if len(word) >= 2 and word not in STOP_WORDS and word not in words:
+            words.append(word)
+    return words
+
+
+class TrigramIndex:
+    """Trigramový index nad slovami procesov.
+
+    Podobnosť slova je Jaccard zhodných trigramov, skóre procesu je priemer
+    najlepších zhôd pre jednotlivé slová otázky.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Set[str]] = defaultdict(set)   # trigram -> slová
+        self._word_trigrams: Dict[str, Set[str]] = {}             # slovo -> trigramy
+        self._word_processes: Dict[str, Set[int]] = defaultdict(set)
+        self._process_words: Dict[int, Set[str]] = {}
+        self._last_change_id: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._process_words)
+
+    def _add_word(self, word: str, process_id: int):
+        if word not in self._word_trigrams:
+            trigrams = word_trigrams(word)
+            self._word_trigrams[word] = trigrams
+            for trigram in trigrams:
+                self._postings[trigram].add(word)
+        self._word_processes[word].add(process_id)
+
+    def _remove_process(self, process_id: int):
+        for word in self._process_words.pop(process_id, set()):
+            processes = self._word_processes[word]
+            processes.discard(process_id)
+            if processes:
+                continue
+            # Slovo už nepoužíva žiadny proces - vyhodíme ho z postings
+            del self._word_processes[word]
+            for trigram in self._word_trigrams.pop(word):
+                self._postings[trigram].discard(word)
+                if not self._postings[trigram]:
+                    del self._postings[trigram]
+
+    def _add_process(self, row):
+        words = set()
+        for column in TRIGRAM_COLUMNS:
+            words |= _index_words(row[column] or '')
+        self._process_words[row['id']] = words
+        for word in words:
+            self._add_word(word, row['id'])
+
+    def _load_rows(self, conn, process_ids: Optional[List[int]] = None):
+        columns = ', '.join(('id',) + TRIGRAM_COLUMNS)
+        sql = f"SELECT {columns} FROM processes WHERE is_active = 1"
+        params: list = []
+        if process_ids is not None:
+            sql += f" AND id IN ({', '.join('?' * len(process_ids))})"
+            params = list(process_ids)
+        return conn.execute(sql, params).fetchall()
+
+    def _clear(self):
+        self._postings.clear()
+        self._word_trigrams.clear()
+        self._word_processes.clear()
+        self._process_words.clear()
+
+    def refresh(self) -> int:
+        """Načíta zmeny od posledného refreshu, vráti počet prepočítaných procesov (len číta)"""
+        with self._lock, get_connection(self.db_path) as conn:
+            first_change, last_change = conn.execute(
+                "SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM process_changes"
+            ).fetchone()
+            if last_change == self._last_change_id:
+                return 0
+
+            # Prvé načítanie, log medzičasom orezaný alebo databáza obnovená zo zálohy - celý index odznova
+            if (self._last_change_id is None or first_change > self._last_change_id + 1
+                    or last_change < self._last_change_id):
+                self._clear()
+                for row in self._load_rows(conn):
+                    self._add_process(row)
+                updated = len(self._process_words)
+            else:
+                changed = [
+                    row[0] for row in conn.execute(
+                        "SELECT DISTINCT process_id FROM process_changes WHERE id > ?", (self._last_change_id,)
+                    ).fetchall()
+                ]
+                for process_id in changed:
+                    self._remove_process(process_id)
+                for row in self._load_rows(conn, changed):
+                    self._add_process(row)
+                updated = len(changed)
+
+            self._last_change_id = last_change
+        if last_change - first_change >= CHANGE_LOG_PRUNE_AT:
+            prune_change_log(last_change, self.db_path)
+        return updated
+
+    def search(self, query: str, k: int = DEFAULT_TOP_K,
+               min_similarity: float = MIN_SIMILARITY) -> List[Tuple[int, float]]:
+        """Top-k procesov podľa trigramovej podobnosti [(process_id, skóre 0-1)]"""
+        words = _query_words(query)
+        if not words:
+            return []
+        scores: Dict[int, float] = defaultdict(float)
+        with self._lock:
+            for query_word in words:
+                query_trigrams = word_trigrams(query_word)
+                shared: Dict[str, int] = defaultdict(int)
+                for trigram in query_trigrams:
+                    for word in self._postings.get(trigram, ()):
+                        shared[word] += 1
+
+                best: Dict[int, float] = {}
+                for word, count in shared.items():
+                    similarity = count / (len(query_trigrams) + len(self._word_trigrams[word]) - count)
+                    if similarity < min_similarity:
+                        continue
+                    for process_id in self._word_processes[word]:
+                        if similarity > best.get(process_id, 0.0):
+                            best[process_id] = similarity
+                for process_id, similarity in best.items():
+                    scores[process_id] += similarity
+
+        ranked = [(process_id, round(total / len(words), 3)) for process_id, total in scores.items()]
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked[:k]
+
+
+def prune_change_log(last_change: int, db_path: Optional[str] = None):
+    """Zaradí do zapisovača zmazanie starých záznamov logu (vyhľadávanie samo nezapisuje)"""
+    try:
+        submit_write(lambda conn: conn.execute(
+            "DELETE FROM process_changes WHERE id <= ?", (last_change - CHANGE_LOG_KEEP,)
+        ), db_path)
+    except Exception as e:
+        logger.warning("Log zmien procesov: %s", e)
+
+
+_indexes: Dict[str, TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_trigram_index(db_path: Optional[str] = None) -> TrigramIndex:
+    """Zdieľaný index pre databázu, pri každom volaní dotiahne nové zmeny"""
+    path = resolve_db_path(db_path)
+    key = os.path.abspath(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = TrigramIndex(path)
+    index.refresh()
+    return index
+
+
+def release_trigram_index(db_path: Optional[str] = None):
+    """Zahodí index jednej databázy (pri zatvorení jej poolu)"""
+    with _indexes_lock:
+        _indexes.pop(os.path.abspath(resolve_db_path(db_path)), None)
+
+
+on_pool_closed(release_trigram_index)
+
+
+def fuzzy_search_processes(query: str, db_path: Optional[str] = None,
+                           k: int = DEFAULT_TOP_K) -> List[Tuple[Dict, float]]:
+    """Vyhľadá procesy tolerantne k preklepom - [(proces, podobnosť 0-1)]"""
+    ranked = get_trigram_index(db_path).search(query, k)
+    if not ranked:
+        return []
+    placeholders = ', '.join('?' * len(ranked))
+    rows = {
+        row['id']: dict(row)
+        for row in fetch_all(
+            f"SELECT * FROM processes WHERE id IN ({placeholders})",
+            [process_id for process_id, _ in ranked], db_path=db_path
+        )
+    }
+    return [(rows[process_id], score) for process_id, score in ranked if process_id in rows]
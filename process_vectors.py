@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Process Vectors
+Vektorový index procesov (NumPy) pre sémantický predvýber kandidátov pred AI.
+Dopĺňa sa inkrementálne podľa tabuľky process_vector_changes a ukladá sa
+vedľa databázy. Embedder je vymeniteľný - predvolený hashovací funguje bez siete.
+"""
+
+import json
+import logging
+import os
+import threading
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from database_repository import fetch_all, get_connection, on_pool_closed, resolve_db_path
+from database_writer import submit_write
+from text_normalization import stem_word, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Text procesu pre embedding (názov má dvojnásobnú váhu)
+VECTOR_COLUMNS = ('name', 'name', 'category', 'owner', 'tags', 'description')
+
+EMBEDDING_DIM = 512
+DEFAULT_TOP_K = 10
+INDEX_SUFFIX = '.vectors.npz'
+# Embedder podľa názvu v EMBEDDERS (napr. "openai" pre sémantické embeddingy z API)
+EMBEDDER_ENV_VAR = 'ADSUN_EMBEDDER'
+DEFAULT_EMBEDDER = 'hashing'
+
+# Koľko posledných záznamov process_vector_changes ponechať (staršie sa mažú cez
+# zapisovač až keď ich je aspoň CHANGE_LOG_PRUNE_AT, nie pri každom vyhľadávaní)
+CHANGE_LOG_KEEP = 1000
+CHANGE_LOG_PRUNE_AT = 2 * CHANGE_LOG_KEEP
+
+
+class HashingEmbedder:
+    """Kmene slov a znakové trigramy hashované do pevného počtu dimenzií (bez siete)"""
+
+    name = 'hashing'
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        features = []
+        for word in tokenize(text):
+            stem = stem_word(word)
+            features.append(stem)
+            padded = f" {stem} "
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                # crc32 je stabilný medzi behmi (na rozdiel od hash())
+                bucket = zlib.crc32(feature.encode('utf-8'))
+                vectors[row, bucket % self.dim] += 1.0 if bucket & 0x80000000 else -1.0
+        return _normalize(vectors)
+
+
+class OpenAIEmbedder:
+    """Embeddingy z OpenAI API - presnejšia sémantika, vyžaduje kľúč a sieť"""
+
+    name = 'openai'
+
+    def __init__(self, model: str = 'text-embedding-3-small', dim: int = EMBEDDING_DIM):
+        self.model = model
+        self.dim = dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        from openai_clients import create_embeddings
+        response = create_embeddings(model=self.model, input=texts, dimensions=self.dim)
+        return _normalize(np.array([item.embedding for item in response.data], dtype=np.float32))
+
+
+EMBEDDERS: Dict[str, Callable[[], object]] = {
+    'hashing': HashingEmbedder,
+    'openai': OpenAIEmbedder,
+}
+
+
+def register_embedder(name: str, factory: Callable[[], object]):
+    """Vlastný embedder: objekt s atribútmi name, dim a metódou embed(texts) -> (n, dim)"""
+    EMBEDDERS[name] = factory
+
+
+def get_embedder(name: Optional[str] = None):
+    return EMBEDDERS[name or os.environ.get(EMBEDDER_ENV_VAR, DEFAULT_EMBEDDER)]()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def _process_text(row) -> str:
+    return ' '.join(str(row[column] or '') for column in VECTOR_COLUMNS)
+
+
+def index_path(db_path: Optional[str] = None) -> str:
+    """Index vedľa databázy (každý tenant má vlastný)"""
+    return os.path.splitext(resolve_db_path(db_path))[0] + INDEX_SUFFIX
+
+
+class VectorIndex:
+    """Matica normalizovaných embeddingov aktívnych procesov, skóre = kosínusová podobnosť"""
+
+    def __init__(self, db_path: Optional[str] = None, embedder=None):
+        self.db_path = db_path
+        self.embedder = embedder or get_embedder()
+        self._lock = threading.Lock()
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._vectors = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._last_change_id: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _load_rows(self, conn, process_ids: Optional[List[int]] = None):
+        columns = ', '.join(('id',) + tuple(dict.fromkeys(VECTOR_COLUMNS)))
+        sql = f"SELECT {columns} FROM processes WHERE is_active = 1"
+        params: list = []
+        if process_ids is not None:
+            sql += f" AND id IN ({', '.join('?' * len(process_ids))})"
+            params = list(process_ids)
+        return conn.execute(sql, params).fetchall()
+
+    def _embed_rows(self, rows) -> Tuple[np.ndarray, np.ndarray]:
+        ids = np.array([row['id'] for row in rows], dtype=np.int64)
+        if not rows:
+            return ids, np.zeros((0, self.embedder.dim), dtype=np.float32)
+        return ids, self.embedder.embed([_process_text(row) for row in rows]).astype(np.float32)
+
+    def refresh(self) -> int:
+        """Načíta zmeny od posledného refreshu, vráti počet prepočítaných procesov (databázu len číta)"""
+        with self._lock, get_connection(self.db_path) as conn:
+            first_change, last_change = conn.execute(
+                "SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM process_vector_changes"
+            ).fetchone()
+            if last_change == self._last_change_id:
+                return 0
+
+            # Prvé načítanie, orezaný log alebo databáza obnovená zo zálohy - celý index odznova
+            if (self._last_change_id is None or first_change > self._last_change_id + 1
+                    or last_change < self._last_change_id):
+                self._ids, self._vectors = self._embed_rows(self._load_rows(conn))
+                updated = len(self._ids)
+            else:
+                changed = [
+                    row[0] for row in conn.execute(
+                        "SELECT DISTINCT process_id FROM process_vector_changes WHERE id > ?",
+                        (self._last_change_id,)
+                    ).fetchall()
+                ]
+                keep = ~np.isin(self._ids, changed)
+                ids, vectors = self._embed_rows(self._load_rows(conn, changed))
+                self._ids = np.concatenate([self._ids[keep], ids])
+                self._vectors = np.concatenate([self._vectors[keep], vectors])
+                updated = len(changed)
+
+            self._last_change_id = last_change
+        self.save()
+        if last_change - first_change >= CHANGE_LOG_PRUNE_AT:
+            prune_change_log(last_change, self.db_path)
+        return updated
+
+    def search(self, query: str, k: int = DEFAULT_TOP_K) -> List[Tuple[int, float]]:
+        """Top-k procesov podľa kosínusovej podobnosti [(process_id, skóre)], len kladné skóre"""
+        with self._lock:
+            if not len(self._ids):
+                return []
+            scores = self._vectors @ self.embedder.embed([query])[0]
+            top = np.argsort(-scores)[:k] if len(scores) <= k else np.argpartition(-scores, k)[:k]
+            ranked = [(int(self._ids[i]), round(float(scores[i]), 3)) for i in top if scores[i] > 0]
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked
+
+    def save(self, path: Optional[str] = None):
+        path = path or index_path(self.db_path)
+        with self._lock:
+            meta = {'embedder': self.embedder.name, 'dim': self.embedder.dim,
+                    'last_change_id': self._last_change_id}
+            with open(path + '.part', 'wb') as f:
+                np.savez(f, ids=self._ids, vectors=self._vectors, meta=np.array(json.dumps(meta)))
+        os.replace(path + '.part', path)
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """Načíta uložený index; iný embedder alebo poškodený súbor = False (prestavia sa)"""
+        path = path or index_path(self.db_path)
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data['meta']))
+                if meta['embedder'] != self.embedder.name or meta['dim'] != self.embedder.dim:
+                    return False
+                with self._lock:
+                    self._ids = data['ids']
+                    self._vectors = data['vectors']
+                    self._last_change_id = meta['last_change_id']
+            return True
+        except Exception as e:
+            logger.warning("Vektorový index %s: %s", path, e)
+            return False
+
+
+def prune_change_log(last_change: int, db_path: Optional[str] = None):
+    """Zaradí do zapisovača zmazanie starých záznamov logu (vyhľadávanie samo nezapisuje)"""
+    try:
+        submit_write(lambda conn: conn.execute(
+            "DELETE FROM process_vector_changes WHERE id <= ?", (last_change - CHANGE_LOG_KEEP,)
+        ), db_path)
+    except Exception as e:
+        logger.warning("Log zmien procesov: %s", e)
+
+
+_indexes: Dict[str, VectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_vector_index(db_path: Optional[str] = None) -> VectorIndex:
+    """Zdieľaný index pre databázu (zo súboru pri prvom použití), dotiahne nové zmeny"""
+    path = resolve_db_path(db_path)
+    key = os.path.abspath(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = VectorIndex(path)
+            index.load()
+    index.refresh()
+    return index
+
+
+def invalidate_vector_indexes(db_path: Optional[str] = None):
+    """Zahodí index databázy z pamäte aj uložený súbor (napr. po obnove zo zálohy)"""
+    release_vector_index(db_path)
+    if os.path.exists(index_path(db_path)):
+        os.remove(index_path(db_path))
+
+
+def release_vector_index(db_path: Optional[str] = None):
+    """Zahodí index jednej databázy z pamäte, uložený súbor ostáva (pri zatvorení poolu)"""
+    with _indexes_lock:
+        _indexes.pop(os.path.abspath(resolve_db_path(db_path)), None)
+
+
+on_pool_closed(release_vector_index)
+
+
+def semantic_search_processes(query: str, db_path: Optional[str] = None,
+                              k: int = DEFAULT_TOP_K) -> List[Tuple[Dict, float]]:
+    """Top-k procesov podľa významu - [(proces, podobnosť)]"""
+    ranked = get_vector_index(db_path).search(query, k)
+    if not ranked:
+        return []
+    placeholders = ', '.join('?' * len(ranked))
+    rows = {
+        row['id']: dict(row)
+        for row in fetch_all(
+            f"SELECT * FROM processes WHERE id IN ({placeholders})",
+            [process_id for process_id, _ in ranked], db_path=db_path
+        )
+    }
+    return [(rows[process_id], score) for process_id, score in ranked if process_id in rows]
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Query Cache
+Zdieľaná cache čítaní (všetky sessions a vlákna) platná do najbližšieho zápisu.
+Zmenu databázy zisťuje PRAGMA data_version na samostatnom pripojení ktoré nikdy
+nezapisuje - mení sa po každom commite iného pripojenia, aj z iného procesu.
+"""
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from database_repository import fetch_all, get_pool, on_pool_closed, resolve_db_path
+
+# Maximálny počet uložených výsledkov (najdlhšie nepoužitý vypadne prvý)
+QUERY_CACHE_SIZE = 512
+
+
+class _VersionProbe:
+    """Samostatné pripojenie len na PRAGMA data_version jednej databázy"""
+
+    def __init__(self, db_path: str):
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+
+    def version(self) -> int:
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class QueryCache:
+    """Výsledky čítaní podľa (databáza, kľúč) s verziou databázy v čase čítania"""
+
+    def __init__(self, max_size: int = QUERY_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._probes: Dict[str, _VersionProbe] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _version(self, db_path: str) -> int:
+        key = os.path.abspath(db_path)
+        with self._lock:
+            probe = self._probes.get(key)
+            if probe is None:
+                probe = self._probes[key] = _VersionProbe(db_path)
+        return probe.version()
+
+    def get_or_load(self, key: tuple, loader: Callable[[], Any], db_path: Optional[str] = None) -> Any:
+        """Vráti uložený výsledok ak sa databáza odvtedy nezmenila, inak zavolá loader"""
+        path = resolve_db_path(db_path)
+        # Vlákno s otvorenou transakciou vidí aj nepotvrdené zmeny - také čítanie neukladáme
+        conn = get_pool(path).current_connection()
+        if conn is not None and conn.in_transaction:
+            return loader()
+
+        # Verzia pred čítaním - zápis počas čítania výsledok len zneplatní
+        version = self._version(path)
+        cache_key = (os.path.abspath(path),) + key
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        result = loader()
+        with self._lock:
+            self._entries[cache_key] = (version, result)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return result
+
+    def forget(self, db_path: str):
+        """Zahodí výsledky a zatvorí pripojenie na data_version jednej databázy"""
+        key = os.path.abspath(db_path)
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == key]:
+                del self._entries[cache_key]
+            probe = self._probes.pop(key, None)
+        if probe is not None:
+            probe.close()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            probes = list(self._probes.values())
+            self._probes.clear()
+            self.hits = 0
+            self.misses = 0
+        for probe in probes:
+            probe.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+_cache = QueryCache()
+
+
+def cached_fetch_all(sql: str, params: Sequence = (), db_path: Optional[str] = None) -> List[Dict]:
+    """fetch_all s cache - riadky sú kópie, volajúci ich môže meniť"""
+    rows = _cache.get_or_load(('sql', sql, tuple(params)),
+                              lambda: fetch_all(sql, params, db_path=db_path), db_path)
+    return [dict(row) for row in rows]
+
+
+def cached_call(fn: Callable[..., Any], *args, db_path: Optional[str] = None) -> Any:
+    """Výsledok fn(*args) z cache - pre odvodené hodnoty (nemenné: str, tuple, ...)"""
+    return _cache.get_or_load(('call', fn.__module__, fn.__qualname__) + args, lambda: fn(*args), db_path)
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    return _cache.stats()
+
+
+def clear_query_cache():
+    """Zahodí cache a zatvorí pripojenia na data_version - pri testoch a po obnove zo zálohy"""
+    _cache.clear()
+
+
+def forget_database(db_path: Optional[str] = None):
+    """Uvoľní cache jednej databázy (pri zatvorení jej poolu)"""
+    _cache.forget(resolve_db_path(db_path))
+
+
+on_pool_closed(forget_database)
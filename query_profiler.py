@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Query Profiler
+Voliteľné profilovanie SQL počas jedného behu Streamlit skriptu - každý dotaz
+s trvaním, počtom riadkov a render funkciou ktorá ho spustila; panel najpomalších
+dotazov v sidebare a export trace do JSON.
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import streamlit as st
+
+from database_repository import QueryStats, get_query_profiler, set_query_profiler
+
+PROFILE_SESSION_KEY = 'sql_profiling'
+# Zapnutie profilovania pri štarte (napr. ADSUN_SQL_PROFILE=1 streamlit run main_app.py)
+PROFILE_ENV_VAR = 'ADSUN_SQL_PROFILE'
+
+SLOWEST_QUERIES = 10
+
+# Moduly ktoré pri hľadaní volajúceho preskakujeme (vrstva pripojení a samotný profiler)
+_SKIPPED_MODULES = {'database_repository', 'query_profiler', 'contextlib'}
+_RENDER_PREFIXES = ('render_', 'show_')
+
+
+def _caller() -> Dict[str, Optional[str]]:
+    """Prvá funkcia mimo vrstvy pripojení a najbližšia render_/show_ funkcia v zásobníku"""
+    caller = None
+    render_function = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module not in _SKIPPED_MODULES:
+            name = f"{module}.{frame.f_code.co_name}:{frame.f_lineno}"
+            if caller is None:
+                caller = name
+            if frame.f_code.co_name.startswith(_RENDER_PREFIXES):
+                render_function = f"{module}.{frame.f_code.co_name}"
+                break
+        frame = frame.f_back
+    return {'caller': caller, 'render_function': render_function}
+
+
+class QueryProfiler:
+    """Záznam všetkých SQL príkazov jedného behu (vlákna)"""
+
+    def __init__(self, label: str = ''):
+        self.label = label
+        self.started_at = datetime.now()
+        self.entries: List[Dict[str, Any]] = []
+        self.wall_ms = 0.0
+        self._start = time.perf_counter()
+
+    def record(self, sql: str, duration_ms: float, rows: int) -> Dict[str, Any]:
+        """Volá ho kurzor pri každom príkaze; vrátený záznam kurzor dopĺňa pri fetch"""
+        entry = {
+            'sql': QueryStats.normalize_sql(sql),
+            'duration_ms': duration_ms,
+            'rows': rows,
+            'offset_ms': round((time.perf_counter() - self._start) * 1000 - duration_ms, 3),
+            **_caller(),
+        }
+        self.entries.append(entry)
+        return entry
+
+    def finish(self):
+        self.wall_ms = (time.perf_counter() - self._start) * 1000
+
+    @property
+    def total_ms(self) -> float:
+        return sum(entry['duration_ms'] for entry in self.entries)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Príkazy zoskupené podľa SQL, zoradené podľa celkového času"""
+        groups: Dict[str, Dict[str, Any]] = {}
+        for entry in self.entries:
+            group = groups.get(entry['sql'])
+            if group is None:
+                group = {'sql': entry['sql'], 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                         'rows': 0, 'render_functions': []}
+                groups[entry['sql']] = group
+            group['calls'] += 1
+            group['total_ms'] += entry['duration_ms']
+            group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+            group['rows'] += entry['rows']
+            source = entry['render_function'] or entry['caller']
+            if source and source not in group['render_functions']:
+                group['render_functions'].append(source)
+        return sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)
+
+    def slowest(self, limit: int = SLOWEST_QUERIES) -> List[Dict[str, Any]]:
+        return self.summary()[:limit]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'label': self.label,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_ms': round(self.wall_ms, 3),
+            'sql_ms': round(self.total_ms, 3),
+            'statements': len(self.entries),
+            'summary': self.summary(),
+            'entries': self.entries,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+
+@contextmanager
+def profile_queries(label: str = ''):
+    """Zaznamená všetky SQL príkazy vykonané v tomto vlákne počas bloku"""
+    profiler = QueryProfiler(label)
+    previous = get_query_profiler()
+    set_query_profiler(profiler)
+    try:
+        yield profiler
+    finally:
+        profiler.finish()
+        set_query_profiler(previous)
+
+
+def profiling_enabled() -> bool:
+    if PROFILE_SESSION_KEY not in st.session_state:
+        st.session_state[PROFILE_SESSION_KEY] = os.environ.get(PROFILE_ENV_VAR) == '1'
+    return bool(st.session_state[PROFILE_SESSION_KEY])
+
+
+@contextmanager
+def profile_script_run():
+    """Profiluje jeden beh skriptu ak je profilovanie zapnuté (inak yield None)"""
+    if not profiling_enabled():
+        yield None
+        return
+    with profile_queries(st.session_state.get('mode', '')) as profiler:
+        yield profiler
+
+
+def render_profiler_sidebar(profiler: Optional[QueryProfiler] = None):
+    """Prepínač profilovania a panel najpomalších dotazov tohto behu v sidebare"""
+    with st.sidebar:
+        st.markdown("---")
+        profiling_enabled()
+        st.checkbox("🔬 SQL profiler", key=PROFILE_SESSION_KEY,
+                    help="Zaznamená každý SQL dotaz tohto behu stránky s trvaním a volajúcou funkciou")
+        if not st.session_state[PROFILE_SESSION_KEY]:
+            return
+        if profiler is None:
+            st.caption("Profil sa zobrazí po ďalšom načítaní stránky.")
+            return
+
+        st.caption(
+            f"{len(profiler.entries)} dotazov · SQL {profiler.total_ms:.1f} ms · beh {profiler.wall_ms:.0f} ms"
+        )
+        with st.expander("🐢 Najpomalšie dotazy tohto behu", expanded=True):
+            for group in profiler.slowest():
+                st.markdown(
+                    f"**{group['total_ms']:.2f} ms** · {group['calls']}× · {group['rows']} riadkov  \n"
+                    f"`{', '.join(group['render_functions']) or '?'}`"
+                )
+                st.code(group['sql'][:300], language='sql')
+        st.download_button(
+            "📥 Export trace (JSON)",
+            data=profiler.to_json(),
+            file_name=f"sql_profile_{profiler.started_at.strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json",
+            use_container_width=True
+        )
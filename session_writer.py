@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Session Writer
+Dávkový zápis konverzačnej histórie mapovania procesu.
+Jeden payload builder pre SQLite (executemany v jednej transakcii) aj Airtable.
+"""
+
+import json
+from typing import Dict, List
+
+SESSION_INSERT_SQL = """
+    INSERT INTO documentation_sessions (process_id, documented_by, session_notes,
+                                      step, question, response, analysis, session_timestamp,
+                                      completeness_score, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Skóre úplnosti = počet krokov konverzácie, max 10
+MAX_COMPLETENESS_SCORE = 10
+
+
+def build_session_payloads(conversation_history: List[Dict], documenter: str) -> List[Dict]:
+    """Pripraví záznamy session krokov (spoločné pre SQLite aj Airtable)"""
+    completeness = min(len(conversation_history), MAX_COMPLETENESS_SCORE)
+    payloads = []
+    for i, entry in enumerate(conversation_history):
+        analysis = entry.get('analysis', {}) or {}
+        timestamp = entry['timestamp']
+        payloads.append({
+            'documenter': documenter,
+            'step': i + 1,
+            'question': entry['question'],
+            'response': entry['response'],
+            'analysis': analysis,
+            'ai_powered': analysis.get('ai_powered', False),
+            'timestamp': timestamp.isoformat(),
+            'created_at': timestamp,
+            'completeness_score': completeness,
+        })
+    return payloads
+
+
+def session_notes(payload: Dict) -> str:
+    """JSON do stĺpca session_notes (rovnaký tvar ako doteraz)"""
+    return json.dumps({
+        'step': payload['step'],
+        'question': payload['question'],
+        'response': payload['response'],
+        'analysis': payload['analysis'],
+        'timestamp': payload['timestamp']
+    }, ensure_ascii=False)
+
+
+def write_sessions(conn, process_id: int, payloads: List[Dict]) -> int:
+    """Zapíše všetky kroky jedným executemany (transakciu drží volajúci).
+
+    Polia kroku idú do vlastných stĺpcov, session_notes ostáva pre staršie čítania.
+    """
+    conn.executemany(SESSION_INSERT_SQL, [
+        (process_id, payload['documenter'], session_notes(payload),
+         payload['step'], payload['question'], payload['response'],
+         json.dumps(payload['analysis'], ensure_ascii=False), payload['timestamp'],
+         payload['completeness_score'], payload['created_at'])
+        for payload in payloads
+    ])
+    return len(payloads)
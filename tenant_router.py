@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Tenant Router
+Určí databázu firmy (tenanta) pre každú Streamlit session - z prihlásenia
+alebo z predvoleného tenanta nasadenia - a nastaví ju pre celý beh skriptu,
+takže viac firiem zdieľa jeden proces bez miešania dát.
+"""
+
+import os
+import re
+import unicodedata
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import streamlit as st
+
+from database_repository import (
+    DEFAULT_DB_PATH,
+    close_idle_pools,
+    get_current_db_path,
+    set_current_db_path,
+)
+
+# Kľúč session_state s identifikátorom firmy pre prihlásenie; aplikácia zatiaľ prihlásenie nemá,
+# bez neho platí predvolený tenant nasadenia (ADSUN_TENANT / tenancy.default)
+TENANT_SESSION_KEY = 'tenant'
+# Tenant pre CLI a skripty mimo Streamlitu
+TENANT_ENV_VAR = 'ADSUN_TENANT'
+TENANTS_DIR = os.environ.get('ADSUN_TENANTS_DIR', 'tenants')
+DEFAULT_TENANT = 'default'
+
+
+def tenant_slug(tenant: str) -> str:
+    """Bezpečný názov súboru z identifikátora firmy ('Firma Žilina s.r.o.' -> 'firma-zilina-s-r-o')"""
+    ascii_name = unicodedata.normalize('NFKD', tenant).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', ascii_name.lower()).strip('-')
+
+
+def load_tenancy_settings() -> Dict:
+    """Sekcia "tenancy" z company_settings.json: {"default": "...", "databases": {"tenant": "cesta.db"}}"""
+    from company_settings import load_company_settings
+    return load_company_settings().get('tenancy', {}) or {}
+
+
+def tenant_db_path(tenant: Optional[str], settings: Optional[Dict] = None) -> str:
+    """Cesta k databáze tenanta - explicitne z nastavení, inak TENANTS_DIR/<slug>.db"""
+    if not tenant or tenant == DEFAULT_TENANT:
+        return DEFAULT_DB_PATH
+    settings = load_tenancy_settings() if settings is None else settings
+    configured = settings.get('databases', {}).get(tenant)
+    if configured:
+        return configured
+    slug = tenant_slug(tenant)
+    if not slug:
+        raise ValueError(f"Neplatný identifikátor firmy: {tenant!r}")
+    os.makedirs(TENANTS_DIR, exist_ok=True)
+    return os.path.join(TENANTS_DIR, f"{slug}.db")
+
+
+def default_tenant(settings: Optional[Dict] = None) -> Optional[str]:
+    """Tenant mimo session: ADSUN_TENANT, inak tenancy.default z nastavení"""
+    settings = load_tenancy_settings() if settings is None else settings
+    return os.environ.get(TENANT_ENV_VAR) or settings.get('default')
+
+
+def resolve_session_tenant(settings: Optional[Dict] = None) -> Optional[str]:
+    """Tenant aktuálnej session: prihlásenie > predvolený tenant nasadenia.
+
+    Nikdy nie z URL - parameter odkazu si môže ktokoľvek prepísať a otvoriť
+    si tak databázu inej firmy bez prihlásenia.
+    """
+    settings = load_tenancy_settings() if settings is None else settings
+    return st.session_state.get(TENANT_SESSION_KEY) or default_tenant(settings)
+
+
+@contextmanager
+def use_tenant(tenant: Optional[str], settings: Optional[Dict] = None):
+    """Počas bloku idú všetky volania bez db_path do databázy daného tenanta"""
+    previous = get_current_db_path()
+    set_current_db_path(tenant_db_path(tenant, settings))
+    try:
+        yield get_current_db_path()
+    finally:
+        set_current_db_path(previous)
+
+
+@contextmanager
+def tenant_session():
+    """Obalí jeden beh skriptu databázou tenanta session a uprace nepoužívané pooly
+    (spolu s nimi zapisovače, plánovače záloh a indexy ich databáz)"""
+    settings = load_tenancy_settings()
+    tenant = resolve_session_tenant(settings)
+    with use_tenant(tenant, settings) as db_path:
+        st.session_state['tenant_db_path'] = db_path
+        close_idle_pools()
+        yield db_path
@@ -0,0 +1,1985 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testy databázovej vrstvy ADSUN (pool pripojení, repository funkcie, indexy)
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+
+import database_repository
+from database_indexes import HOT_QUERIES, IndexManager
+from database_repository import (
+    ConnectionPool,
+    close_all_pools,
+    execute,
+    execute_many,
+    fetch_all,
+    fetch_one,
+    fetch_value,
+    get_connection,
+    get_pool,
+    get_query_stats,
+    reset_query_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_openai_clients():
+    """Registry OpenAI klientov je procesový - každý test si podvrhne vlastný falošný klient"""
+    from openai_clients import close_openai_clients
+
+    close_openai_clients()
+    yield
+    close_openai_clients()
+
+
+@pytest.fixture
+def db_path():
+    """Dočasná databáza s tabuľkou processes"""
+    tmp_dir = tempfile.mkdtemp()
+    path = os.path.join(tmp_dir, "test_adsun.db")
+    with get_connection(path) as conn:
+        conn.execute("""
+            CREATE TABLE processes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                category TEXT DEFAULT '',
+                owner TEXT DEFAULT '',
+                is_active INTEGER DEFAULT 1
+            )
+        """)
+    yield path
+    close_all_pools()
+
+
+@pytest.fixture
+def app_db():
+    """Dočasná databáza s plnou schémou z database_schema.sql"""
+    tmp_dir = tempfile.mkdtemp()
+    path = os.path.join(tmp_dir, "test_adsun_app.db")
+    schema_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database_schema.sql")
+    with open(schema_file, encoding="utf-8") as f:
+        schema_sql = f.read()
+    with get_connection(path) as conn:
+        conn.executescript(schema_sql)
+    yield path
+    close_all_pools()
+
+
+def test_pool_applies_pragmas(db_path):
+    """Každé pripojenie z poolu má WAL a busy_timeout"""
+    with get_connection(db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_pool_reuses_connections(db_path):
+    """Opakované požičanie vráti to isté pripojenie namiesto nového"""
+    pool = get_pool(db_path)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert pool.status()['created'] == 1
+
+
+def test_nested_connection_is_shared_and_committed_once(db_path):
+    """Vnorený blok v rovnakom vlákne zdieľa pripojenie a transakciu"""
+    with get_connection(db_path) as outer:
+        outer.execute("INSERT INTO processes (name) VALUES (?)", ("Fakturácia",))
+        with get_connection(db_path) as inner:
+            assert inner is outer
+            assert inner.in_transaction
+    assert fetch_value("SELECT COUNT(*) FROM processes", db_path=db_path) == 1
+
+
+def test_rollback_on_error(db_path):
+    """Pri výnimke sa zápis nepotvrdí"""
+    with pytest.raises(ValueError):
+        with get_connection(db_path) as conn:
+            conn.execute("INSERT INTO processes (name) VALUES (?)", ("Chybný",))
+            raise ValueError("test")
+    assert fetch_value("SELECT COUNT(*) FROM processes", db_path=db_path) == 0
+
+
+def test_repository_helpers(db_path):
+    """fetch_* a execute* vracajú slovníky a hodnoty"""
+    cursor = execute("INSERT INTO processes (name, category) VALUES (?, ?)", ("Objednávky", "obchod"), db_path=db_path)
+    assert cursor.lastrowid == 1
+    inserted = execute_many(
+        "INSERT INTO processes (name, category) VALUES (?, ?)",
+        [("Dovolenky", "HR"), ("Nábor", "HR")],
+        db_path=db_path
+    )
+    assert inserted == 2
+
+    rows = fetch_all("SELECT name, category FROM processes ORDER BY id", db_path=db_path)
+    assert rows[0] == {'name': 'Objednávky', 'category': 'obchod'}
+    assert fetch_one("SELECT name FROM processes WHERE category = ?", ("obchod",), db_path=db_path) == {'name': 'Objednávky'}
+    assert fetch_one("SELECT name FROM processes WHERE id = 99", db_path=db_path) is None
+    assert fetch_value("SELECT name FROM processes WHERE id = 99", db_path=db_path, default="-") == "-"
+
+
+def test_query_stats_are_recorded(db_path):
+    """Časovanie sa zaznamená aj pre conn.execute aj pre kurzor"""
+    reset_query_stats()
+    with get_connection(db_path) as conn:
+        conn.execute("SELECT COUNT(*) FROM processes").fetchone()
+        conn.cursor().execute("SELECT COUNT(*)   FROM processes").fetchone()
+    stats = {s['sql']: s for s in get_query_stats()}
+    entry = stats["SELECT COUNT(*) FROM processes"]
+    assert entry['calls'] == 2
+    assert entry['max_ms'] >= entry['avg_ms'] >= 0
+
+
+def test_pool_is_thread_safe(db_path):
+    """Viacero vlákien zapisuje cez malý pool bez chýb"""
+    pool = ConnectionPool(db_path, size=2)
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(10):
+                with pool.connection() as conn:
+                    conn.execute("INSERT INTO processes (name) VALUES (?)", (f"proces {n}-{i}",))
+        except Exception as e:  # pragma: no cover - zachytí chybu pre assert
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    pool.close()
+
+    assert not errors
+    assert pool.status()['created'] <= 2
+    assert fetch_value("SELECT COUNT(*) FROM processes", db_path=db_path) == 60
+
+
+def test_failing_close_hook_is_logged(db_path, monkeypatch, caplog):
+    """Chyba jedného hooku sa zaloguje a ostatné hooky pri zatvorení poolu aj tak prebehnú"""
+    released = []
+
+    def failing(path):
+        raise RuntimeError("hook zlyhal")
+
+    monkeypatch.setattr(database_repository, '_close_hooks', [failing, released.append])
+    fetch_value("SELECT 1", db_path=db_path)
+    with caplog.at_level('WARNING', logger='database_repository'):
+        database_repository.close_pool(db_path)
+    assert released == [os.path.abspath(db_path)]
+    assert 'hook zlyhal' in caplog.text
+
+
+def test_default_db_path():
+    """Bez cesty sa použije hlavná databáza aplikácie"""
+    assert get_pool().db_path == database_repository.DEFAULT_DB_PATH
+
+
+def test_index_manager_creates_and_verifies(app_db):
+    """Deklarované indexy sa vytvoria raz a overenie hlási OK"""
+    manager = IndexManager(app_db)
+    first = manager.ensure_indexes()
+    assert 'idx_processes_active_category' in first['created']
+    assert not first['skipped']
+
+    second = manager.ensure_indexes()
+    assert not second['created']
+    assert set(second['existing']) == set(first['created'])
+    assert all(item['status'] == 'ok' for item in manager.verify_indexes())
+
+
+def test_index_manager_skips_missing_columns(db_path):
+    """Index na neexistujúci stĺpec sa preskočí namiesto chyby"""
+    schema = {
+        'processes': {'columns': {}, 'indexes': [
+            {'name': 'idx_test_owner', 'columns': ['owner'], 'where': 'is_active = 1'},
+            {'name': 'idx_test_missing', 'columns': ['created_at']},
+        ]}
+    }
+    result = IndexManager(db_path, schema=schema).ensure_indexes()
+    assert result['created'] == ['idx_test_owner']
+    assert result['skipped'][0][0] == 'idx_test_missing'
+
+
+def test_hot_queries_avoid_full_scans(app_db):
+    """Po vytvorení indexov hot queries nerobia full scan cez processes ani sessions"""
+    manager = IndexManager(app_db)
+    before = manager.explain(*HOT_QUERIES['show_process_details'])
+    assert before['full_scans']
+
+    manager.ensure_indexes()
+    manager.analyze()
+    results = manager.explain_hot_queries()
+    for name in ('show_process_details', 'load_process_sessions', 'render_departments',
+                 '_handle_people_query', 'show_department_processes'):
+        assert not results[name].get('error'), name
+        assert not results[name]['full_scans'], (name, results[name]['plan'])
+
+
+LEGACY_SCHEMA = """
+    CREATE TABLE processes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        category TEXT NOT NULL DEFAULT '',
+        owner TEXT NOT NULL DEFAULT '',
+        frequency TEXT DEFAULT '',
+        duration_minutes INTEGER DEFAULT 0,
+        priority INTEGER DEFAULT 3,
+        automation_readiness INTEGER DEFAULT 3,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE departments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT DEFAULT '',
+        manager TEXT DEFAULT '',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE positions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        department_id INTEGER,
+        description TEXT DEFAULT '',
+        responsibilities TEXT DEFAULT '',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    INSERT INTO processes (name, category, owner) VALUES ('Fakturácia', 'administratíva', 'Anna');
+    INSERT INTO departments (name, description, manager) VALUES ('Obchod', 'Predaj', 'Mária');
+"""
+
+
+@pytest.fixture
+def legacy_db():
+    """Databáza v pôvodnom formáte (bez is_active, pozície s title)"""
+    tmp_dir = tempfile.mkdtemp()
+    path = os.path.join(tmp_dir, "legacy_adsun.db")
+    with get_connection(path) as conn:
+        conn.executescript(LEGACY_SCHEMA)
+        conn.executemany(
+            "INSERT INTO positions (title, department_id, responsibilities) VALUES (?, ?, ?)",
+            [(f"Pozícia {i}", 1, "obchod") for i in range(1200)]
+        )
+    yield path
+    close_all_pools()
+
+
+def test_migrations_fresh_database(db_path):
+    """Prázdna databáza dostane všetky tabuľky a migrácie prebehnú raz"""
+    from database_migrations import MIGRATIONS, get_schema_version, run_migrations
+
+    applied = run_migrations(db_path)
+    assert applied == [m.version for m in MIGRATIONS]
+    assert get_schema_version(db_path) == MIGRATIONS[-1].version
+    assert run_migrations(db_path) == []
+    assert run_migrations(db_path, migrations=MIGRATIONS) == []
+
+    tables = {row['name'] for row in fetch_all("SELECT name FROM sqlite_master WHERE type = 'table'", db_path=db_path)}
+    assert {'processes', 'process_steps', 'documentation_sessions', 'departments', 'positions', 'schema_version'} <= tables
+    index_names = {row['name'] for row in fetch_all("SELECT name FROM sqlite_master WHERE type = 'index'", db_path=db_path)}
+    assert 'idx_processes_active_category' in index_names
+
+
+def test_migrations_upgrade_legacy_database(legacy_db):
+    """Pôvodná schéma sa doplní o stĺpce a pozície sa prestavajú po dávkach"""
+    from database_migrations import run_migrations
+
+    progress_calls = []
+    run_migrations(legacy_db, progress=lambda label, done, total: progress_calls.append((label, done, total)))
+
+    process = fetch_one("SELECT is_active, updated_at, description FROM processes", db_path=legacy_db)
+    assert process['is_active'] == 1
+    assert process['updated_at'] is not None
+
+    department = fetch_one("SELECT function FROM departments", db_path=legacy_db)
+    assert department['function'] == 'Predaj'
+
+    assert fetch_value("SELECT COUNT(*) FROM positions", db_path=legacy_db) == 1200
+    position = fetch_one("SELECT id, name, department FROM positions WHERE id = 1", db_path=legacy_db)
+    assert position == {'id': 1, 'name': 'Pozícia 0', 'department': 'Obchod'}
+    assert fetch_value("SELECT COUNT(*) FROM sqlite_master WHERE name = 'positions_legacy'", db_path=legacy_db) == 0
+
+    # 1200 riadkov po 500 = úvodné hlásenie + 3 dávky
+    assert [c[1] for c in progress_calls] == [0, 500, 1000, 1200]
+
+
+def test_failed_migration_rolls_back(db_path):
+    """Chyba v kroku migrácie nezapíše verziu ani čiastočné zmeny"""
+    from database_migrations import Migration, get_schema_version, run_migrations
+
+    def broken(conn, progress):
+        conn.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("zlyhanie")
+
+    with pytest.raises(RuntimeError):
+        run_migrations(db_path, migrations=[Migration(1, "zlomená", broken)])
+    assert get_schema_version(db_path) == 0
+    assert fetch_value("SELECT COUNT(*) FROM sqlite_master WHERE name = 'half_done'", db_path=db_path) == 0
+
+
+def test_migrations_run_once_across_processes(db_path):
+    """Viac workerov naraz - každá migrácia sa zapíše práve raz"""
+    import subprocess
+    import sys
+
+    close_all_pools()
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    script = (
+        "import sys; sys.path.insert(0, %r)\n"
+        "from database_migrations import run_migrations\n"
+        "print(len(run_migrations(%r)))\n"
+    ) % (repo_dir, db_path)
+    workers = [subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, text=True) for _ in range(3)]
+    outputs = [int(w.communicate(timeout=120)[0].strip().splitlines()[-1]) for w in workers]
+
+    from database_migrations import MIGRATIONS
+    assert sorted(outputs) == [0, 0, len(MIGRATIONS)]
+    assert fetch_value("SELECT COUNT(*) FROM schema_version", db_path=db_path) == len(MIGRATIONS)
+
+
+@pytest.fixture
+def search_db(db_path):
+    """Zmigrovaná databáza s niekoľkými procesmi pre vyhľadávanie"""
+    from database_migrations import run_migrations
+
+    run_migrations(db_path)
+    execute_many(
+        "INSERT INTO processes (name, category, owner, description, steps, tools) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            ("Spracovanie objednávok zákazníkov", "obchod", "Mária Novák",
+             "Objednávka od príjmu po expedíciu", "1. Príjem\n2. Expedícia", "CRM, Email"),
+            ("Schvaľovanie dovoleniek", "HR", "Peter Kováč",
+             "Žiadosti o dovolenku", "1. Žiadosť\n2. Schválenie", "HR systém"),
+            ("Fakturácia dodávateľom", "administratíva", "Anna Krásna",
+             "Úhrada faktúr od dodávateľov", "1. Kontrola\n2. Úhrada", "Účtovný systém, Internetbanking"),
+        ],
+        db_path=db_path
+    )
+    return db_path
+
+
+def test_fts_search_ranks_name_matches_first(search_db):
+    """Zhoda v názve má prednosť a výsledky majú confidence 0-1"""
+    from process_search import search_processes
+
+    results = search_processes("fakturácia", search_db)
+    assert results[0][0]['name'] == "Fakturácia dodávateľom"
+    assert results[0][1] == 1.0
+
+    # Viacslovná otázka - predtým LIKE '%celá otázka%' nenašiel nič
+    results = search_processes("ako schvaľovať dovolenky v HR", search_db)
+    assert results and results[0][0]['name'] == "Schvaľovanie dovoleniek"
+    assert all(0.0 <= confidence <= 1.0 for _, confidence in results)
+
+
+def test_fts_index_follows_updates_and_deletes(search_db):
+    """Triggery držia FTS index v súlade s tabuľkou processes"""
+    from process_search import search_process_ids
+
+    execute(
+        "UPDATE processes SET name = 'Reklamácie zákazníkov', description = 'Vybavenie reklamácií' WHERE id = 1",
+        db_path=search_db
+    )
+    assert search_process_ids("objednávok", db_path=search_db) == []
+    assert search_process_ids("reklamácie", db_path=search_db) == [1]
+
+    execute("UPDATE processes SET is_active = 0 WHERE id = 2", db_path=search_db)
+    assert search_process_ids("dovoleniek", db_path=search_db) == []
+    assert search_process_ids("dovoleniek", db_path=search_db, include_inactive=True) == [2]
+
+    execute("DELETE FROM processes WHERE id = 3", db_path=search_db)
+    assert search_process_ids("fakturácia", db_path=search_db, include_inactive=True) == []
+
+
+def test_like_fallback_without_fts(search_db):
+    """Bez FTS tabuľky vyhľadávanie funguje cez LIKE"""
+    from process_search import FTS_TABLE, search_processes
+
+    with get_connection(search_db) as conn:
+        conn.execute("DROP TRIGGER processes_fts_delete")
+        conn.execute(f"DROP TABLE {FTS_TABLE}")
+
+    results = search_processes("dovoleniek", search_db)
+    assert [p['name'] for p, _ in results] == ["Schvaľovanie dovoleniek"]
+    # Tieňové stĺpce - aj bez diakritiky
+    results = search_processes("fakturacia", search_db)
+    assert [p['name'] for p, _ in results] == ["Fakturácia dodávateľom"]
+
+
+def test_process_list_search_falls_back_to_substring(search_db, monkeypatch):
+    """Zoznam procesov: poradie z fulltextu, bez výsledku alebo pri chybe indexu hľadanie podreťazca"""
+    import sqlite3
+
+    import process_management
+    from process_management import filter_processes_by_search
+
+    processes = fetch_all("SELECT id, name, category, owner FROM processes", db_path=search_db)
+    assert [p['name'] for p in filter_processes_by_search(processes, 'dovoleniek', search_db)] == \
+        ["Schvaľovanie dovoleniek"]
+    # Jednopísmenový dotaz fulltext ignoruje - ostáva podreťazec
+    assert len(filter_processes_by_search(processes, 'á', search_db)) == 3
+
+    def broken_index(*args, **kwargs):
+        raise sqlite3.OperationalError('fts5: syntax error near "\""')
+
+    monkeypatch.setattr(process_management, 'search_process_ids', broken_index)
+    assert [p['name'] for p in filter_processes_by_search(processes, 'novák', search_db)] == \
+        ["Spracovanie objednávok zákazníkov"]
+
+
+def test_plain_connection_can_write_processes(search_db):
+    """Triggery nevolajú funkcie poolu - zápis funguje aj cez obyčajné sqlite3 pripojenie"""
+    import sqlite3
+
+    from database_writer import write
+    from process_search import search_processes
+
+    conn = sqlite3.connect(search_db)
+    conn.execute("INSERT INTO processes (name, category) VALUES ('Reklamácie tovaru', 'obchod')")
+    conn.execute("UPDATE processes SET name = 'Fakturácia odberateľom' WHERE name = 'Fakturácia dodávateľom'")
+    conn.commit()
+    conn.close()
+
+    # Zložený text dopočíta najbližší zápis aplikácie
+    write(lambda conn: None, search_db)
+    assert [p['name'] for p, _ in search_processes("reklamacie", search_db)] == ["Reklamácie tovaru"]
+    assert [p['name'] for p, _ in search_processes("odberatelom", search_db)] == ["Fakturácia odberateľom"]
+    row = fetch_one("SELECT name_folded FROM processes WHERE name = 'Reklamácie tovaru'", db_path=search_db)
+    assert row['name_folded'] == "reklamacie tovaru"
+
+
+def test_fold_and_stem_slovak_words():
+    """Rôzne tvary slova s diakritikou aj bez nej majú rovnaký kmeň"""
+    from text_normalization import fold_text, normalize_query, stem_word
+
+    assert fold_text("Schvaľovanie Objednávok") == "schvalovanie objednavok"
+    assert {stem_word(w) for w in ("objednavky", "objednavok", "objednavka")} == {"objednav"}
+    assert stem_word("zakaznikov") == stem_word("zakaznici")
+    assert normalize_query("Dovoleniek") == normalize_query("dovolenky")
+
+
+def test_search_without_diacritics(search_db):
+    """Otázka bez diakritiky a v inom páde nájde proces"""
+    from process_search import search_processes
+
+    results = search_processes("objednavky zakaznika", search_db)
+    assert results[0][0]['name'] == "Spracovanie objednávok zákazníkov"
+    results = search_processes("dovolenky", search_db)
+    assert [p['name'] for p, _ in results] == ["Schvaľovanie dovoleniek"]
+
+
+def test_folded_columns_follow_inserts_and_updates(search_db):
+    """Triggery udržujú tieňové stĺpce bez diakritiky"""
+    execute(
+        "INSERT INTO processes (name, category, owner) VALUES ('Účtovná uzávierka', 'Účtovníctvo', 'Ján Šťastný')",
+        db_path=search_db
+    )
+    assert fetch_one(
+        "SELECT name_folded, category_folded, owner_folded FROM processes WHERE name = 'Účtovná uzávierka'",
+        db_path=search_db
+    ) == {'name_folded': 'uctovna uzavierka', 'category_folded': 'uctovnictvo', 'owner_folded': 'jan stastny'}
+
+    execute("UPDATE processes SET owner = 'Žofia Ďurišová' WHERE id = 2", db_path=search_db)
+    assert fetch_value("SELECT owner_folded FROM processes WHERE id = 2", db_path=search_db) == 'zofia durisova'
+
+
+def test_trigram_index_tolerates_typos(search_db):
+    """Preklep v otázke nájde proces cez trigramovú podobnosť"""
+    from process_trigrams import fuzzy_search_processes
+
+    results = fuzzy_search_processes("fakturacai", search_db)
+    assert results[0][0]['name'] == "Fakturácia dodávateľom"
+    assert 0 < results[0][1] <= 1
+    assert fuzzy_search_processes("kovac", search_db)[0][0]['owner'] == "Peter Kováč"
+    assert fuzzy_search_processes("xyzqw", search_db) == []
+
+
+def test_trigram_index_refreshes_incrementally(search_db, monkeypatch):
+    """Index dotiahne len zmenené procesy podľa process_changes"""
+    from process_trigrams import TrigramIndex
+
+    index = TrigramIndex(search_db)
+    assert index.refresh() == 3
+    assert index.refresh() == 0
+
+    execute("INSERT INTO processes (name, owner) VALUES ('Inventúra skladu', 'Ján Malý')", db_path=search_db)
+    execute("UPDATE processes SET is_active = 0 WHERE id = 2", db_path=search_db)
+    assert index.refresh() == 2
+    assert [pid for pid, _ in index.search("inventura")] == [4]
+    assert index.search("dovolenky") == []
+
+    # Zmena stĺpca mimo indexu nezapíše do logu
+    execute("UPDATE processes SET description = 'x' WHERE id = 1", db_path=search_db)
+    assert index.refresh() == 0
+
+    # Refresh len číta; starý log zmaže zapisovač až nad CHANGE_LOG_PRUNE_AT záznamov
+    import process_trigrams
+    from database_writer import get_writer
+
+    execute("UPDATE processes SET name = 'Inventúra skladu 2' WHERE id = 4", db_path=search_db)
+    import sqlite3
+    probe = sqlite3.connect(search_db)
+    version = probe.execute("PRAGMA data_version").fetchone()[0]
+    assert index.refresh() == 1
+    assert probe.execute("PRAGMA data_version").fetchone()[0] == version
+    probe.close()
+    monkeypatch.setattr(process_trigrams, 'CHANGE_LOG_KEEP', 1)
+    monkeypatch.setattr(process_trigrams, 'CHANGE_LOG_PRUNE_AT', 2)
+    execute("UPDATE processes SET owner = 'Eva' WHERE id = 4", db_path=search_db)
+    assert index.refresh() == 1
+    get_writer(search_db).submit(lambda conn: None).result(5)
+    assert fetch_value("SELECT COUNT(*) FROM process_changes", db_path=search_db) == 1
+
+
+def test_trigram_index_reloads_after_log_pruning(search_db):
+    """Keď log chýba časť histórie, index sa načíta celý odznova"""
+    from process_trigrams import TrigramIndex
+
+    index = TrigramIndex(search_db)
+    index.refresh()
+    execute("DELETE FROM processes WHERE id = 3", db_path=search_db)
+    execute("INSERT INTO processes (name) VALUES ('Inventúra skladu')", db_path=search_db)
+    execute("DELETE FROM process_changes", db_path=search_db)
+    execute("UPDATE processes SET name = 'Inventúra skladu 2025' WHERE id = 4", db_path=search_db)
+
+    index.refresh()
+    assert len(index) == 3
+    assert index.search("fakturacia") == []
+
+
+def test_trigram_index_reloads_when_log_goes_back(search_db):
+    """Log začína od nižšieho ID (databáza obnovená zo zálohy) - index sa načíta celý odznova"""
+    from process_trigrams import TrigramIndex
+
+    index = TrigramIndex(search_db)
+    index.refresh()
+    execute("UPDATE processes SET name = name WHERE id IN (1, 2)", db_path=search_db)
+    index.refresh()
+    with get_connection(search_db) as conn:
+        conn.execute("DELETE FROM process_changes")
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'process_changes'")
+    execute("UPDATE processes SET name = 'Inventúra skladu' WHERE id = 3", db_path=search_db)
+
+    index.refresh()
+    assert [pid for pid, _ in index.search("inventura")] == [3]
+    assert index.search("fakturacia") == []
+
+
+def test_stats_table_follows_writes(search_db):
+    """Triggery udržujú súhrnnú tabuľku stats v súlade s dátami"""
+    from database_stats import check_stats, get_breakdown, get_category_owners, get_summary
+
+    execute("UPDATE processes SET automation_readiness = 4 WHERE id = 1", db_path=search_db)
+    execute("UPDATE processes SET category = 'obchod', is_active = 1 WHERE id = 2", db_path=search_db)
+    execute("UPDATE processes SET is_active = 0 WHERE id = 3", db_path=search_db)
+    execute(
+        "INSERT INTO process_steps (process_id, step_number, title, description, responsible_person, action_details) "
+        "VALUES (1, 1, 'Príjem', 'Príjem objednávky', 'Mária', 'Zápis do CRM')",
+        db_path=search_db
+    )
+    execute_many(
+        "INSERT INTO documentation_sessions (process_id, documented_by) VALUES (?, ?)",
+        [(1, 'Mária Novák'), (2, 'Mária Novák'), (2, 'Peter Kováč')],
+        db_path=search_db
+    )
+    execute("DELETE FROM documentation_sessions WHERE documented_by = 'Peter Kováč'", db_path=search_db)
+
+    summary = get_summary(search_db)
+    assert (summary['process_count'], summary['steps_count'], summary['sessions_count']) == (2, 1, 2)
+    assert summary['category_count'] == 1 and summary['owner_count'] == 2
+    assert summary['avg_automation'] == 3.5
+    assert get_breakdown('category', search_db) == [{'key': 'obchod', 'count': 2, 'avg_automation': 3.5}]
+    assert get_breakdown('documenter', search_db) == [{'key': 'Mária Novák', 'count': 2, 'avg_automation': 0}]
+    assert get_category_owners(search_db) == {'obchod': ['Mária Novák', 'Peter Kováč']}
+    assert check_stats(search_db, repair=False) == []
+
+
+def test_check_stats_repairs_drift(search_db):
+    """Kontrola prepočíta štatistiky od nuly a opraví rozdiely"""
+    from database_stats import check_stats, get_summary
+
+    execute("UPDATE stats SET count = 99 WHERE scope = 'processes'", db_path=search_db)
+    execute("DELETE FROM stats WHERE scope = 'owner'", db_path=search_db)
+
+    mismatches = check_stats(search_db)
+    assert {item['scope'] for item in mismatches} == {'processes', 'owner'}
+    assert get_summary(search_db)['process_count'] == 3
+    assert check_stats(search_db) == []
+
+
+def test_table_browser_keyset_pages_and_sql_filter(search_db):
+    """Filter beží v SQL nad celou tabuľkou, strany idú cez keyset na id"""
+    from database_browser import fetch_table_page
+
+    execute_many(
+        "INSERT INTO documentation_sessions (process_id, documented_by, session_notes) VALUES (?, ?, ?)",
+        [(1, 'Mária Novák' if i % 3 else 'Ján Šťastný', f"Poznámka {i}") for i in range(250)],
+        db_path=search_db
+    )
+
+    page = fetch_table_page('documentation_sessions', page_size=100, db_path=search_db)
+    seen = [row['id'] for row in page['rows']]
+    while page['has_next']:
+        page = fetch_table_page('documentation_sessions', page_size=100, after=page['next_after'], db_path=search_db)
+        seen += [row['id'] for row in page['rows']]
+    assert seen == list(range(1, 251))
+
+    # Hľadanie bez diakritiky v konkrétnom stĺpci - aj za prvými 100 riadkami
+    page = fetch_table_page('documentation_sessions', search_term='STASTNY', search_column='documented_by',
+                            page_size=500, db_path=search_db)
+    assert len(page['rows']) == 84 and not page['has_next']
+    page = fetch_table_page('documentation_sessions', search_term='poznámka 249', db_path=search_db)
+    assert [row['id'] for row in page['rows']] == [250]
+    # % a _ sú v hľadanom texte obyčajné znaky
+    assert fetch_table_page('documentation_sessions', search_term='%', db_path=search_db)['rows'] == []
+
+    with pytest.raises(ValueError):
+        fetch_table_page('documentation_sessions', search_term='x', search_column='id; DROP TABLE x',
+                         db_path=search_db)
+
+
+def test_table_browser_without_rowid_uses_offset(search_db):
+    """WITHOUT ROWID tabuľka (stats) sa stránkuje cez offset"""
+    from database_browser import fetch_table_page
+
+    first = fetch_table_page('stats', page_size=2, db_path=search_db)
+    assert not first['keyset'] and first['has_next']
+    second = fetch_table_page('stats', page_size=2, offset=2, db_path=search_db)
+    assert first['rows'] != second['rows']
+
+
+def test_export_streams_all_formats(search_db, tmp_path):
+    """Export zapíše celú tabuľku po dávkach do CSV, JSONL aj Parquet"""
+    import csv
+    import json
+    from database_export import export_table
+
+    execute_many(
+        "INSERT INTO documentation_sessions (process_id, documented_by, completeness_score) VALUES (?, ?, ?)",
+        [(1, 'Ján Šťastný' if i % 2 else 'Mária Novák', i % 10 + 1) for i in range(1234)],
+        db_path=search_db
+    )
+
+    result = export_table('documentation_sessions', 'csv', db_path=search_db, chunk_size=100, directory=tmp_path)
+    with open(result['path'], encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert result['rows'] == len(rows) == 1234
+    assert rows[1]['documented_by'] == 'Ján Šťastný'
+    assert result['file_name'].startswith('documentation_sessions_') and result['file_name'].endswith('.csv')
+
+    # Rovnaký filter ako prehliadač tabuliek
+    result = export_table('documentation_sessions', 'jsonl', search_term='stastny', search_column='documented_by',
+                          db_path=search_db, chunk_size=100, directory=tmp_path)
+    with open(result['path'], encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert result['rows'] == len(records) == 617
+    assert {r['documented_by'] for r in records} == {'Ján Šťastný'}
+
+    pq = pytest.importorskip('pyarrow.parquet')
+    result = export_table('documentation_sessions', 'parquet', db_path=search_db, chunk_size=100, directory=tmp_path)
+    table = pq.read_table(result['path'])
+    assert table.num_rows == 1234
+    assert str(table.schema.field('completeness_score').type) == 'int64'
+    assert str(table.schema.field('session_notes').type) == 'string'
+
+
+def test_export_parquet_mixed_types_as_text(search_db, tmp_path):
+    """Stĺpec s mixom typov (dynamické typy SQLite) ide do Parquet ako text"""
+    pq = pytest.importorskip('pyarrow.parquet')
+    from database_export import export_query
+
+    execute("UPDATE processes SET priority = 'vysoká' WHERE id = 1", db_path=search_db)
+    result = export_query("SELECT id, priority FROM processes ORDER BY id", fmt='parquet',
+                          db_path=search_db, directory=tmp_path)
+    values = pq.read_table(result['path']).column('priority').to_pylist()
+    assert values[0] == 'vysoká' and all(isinstance(v, str) for v in values if v is not None)
+
+    with pytest.raises(ValueError):
+        export_query("SELECT 1", fmt='xlsx', db_path=search_db, directory=tmp_path)
+    assert list(tmp_path.iterdir()) == [tmp_path / result['path'].split('/')[-1]]
+
+
+def test_export_without_pyarrow_hides_parquet(search_db, tmp_path, monkeypatch):
+    """Bez pyarrow sa Parquet neponúka a export skončí zrozumiteľnou chybou bez dočasného súboru"""
+    import sys
+    from database_export import available_export_formats, export_query
+
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    assert available_export_formats() == ['csv', 'jsonl']
+    with pytest.raises(ValueError, match='pyarrow'):
+        export_query("SELECT 1", fmt='parquet', db_path=search_db, directory=tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_table_export_download_removes_temp_file(search_db, tmp_path, monkeypatch):
+    """Export sa prečíta raz pri vykreslení tlačidla a dočasný súbor sa hneď zmaže"""
+    import contextlib
+    import types
+
+    import database_management
+    from database_export import export_table
+
+    buttons = []
+
+    def download_button(label, data, **options):
+        buttons.append((data.read(), options))
+
+    fake_st = types.SimpleNamespace(spinner=lambda text: contextlib.nullcontext(), download_button=download_button)
+    monkeypatch.setattr(database_management, 'st', fake_st)
+    monkeypatch.setattr(database_management, 'export_table', lambda *args: export_table(
+        *args, db_path=search_db, directory=str(tmp_path)))
+
+    database_management.render_table_export('processes', 'csv', '', None)
+    (data, options), = buttons
+    assert 'Fakturácia dodávateľom'.encode() in data and options['on_click'] == 'ignore'
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_backup_and_restore_roundtrip(search_db, tmp_path):
+    """Online záloha je komprimovaná, obnova vráti obsah a doplní schému"""
+    import gzip
+    from database_backup import create_backup, list_backups, restore_backup
+
+    progress = []
+    backup = create_backup(search_db, str(tmp_path), progress=lambda label, done, total: progress.append(done))
+    assert progress and progress[-1] > 0
+    with gzip.open(backup['path'], 'rb') as f:
+        assert f.read(16) == b'SQLite format 3\x00'
+
+    execute("DELETE FROM processes WHERE id = 1", db_path=search_db)
+    assert fetch_value("SELECT COUNT(*) FROM processes", db_path=search_db) == 2
+
+    safety = restore_backup(backup['path'], search_db, str(tmp_path))
+    assert fetch_value("SELECT COUNT(*) FROM processes", db_path=search_db) == 3
+    assert 'pred_obnovou' in safety['name']
+    assert {b['name'] for b in list_backups(str(tmp_path))} == {backup['name'], safety['name']}
+    assert not [p for p in tmp_path.iterdir() if not p.name.endswith('.db.gz')]
+
+
+def test_restore_releases_only_restored_database(tmp_path, monkeypatch):
+    """Obnova zastaví plánovač a zapisovač databázy a zahodí len jej indexy a odpovede"""
+    import database_backup
+    import database_writer
+    import process_trigrams
+    from answer_cache import store_answer
+    from cache_database import cache_db_path
+    from database_migrations import run_migrations
+
+    monkeypatch.setattr(database_backup, 'BACKUP_DIR', str(tmp_path / 'backups'))
+    restored, other = str(tmp_path / 'a.db'), str(tmp_path / 'b.db')
+    for path in (restored, other):
+        run_migrations(path)
+        database_writer.write(lambda conn: conn.execute("INSERT INTO processes (name) VALUES ('Sklad')"), path)
+    backup = database_backup.create_backup(restored, str(tmp_path))
+    database_writer.write(lambda conn: conn.execute("INSERT INTO processes (name) VALUES ('Expedícia')"), restored)
+
+    for path in (restored, other):
+        process_trigrams.get_trigram_index(path)
+    store_answer('local|statistics|kolko', 'statistics', 1, 'Celkom: 2', restored)
+    database_writer.get_writer(cache_db_path(restored)).submit(lambda conn: None).result(5)
+    database_backup.start_backup_scheduler(restored, interval_seconds=3600)
+
+    database_backup.restore_backup(backup['path'], restored, str(tmp_path))
+    assert os.path.abspath(restored) not in database_backup._schedulers
+    assert os.path.abspath(restored) not in process_trigrams._indexes
+    assert os.path.abspath(other) in process_trigrams._indexes
+    assert fetch_value("SELECT COUNT(*) FROM answer_cache", db_path=cache_db_path(restored)) == 0
+    assert [p['name'] for p, _ in process_trigrams.fuzzy_search_processes('expedicia', restored)] == []
+    assert fetch_value("SELECT COUNT(*) FROM processes", db_path=restored) == 1
+
+
+def test_backup_consistent_during_writes(search_db, tmp_path, monkeypatch):
+    """Záloha počas zápisov z iného vlákna je čitateľná a konzistentná"""
+    import gzip
+    import sqlite3
+    import database_backup
+    from database_backup import create_backup
+
+    # Veľa malých krokov - zápisy medzi nimi kopírovanie reštartujú
+    monkeypatch.setattr(database_backup, 'BACKUP_PAGES_PER_STEP', 2)
+    execute_many("INSERT INTO documentation_sessions (process_id, documented_by, session_notes) VALUES (1, 'x', ?)",
+                 [('poznámka ' * 100,) for _ in range(500)], db_path=search_db)
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            execute("INSERT INTO process_steps (process_id, step_number, title, description, "
+                    "responsible_person, action_details) VALUES (1, 1, 't', 'd', 'r', 'a')", db_path=search_db)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        # Callback pustí writer k slovu (GIL) - bez stropu reštartov by záloha nikdy neskončila
+        backup = create_backup(search_db, str(tmp_path), progress=lambda *args: time.sleep(0.001))
+    finally:
+        stop.set()
+        thread.join()
+
+    restored = tmp_path / 'restored.db'
+    with gzip.open(backup['path'], 'rb') as f:
+        restored.write_bytes(f.read())
+    conn = sqlite3.connect(restored)
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+    # Trigger-udržiavaná štatistika sedí s obsahom zálohy
+    steps, tracked = conn.execute(
+        "SELECT (SELECT COUNT(*) FROM process_steps), "
+        "(SELECT count FROM stats WHERE scope = 'table' AND key = 'process_steps')"
+    ).fetchone()
+    conn.close()
+    assert steps == tracked
+
+
+def test_backup_retention_and_scheduler(search_db, tmp_path):
+    """Retencia ponechá posledné a denné zálohy, plánovač preskočí nezmenenú DB"""
+    from datetime import datetime, timedelta
+    from database_backup import BackupScheduler, RetentionPolicy, _backup_name, apply_retention, list_backups
+
+    now = datetime(2026, 3, 20, 12, 0, 0)
+    for hours in (0, 1, 2, 30, 31, 24 * 20):
+        (tmp_path / _backup_name(now - timedelta(hours=hours))).write_bytes(b'')
+    removed = apply_retention(str(tmp_path), RetentionPolicy(keep_last=2, keep_daily_days=7), now=now)
+    # Ostanú 2 najnovšie + najnovšia z predošlého dňa; stará mimo okna zmizne
+    assert len(removed) == 3
+    assert [b['created_at'] for b in list_backups(str(tmp_path))] == [
+        now, now - timedelta(hours=1), now - timedelta(hours=30)
+    ]
+
+    scheduler_dir = tmp_path / 'scheduled'
+    scheduler = BackupScheduler(search_db, str(scheduler_dir), interval_seconds=3600)
+    assert scheduler.seconds_until_due() == 0
+    assert scheduler.run_once() is not None
+    assert scheduler.seconds_until_due() > 3500
+    os.utime(search_db, (0, 0))
+    if os.path.exists(search_db + '-wal'):
+        os.utime(search_db + '-wal', (0, 0))
+    assert scheduler.run_once() is None
+
+
+def _conversation(turns):
+    from datetime import datetime, timedelta
+    start = datetime(2026, 3, 1, 9, 0, 0)
+    return [
+        {'question': f"Otázka {i}", 'response': f"Odpoveď {i}", 'analysis': {'ai_powered': i % 2 == 0},
+         'timestamp': start + timedelta(minutes=i)}
+        for i in range(turns)
+    ]
+
+
+def test_save_process_session_batches_history(search_db, monkeypatch):
+    """60 krokov konverzácie sa zapíše jedným executemany v jednej transakcii, aj s krokmi procesu"""
+    import json
+
+    import database_components
+    from adsun_process_mapper_ai import ProcessContext
+    from database_components import DatabaseManager
+
+    synced = []
+    original_sync = database_components.sync_process_steps
+    monkeypatch.setattr(database_components, 'sync_process_steps',
+                        lambda conn, process_id: synced.append(conn.in_transaction) or original_sync(conn, process_id))
+    reset_query_stats()
+    process_id = DatabaseManager(search_db).save_process_session(
+        "Reklamácie", _conversation(60), ProcessContext(category='obchod'), 'Mária Novák'
+    )
+
+    rows = fetch_all(
+        "SELECT session_notes, completeness_score, documented_by FROM documentation_sessions "
+        "WHERE process_id = ? ORDER BY id", (process_id,), db_path=search_db
+    )
+    assert len(rows) == 60
+    notes = json.loads(rows[59]['session_notes'])
+    assert notes == {'step': 60, 'question': 'Otázka 59', 'response': 'Odpoveď 59',
+                     'analysis': {'ai_powered': False}, 'timestamp': '2026-03-01T09:59:00'}
+    assert {row['completeness_score'] for row in rows} == {10}
+
+    inserts = [s for s in get_query_stats() if s['sql'].startswith('INSERT INTO documentation_sessions')]
+    assert len(inserts) == 1 and inserts[0]['calls'] == 1
+    assert synced == [True]
+
+
+def test_airtable_sessions_use_batched_requests(monkeypatch):
+    """Airtable dostane rovnaké payloady po 10 záznamoch na request"""
+    import airtable_connector
+    from airtable_connector import AirtableConnector
+    from session_writer import build_session_payloads
+
+    requests_made = []
+
+    class Response:
+        status_code = 200
+
+        def __init__(self, records):
+            self._records = records
+
+        def json(self):
+            return {'records': [{'id': f"rec{len(requests_made)}_{i}"} for i in range(len(self._records))]}
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        requests_made.append(json['records'])
+        return Response(json['records'])
+
+    monkeypatch.setattr(airtable_connector.requests, 'post', fake_post)
+    payloads = build_session_payloads(_conversation(53), 'Peter Kováč')
+    ids = AirtableConnector('key', 'base').save_documentation_sessions('recProcess', payloads)
+
+    assert [len(batch) for batch in requests_made] == [10, 10, 10, 10, 10, 3]
+    assert len(ids) == 53
+    fields = requests_made[5][2]['fields']
+    assert fields['Step Number'] == 53 and fields['Process'] == ['recProcess']
+    assert fields['AI Powered'] is True and fields['Completeness Score'] == 10
+
+
+def test_airtable_failed_batch_does_not_fall_back_to_sqlite(monkeypatch):
+    """Zlyhaná dávka sa zopakuje a nahlási k existujúcemu procesu - žiadna duplicitná kópia v SQLite"""
+    import airtable_connector
+    from adsun_process_mapper_ai import ProcessContext
+    from airtable_connector import AirtableConnector, HybridDatabaseManager
+
+    attempts = []
+
+    class Response:
+        def __init__(self, records, status_code):
+            self._records = records
+            self.status_code = status_code
+            self.text = 'server error'
+
+        def json(self):
+            return {'records': [{'id': f"rec{len(attempts)}_{i}"} for i in range(len(self._records))]}
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        attempts.append(json['records'][0]['fields']['Step Number'])
+        # Druhá dávka (kroky 11-20) zlyhá vždy
+        return Response(json['records'], 500 if json['records'][0]['fields']['Step Number'] == 11 else 200)
+
+    monkeypatch.setattr(airtable_connector.requests, 'post', fake_post)
+    monkeypatch.setattr(airtable_connector, 'AIRTABLE_RETRY_DELAY_SECONDS', 0)
+    warnings = []
+    monkeypatch.setattr(airtable_connector.st, 'warning', warnings.append)
+
+    class FailingSQLite:
+        def save_process_session(self, *args):
+            raise AssertionError("SQLite fallback po čiastočnom zápise do Airtable")
+
+    manager = HybridDatabaseManager.__new__(HybridDatabaseManager)
+    manager.use_airtable = manager.connection_ok = True
+    manager.airtable = AirtableConnector('key', 'base')
+    manager.airtable.save_process = lambda data: 'recProcess'
+    manager.sqlite_manager = FailingSQLite()
+
+    assert manager.save_process_session("Reklamácie", _conversation(25), ProcessContext(), 'Mária') == 'recProcess'
+    assert attempts == [1, 11, 11, 11, 21]
+    assert len(warnings) == 1 and '11, 12' in warnings[0] and 'recProcess' in warnings[0]
+
+
+def test_session_columns_written_and_indexed(search_db):
+    """Krok, otázka a odpoveď sa zapíšu do stĺpcov a krok sa hľadá cez index"""
+    from adsun_process_mapper_ai import ProcessContext
+    from database_components import DatabaseManager
+
+    manager = DatabaseManager(search_db)
+    process_id = manager.save_process_session(
+        "Reklamácie", _conversation(5), ProcessContext(category='obchod'), 'Mária Novák'
+    )
+
+    history = manager.load_process_history(process_id, step=3)
+    assert len(history) == 1
+    assert history[0]['question'] == 'Otázka 2' and history[0]['response'] == 'Odpoveď 2'
+    assert history[0]['session_timestamp'] == '2026-03-01T09:02:00'
+    assert fetch_value("SELECT json_extract(analysis, '$.ai_powered') FROM documentation_sessions "
+                       "WHERE process_id = ? AND step = 3", (process_id,), db_path=search_db) == 1
+    assert [row['step'] for row in manager.load_process_history(process_id)] == [1, 2, 3, 4, 5]
+
+    plan = IndexManager(search_db).explain(*HOT_QUERIES['load_process_history'])
+    assert not plan['full_scans'], plan['plan']
+    assert any('idx_sessions_process_step' in line for line in plan['plan'])
+
+
+def test_session_notes_backfill_in_batches(db_path):
+    """Staré riadky so session_notes JSON sa rozbalia po dávkach, voľný text ostane"""
+    import json
+    from database_migrations import MIGRATIONS, BASE_TABLES, backfill_session_columns, run_migrations
+
+    with get_connection(db_path) as conn:
+        conn.execute(BASE_TABLES['documentation_sessions'])
+        conn.executemany(
+            "INSERT INTO documentation_sessions (process_id, documented_by, session_notes) VALUES (?, ?, ?)",
+            [(1, 'Anna', json.dumps({'step': i + 1, 'question': f"Q{i}", 'response': f"R{i}",
+                                     'analysis': {'ai_powered': True}, 'timestamp': '2026-01-01T10:00:00'},
+                                    ensure_ascii=False))
+             for i in range(1100)] + [(2, 'Peter', 'voľné poznámky'), (2, 'Peter', '[1, 2]')]
+        )
+
+    progress_calls = []
+    run_migrations(db_path, migrations=[m for m in MIGRATIONS if m.version < 10])
+    run_migrations(db_path, progress=lambda label, done, total: progress_calls.append(done))
+    assert progress_calls == [0, 500, 1000, 1102]
+
+    row = fetch_one("SELECT step, question, response, analysis, session_timestamp FROM documentation_sessions "
+                    "WHERE process_id = 1 AND step = 1100", db_path=db_path)
+    assert row['question'] == 'Q1099' and row['response'] == 'R1099'
+    assert json.loads(row['analysis']) == {'ai_powered': True}
+    assert row['session_timestamp'] == '2026-01-01T10:00:00'
+    assert fetch_value("SELECT COUNT(*) FROM documentation_sessions WHERE process_id = 2 AND step IS NULL",
+                       db_path=db_path) == 2
+
+    with get_connection(db_path) as conn:
+        assert backfill_session_columns(conn, batch_size=1000) == 1102
+
+
+def test_parse_steps_from_numbered_text():
+    """Číslované kroky + detaily -> názov, popis, nástroj, zodpovedná osoba a čas"""
+    from process_steps import parse_steps
+
+    steps = parse_steps(
+        "1. Príjem faktúry\n2. Kontrola údajov (10 min)\n3. Úhrada",
+        "1. Príjem faktúry: Email alebo pošta\n   skenuje sa do systému\n"
+        "2. Kontrola údajov: Overenie správnosti, zodpovedá: Ján Malý\n3. Úhrada: Internetbanking",
+        owner="Anna Krásna", tools="Email, Internetbanking", duration_minutes=31, automation_readiness=7
+    )
+
+    assert [s['step_number'] for s in steps] == [1, 2, 3]
+    assert steps[0]['title'] == 'Príjem faktúry'
+    assert steps[0]['description'] == 'Email alebo pošta skenuje sa do systému'
+    assert [s['system_tool'] for s in steps] == ['Email', None, 'Internetbanking']
+    assert [s['responsible_person'] for s in steps] == ['Anna Krásna', 'Ján Malý', 'Anna Krásna']
+    # 10 min explicitne, zvyšných 21 min rovnomerne na ostatné kroky
+    assert [s['estimated_time_minutes'] for s in steps] == [11, 10, 10]
+    assert {s['automation_potential'] for s in steps} == {5}
+
+    assert parse_steps("- Príprava\n- Odoslanie")[1]['title'] == 'Odoslanie'
+    assert parse_steps("") == []
+
+
+def test_process_steps_backfill_and_aggregates(search_db):
+    """Existujúce procesy sa rozložia po dávkach, ručné kroky ostanú, agregácie idú cez indexy"""
+    from process_steps import (
+        AUTOMATABLE_BY_TOOL_SQL, TIME_BY_RESPONSIBLE_SQL, backfill_process_steps,
+        get_automatable_minutes_by_tool, get_time_by_responsible, sync_process_steps,
+    )
+
+    execute("UPDATE processes SET duration_minutes = 30, automation_readiness = 4 WHERE id = 1", db_path=search_db)
+    execute(
+        "INSERT INTO process_steps (process_id, step_number, title, description, responsible_person, "
+        "action_details) VALUES (3, 1, 'Ručný krok', 'popis', 'Účtovníčka', 'detail')",
+        db_path=search_db
+    )
+
+    progress_calls = []
+    with get_connection(search_db) as conn:
+        inserted = backfill_process_steps(conn, batch_size=1,
+                                          progress=lambda label, done, total: progress_calls.append(done))
+        assert inserted == 4
+        assert backfill_process_steps(conn) == 0
+        # Opakovaná synchronizácia kroky nahradí, nezdvojí
+        assert sync_process_steps(conn, 1) == 2
+        assert sync_process_steps(conn, 3) == 0
+    assert progress_calls == [0, 1, 2]
+
+    rows = fetch_all("SELECT process_id, title, source FROM process_steps ORDER BY process_id, step_number",
+                     db_path=search_db)
+    assert [(r['process_id'], r['title'], r['source']) for r in rows] == [
+        (1, 'Príjem', 'text'), (1, 'Expedícia', 'text'),
+        (2, 'Žiadosť', 'text'), (2, 'Schválenie', 'text'),
+        (3, 'Ručný krok', 'manual'),
+    ]
+    assert fetch_value("SELECT count FROM stats WHERE scope = 'table' AND key = 'process_steps'",
+                       db_path=search_db) == 5
+
+    by_person = {r['responsible_person']: r['total_minutes'] for r in get_time_by_responsible(search_db)}
+    assert by_person == {'Mária Novák': 30, 'Peter Kováč': 0, 'Účtovníčka': 0}
+    assert get_automatable_minutes_by_tool(search_db) == []
+
+    execute("UPDATE process_steps SET system_tool = 'CRM' WHERE process_id = 1", db_path=search_db)
+    assert get_automatable_minutes_by_tool(search_db) == [
+        {'system_tool': 'CRM', 'step_count': 2, 'automatable_minutes': 30}
+    ]
+
+    manager = IndexManager(search_db)
+    for sql, params in ((TIME_BY_RESPONSIBLE_SQL, ()), (AUTOMATABLE_BY_TOOL_SQL, (4,))):
+        plan = manager.explain(sql, params)
+        assert not any('process_steps' in line for line in plan['full_scans']), plan['plan']
+
+
+def test_benchmark_generator_and_report(tmp_path):
+    """Syntetické dáta v malej mierke, report s p50/p95 a porovnanie dvoch behov"""
+    from benchmark_data import SCALES, generate_dataset
+    from database_benchmark import compare_reports, load_report, run_benchmark, write_report
+
+    db = str(tmp_path / "bench.db")
+    counts = generate_dataset(db, SCALES['tiny'], seed=7)
+    assert counts['processes'] == 50 and counts['documentation_sessions'] == 500
+    assert counts['process_steps'] > 50
+    assert fetch_value("SELECT COUNT(*) FROM documentation_sessions WHERE question IS NULL", db_path=db) == 0
+
+    report = run_benchmark(db, repeat=3, warmup=0)
+    assert report['table_counts']['documentation_sessions'] == 500
+    for name in ('query.get_all_processes', 'query.load_process_sessions', 'query.render_departments',
+                 'repository.search_processes', 'handler.handle_process_query', 'handler.handle_people_query'):
+        case = report['cases'][name]
+        assert 'error' not in case, (name, case)
+        assert case['runs'] == 3 and 0 <= case['p50_ms'] <= case['p95_ms']
+        assert case['queries'] >= 1
+    assert report['cases']['query.get_all_processes']['rows'] == fetch_value(
+        "SELECT COUNT(*) FROM processes WHERE is_active = 1", db_path=db)
+    assert 'plan' in report['cases']['query.render_departments']
+
+    path = str(tmp_path / "report.json")
+    write_report(report, path)
+    baseline = load_report(path)
+    slower = load_report(path)
+    slower['cases']['query.get_all_processes']['p95_ms'] = baseline['cases']['query.get_all_processes']['p95_ms'] * 3 + 5
+    rows = compare_reports(baseline, slower)
+    assert rows[0]['name'] == 'query.get_all_processes' and rows[0]['regression']
+    assert not any(row['regression'] for row in rows[1:])
+
+
+def test_query_profiler_records_statements_per_run(search_db):
+    """Profiler zaznamená príkazy s trvaním, riadkami a render funkciou; mimo bloku je vypnutý"""
+    import json
+    from query_profiler import profile_queries
+
+    def render_sample_page():
+        fetch_all("SELECT id, name FROM processes", db_path=search_db)
+        with get_connection(search_db) as conn:
+            rows = list(conn.execute("SELECT id FROM processes WHERE category = ?", ('HR',)))
+        execute("UPDATE processes SET priority = 2 WHERE is_active = 1", db_path=search_db)
+        return rows
+
+    with profile_queries('test') as profiler:
+        render_sample_page()
+        fetch_value("SELECT COUNT(*) FROM processes", db_path=search_db)
+
+    by_sql = {entry['sql']: entry for entry in profiler.entries}
+    assert by_sql['SELECT id, name FROM processes']['rows'] == 3
+    assert by_sql['SELECT id FROM processes WHERE category = ?']['rows'] == 1
+    assert by_sql['UPDATE processes SET priority = 2 WHERE is_active = 1']['rows'] == 3
+    assert by_sql['SELECT id, name FROM processes']['render_function'].endswith('render_sample_page')
+    count_entry = by_sql['SELECT COUNT(*) FROM processes']
+    assert count_entry['render_function'] is None
+    assert 'test_query_profiler_records_statements_per_run' in count_entry['caller']
+    assert all(entry['duration_ms'] >= 0 for entry in profiler.entries)
+
+    report = json.loads(profiler.to_json())
+    assert report['statements'] == len(profiler.entries) and report['wall_ms'] > 0
+    assert profiler.slowest(1)[0]['total_ms'] == max(g['total_ms'] for g in report['summary'])
+
+    # Mimo bloku sa nič nezaznamenáva
+    statements = len(profiler.entries)
+    fetch_all("SELECT id FROM processes", db_path=search_db)
+    assert len(profiler.entries) == statements
+    assert database_repository.get_query_profiler() is None
+
+
+def test_write_queue_batches_concurrent_writes(db_path):
+    """Zapisovač zoskupí súbežné zápisy, chybný zápis nezruší ostatné a výsledok je hneď čitateľný"""
+    from database_writer import close_all_writers, get_write_metrics, get_writer, submit_write, write
+
+    gate = threading.Event()
+    # Prvý zápis drží vlákno zapisovača, ďalšie sa medzitým nahromadia vo fronte
+    blocker = submit_write(lambda conn: gate.wait(5), db_path)
+    futures = [
+        submit_write(lambda conn, i=i: conn.execute(
+            "INSERT INTO processes (name) VALUES (?)", (f"Proces {i}",)).lastrowid, db_path)
+        for i in range(20)
+    ]
+    failing = submit_write(lambda conn: conn.execute("INSERT INTO missing_table VALUES (1)"), db_path)
+    assert get_writer(db_path).metrics()['queue_depth'] > 0
+    gate.set()
+
+    assert blocker.result(5) is True
+    ids = [future.result(5) for future in futures]
+    with pytest.raises(Exception):
+        failing.result(5)
+    assert fetch_value("SELECT COUNT(*) FROM processes", db_path=db_path) == 20
+
+    # Zápisy z viacerých vlákien bez "database is locked"; po write() je riadok viditeľný
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(10):
+                new_id = write(lambda conn: conn.execute(
+                    "INSERT INTO processes (name, owner) VALUES (?, ?)", (f"W{n}-{i}", f"user{n}")).lastrowid,
+                    db_path)
+                assert fetch_one("SELECT name FROM processes WHERE id = ?", (new_id,), db_path)['name'] == f"W{n}-{i}"
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert fetch_value("SELECT COUNT(*) FROM processes", db_path=db_path) == 80
+
+    # Zápis vyvolaný z iného zápisu beží v tej istej transakcii (bez deadlocku)
+    nested = write(lambda conn: write(lambda inner: inner.execute(
+        "UPDATE processes SET category = 'HR' WHERE id = ?", (ids[0],)).rowcount, db_path), db_path)
+    assert nested == 1
+
+    metrics = get_writer(db_path).metrics()
+    assert metrics['completed'] == metrics['submitted'] == 20 + 2 + 60 + 1
+    assert metrics['failed'] == 1
+    assert metrics['commits'] < metrics['completed']
+    assert metrics['max_queue_depth'] >= 20 and metrics['queue_depth'] == 0
+    assert metrics['p95_commit_ms'] > 0 and metrics['avg_commit_ms'] > 0
+    close_all_writers()
+    assert get_write_metrics() == []
+
+
+def test_write_timeout_cancels_queued_write(db_path):
+    """Zápis ktorý vypršal vo fronte sa zruší - neprebehne neskôr bez vedomia volajúceho"""
+    from concurrent.futures import TimeoutError as FutureTimeoutError
+
+    from database_writer import close_all_writers, submit_write, write
+
+    gate, running = threading.Event(), threading.Event()
+    # Zapisovač drží iná dávka; zápis nižšie čaká vo fronte
+    blocker = submit_write(lambda conn: running.set() or gate.wait(5), db_path)
+    assert running.wait(5)
+    with pytest.raises(FutureTimeoutError):
+        write(lambda conn: conn.execute("INSERT INTO processes (name) VALUES ('Neskoro')"), db_path, timeout=0.05)
+    gate.set()
+    assert blocker.result(5) is True
+    submit_write(lambda conn: None, db_path).result(5)
+    assert fetch_value("SELECT COUNT(*) FROM processes WHERE name = 'Neskoro'", db_path=db_path) == 0
+    close_all_writers()
+
+
+def test_tenant_router_isolates_databases(tmp_path, monkeypatch):
+    """Volania bez db_path idú do databázy tenanta vlákna; pooly sú LRU a nečinné sa zatvárajú"""
+    from database_migrations import run_migrations
+    from database_writer import close_all_writers, write
+    from tenant_router import tenant_db_path, tenant_slug, use_tenant
+
+    settings = {'databases': {'firma-a': str(tmp_path / 'a.db'), 'firma-b': str(tmp_path / 'b.db')}}
+    assert tenant_slug('Firma Žilina s.r.o.') == 'firma-zilina-s-r-o'
+    assert tenant_db_path(None, settings) == database_repository.DEFAULT_DB_PATH
+    assert tenant_db_path('firma-b', settings) == str(tmp_path / 'b.db')
+
+    for tenant, count in (('firma-a', 2), ('firma-b', 1)):
+        with use_tenant(tenant, settings):
+            run_migrations()
+            for i in range(count):
+                write(lambda conn: conn.execute("INSERT INTO processes (name) VALUES (?)", (f"{tenant} {i}",)))
+            # Vlákno zapisovača rieši cesty bez db_path do databázy zapisovača, nie predvolenej
+            assert write(lambda conn: database_repository.resolve_db_path()) == settings['databases'][tenant]
+
+    # Dve vlákna naraz, každé so svojou firmou - žiadne miešanie dát
+    results = {}
+
+    def read(tenant):
+        with use_tenant(tenant, settings):
+            for _ in range(20):
+                names = {row['name'] for row in fetch_all("SELECT name FROM processes")}
+                results.setdefault(tenant, set()).update(names)
+
+    threads = [threading.Thread(target=read, args=(tenant,)) for tenant in ('firma-a', 'firma-b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {'firma-a': {'firma-a 0', 'firma-a 1'}, 'firma-b': {'firma-b 0'}}
+    assert database_repository.get_current_db_path() is None
+
+    # Limit otvorených poolov - najdlhšie nepoužitý sa zatvorí
+    close_all_writers()
+    close_all_pools()
+    monkeypatch.setattr(database_repository, 'MAX_OPEN_POOLS', 2)
+    for name in ('a', 'b', 'c'):
+        fetch_value("SELECT 1", db_path=str(tmp_path / f"{name}.db"))
+    open_paths = [status['db_path'] for status in database_repository.get_pool_status()]
+    assert open_paths == [str(tmp_path / 'c.db'), str(tmp_path / 'b.db')]
+
+    # Pool s požičaným pripojením sa nezatvára
+    with get_connection(str(tmp_path / 'b.db')):
+        assert database_repository.close_idle_pools(0) == 1
+    assert [s['db_path'] for s in database_repository.get_pool_status()] == [str(tmp_path / 'b.db')]
+    assert database_repository.close_idle_pools(0) == 1
+    close_all_pools()
+
+
+def test_tenant_only_from_login_and_idle_tenant_released(tmp_path, monkeypatch):
+    """Odkaz ?tenant= neotvorí cudziu databázu; zatvorený pool uvoľní zapisovač, plánovač aj indexy"""
+    import types
+
+    import database_backup
+    import database_writer
+    import process_trigrams
+    import query_cache
+    import tenant_router
+    from database_migrations import run_migrations
+
+    settings = {'default': 'firma-a', 'databases': {'firma-a': 'a.db', 'firma-b': 'b.db'}}
+    fake_st = types.SimpleNamespace(session_state={}, query_params={'tenant': 'firma-b'})
+    monkeypatch.setattr(tenant_router, 'st', fake_st)
+    monkeypatch.delenv(tenant_router.TENANT_ENV_VAR, raising=False)
+    assert tenant_router.resolve_session_tenant(settings) == 'firma-a'
+    fake_st.session_state['tenant'] = 'firma-b'
+    assert tenant_router.resolve_session_tenant(settings) == 'firma-b'
+
+    path = str(tmp_path / 'b.db')
+    key = os.path.abspath(path)
+    run_migrations(path)
+    database_writer.write(lambda conn: conn.execute("INSERT INTO processes (name) VALUES ('Sklad')"), path)
+    process_trigrams.get_trigram_index(path)
+    query_cache.cached_fetch_all("SELECT 1", db_path=path)
+    monkeypatch.setattr(database_backup, 'BACKUP_DIR', str(tmp_path / 'backups'))
+    database_backup.start_backup_scheduler(path, interval_seconds=3600)
+    assert key in database_writer._writers and key in database_backup._schedulers
+
+    assert database_repository.close_idle_pools(0) >= 1
+    assert key not in database_writer._writers
+    assert key not in database_backup._schedulers
+    assert key not in process_trigrams._indexes
+    assert key not in query_cache._cache._probes
+
+
+def test_query_cache_invalidated_by_data_version(search_db):
+    """Opakované čítanie je zásah do cache až do zápisu - aj z iného pripojenia či vlákna"""
+    import sqlite3
+    from query_cache import cached_call, cached_fetch_all, clear_query_cache, get_cache_stats
+
+    clear_query_cache()
+    sql = "SELECT name FROM processes WHERE is_active = 1 ORDER BY name"
+    first = cached_fetch_all(sql, db_path=search_db)
+    reset_query_stats()
+    again = cached_fetch_all(sql, db_path=search_db)
+    assert again == first and get_query_stats() == []
+    again[0]['name'] = 'zmenené'
+    assert cached_fetch_all(sql, db_path=search_db) == first
+
+    # Zápis cez pool aj cez úplne cudzie pripojenie (iný proces) zneplatní cache
+    execute("UPDATE processes SET name = 'Nový názov' WHERE id = 1", db_path=search_db)
+    assert 'Nový názov' in {row['name'] for row in cached_fetch_all(sql, db_path=search_db)}
+    other = sqlite3.connect(search_db)
+    other.execute("UPDATE processes SET is_active = 0 WHERE id = 1")
+    other.commit()
+    other.close()
+    assert 'Nový názov' not in {row['name'] for row in cached_fetch_all(sql, db_path=search_db)}
+
+    # Čítanie v otvorenej transakcii (nepotvrdené zmeny) sa neukladá
+    calls = []
+
+    def count_active():
+        calls.append(1)
+        return fetch_value("SELECT COUNT(*) FROM processes WHERE is_active = 1", db_path=search_db)
+
+    with get_connection(search_db) as conn:
+        conn.execute("UPDATE processes SET is_active = 0")
+        assert cached_call(count_active, db_path=search_db) == 0
+        conn.rollback()
+    assert cached_call(count_active, db_path=search_db) == 2
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cached_call(count_active, db_path=search_db)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [2] * 4 and len(calls) == 2
+    assert get_cache_stats()['hits'] >= 6
+    clear_query_cache()
+
+
+def test_intent_cache_skips_repeated_api_calls(search_db, monkeypatch):
+    """Rovnako znejúca otázka ide do API len raz; zmena taxonómie cache zneplatní"""
+    import sys
+    import types
+
+    import adsun_knowledge_assistant
+    from adsun_knowledge_assistant import ADSUNKnowledgeAssistant
+    from cache_database import cache_db_path
+    from database_writer import get_writer
+    from intent_cache import get_intent_cache_stats, reset_intent_cache_stats, taxonomy_version
+
+    api_calls = []
+
+    class FakeCompletions:
+        def create(self, **kwargs):
+            api_calls.append(kwargs['messages'][1]['content'])
+            header = '{"intent": "statistics", "process_ids": []}\n'
+            delta = types.SimpleNamespace(content=header)
+            return [types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta)])]
+
+    class FakeOpenAI:
+        def __init__(self, api_key, **options):
+            self.chat = types.SimpleNamespace(completions=FakeCompletions())
+
+    monkeypatch.setitem(sys.modules, 'openai', types.SimpleNamespace(OpenAI=FakeOpenAI))
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    reset_intent_cache_stats()
+    cache_db = cache_db_path(search_db)
+
+    assistant = ADSUNKnowledgeAssistant(search_db)
+    monkeypatch.setattr(assistant, '_classify_locally', lambda query: ('general_search', 0.1))
+    assert 'Celkom: 3 procesov' in assistant.answer_query('koľko procesov mám')
+    get_writer(cache_db).submit(lambda conn: None).result(5)  # uloženie ide cez zapisovač
+    # Zmena dát zneplatní hotovú odpoveď, intent ostáva; iná diakritika a veľkosť písmen = rovnaký kľúč
+    execute("UPDATE processes SET owner = 'Eva' WHERE id = 1", db_path=search_db)
+    assert 'Celkom: 3 procesov' in assistant.answer_query('Kolko procesov mam')
+    assert len(api_calls) == 1
+
+    get_writer(cache_db).submit(lambda conn: None).result(5)
+    row = fetch_one("SELECT query_key, hits, api_ms FROM intent_cache", db_path=cache_db)
+    assert row['query_key'] == 'kolko procesov mam' and row['hits'] == 1 and row['api_ms'] >= 0
+    stats = get_intent_cache_stats(search_db)
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['hit_rate'] == 0.5
+    assert stats['entries'] == 1 and stats['total_hits'] == 1
+
+    # Nová taxonómia - starý záznam sa nepoužije a pri ďalšom uložení zmizne
+    new_types = {**adsun_knowledge_assistant.INTENT_TYPES, 'reports': 'chce report'}
+    monkeypatch.setattr(adsun_knowledge_assistant, 'INTENT_TYPES', new_types)
+    monkeypatch.setattr(adsun_knowledge_assistant, 'INTENT_TAXONOMY_VERSION', taxonomy_version(new_types))
+    execute("UPDATE processes SET owner = 'Jana' WHERE id = 1", db_path=search_db)
+    assert 'Celkom: 3 procesov' in assistant.answer_query('koľko procesov mám')
+    assert len(api_calls) == 2
+    get_writer(cache_db).submit(lambda conn: None).result(5)
+    versions = fetch_all("SELECT taxonomy_version FROM intent_cache", db_path=cache_db)
+    assert [row['taxonomy_version'] for row in versions] == [taxonomy_version(new_types)]
+
+    # Limit záznamov - vypadnú najdlhšie nepoužité
+    from intent_cache import evict_intents
+    with get_connection(cache_db) as conn:
+        conn.executemany(
+            "INSERT INTO intent_cache (query_key, intent, taxonomy_version, last_used_at) "
+            "VALUES (?, 'list_all', ?, datetime('now', ?))",
+            [(f"otazka {i}", taxonomy_version(new_types), f"-{i} minutes") for i in range(1, 6)]
+        )
+        assert evict_intents(conn, taxonomy_version(new_types), max_entries=3) == 3
+    keys = {row['query_key'] for row in fetch_all("SELECT query_key FROM intent_cache", db_path=cache_db)}
+    assert keys == {'kolko procesov mam', 'otazka 1', 'otazka 2'}
+
+
+def test_local_intent_classifier_skips_api_when_confident(search_db, monkeypatch):
+    """Istý lokálny klasifikátor obíde AI; pretrénovanie sa učí z otázok v intent_cache"""
+    import sys
+    import types
+
+    from adsun_knowledge_assistant import INTENT_TAXONOMY_VERSION, ADSUNKnowledgeAssistant
+    from cache_database import ensure_cache_db
+    from intent_classifier import IntentClassifier, get_classifier, model_path, train_classifier
+
+    api_calls = []
+
+    class FakeCompletions:
+        def create(self, **kwargs):
+            api_calls.append(kwargs['messages'][1]['content'])
+            message = types.SimpleNamespace(content='general_search')
+            return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+    class FakeOpenAI:
+        def __init__(self, api_key, **options):
+            self.chat = types.SimpleNamespace(completions=FakeCompletions())
+
+    monkeypatch.setitem(sys.modules, 'openai', types.SimpleNamespace(OpenAI=FakeOpenAI))
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+
+    model = train_classifier(search_db, INTENT_TAXONOMY_VERSION)
+    assert os.path.exists(model_path(search_db))
+    assert model.predict('kolko procesov mame')[0] == 'statistics'
+    assert model.predict('ake oddelenia mame')[0] == 'departments'
+    assert model.predict('') == ('general_search', 0.0)
+    # Uložený model dáva rovnaké výsledky
+    loaded = IntentClassifier.load(model_path(search_db))
+    assert loaded.predict('zoznam procesov') == model.predict('zoznam procesov')
+
+    assistant = ADSUNKnowledgeAssistant(search_db)
+    assert assistant._classify_locally('Koľko procesov máme?')[1] >= 0.7
+    assistant.answer_query('Koľko procesov máme?')
+    assert api_calls == []
+
+    # Otázky klasifikované AI sa po pretrénovaní rozpoznajú lokálne
+    assert get_classifier(search_db).predict('sklad barvy')[0] != 'pricing'
+    with get_connection(ensure_cache_db(search_db)) as conn:
+        conn.executemany(
+            "INSERT INTO intent_cache (query_key, intent, taxonomy_version) VALUES (?, 'pricing', ?)",
+            [(query, INTENT_TAXONOMY_VERSION) for query in
+             ('sklad barvy', 'barvy na sklade cena', 'kolko stoja barvy zo skladu')]
+        )
+    retrained = train_classifier(search_db, INTENT_TAXONOMY_VERSION)
+    assert retrained.predict('sklad barvy')[0] == 'pricing'
+    assert get_classifier(search_db) is retrained
+
+
+def test_untrained_tenant_uses_seed_model_and_trains_in_background(search_db):
+    """Prvá otázka netrénuje na logu otázok - dostane model z príkladov, model tenanta sa učí na pozadí"""
+    from intent_classifier import (IntentClassifier, SEED_EXAMPLES, get_classifier, model_path,
+                                   seed_classifier)
+
+    assert not os.path.exists(model_path(search_db))
+    assert get_classifier(search_db) is seed_classifier()
+    deadline = time.time() + 30
+    while get_classifier(search_db) is seed_classifier() and time.time() < deadline:
+        time.sleep(0.05)
+    assert get_classifier(search_db) is not seed_classifier()
+    assert os.path.exists(model_path(search_db))
+
+    # Slovník je ohraničený na najčastejšie n-gramy
+    texts, labels = zip(*SEED_EXAMPLES)
+    capped = IntentClassifier().fit(texts, labels, max_vocabulary=200)
+    assert len(capped.vocabulary) == 200 and capped.weights.shape == (200, len(capped.labels))
+    assert capped.predict('kolko procesov mame')[0] == 'statistics'
+
+
+def test_classifier_retrains_on_new_taxonomy_and_new_examples(search_db, monkeypatch):
+    """Model inej taxonómie sa nepoužije; nové otázky v logu spustia pretrénovanie na pozadí"""
+    import intent_classifier
+    from cache_database import ensure_cache_db
+    from intent_classifier import get_classifier, seed_classifier, train_classifier
+
+    def wait_for(condition):
+        deadline = time.time() + 30
+        while not condition() and time.time() < deadline:
+            time.sleep(0.05)
+        return condition()
+
+    old = train_classifier(search_db, 'v1')
+    intent_classifier.release_classifier(search_db)
+    assert get_classifier(search_db, 'v1').taxonomy_version == 'v1'
+    assert get_classifier(search_db, 'v2') is seed_classifier()
+    assert wait_for(lambda: get_classifier(search_db, 'v2').taxonomy_version == 'v2')
+    assert get_classifier(search_db, 'v2') is not old
+
+    monkeypatch.setattr(intent_classifier, 'RETRAIN_AFTER_EXAMPLES', 3)
+    monkeypatch.setattr(intent_classifier, 'RETRAIN_CHECK_SECONDS', 0)
+    current = get_classifier(search_db, 'v2')
+    assert current.predict('sklad barvy')[0] != 'pricing'
+    with get_connection(ensure_cache_db(search_db)) as conn:
+        conn.executemany(
+            "INSERT INTO intent_cache (query_key, intent, taxonomy_version, created_at) "
+            "VALUES (?, 'pricing', 'v2', datetime('now', '+1 minute'))",
+            [(query,) for query in ('sklad barvy', 'barvy na sklade cena', 'kolko stoja barvy zo skladu')]
+        )
+    assert get_classifier(search_db, 'v2') is current  # tréning beží na pozadí
+    assert wait_for(lambda: get_classifier(search_db, 'v2') is not current)
+    assert get_classifier(search_db, 'v2').predict('sklad barvy')[0] == 'pricing'
+
+
+def test_one_call_answer_returns_intent_process_and_text(search_db, monkeypatch):
+    """Neistá otázka stojí jedno volanie AI - intent, ID procesu aj odpoveď v jednej odpovedi"""
+    import json
+    import sys
+    import types
+
+    from adsun_knowledge_assistant import ADSUNKnowledgeAssistant
+    from database_writer import get_writer
+
+    api_calls = []
+    replies = []
+
+    class FakeCompletions:
+        def create(self, **kwargs):
+            api_calls.append(kwargs)
+            reply = replies.pop(0)
+            content = json.dumps({key: reply[key] for key in ('intent', 'process_ids')}) + '\n' + reply['answer']
+            return [types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=content[i:i + 5]))])
+                    for i in range(0, len(content), 5)]
+
+    class FakeOpenAI:
+        def __init__(self, api_key, **options):
+            self.chat = types.SimpleNamespace(completions=FakeCompletions())
+
+    monkeypatch.setitem(sys.modules, 'openai', types.SimpleNamespace(OpenAI=FakeOpenAI))
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    assistant = ADSUNKnowledgeAssistant(search_db)
+    monkeypatch.setattr(assistant, '_classify_locally', lambda query: ('general_search', 0.1))
+
+    replies.append({'intent': 'find_process', 'process_ids': [3], 'answer': 'Pozri fakturáciu'})
+    answer = assistant.answer_query('musím zaplatiť účet od firmy čo nám dodala papier')
+    assert len(api_calls) == 1
+    assert api_calls[0]['stream'] is True
+    assert "Fakturácia dodávateľom" in answer and "Úhrada faktúr" in answer
+
+    # Intent pre štatistiky určí AI, odpoveď vykreslí lokálny handler
+    replies.append({'intent': 'statistics', 'process_ids': [], 'answer': 'ignorované'})
+    answer = assistant.answer_query('mam tu vobec nieco ulozene')
+    assert len(api_calls) == 2 and 'ignorované' not in answer
+
+    # Bez zhody procesu sa zobrazí text odpovede AI
+    replies.append({'intent': 'find_process', 'process_ids': [99], 'answer': 'Taký proces nemáte.'})
+    assert 'Taký proces nemáte.' in assistant.answer_query('kde je kľúč od skladu')
+    assert len(api_calls) == 3
+
+    # Zaznamenaný intent - opakovaná otázka ide bez AI
+    get_writer(search_db).submit(lambda conn: None).result(5)
+    assistant.answer_query('Mam tu vobec nieco ulozene?')
+    assert len(api_calls) == 3
+
+
+def test_vector_index_updates_incrementally_and_persists(search_db, monkeypatch):
+    """Vektorový index dotiahne uložené, upravené aj zmazané procesy a načíta sa zo súboru"""
+    from process_vectors import VectorIndex, index_path, semantic_search_processes
+
+    index = VectorIndex(search_db)
+    assert index.refresh() == 3
+    assert index.refresh() == 0
+    assert index.search("úhrada faktúr dodávateľov")[0][0] == 3
+    assert os.path.exists(index_path(search_db))
+
+    # Úprava popisu (mimo trigramového logu) aj zmazanie sa prejavia
+    execute("UPDATE processes SET description = 'Sklad a inventúra materiálu' WHERE id = 1", db_path=search_db)
+    execute("DELETE FROM processes WHERE id = 2", db_path=search_db)
+    assert index.refresh() == 2
+    assert len(index) == 2
+    assert index.search("inventura skladu")[0][0] == 1
+    assert 2 not in [pid for pid, _ in index.search("dovolenka")]
+
+    # Nový index pokračuje z uloženého stavu bez prepočtu
+    restored = VectorIndex(search_db)
+    assert restored.load()
+    assert restored.refresh() == 0
+    assert restored.search("inventura skladu") == index.search("inventura skladu")
+
+    results = semantic_search_processes("sklad materiál", search_db, k=1)
+    assert len(results) == 1 and results[0][0]['name'] == "Spracovanie objednávok zákazníkov"
+
+    # Refresh databázu len číta; starý log zmaže zapisovač až nad CHANGE_LOG_PRUNE_AT záznamov
+    import sqlite3
+
+    import process_vectors
+    from database_writer import get_writer
+
+    monkeypatch.setattr(process_vectors, 'CHANGE_LOG_KEEP', 1)
+    monkeypatch.setattr(process_vectors, 'CHANGE_LOG_PRUNE_AT', 100)
+    execute("UPDATE processes SET name = 'Inventúra' WHERE id = 1", db_path=search_db)
+    probe = sqlite3.connect(search_db)
+    version = probe.execute("PRAGMA data_version").fetchone()[0]
+    assert index.refresh() == 1
+    assert probe.execute("PRAGMA data_version").fetchone()[0] == version
+    probe.close()
+    monkeypatch.setattr(process_vectors, 'CHANGE_LOG_PRUNE_AT', 2)
+    execute("UPDATE processes SET owner = 'Eva' WHERE id = 1", db_path=search_db)
+    assert index.refresh() == 1
+    get_writer(search_db).submit(lambda conn: None).result(5)
+    assert fetch_value("SELECT COUNT(*) FROM process_vector_changes", db_path=search_db) == 1
+
+
+def test_process_query_sends_only_top_k_candidates(search_db, monkeypatch):
+    """Do promptu AI ide len top-k kandidátov, nie celý katalóg"""
+    import sys
+    import types
+
+    from adsun_knowledge_assistant import AI_CANDIDATES_TOP_K, ADSUNKnowledgeAssistant
+
+    execute_many(
+        "INSERT INTO processes (name, category) VALUES (?, 'ostatné')",
+        [(f"Interný proces {i}",) for i in range(50)], db_path=search_db
+    )
+    prompts = []
+
+    class FakeCompletions:
+        def create(self, **kwargs):
+            prompts.append(kwargs['messages'][0]['content'])
+            message = types.SimpleNamespace(content='Fakturácia dodávateľom')
+            return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+    class FakeOpenAI:
+        def __init__(self, api_key, **options):
+            self.chat = types.SimpleNamespace(completions=FakeCompletions())
+
+    monkeypatch.setitem(sys.modules, 'openai', types.SimpleNamespace(OpenAI=FakeOpenAI))
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+
+    assistant = ADSUNKnowledgeAssistant(search_db)
+    answer = assistant._handle_process_query('zaplatiť účet od dodávateľa papiera')
+    assert "Fakturácia dodávateľom" in answer
+    listed = [line for line in prompts[0].splitlines() if line.startswith('- ') and 'kategória:' in line]
+    assert 0 < len(listed) <= AI_CANDIDATES_TOP_K
+    assert any('Fakturácia dodávateľom' in line for line in listed)
+
+
+def test_process_query_ambiguous_top_hit_is_not_answered_directly(search_db, monkeypatch):
+    """Jednoslovný dotaz zhodný s viacerými procesmi nedá priamu odpoveď prvým výsledkom"""
+    from adsun_knowledge_assistant import ADSUNKnowledgeAssistant
+
+    execute("INSERT INTO processes (name, category) VALUES ('Fakturácia zákazníkom', 'administratíva')",
+            db_path=search_db)
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    assistant = ADSUNKnowledgeAssistant(search_db)
+    monkeypatch.setattr(assistant, '_get_api_key', lambda: None)
+
+    candidates = assistant._find_process_candidates('fakturácia')
+    assert candidates[0][1] - candidates[1][1] < 0.2
+    answer = assistant._handle_process_query('fakturácia')
+    assert "Viac procesov" in answer
+    assert "Fakturácia dodávateľom" in answer and "Fakturácia zákazníkom" in answer
+
+    answer = assistant._handle_process_query('schvaľovanie dovoleniek')
+    assert "Proces nájdený" in answer
+
+
+def test_typo_without_api_key_reaches_trigram_index(search_db, monkeypatch):
+    """Bez API kľúča neistá otázka ide podľa lokálnej predikcie - preklep nájde proces"""
+    from adsun_knowledge_assistant import ADSUNKnowledgeAssistant
+
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    assistant = ADSUNKnowledgeAssistant(search_db)
+    monkeypatch.setattr(assistant, '_get_api_key', lambda: None)
+    monkeypatch.setattr(assistant, '_classify_locally', lambda query: ('find_process', 0.43))
+
+    answer = assistant.answer_query('fakturacai')
+    assert "Fakturácia dodávateľom" in answer and "API kľúč" not in answer
+
+
+def test_answer_stream_yields_tokens_as_they_arrive(search_db, monkeypatch):
+    """Text z AI prichádza po tokenoch; pri lokálnom intente sa zvyšok streamu nečíta"""
+    import sys
+    import types
+
+    from adsun_knowledge_assistant import ADSUNKnowledgeAssistant
+
+    consumed = []
+    closed = []
+
+    class FakeStream:
+        def __init__(self, tokens):
+            self.tokens = tokens
+
+        def __iter__(self):
+            for token in self.tokens:
+                consumed.append(token)
+                yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=token))])
+
+        def close(self):
+            closed.append(True)
+
+    streams = []
+
+    class FakeCompletions:
+        def create(self, **kwargs):
+            return FakeStream(streams.pop(0))
+
+    class FakeOpenAI:
+        def __init__(self, api_key, **options):
+            self.chat = types.SimpleNamespace(completions=FakeCompletions())
+
+    monkeypatch.setitem(sys.modules, 'openai', types.SimpleNamespace(OpenAI=FakeOpenAI))
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    assistant = ADSUNKnowledgeAssistant(search_db)
+    monkeypatch.setattr(assistant, '_classify_locally', lambda query: ('general_search', 0.1))
+
+    streams.append(['{"intent": "find_', 'process", "process_ids": []}\n', 'Taký ', 'proces ', 'nemáte.'])
+    chunks = assistant.answer_query_stream('kde je kľúč od skladu')
+    assert next(chunks).startswith('🤖')
+    assert next(chunks) == 'Taký '
+    assert consumed[-1] == 'Taký '  # ďalšie tokeny ešte neprišli
+    assert list(chunks)[:2] == ['proces ', 'nemáte.']
+    assert closed
+
+    consumed.clear()
+    streams.append(['{"intent": "statistics", "process_ids": []}\n', 'nepotrebný ', 'text'])
+    answer = ''.join(assistant.answer_query_stream('mam tu vobec nieco'))
+    assert 'nepotrebný' not in answer and 'nepotrebný ' not in consumed
+    assert len(closed) == 2
+
+
+def test_answer_stream_error_mid_stream_is_reported_and_not_cached(search_db, monkeypatch):
+    """Chyba AI uprostred streamu nepreletí do chatu a prerušená odpoveď sa neuloží"""
+    import sys
+    import types
+
+    from adsun_knowledge_assistant import ADSUNKnowledgeAssistant
+    from cache_database import cache_db_path
+    from database_writer import get_writer
+
+    def broken_stream():
+        for token in ['{"intent": "find_process", "process_ids": []}\n', 'Taký ']:
+            yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=token))])
+        raise ConnectionError('spojenie prerušené')
+
+    class FakeOpenAI:
+        def __init__(self, api_key, **options):
+            create = lambda **kwargs: broken_stream()
+            self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=create))
+
+    monkeypatch.setitem(sys.modules, 'openai', types.SimpleNamespace(OpenAI=FakeOpenAI))
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    assistant = ADSUNKnowledgeAssistant(search_db)
+    monkeypatch.setattr(assistant, '_classify_locally', lambda query: ('general_search', 0.1))
+
+    answer = assistant.answer_query('kde je kľúč od skladu')
+    assert 'Taký' in answer and 'spojenie prerušené' in answer
+    get_writer(cache_db_path(search_db)).submit(lambda conn: None).result(5)
+    assert fetch_value("SELECT COUNT(*) FROM answer_cache", db_path=cache_db_path(search_db)) == 0
+
+
+def test_openai_client_registry_reuses_client_and_retries(monkeypatch):
+    """Jeden klient na kľúč, opakovanie len pri dočasných chybách, vypínač zastaví volania"""
+    import sys
+    import types
+
+    import openai_clients
+    from openai_clients import AIDisabledError, chat_completion, get_openai_client, get_openai_stats
+
+    created = []
+    failures = []
+
+    class APIConnectionError(Exception):
+        pass
+
+    class BadRequestError(Exception):
+        status_code = 400
+
+    class FakeCompletions:
+        def create(self, **kwargs):
+            if failures:
+                raise failures.pop(0)
+            return kwargs
+
+    class FakeOpenAI:
+        def __init__(self, api_key, **options):
+            created.append(options)
+            self.chat = types.SimpleNamespace(completions=FakeCompletions())
+
+        def close(self):
+            pass
+
+    monkeypatch.setitem(sys.modules, 'openai', types.SimpleNamespace(OpenAI=FakeOpenAI))
+    monkeypatch.setattr(openai_clients.time, 'sleep', lambda seconds: None)
+    monkeypatch.delenv(openai_clients.AI_KILL_SWITCH_ENV_VAR, raising=False)
+
+    assert get_openai_client('key-a') is get_openai_client('key-a')
+    assert get_openai_client('key-b') is not get_openai_client('key-a')
+    assert len(created) == 2 and created[0]['max_retries'] == 0
+
+    # Dočasné chyby sa zopakujú, timeout ide do každého volania
+    failures.extend([APIConnectionError(), APIConnectionError()])
+    assert chat_completion(api_key='key-a', timeout=5, model='m')['timeout'] == 5
+    assert get_openai_stats()['retries'] == 2
+
+    failures.append(BadRequestError())
+    with pytest.raises(BadRequestError):
+        chat_completion(api_key='key-a', model='m')
+    failures.extend([APIConnectionError()] * 3)
+    with pytest.raises(APIConnectionError):
+        chat_completion(api_key='key-a', max_retries=2, model='m')
+    assert not failures
+
+    assert all(0 <= openai_clients.retry_delay(attempt) <= openai_clients.RETRY_MAX_DELAY_SECONDS
+               for attempt in range(10))
+
+    monkeypatch.setenv(openai_clients.AI_KILL_SWITCH_ENV_VAR, '1')
+    with pytest.raises(AIDisabledError):
+        chat_completion(api_key='key-a', model='m')
+
+
+def test_answer_cache_serves_repeated_questions_until_write(search_db, monkeypatch):
+    """Opakovaná otázka sa neprepočíta; zápis do procesov ju zneplatní, odpoveď prežije reštart"""
+    from adsun_knowledge_assistant import ADSUNKnowledgeAssistant
+    from answer_cache import content_version, evict_answers, get_answer_cache_stats, reset_answer_cache_stats
+    from cache_database import cache_db_path
+    from database_writer import get_writer
+    from query_cache import cached_fetch_all, clear_query_cache, get_cache_stats
+
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    reset_answer_cache_stats()
+    cache_db = cache_db_path(search_db)
+    assistant = ADSUNKnowledgeAssistant(search_db)
+    handled = []
+    original = assistant._handle_statistics_query
+    monkeypatch.setattr(assistant, '_handle_statistics_query',
+                        lambda query: handled.append(query) or original(query))
+
+    first = assistant.answer_query('Koľko procesov máme?')
+    get_writer(cache_db).submit(lambda conn: None).result(5)
+    # Zásahy cache sa zapisujú do cache databázy - cache čítaní hlavnej databázy ostane platná
+    clear_query_cache()
+    cached_fetch_all("SELECT COUNT(*) FROM processes", db_path=search_db)
+    misses = get_cache_stats()['misses']
+    # Iná diakritika a interpunkcia = rovnaký kľúč
+    assert assistant.answer_query('kolko procesov mame') == first
+    assert len(handled) == 1
+    get_writer(cache_db).submit(lambda conn: None).result(5)
+    cached_fetch_all("SELECT COUNT(*) FROM processes", db_path=search_db)
+    assert get_cache_stats()['misses'] == misses
+
+    # Nová inštancia (reštart) číta z tabuľky
+    restarted = ADSUNKnowledgeAssistant(search_db)
+    monkeypatch.setattr(restarted, '_handle_statistics_query',
+                        lambda query: handled.append(query) or original(query))
+    assert restarted.answer_query('Koľko procesov máme?') == first
+    assert len(handled) == 1
+    get_writer(cache_db).submit(lambda conn: None).result(5)
+    assert get_answer_cache_stats(search_db)['total_hits'] == 2
+
+    # Zápis zvýši verziu obsahu - odpoveď sa prepočíta s novými dátami
+    execute("INSERT INTO processes (name) VALUES ('Inventúra skladu')", db_path=search_db)
+    assert '4' in restarted.answer_query('Koľko procesov máme?')
+    assert len(handled) == 2
+
+    get_writer(cache_db).submit(lambda conn: None).result(5)
+    stats = get_answer_cache_stats(search_db)
+    assert stats['hits'] == 2 and stats['misses'] == 2 and stats['hit_rate'] == 0.5
+    assert stats['entries'] == 1  # odpoveď starej verzie pri uložení novej vypadla
+
+    # Stará verzia a limit záznamov
+    version = content_version(search_db)
+    with get_connection(cache_db) as conn:
+        conn.executemany(
+            "INSERT INTO answer_cache (cache_key, data_version, answer, last_used_at) "
+            "VALUES (?, ?, 'x', datetime('now', ?))",
+            [(f"otazka {i}", version, f"-{i} minutes") for i in range(1, 4)]
+        )
+        conn.execute("INSERT INTO answer_cache (cache_key, data_version, answer) VALUES ('stara', -1, 'x')")
+        assert evict_answers(conn, version, max_entries=2) == 3  # stará verzia + 2 najdlhšie nepoužité
+    assert fetch_value("SELECT COUNT(*) FROM answer_cache", db_path=cache_db) == 2
+
+
+def test_answer_cache_skips_failed_answers_and_keys_on_resolved_intent(search_db, monkeypatch):
+    """Neuloží sa len odpoveď označená ako chyba; odpoveď AI má kľúč podľa intentu určeného AI"""
+    import sys
+    import types
+
+    from adsun_knowledge_assistant import ADSUNKnowledgeAssistant
+    from answer_cache import FailedAnswer
+    from cache_database import cache_db_path
+    from database_writer import get_writer
+
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    cache_db = cache_db_path(search_db)
+    assistant = ADSUNKnowledgeAssistant(search_db)
+    answers = [FailedAnswer('Databáza je zamknutá'), 'Chyby v procesoch: žiadne']
+    handled = []
+    monkeypatch.setattr(assistant, '_handle_statistics_query',
+                        lambda query: handled.append(query) or answers[min(len(handled), 2) - 1])
+
+    assert assistant.answer_query('Koľko procesov máme?') == 'Databáza je zamknutá'
+    get_writer(cache_db).submit(lambda conn: None).result(5)
+    # Slovo "chyb" v bežnej odpovedi ju z cache nevylúči
+    assert assistant.answer_query('Koľko procesov máme?') == 'Chyby v procesoch: žiadne'
+    get_writer(cache_db).submit(lambda conn: None).result(5)
+    assert assistant.answer_query('Koľko procesov máme?') == 'Chyby v procesoch: žiadne'
+    assert len(handled) == 2
+
+    # Lokálny klasifikátor nie je istý - intent určí AI a pod ním sa odpoveď uloží aj nájde
+    api_calls = []
+
+    class FakeCompletions:
+        def create(self, **kwargs):
+            api_calls.append(kwargs)
+            delta = types.SimpleNamespace(content='{"intent": "statistics", "process_ids": []}\n')
+            return [types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta)])]
+
+    class FakeOpenAI:
+        def __init__(self, api_key, **options):
+            self.chat = types.SimpleNamespace(completions=FakeCompletions())
+
+    monkeypatch.setitem(sys.modules, 'openai', types.SimpleNamespace(OpenAI=FakeOpenAI))
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(assistant, '_classify_locally', lambda query: ('general_search', 0.1))
+    assert assistant.answer_query('mam tu vobec nieco') == 'Chyby v procesoch: žiadne'
+    get_writer(cache_db).submit(lambda conn: None).result(5)
+    row = fetch_one("SELECT cache_key, intent FROM answer_cache WHERE cache_key LIKE 'ai|%'", db_path=cache_db)
+    assert row['intent'] == 'statistics' and row['cache_key'].startswith('ai|statistics|')
+    assert assistant.answer_query('mam tu vobec nieco') == 'Chyby v procesoch: žiadne'
+    assert len(api_calls) == 1 and len(handled) == 3
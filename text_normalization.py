@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADSUN Text Normalization
+Odstránenie diakritiky a jednoduchý slovenský stemmer pre vyhľadávanie
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List
+
+# Koncovky bez diakritiky zoradené od najdlhšej - odstráni sa prvá zhoda
+SLOVAK_SUFFIXES = sorted([
+    'ovanie', 'ovania', 'ovaniu', 'ovanim', 'ovat', 'ovali', 'oval',
+    'anie', 'ania', 'aniu', 'enie', 'enia', 'eniu', 'ostami', 'ostiach',
+    'ovia', 'iach', 'ami', 'ach', 'ych', 'ymi', 'eho', 'emu', 'iek', 'ost',
+    'ov', 'om', 'mi', 'ou', 'ej', 'ym', 'ie', 'ia', 'iu', 'ii', 'ok', 'ek',
+    'a', 'e', 'i', 'o', 'u', 'y'
+], key=len, reverse=True)
+
+MIN_STEM_LENGTH = 3
+VOWELS = set('aeiouy')
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def fold_text(text: str) -> str:
+    """NFKD + odstránenie diakritiky + malé písmená ("Objednávky" -> "objednavky")"""
+    if not text:
+        return ''
+    normalized = unicodedata.normalize('NFKD', str(text))
+    return ''.join(ch for ch in normalized if not unicodedata.combining(ch)).lower()
+
+
+@lru_cache(maxsize=8192)
+def stem_word(word: str) -> str:
+    """Odstráni pádovú/slovesnú koncovku zo zloženého (folded) slova.
+
+    Ľahký stemmer - cieľom je aby "objednavky", "objednavok" aj
+    "objednavka" skončili na rovnakom kmeni, nie lingvistická presnosť.
+    """
+    if len(word) <= MIN_STEM_LENGTH or word.isdigit():
+        return word
+    stem = word
+    for suffix in SLOVAK_SUFFIXES:
+        if stem.endswith(suffix) and len(stem) - len(suffix) >= MIN_STEM_LENGTH:
+            stem = stem[:-len(suffix)]
+            break
+    # Vkladné k/c: objednavk -> objednav, zakaznic -> zakaznik
+    if len(stem) > MIN_STEM_LENGTH and stem.endswith('k') and stem[-2] not in VOWELS:
+        stem = stem[:-1]
+    elif stem.endswith('c') and len(stem) > MIN_STEM_LENGTH:
+        stem = stem[:-1] + 'k'
+    return stem
+
+
+def tokenize(text: str) -> List[str]:
+    """Rozdelí text na slová bez diakritiky"""
+    return _WORD_RE.findall(fold_text(text))
+
+
+def fold_stem_text(text: str) -> str:
+    """Text bez diakritiky so stemovanými slovami (pre fulltextový index)"""
+    return ' '.join(stem_word(word) for word in tokenize(text))
+
+
+def normalize_query(query: str) -> List[str]:
+    """Otázka -> zoznam kmeňov bez diakritiky (rovnaká normalizácia ako index)"""
+    return [stem_word(word) for word in tokenize(query)]
+
+
+def _sql_safe(func):
+    """NULL ostane NULL, ostatné hodnoty sa prevedú na text"""
+    def wrapper(value):
+        return None if value is None else func(str(value))
+    return wrapper
+
+
+def register_sql_functions(conn):
+    """Zaregistruje fold() a fold_stem() ako deterministické SQL funkcie.
+
+    Pool ich registruje na každom pripojení pre dotazy (LIKE bez diakritiky).
+    Triggery ich nesmú volať - iné pripojenia (sqlite3 CLI, skripty) ich nemajú.
+    """
+    conn.create_function('fold', 1, _sql_safe(fold_text), deterministic=True)
+    conn.create_function('fold_stem', 1, _sql_safe(fold_stem_text), deterministic=True)
@@ -370,33 +370,7 @@ def render_assistant_mode():
     with chat_container:
         # Zobrazenie chat histórie
         for msg in st.session_state.chat_history:
-            if msg['type'] == 'user':
-                # Používateľská správa - napravo, modré pozadie
-                st.markdown(f"""
-                <div style="display: flex; justify-content: flex-end; margin: 10px 0;">
-                    <div style="background-color: #007bff; color: white; padding: 12px 16px; border-radius: 18px 18px 4px 18px; max-width: 70%; word-wrap: break-word;">
-                        <strong>👤 Vy:</strong><br>
-                        {msg['content']}
-                        <div style="font-size: 0.7em; opacity: 0.8; margin-top: 5px;">
-                            {msg['timestamp'].strftime('%H:%M')}
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-            else:  # AI správa
-                # AI správa - naľavo, sivé pozadie
-                st.markdown(f"""
-                <div style="display: flex; justify-content: flex-start; margin: 10px 0;">
-                    <div style="background-color: #f1f3f4; color: #333; padding: 12px 16px; border-radius: 18px 18px 18px 4px; max-width: 85%; word-wrap: break-word;">
-                        <strong>🤖 AI Assistant:</strong><br>
-                        {msg['content']}
-                        <div style="font-size: 0.7em; opacity: 0.6; margin-top: 5px;">
-                            {msg['timestamp'].strftime('%H:%M')}
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+            st.markdown(_chat_bubble_html(msg), unsafe_allow_html=True)
     
     # Separator
     st.markdown("---")
@@ -441,26 +415,9 @@ def render_assistant_mode():
         for i, question in enumerate(quick_questions):
             with cols[i % 3]:
                 if st.button(question, key=f"quick_chat_{i}", use_container_width=True):
-                    # Pridaj otázku ako používateľskú správu
-                    user_msg = {
-                        'type': 'user',
-                        'content': question,
-                        'timestamp': datetime.now()
-                    }
-                    st.session_state.chat_history.append(user_msg)
-                    
-                    # Získaj odpoveď od AI
-                    with st.spinner("🤖 AI premýšľa..."):
-                        ai_response = st.session_state.knowledge_assistant.answer_query(question)
-                        ai_response = clean_ai_response(ai_response)  # Očisti od HTML
-                    
-                    # Pridaj AI odpoveď
-                    ai_msg = {
-                        'type': 'ai',
-                        'content': ai_response,
-                        'timestamp': datetime.now()
-                    }
-                    st.session_state.chat_history.append(ai_msg)
+                    # Otázka a streamovaná odpoveď sa zobrazia pod históriou
+                    with chat_container:
+                        _stream_chat_answer(question)
                     
                     # Skry rýchle otázky a refresh
                     st.session_state.show_quick_questions = False
@@ -471,32 +428,9 @@ def render_assistant_mode():
         # Resetuj enter_pressed flag
         st.session_state.enter_pressed = False
         
-        # Pridaj používateľskú správu
-        user_msg = {
-            'type': 'user',
-            'content': user_input.strip(),
-            'timestamp': datetime.now()
-        }
-        st.session_state.chat_history.append(user_msg)
-        
-        # Získaj odpoveď od AI
-        with st.spinner("🤖 AI pripravuje odpoveď..."):
-            try:
-                ai_response = st.session_state.knowledge_assistant.answer_query(user_input.strip())
-                ai_response = clean_ai_response(ai_response)  # Očisti od HTML
-            except Exception as e:
-                ai_response = f"❌ **Chyba:** {e}\n\n💡 **Skúste:** Napísať otázku inak alebo použiť 'Učenie procesov'"
-        
-        # Pridaj AI odpoveď
-        ai_msg = {
-            'type': 'ai', 
-            'content': ai_response,
-            'timestamp': datetime.now()
-        }
-        st.session_state.chat_history.append(ai_msg)
-        
-        # Refresh stránku (input sa vyčistí automaticky)
-        st.rerun()
+        # Otázka a odpoveď sa dopíšu pod históriu bez prekreslenia stránky
+        with chat_container:
+            _stream_chat_answer(user_input.strip())
     
     # Vyčistenie chatu
     if clear_button:
@@ -542,6 +476,59 @@ def render_assistant_mode():
                     mime="text/markdown"
                 ) 
 
+def _chat_bubble_html(msg: Dict) -> str:
+    """HTML bublina chat správy (používateľ napravo, AI naľavo)"""
+    if msg['type'] == 'user':
+        # Používateľská správa - napravo, modré pozadie
+        return f"""
+                <div style="display: flex; justify-content: flex-end; margin: 10px 0;">
+                    <div style="background-color: #007bff; color: white; padding: 12px 16px; border-radius: 18px 18px 4px 18px; max-width: 70%; word-wrap: break-word;">
+                        <strong>👤 Vy:</strong><br>
+                        {msg['content']}
+                        <div style="font-size: 0.7em; opacity: 0.8; margin-top: 5px;">
+                            {msg['timestamp'].strftime('%H:%M')}
+                        </div>
+                    </div>
+                </div>
+                """
+    
+    # AI správa - naľavo, sivé pozadie
+    return f"""
+                <div style="display: flex; justify-content: flex-start; margin: 10px 0;">
+                    <div style="background-color: #f1f3f4; color: #333; padding: 12px 16px; border-radius: 18px 18px 18px 4px; max-width: 85%; word-wrap: break-word;">
+                        <strong>🤖 AI Assistant:</strong><br>
+                        {msg['content']}
+                        <div style="font-size: 0.7em; opacity: 0.6; margin-top: 5px;">
+                            {msg['timestamp'].strftime('%H:%M')}
+                        </div>
+                    </div>
+                </div>
+                """
+
+def _stream_chat_answer(question: str):
+    """Zobrazí otázku a odpoveď asistenta priebežne ako prichádzajú tokeny, potom ich uloží do histórie"""
+    user_msg = {'type': 'user', 'content': question, 'timestamp': datetime.now()}
+    st.session_state.chat_history.append(user_msg)
+    st.markdown(_chat_bubble_html(user_msg), unsafe_allow_html=True)
+    
+    ai_msg = {'type': 'ai', 'content': "🤖 AI pripravuje odpoveď...", 'timestamp': datetime.now()}
+    placeholder = st.empty()
+    placeholder.markdown(_chat_bubble_html(ai_msg), unsafe_allow_html=True)
+    
+    response = ""
+    try:
+        for chunk in st.session_state.knowledge_assistant.answer_query_stream(question):
+            response += chunk
+            ai_msg['content'] = clean_ai_response(response)  # Očisti od HTML
+            placeholder.markdown(_chat_bubble_html(ai_msg), unsafe_allow_html=True)
+    except Exception as e:
+        response += f"\n\n❌ **Chyba:** {e}\n\n💡 **Skúste:** Napísať otázku inak alebo použiť 'Učenie procesov'"
+    
+    ai_msg['content'] = clean_ai_response(response)
+    ai_msg['timestamp'] = datetime.now()
+    placeholder.markdown(_chat_bubble_html(ai_msg), unsafe_allow_html=True)
+    st.session_state.chat_history.append(ai_msg)
+
 def clean_ai_response(response: str) -> str:
     """Očistí AI odpoveď od HTML tagov"""
     if not response: